@@ -14,6 +14,7 @@ from app.schemas.responses.upload import UploadDataResponse
 from app.services import ApiKeyDep
 from app.services.apple.apple_xml.presigned_url_service import presigned_url_service
 from app.services.apple.apple_xml.sns_service import sns_service
+from app.services.apple.apple_xml.upload_spool import discard_upload, spool_upload
 
 router = APIRouter()
 
@@ -34,11 +35,19 @@ def import_xml_file(
     file: UploadFile,
     _api_key: ApiKeyDep,
 ) -> dict[str, str]:
-    """Import XML file into the database."""
-    file_contents = file.file.read()
+    """Import an Apple Health export (``export.xml`` or the ``export.zip`` archive) into the database.
+
+    The upload is spooled to disk in chunks and only its path is enqueued, so API
+    memory stays flat regardless of export size.
+    """
     filename = file.filename or "upload.xml"
+    file_path = spool_upload(file.file, filename)
 
-    task = process_xml_upload.delay(file_contents=file_contents, filename=filename, user_id=user_id)
+    try:
+        task = process_xml_upload.delay(file_path=str(file_path), filename=filename, user_id=user_id)
+    except Exception:
+        discard_upload(file_path)
+        raise
 
     return {
         "status": "processing",
@@ -29,6 +29,7 @@ from app.schemas.webhooks.endpoints import (
 )
 from app.schemas.webhooks.event_types import EVENT_TYPE_DESCRIPTIONS, EVENT_TYPE_GROUPS, WebhookEventType
 from app.services import DeveloperDep
+from app.services.outgoing_webhooks import app_registry
 from app.services.outgoing_webhooks import svix as svix_service
 
 router = APIRouter()
@@ -41,6 +42,7 @@ def _ep_to_response(ep: EndpointOut) -> EndpointResponse:
         description=ep.description,
         filter_types=ep.filter_types,
         user_id=svix_service.user_id_from_endpoint(ep),
+        payload_mode=svix_service.payload_mode_from_endpoint(ep),
     )
 
 
@@ -65,7 +67,10 @@ def create_endpoint(body: EndpointCreateRequest, app_id: SvixAppId) -> EndpointR
         description=body.description,
         filter_types=body.filter_types,
         user_id=body.user_id,
+        payload_mode=body.payload_mode,
     )
+    # The registry records which payload modes each app's endpoints use.
+    app_registry.invalidate()
     return _ep_to_response(ep)
 
 
@@ -92,13 +97,17 @@ def update_endpoint(endpoint_id: str, body: EndpointUpdateRequest, app_id: SvixA
         filter_types=body.filter_types,
         user_id=body.user_id,
         clear_user_id=clear_user,
+        payload_mode=body.payload_mode,
     )
+    if body.payload_mode is not None:
+        app_registry.invalidate()
     return _ep_to_response(ep)
 
 
 @router.delete("/endpoints/{endpoint_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_endpoint(endpoint_id: str, app_id: SvixAppId) -> None:
     svix_service.delete_endpoint(app_id, endpoint_id)
+    app_registry.invalidate()
 
 
 @router.get("/endpoints/{endpoint_id}/secret")
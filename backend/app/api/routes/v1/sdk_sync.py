@@ -1,4 +1,5 @@
 import json
+import time
 import uuid
 from logging import getLogger
 
@@ -7,7 +8,9 @@ from fastapi import APIRouter, HTTPException, status
 from app.integrations.celery.tasks.process_sdk_upload_task import process_sdk_upload
 from app.schemas.providers.mobile_sdk import SyncRequest
 from app.schemas.responses.upload import UploadDataResponse
+from app.services.payload_dedup import claim_payload, payload_digest, release_payload
 from app.services.raw_payload_storage import store_raw_payload
+from app.services.sdk_admission import check_admission, mark_enqueued
 from app.utils.api_utils import inline_schema_defs
 from app.utils.auth import SDKAuthDep
 from app.utils.structured_logging import log_structured
@@ -57,7 +60,9 @@ def sync_sdk_data(
         UploadDataResponse with 202 status and task queued message
 
     Raises:
-        HTTPException: 403 if token doesn't match user_id, 400 if provider unsupported.
+        HTTPException: 403 if token doesn't match user_id, 400 if provider unsupported,
+        429 with ``Retry-After`` when the sdk_sync queue is saturated (the SDK should
+        resend the same batch after that many seconds).
         Payload validation runs async in the worker, not here.
     """
     if auth.auth_type == "sdk_token" and (not auth.user_id or str(auth.user_id) != user_id):
@@ -107,6 +112,48 @@ def sync_sdk_data(
 
     content_str = json.dumps(body)
 
+    # Phone retries and raw payload replays resend byte-identical batches. Ack them
+    # without enqueueing so identical rows aren't re-upserted and re-emitted.
+    digest = payload_digest(content_str)
+    if not claim_payload(f"sdk:{user_id}", digest, batch_id, metric="sdk"):
+        log_structured(
+            logger,
+            "info",
+            f"{provider.capitalize()} sync batch skipped as duplicate",
+            action=f"{provider}_sdk_batch_duplicate",
+            batch_id=batch_id,
+            user_id=user_id,
+            provider=provider,
+            payload_digest=digest,
+        )
+        return UploadDataResponse(status_code=202, response="Duplicate batch already queued", user_id=user_id)
+
+    admission = check_admission(user_id)
+    if not admission.admitted:
+        # Forget the claim so the SDK's retry of this very batch is accepted later.
+        release_payload(f"sdk:{user_id}", digest, batch_id)
+        log_structured(
+            logger,
+            "warning",
+            f"{provider.capitalize()} sync batch rejected by admission control",
+            action=f"{provider}_sdk_batch_throttled",
+            batch_id=batch_id,
+            user_id=user_id,
+            provider=provider,
+            reason=admission.reason,
+            queue_depth=admission.queue_depth,
+            retry_after_seconds=admission.retry_after_seconds,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail={
+                "message": "Sync queue is saturated, retry the same batch later",
+                "reason": admission.reason,
+                "retry_after_seconds": admission.retry_after_seconds,
+            },
+            headers={"Retry-After": str(admission.retry_after_seconds)},
+        )
+
     store_raw_payload(
         source="sdk",
         provider=provider,
@@ -115,12 +162,20 @@ def sync_sdk_data(
         trace_id=batch_id,
     )
 
-    process_sdk_upload.delay(
-        content=content_str,
-        content_type="application/json",
-        user_id=user_id,
-        provider=provider,
-        batch_id=batch_id,
-    )
+    try:
+        process_sdk_upload.delay(
+            content=content_str,
+            content_type="application/json",
+            user_id=user_id,
+            provider=provider,
+            batch_id=batch_id,
+            payload_digest=digest,
+            enqueued_at=time.time(),
+        )
+    except Exception:
+        # Not enqueued — let the client's retry through instead of acking it as a duplicate.
+        release_payload(f"sdk:{user_id}", digest, batch_id)
+        raise
+    mark_enqueued(user_id)
 
     return UploadDataResponse(status_code=202, response="Import task queued successfully", user_id=user_id)
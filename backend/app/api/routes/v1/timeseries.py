@@ -1,7 +1,8 @@
+from datetime import timedelta
 from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query, status
 
 from app.database import DbSession
 from app.schemas.enums import SeriesType
@@ -9,6 +10,7 @@ from app.schemas.model_crud.activities import TimeSeriesQueryParams
 from app.schemas.responses.activity import TimeSeriesSample
 from app.schemas.utils import PaginatedResponse
 from app.services import ApiKeyDep, timeseries_service
+from app.services.outgoing_webhooks import payload_modes
 from app.utils.dates import DateTimeQueryParam, parse_query_datetime
 
 router = APIRouter()
@@ -34,3 +36,30 @@ def get_timeseries(
         cursor=cursor,
     )
     return timeseries_service.get_timeseries(db, user_id, types, params)
+
+
+@router.get("/users/{user_id}/timeseries/fetch")
+def fetch_webhook_timeseries(
+    user_id: UUID,
+    token: str,
+    db: DbSession,
+    cursor: str | None = None,
+    limit: Annotated[int, Query(ge=1, le=100)] = 50,
+) -> PaginatedResponse[TimeSeriesSample]:
+    """Returns the samples announced by a reference-mode timeseries webhook.
+
+    Authorized by the signed ``fetch_url`` of the webhook payload instead of an API key.
+    """
+    claims = payload_modes.verify_fetch_token(token, user_id)
+    if claims is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired fetch token")
+    params = TimeSeriesQueryParams(
+        start_datetime=parse_query_datetime(claims["start_time"]),
+        # The webhook's end_time is its last sample; the query end bound is exclusive.
+        end_datetime=parse_query_datetime(claims["end_time"]) + timedelta(microseconds=1),
+        # Tokens issued before the claim existed are not bound to a provider.
+        provider=claims.get("provider"),
+        limit=limit,
+        cursor=cursor,
+    )
+    return timeseries_service.get_timeseries(db, user_id, [SeriesType(claims["series_type"])], params)
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import tempfile
 import warnings
 from datetime import timedelta
 from functools import lru_cache
@@ -22,6 +23,9 @@ from app.utils.config_utils import (
     parse_duration,
 )
 
+# Per-host default for xml_upload_dir; only usable when the API and workers share a host.
+DEFAULT_XML_UPLOAD_DIR = Path(tempfile.gettempdir()) / "xml-uploads"
+
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
@@ -96,6 +100,10 @@ class Settings(BaseSettings):
 
     # SYNC SETTINGS
     sync_interval_seconds: int = 3600  # Default: 1 hour (3600 seconds)
+    # Beat tick of the periodic sync: each user is synced once per sync_interval_seconds at a stable
+    # slot (hash of the user ID), and every tick enqueues the users whose slot just passed. 0 syncs
+    # every user at once each interval.
+    sync_spread_tick_seconds: int = 60
     sleep_sync_interval_seconds: int = 3600  # Default: 1 hour (3600 seconds)
     # Re-fetch a trailing window on each *live* pull sync so late provider revisions
     # (e.g. Oura finalising a day's step count after we already moved past it) are
@@ -236,13 +244,103 @@ class Settings(BaseSettings):
     aws_sns_topic_arn: SecretStr | None = None
 
     xml_chunk_size: int = 50_000
+    xml_parser: str = "lxml"  # lxml | stdlib (reference xml.etree parser, same output)
+    # Chunks the parser thread may run ahead of the database writer during an import
+    # (0 = parse and write serially). Each buffered chunk holds up to xml_chunk_size records.
+    xml_pipeline_depth: int = 1
+    # Sharded imports: split exports of at least xml_shard_min_bytes (uncompressed) into
+    # byte ranges of ~xml_shard_target_bytes imported by parallel workers. Requires
+    # s3 upload storage or an xml_upload_dir shared by every worker.
+    xml_sharded_import: bool = False
+    xml_shard_min_bytes: int = 512 * 1024 * 1024  # 512 MB
+    xml_shard_target_bytes: int = 128 * 1024 * 1024  # 128 MB
+    xml_max_shards: int = 32
+    # Resumable imports: checkpoint the byte offset (and parse stats) in Redis every
+    # ~xml_checkpoint_bytes of uncompressed export, so a retried or redelivered import
+    # continues from there instead of byte 0 (0 = no checkpoints).
+    xml_checkpoint_bytes: int = 64 * 1024 * 1024  # 64 MB
+    xml_checkpoint_ttl_seconds: int = 24 * 3600
+    # A running import holds a Redis lease renewed every third of this; a redelivery of the
+    # same import exits while the lease is alive instead of importing concurrently.
+    xml_import_lease_seconds: int = 60
+    # Where the direct-upload route spools Apple Health exports: local | s3 | auto
+    # (auto = s3 when aws_bucket_name is set). s3 needs no disk shared between the API and
+    # workers; local requires xml_upload_dir to be shared by both.
+    xml_upload_storage: str = "auto"
+    xml_upload_s3_prefix: str = "xml-uploads"
+    # Local spool directory (docker-compose mounts a shared volume here); with s3 storage
+    # workers only keep their temporary download of the export here.
+    xml_upload_dir: Path = DEFAULT_XML_UPLOAD_DIR
 
     # RAW PAYLOAD STORAGE
-    raw_payload_storage: str = "disabled"  # disabled | log | s3
+    raw_payload_storage: str = "disabled"  # disabled | log | s3 | local
     raw_payload_max_size_bytes: int = 10 * 1024 * 1024  # 10 MB
     raw_payload_s3_bucket: str | None = None  # defaults to aws_bucket_name if not set
     raw_payload_s3_prefix: str = "raw-payloads"
     raw_payload_s3_endpoint_url: str | None = None  # for S3-compatible storage (e.g. Railway Object Storage)
+    # s3 mode uploads one gzip NDJSON object per provider/source/minute; a batch is cut early at this size
+    raw_payload_batch_max_bytes: int = 8 * 1024 * 1024  # 8 MB uncompressed
+    # Payloads waiting for the archive writer; beyond this they are dropped instead of slowing ingestion
+    raw_payload_queue_size: int = 10_000
+    # local mode appends to gzip NDJSON segment files here, rotated at whichever limit is hit first
+    raw_payload_local_dir: str = "raw-payloads"
+    raw_payload_segment_max_bytes: int = 64 * 1024 * 1024  # 64 MB uncompressed
+    raw_payload_segment_max_seconds: int = 3600
+
+    # PAYLOAD DEDUPLICATION
+    # Identical SDK batches / webhook pushes seen within this window are acknowledged
+    # without being enqueued again (phone retries, raw payload replays). 0 disables.
+    payload_dedup_ttl_seconds: int = 24 * 3600  # 24 hours
+    # Incoming webhooks: a delivery (raw body digest) or enqueued payload
+    # already seen within this window is acknowledged before any DB work. 0 disables.
+    webhook_dedup_ttl_seconds: int = 24 * 3600
+
+    # INCOMING WEBHOOK FAST-ACK
+    # Provider webhooks are acknowledged once the signature is verified and the raw body is
+    # in the Redis claim-check store; parsing and dispatch run on the webhook_sync queue.
+    # When off (or Redis is unavailable) handlers parse and dispatch inside the request.
+    webhook_fast_ack_enabled: bool = True
+    webhook_body_ttl_seconds: int = 24 * 3600  # how long a stored body waits for a worker
+    # Notify-only webhooks (Oura, Strava, Whoop) for the same user within this window are
+    # merged into one pull per changed object instead of one pull per notification. 0 disables.
+    webhook_coalesce_window_seconds: int = 30
+
+    # SDK SYNC ADMISSION CONTROL
+    # /sdk/users/{user_id}/sync answers 429 + Retry-After instead of enqueueing once the
+    # sdk_sync queue is saturated. Past the soft limit only users with more than
+    # sdk_sync_max_queued_per_user batches waiting are rejected; past the hard limit
+    # (or when workers lag more than sdk_sync_max_lag_seconds) everyone is.
+    sdk_admission_enabled: bool = True
+    sdk_sync_queue_soft_limit: int = 2_000
+    sdk_sync_queue_hard_limit: int = 10_000
+    sdk_sync_max_lag_seconds: int = 900  # 15 minutes
+    sdk_sync_max_queued_per_user: int = 10
+    sdk_sync_retry_after_seconds: int = 30
+    sdk_sync_retry_after_max_seconds: int = 600
+
+    # PROVIDER HTTP CLIENTS
+    # Provider API calls reuse one keep-alive httpx client per provider in each worker
+    # process; these bound its connection pool.
+    provider_http_max_connections: int = 20
+    provider_http_max_keepalive_connections: int = 10
+    provider_http_keepalive_expiry_seconds: float = 30.0
+    provider_http_timeout_seconds: float = 30.0
+    # Independent provider endpoints fetched in parallel during one user's sync (1 = one by one)
+    provider_fetch_concurrency: int = 4
+    # Shared (Redis) token buckets per provider app, so all workers stay within vendor rate limits.
+    provider_rate_limit_enabled: bool = True
+    # Waits up to this long inline for the budget; anything longer (and any 429) reschedules the sync.
+    provider_rate_limit_max_wait_seconds: float = 2.0
+    # A sync still rate limited after this many reschedules is marked failed.
+    provider_rate_limit_max_reschedules: int = 5
+    # Valid access tokens are reused in-process for this long instead of a connection lookup per request (0 = off).
+    provider_token_cache_ttl_seconds: int = 60
+    # OAuth refreshes are single-flight per connection: one caller refreshes, the others wait for it.
+    oauth_refresh_lock_ttl_seconds: int = 60
+    oauth_refresh_wait_seconds: float = 20.0
+    # Background renewal of access tokens expiring within this window (0 disables the beat task).
+    oauth_proactive_refresh_minutes: int = 30
+    oauth_proactive_refresh_interval_seconds: int = 600  # 10 minutes
 
     # SVIX WEBHOOK SETTINGS
     # Master switch for outgoing webhooks. Off by default so deployments without Svix
@@ -253,6 +351,18 @@ class Settings(BaseSettings):
     svix_jwt_secret: SecretStr | None = None
     # Bearer token for the Svix API.  If unset, auto-generated from svix_jwt_secret at startup.
     svix_auth_token: SecretStr | None = None
+    # How long the resolved developer -> Svix application list is cached (developer changes invalidate it).
+    svix_app_registry_ttl_seconds: int = 3600
+    # Concurrent Svix calls when one task delivers a batch of events (emit_webhook_events).
+    outgoing_webhook_send_concurrency: int = 8
+    # Lifetime of the signed fetch URLs in reference-mode timeseries webhooks (Svix retries for up to ~3 days).
+    outgoing_webhook_fetch_url_ttl_seconds: int = 7 * 24 * 3600
+    # Transactional outbox: events written with the data, drained by the drain_webhook_outbox beat task.
+    webhook_outbox_drain_interval_seconds: float = 5.0
+    webhook_outbox_batch_size: int = 200  # outbox rows claimed and delivered per transaction
+    webhook_outbox_max_attempts: int = 10  # after this many failed deliveries a row is parked (failed_at)
+    webhook_outbox_retry_base_seconds: int = 10  # exponential backoff base, capped at one hour
+    webhook_outbox_parked_retention_days: int = 14  # parked rows are deleted after this long
 
     @model_validator(mode="after")
     def derive_access_log_level(self) -> "Settings":
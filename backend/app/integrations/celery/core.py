@@ -11,11 +11,14 @@ from celery.schedules import crontab
 from app.config import settings
 from app.services import raw_payload_storage
 
-_WEBHOOK_TASK = "emit_webhook_event_task.emit_webhook_event"
+_WEBHOOK_TASKS = (
+    "emit_webhook_event_task.emit_webhook_event",
+    "drain_webhook_outbox_task.drain_webhook_outbox",
+)
 
 
 class _WebhookTraceFilter(logging.Filter):
-    """Drop celery.app.trace success/retry records for the webhook emit task.
+    """Drop celery.app.trace success/retry records for the webhook emit and outbox drain tasks.
 
     Failures (ERROR and above) are always passed through.
     """
@@ -24,7 +27,7 @@ class _WebhookTraceFilter(logging.Filter):
         if record.levelno >= logging.ERROR:
             return True
         msg = record.getMessage()
-        return _WEBHOOK_TASK not in msg
+        return not any(task in msg for task in _WEBHOOK_TASKS)
 
 
 @signals.setup_logging.connect
@@ -59,7 +62,7 @@ def setup_celery_logging(**kwargs) -> None:
 
     # celery.app.trace logs "Task ... succeeded in Xs: {result}" at INFO for
     # every task execution.  Suppress those lines only for the high-frequency
-    # webhook emit task to avoid log spam while keeping traces for all others.
+    # webhook tasks to avoid log spam while keeping traces for all others.
     getLogger("celery.app.trace").addFilter(_WebhookTraceFilter())
 
 
@@ -73,9 +76,23 @@ def init_raw_payload_storage(**kwargs) -> None:
         s3_prefix=settings.raw_payload_s3_prefix,
         s3_endpoint_url=settings.raw_payload_s3_endpoint_url,
         fit_files_enabled=settings.store_fit_files,
+        batch_max_bytes=settings.raw_payload_batch_max_bytes,
+        queue_size=settings.raw_payload_queue_size,
+        local_dir=settings.raw_payload_local_dir,
+        segment_max_bytes=settings.raw_payload_segment_max_bytes,
+        segment_max_seconds=settings.raw_payload_segment_max_seconds,
     )
 
 
+@signals.worker_process_shutdown.connect
+def flush_raw_payload_storage(**kwargs) -> None:
+    """Write out archived payloads still buffered when a worker process exits.
+
+    Prefork children leave through ``os._exit``, which skips ``atexit``.
+    """
+    raw_payload_storage.shutdown()
+
+
 def create_celery() -> Celery:
     celery_app = cast(Celery, current_celery_app)
     celery_app.conf.update(
@@ -94,6 +111,9 @@ def create_celery() -> Celery:
             # redis-py periodic health check: PING idle pooled connections so a dead one is
             # replaced rather than handed to the next publish/consume.
             "health_check_interval": 30,
+            # visibility_timeout stays at the 1h default so acks_late tasks lost in a worker
+            # crash are redelivered promptly. An XML import running longer is redelivered too;
+            # its import lease drops that copy while the original run is still alive.
         },
         task_serializer="json",
         accept_content=["json"],
@@ -110,9 +130,11 @@ def create_celery() -> Celery:
             "sdk_sync": {},
             "garmin_sync": {},
             "webhook_sync": {},
+            "webhook_outbox": {},
         },
         task_routes={
             "app.integrations.celery.tasks.process_sdk_upload_task.process_sdk_upload": {"queue": "sdk_sync"},
+            "app.integrations.celery.tasks.drain_webhook_outbox_task.drain_webhook_outbox": {"queue": "webhook_outbox"},
         },
     )
 
@@ -128,9 +150,9 @@ def create_celery() -> Celery:
     celery_app.conf.beat_schedule = {
         "sync-all-users-periodic": {
             "task": "app.integrations.celery.tasks.periodic_sync_task.sync_all_users",
-            "schedule": float(settings.sync_interval_seconds),
+            "schedule": float(settings.sync_spread_tick_seconds or settings.sync_interval_seconds),
             "args": (),  # No args - task calculates date range dynamically
-            "kwargs": {"user_id": None},
+            "kwargs": {"user_id": None, "spread": settings.sync_spread_tick_seconds > 0},
         },
         "finalize-stale-sleeps-periodic": {
             "task": "app.integrations.celery.tasks.finalize_stale_sleep_task.finalize_stale_sleeps",
@@ -162,6 +184,18 @@ def create_celery() -> Celery:
             "args": (),
             "kwargs": {},
         },
+        "refresh-expiring-oauth-tokens": {
+            "task": "app.integrations.celery.tasks.refresh_expiring_tokens_task.refresh_expiring_tokens",
+            "schedule": float(settings.oauth_proactive_refresh_interval_seconds),
+            "args": (),
+            "kwargs": {},
+        },
+        "drain-webhook-outbox": {
+            "task": "app.integrations.celery.tasks.drain_webhook_outbox_task.drain_webhook_outbox",
+            "schedule": settings.webhook_outbox_drain_interval_seconds,
+            "args": (),
+            "kwargs": {},
+        },
         "renew-oura-webhooks-monthly": {
             "task": "app.integrations.celery.tasks.renew_oura_webhooks_task.renew_oura_webhooks",
             "schedule": crontab(day_of_month=1, hour=0, minute=0),  # 1st of each month at 00:00 UTC
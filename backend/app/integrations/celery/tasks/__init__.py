@@ -18,7 +18,8 @@ from app.services.providers.garmin.backfill_state import (
 )
 
 from .archival_task import run_daily_archival
-from .emit_webhook_event_task import emit_webhook_event
+from .drain_webhook_outbox_task import drain_webhook_outbox
+from .emit_webhook_event_task import emit_webhook_event, emit_webhook_events
 from .fill_missing_resilience_scores_task import fill_missing_resilience_scores
 from .fill_missing_sleep_scores_task import fill_missing_sleep_scores
 from .finalize_stale_sleep_task import finalize_stale_sleeps
@@ -40,12 +41,13 @@ from .process_aws_upload_task import process_aws_upload
 from .process_sdk_upload_task import process_sdk_upload
 from .process_xml_upload_task import process_xml_upload
 from .refresh_dashboard_stats_task import refresh_dashboard_total_data_points
+from .refresh_expiring_tokens_task import refresh_expiring_tokens
 from .register_provider_webhooks_task import register_provider_webhooks
 from .renew_oura_webhooks_task import renew_oura_webhooks
 from .seed_data_task import generate_seed_data
 from .send_email_task import send_invitation_email_task
 from .sync_vendor_data_task import sync_vendor_data
-from .webhook_push_task import process_webhook_push
+from .webhook_push_task import flush_coalesced_webhooks, process_webhook_body, process_webhook_push
 
 __all__ = [
     # Garmin backfill (30-day webhook-based sync)
@@ -76,9 +78,14 @@ __all__ = [
     "refresh_dashboard_total_data_points",
     "generate_seed_data",
     "send_invitation_email_task",
+    "flush_coalesced_webhooks",
+    "process_webhook_body",
     "process_webhook_push",
     "register_provider_webhooks",
     "renew_oura_webhooks",
+    "refresh_expiring_tokens",
     # Outgoing webhooks
     "emit_webhook_event",
+    "emit_webhook_events",
+    "drain_webhook_outbox",
 ]
@@ -0,0 +1,157 @@
+"""Celery task delivering the outgoing webhook outbox.
+
+Ingestion writes its webhook events to the ``webhook_outbox`` table in the
+same transaction as the data (see ``events.batched_webhooks``).  This task
+claims the oldest rows in ``id`` order, delivers them to Svix in batches and
+deletes them once every message was accepted, so an event is announced at
+least once for every commit — even if the process dies right after it.
+Svix deduplicates redeliveries by the idempotency key stored in the event.
+
+Rows whose delivery failed are retried with exponential backoff and parked
+(``failed_at``) after ``webhook_outbox_max_attempts``; later rows are not
+held back by them.  Parked rows are deleted after
+``webhook_outbox_parked_retention_days``.
+
+Redis keys:
+
+  webhook_outbox:drain_lock
+      Random owner token, SET NX for the duration of one run, so a single
+      drainer delivers the outbox in order.  Without Redis, concurrent runs
+      still never claim the same rows (``FOR UPDATE SKIP LOCKED``).
+
+  webhook_outbox:purged
+      SET NX for ``_PURGE_INTERVAL_SECONDS`` when a run deletes expired parked
+      rows, so the sweep runs about once an hour rather than on every tick.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+from logging import getLogger
+from uuid import uuid4
+
+from celery import shared_task
+
+from app.config import settings
+from app.database import SessionLocal
+from app.integrations.celery.tasks.emit_webhook_event_task import deliver_events
+from app.integrations.redis_client import get_redis_client
+from app.repositories.webhook_outbox_repository import WebhookOutboxRepository
+from app.services.outgoing_webhooks import svix as svix_service
+from app.utils.structured_logging import log_structured
+
+logger = getLogger(__name__)
+
+_LOCK_KEY = "webhook_outbox:drain_lock"
+# A run stops claiming new batches after this long and leaves the rest to the next beat tick.
+_MAX_RUN_SECONDS = 60
+_LOCK_TTL_SECONDS = 2 * _MAX_RUN_SECONDS
+_PURGE_KEY = "webhook_outbox:purged"
+_PURGE_INTERVAL_SECONDS = 3600
+
+_RELEASE_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+_outbox = WebhookOutboxRepository()
+
+
+def _try_lock(owner: str) -> bool:
+    try:
+        return bool(get_redis_client().set(_LOCK_KEY, owner, nx=True, ex=_LOCK_TTL_SECONDS))
+    except Exception as exc:
+        logger.warning("Webhook outbox drain lock unavailable, draining without it: %s", exc)
+        return True
+
+
+def _release(owner: str) -> None:
+    try:
+        get_redis_client().eval(_RELEASE_LUA, 1, _LOCK_KEY, owner)
+    except Exception as exc:
+        logger.warning("Failed to release webhook outbox drain lock: %s", exc)
+
+
+def _purge_due() -> bool:
+    try:
+        return bool(get_redis_client().set(_PURGE_KEY, "1", nx=True, ex=_PURGE_INTERVAL_SECONDS))
+    except Exception as exc:
+        logger.warning("Webhook outbox purge marker unavailable, purging: %s", exc)
+        return True
+
+
+@shared_task
+def drain_webhook_outbox() -> dict:
+    """Deliver pending outbox rows, oldest first, until the outbox is empty or the run budget is spent."""
+    result = {"delivered": 0, "retried": 0, "parked": 0, "purged": 0}
+    if not svix_service.is_enabled():
+        return result
+
+    owner = uuid4().hex
+    if not _try_lock(owner):
+        return result
+
+    deadline = time.monotonic() + _MAX_RUN_SECONDS
+    batch_size = max(1, settings.webhook_outbox_batch_size)
+    try:
+        with SessionLocal() as db:
+            while True:
+                rows = _outbox.claim(db, batch_size)
+                if not rows:
+                    break
+                try:
+                    _, failed, errors = deliver_events([row.event for row in rows])
+                    error = f"Delivery failed for app(s) {errors}" if failed else ""
+                except Exception as exc:
+                    failed, error = list(range(len(rows))), str(exc)
+
+                failed_rows = [rows[index] for index in failed]
+                failed_ids = {row.id for row in failed_rows}
+                _outbox.delete(db, [row.id for row in rows if row.id not in failed_ids])
+                parked = _outbox.reschedule(
+                    db,
+                    failed_rows,
+                    error,
+                    max_attempts=settings.webhook_outbox_max_attempts,
+                    base_delay_seconds=settings.webhook_outbox_retry_base_seconds,
+                )
+                db.commit()
+
+                result["delivered"] += len(rows) - len(failed_rows)
+                result["retried"] += len(failed_rows) - len(parked)
+                result["parked"] += len(parked)
+                for row in parked:
+                    log_structured(
+                        logger,
+                        "error",
+                        "Outgoing webhook event parked after exhausting delivery attempts",
+                        task="drain_webhook_outbox",
+                        outbox_id=row.id,
+                        event_types=row.event.get("event_types"),
+                        attempts=row.attempts,
+                        error=row.last_error,
+                    )
+                if len(rows) < batch_size or time.monotonic() >= deadline:
+                    break
+
+            if _purge_due():
+                retention = timedelta(days=settings.webhook_outbox_parked_retention_days)
+                result["purged"] = _outbox.purge_parked(db, datetime.now(timezone.utc) - retention)
+                db.commit()
+    finally:
+        _release(owner)
+
+    if any(result.values()):
+        log_structured(
+            logger,
+            "info",
+            "Webhook outbox drained",
+            action="drain_webhook_outbox_complete",
+            delivered=result["delivered"],
+            retried=result["retried"],
+            parked=result["parked"],
+            purged=result["purged"],
+        )
+    return result
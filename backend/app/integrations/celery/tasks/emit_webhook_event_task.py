@@ -1,4 +1,4 @@
-"""Celery task that emits outgoing webhook events via Svix.
+"""Celery tasks that emit outgoing webhook events via Svix.
 
 Called asynchronously after data is saved to the database so the
 request / ingestion path is never blocked by webhook delivery.
@@ -6,18 +6,30 @@ request / ingestion path is never blocked by webhook delivery.
 
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from logging import getLogger
 from typing import Any
 
 from celery import shared_task
 
+from app.config import settings
 from app.database import SessionLocal
-from app.services import developer_service
+from app.schemas.webhooks.endpoints import WebhookPayloadMode
+from app.services.outgoing_webhooks import app_registry, payload_modes
 from app.services.outgoing_webhooks import svix as svix_service
 
 logger = getLogger(__name__)
 
 
+def _delivery_apps() -> dict[str, list[str]]:
+    # Steady state: one Redis read, no developers scan and no application.get_or_create per event.
+    apps = app_registry.cached_apps()
+    if apps is None:
+        with SessionLocal() as db:
+            apps = app_registry.load_apps(db)
+    return apps
+
+
 @shared_task(
     name="app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_event",
     bind=True,
@@ -43,24 +55,14 @@ def emit_webhook_event(
         logger.debug("Svix is not configured — skipping webhook dispatch for event %s", event_type)
         return {"event_type": event_type, "sent": 0, "errors": []}
 
-    with SessionLocal() as db:
-        page_size = 100
-        offset = 0
-        developers = []
-        while True:
-            batch = developer_service.crud.get_all(db, filters={}, offset=offset, limit=page_size, sort_by=None)
-            developers.extend(batch)
-            if len(batch) < page_size:
-                break
-            offset += page_size
+    app_ids = list(_delivery_apps())
 
     sent = 0
     errors: list[str] = []
-    for dev in developers:
-        svix_service.ensure_application(str(dev.id), dev.email)
+    for app_id in app_ids:
         result = svix_service.send(
             event_type,
-            str(dev.id),
+            app_id,
             payload,
             channels=channels,
             idempotency_key=idempotency_key,
@@ -68,7 +70,9 @@ def emit_webhook_event(
         if result is not None:
             sent += 1
         else:
-            errors.append(str(dev.id))
+            errors.append(app_id)
+            # The application may be gone from Svix; have the retry ensure it again.
+            app_registry.forget(app_id)
 
     if errors:
         exc = RuntimeError(
@@ -83,3 +87,98 @@ def emit_webhook_event(
         raise self.retry(exc=exc)
 
     return {"event_type": event_type, "sent": sent, "errors": errors}
+
+
+def _payload_modes(event: dict[str, Any], app_modes: list[str]) -> list[WebhookPayloadMode | None]:
+    """Shapes to send *event* in: None (as is) unless it is a timeseries event."""
+    if not payload_modes.is_shapeable(event["data"]):
+        return [None]
+    return [WebhookPayloadMode.FULL, *(WebhookPayloadMode(mode) for mode in app_modes)]
+
+
+def deliver_events(events: list[dict[str, Any]]) -> tuple[int, list[int], list[str]]:
+    """Send every entry to every developer's app with concurrent Svix calls.
+
+    Timeseries entries are also sent in each compact payload mode the app's
+    endpoints use (rendered once per entry and mode).
+
+    Returns the number of accepted messages, the indexes of the entries with a
+    failed delivery and the app UIDs that failed (dropped from the registry,
+    so the retry ensures them again).
+    """
+    apps = _delivery_apps()
+    deliveries = [
+        (index, app_id, event_type, idempotency_key, mode)
+        for index, event in enumerate(events)
+        for event_type, idempotency_key in zip(event["event_types"], event["idempotency_keys"], strict=True)
+        for app_id, app_modes in apps.items()
+        for mode in _payload_modes(event, app_modes)
+    ]
+    if not deliveries:
+        return 0, [], []
+
+    rendered: dict[tuple[int, WebhookPayloadMode], dict[str, Any]] = {}
+    for index, _, _, _, mode in deliveries:
+        if mode is not None and (index, mode) not in rendered:
+            rendered[index, mode] = payload_modes.render(events[index]["data"], mode)
+
+    def deliver(delivery: tuple[int, str, str, str | None, WebhookPayloadMode | None]) -> bool:
+        index, app_id, event_type, idempotency_key, mode = delivery
+        event = events[index]
+        if mode is None:
+            data = event["data"]
+        else:
+            data = rendered[index, mode]
+            if idempotency_key is not None and mode != WebhookPayloadMode.FULL:
+                idempotency_key = f"{idempotency_key}.{mode}"
+        result = svix_service.send(
+            event_type,
+            app_id,
+            {"type": event_type, "data": data},
+            channels=event["channels"],
+            idempotency_key=idempotency_key,
+            payload_mode=mode,
+        )
+        return result is not None
+
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(settings.outgoing_webhook_send_concurrency, len(deliveries)))
+    ) as pool:
+        outcomes = list(pool.map(deliver, deliveries))
+
+    failed = [delivery for delivery, ok in zip(deliveries, outcomes, strict=True) if not ok]
+    errors = sorted({delivery[1] for delivery in failed})
+    for app_id in errors:
+        app_registry.forget(app_id)
+    return len(deliveries) - len(failed), sorted({delivery[0] for delivery in failed}), errors
+
+
+@shared_task(
+    name="app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events",
+    bind=True,
+    max_retries=2,
+    default_retry_delay=5,
+    acks_late=True,
+)
+def emit_webhook_events(self: Any, events: list[dict[str, Any]]) -> dict[str, Any]:
+    """Deliver a batch of events (see ``events.batched_webhooks``) with concurrent Svix calls.
+
+    Each entry carries ``event_types`` sharing one ``data`` payload, with an
+    idempotency key per type.  A retry re-sends only the entries that had a
+    failed delivery; Svix deduplicates the ones that already went out.
+    """
+    if not svix_service.is_enabled():
+        logger.debug("Svix is not configured — skipping webhook dispatch for %d event(s)", len(events))
+        return {"events": len(events), "sent": 0, "errors": []}
+
+    sent, failed, errors = deliver_events(events)
+    if failed:
+        logger.error(
+            "Webhook delivery failed for %d of %d event(s) in a batch; scheduling retry",
+            len(failed),
+            len(events),
+        )
+        exc = RuntimeError(f"Webhook delivery failed for {len(failed)} of {len(events)} event(s) [failed={errors}]")
+        raise self.retry(exc=exc, args=([events[index] for index in failed],))
+
+    return {"events": len(events), "sent": sent, "errors": errors}
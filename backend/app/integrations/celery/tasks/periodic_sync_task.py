@@ -1,21 +1,63 @@
+"""Periodic pull sync of every user with an active connection.
+
+Beat runs ``sync_all_users`` every ``sync_spread_tick_seconds`` with
+``spread=True``.  Each user has a stable slot within ``sync_interval_seconds``
+(a hash of the user ID), and a run only enqueues the users whose slot passed
+since the previous run, spread over the next tick with countdowns.  Every
+user is still synced once per interval, but the workers, Postgres and the
+provider rate limits see a flat stream instead of all users (and their token
+refreshes) at the top of each interval.
+
+Redis keys:
+
+  periodic_sync:cursor
+      Epoch second the previous spread run covered up to, so a late or
+      missed beat tick leaves no slot out.  Without Redis a run covers the
+      last tick only.
+"""
+
+import hashlib
+import time
 from logging import getLogger
 
 from celery import shared_task
 
+from app.config import settings
 from app.database import SessionLocal
 from app.integrations.celery.tasks.sync_vendor_data_task import sync_vendor_data
+from app.integrations.redis_client import get_redis_client
 from app.repositories.user_connection_repository import UserConnectionRepository
 from app.schemas.responses.upload import SyncAllUsersResult
 from app.utils.structured_logging import log_structured
 
 logger = getLogger(__name__)
 
+_CURSOR_KEY = "periodic_sync:cursor"
+
+
+def sync_slot(user_id: str, interval_seconds: int) -> int:
+    """Second within the sync interval at which *user_id* is due; stable across runs and processes."""
+    digest = hashlib.sha256(user_id.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % interval_seconds
+
+
+def _window_start(now: int, tick_seconds: int, interval_seconds: int) -> int:
+    """Where the previous spread run stopped (at most one interval back), else one tick ago."""
+    try:
+        previous = get_redis_client().set(_CURSOR_KEY, now, ex=2 * interval_seconds, get=True)
+    except Exception as exc:
+        logger.warning("Periodic sync cursor unavailable, covering the last tick only: %s", exc)
+        previous = None
+    start = int(previous) if previous else now - tick_seconds
+    return min(max(start, now - interval_seconds), now)
+
 
 @shared_task
 def sync_all_users(
     start_date: str | None = None,
     end_date: str | None = None,
     user_id: str | None = None,
+    spread: bool = False,
 ) -> dict:
     """
     Sync all users with active connections.
@@ -24,6 +66,8 @@ def sync_all_users(
     Args:
         start_date: ISO 8601 date string for start of sync period
         end_date: ISO 8601 date string for end of sync period
+        spread: Only enqueue the users whose slot fell since the previous run (beat schedule);
+            otherwise every user is enqueued at once
     """
     log_structured(logger, "info", "Starting sync for all users", task="sync_all_users")
 
@@ -32,16 +76,52 @@ def sync_all_users(
     with SessionLocal() as db:
         active_user_ids = user_connection_repo.get_all_active_users(db)
 
-        log_structured(
-            logger,
-            "info",
-            f"Found {len(active_user_ids)} users with active connections",
-            provider="sync_all_users",
-            task="sync_all_users",
-            active_user_ids=[str(uid) for uid in active_user_ids],
-        )
+    if spread:
+        return _sync_due_users([str(uid) for uid in active_user_ids], start_date, end_date)
+
+    log_structured(
+        logger,
+        "info",
+        f"Found {len(active_user_ids)} users with active connections",
+        provider="sync_all_users",
+        task="sync_all_users",
+        active_user_ids=[str(uid) for uid in active_user_ids],
+    )
+
+    for active_user_id in active_user_ids:
+        sync_vendor_data.delay(user_id=str(active_user_id), start_date=start_date, end_date=end_date)
+
+    return SyncAllUsersResult(users_for_sync=len(active_user_ids)).model_dump()
 
-        for active_user_id in active_user_ids:
-            sync_vendor_data.delay(user_id=str(active_user_id), start_date=start_date, end_date=end_date)
 
-        return SyncAllUsersResult(users_for_sync=len(active_user_ids)).model_dump()
+def _sync_due_users(user_ids: list[str], start_date: str | None, end_date: str | None) -> dict:
+    interval = max(settings.sync_interval_seconds, 1)
+    tick = min(max(settings.sync_spread_tick_seconds, 1), interval)
+    now = int(time.time())
+    start = _window_start(now, tick, interval)
+    span = now - start
+
+    due: list[tuple[str, int]] = []
+    for uid in user_ids:
+        # Seconds from the window start to the user's slot; the slot fell in the window when below its span.
+        offset = (sync_slot(uid, interval) - start) % interval
+        if offset < span:
+            due.append((uid, offset))
+
+    for uid, offset in due:
+        # Keep the window's order and pace: a window of `span` seconds is replayed over the next tick.
+        sync_vendor_data.apply_async(
+            kwargs={"user_id": uid, "start_date": start_date, "end_date": end_date},
+            countdown=offset * tick // span,
+        )
+
+    log_structured(
+        logger,
+        "info",
+        f"Enqueued {len(due)} of {len(user_ids)} users with active connections",
+        provider="sync_all_users",
+        task="sync_all_users",
+        window_seconds=span,
+        due_user_ids=[uid for uid, _ in due],
+    )
+    return SyncAllUsersResult(users_for_sync=len(due)).model_dump()
@@ -6,11 +6,14 @@ from pathlib import Path
 from celery import shared_task
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import SessionLocal
+from app.schemas.providers.mobile_sdk import SleepRecord
 from app.services import event_record_service
 from app.services.apple.apple_xml.aws_service import get_s3_client
+from app.services.apple.apple_xml.pipeline import prefetch_chunks
 from app.services.apple.apple_xml.xml_service import XMLService
-from app.services.apple.healthkit.sleep_service import handle_sleep_data
+from app.services.apple.healthkit.sleep_service import import_sleep_history
 from app.services.timeseries_service import timeseries_service
 from app.services.user_service import user_service
 from app.utils.exceptions import ResourceNotFoundError
@@ -87,20 +90,30 @@ def _import_xml_data(db: Session, xml_path: str, user_id: str) -> None:
     """
     Parse XML file and import data to database using XMLExporter.
 
+    Parsing runs in a background thread up to ``xml_pipeline_depth`` chunks
+    ahead, so the next chunk is parsed while the current one is written.
+
     Args:
         db: Database session
         xml_path: Path to the XML file
         user_id: User ID to associate with the data
     """
     xml_service = XMLService(Path(xml_path), getLogger(__name__))
-
-    for time_series_records, workouts, sync_request in xml_service.parse_xml(user_id):
-        for record, detail in workouts:
-            created_record = event_record_service.create(db, record)
-            detail_for_record = detail.model_copy(update={"record_id": created_record.id})
-            event_record_service.create_detail(db, detail_for_record)
+    # Sleep is sessionized once over the whole export, after the samples and workouts.
+    sleep_records: list[SleepRecord] = []
+
+    for time_series_records, workouts, sync_request in prefetch_chunks(
+        xml_service.parse_xml(user_id),
+        settings.xml_pipeline_depth,
+    ):
+        if workouts:
+            event_record_service.bulk_create_with_details(db, workouts, detail_type="workout")
         if time_series_records:
             timeseries_service.bulk_create_samples(db, time_series_records)
-            db.commit()
+        db.commit()
         if sync_request and sync_request.data.sleep:
-            handle_sleep_data(db, sync_request, user_id)
+            sleep_records.extend(sync_request.data.sleep)
+
+    if sleep_records:
+        import_sleep_history(db, user_id, sleep_records)
+        db.commit()
@@ -15,6 +15,8 @@ from app.services.apple.healthkit.import_service import (
 from app.services.apple.healthkit.import_service import (
     import_service as sdk_import_service,
 )
+from app.services.payload_dedup import release_payload
+from app.services.sdk_admission import mark_started
 from app.services.sync_status_service import completed, failed, started
 from app.utils.structured_logging import log_structured
 
@@ -34,6 +36,8 @@ def process_sdk_upload(
     user_id: str,
     provider: str,
     batch_id: str | None = None,
+    payload_digest: str | None = None,
+    enqueued_at: float | None = None,
 ) -> dict[str, int | str]:
     """
     Process SDK data import asynchronously.
@@ -44,10 +48,17 @@ def process_sdk_upload(
         user_id: User ID to associate with the data
         provider: Import provider - "apple", "samsung", "google"
         batch_id: Unique batch identifier for tracking (optional for backwards compatibility)
+        payload_digest: Content hash claimed by the sync route; released on failure so
+            a client retry of the same batch is processed instead of deduplicated
+        enqueued_at: Epoch seconds when the route enqueued the batch; feeds the
+            worker-lag signal used by SDK admission control
 
     Returns:
         Dictionary with status_code and response message
     """
+    # Free the user's queue slot and report pickup lag before any early return
+    mark_started(user_id, enqueued_at)
+
     # Generate batch_id if not provided (backwards compatibility)
     if not batch_id:
         batch_id = str(uuid.uuid4())
@@ -93,80 +104,88 @@ def process_sdk_upload(
         provider=provider,
     )
 
-    started(
-        user_uuid,
-        provider,
-        SyncSource.SDK,
-        run_id=batch_id,
-        message=f"Processing {provider} SDK batch",
-        metadata={"batch_id": batch_id},
-    )
-
-    with SessionLocal() as db:
-        # Ensure SDK connection exists for this user (SDK-based, no OAuth tokens)
-        connection_repo = UserConnectionRepository()
-        connection_repo.ensure_sdk_connection(db, user_uuid, provider)
+    try:
+        started(
+            user_uuid,
+            provider,
+            SyncSource.SDK,
+            run_id=batch_id,
+            message=f"Processing {provider} SDK batch",
+            metadata={"batch_id": batch_id},
+        )
 
-        # Select the appropriate import service based on source
-        import_service = _get_import_service(provider)
+        with SessionLocal() as db:
+            # Ensure SDK connection exists for this user (SDK-based, no OAuth tokens)
+            connection_repo = UserConnectionRepository()
+            connection_repo.ensure_sdk_connection(db, user_uuid, provider)
 
-        result = import_service.import_data_from_request(
-            db, content, content_type, user_id, batch_id=batch_id
-        ).model_dump()
+            # Select the appropriate import service based on source
+            import_service = _get_import_service(provider)
 
-        # Log processing completion with results
-        log_structured(
-            logger,
-            "info",
-            f"{provider.capitalize()} sync batch processing completed",
-            action=f"{provider}_batch_processing_complete",
-            batch_id=batch_id,
-            user_id=user_id,
-            provider=provider,
-            status_code=result.get("status_code"),
-            response=result.get("response"),
-            # Include counts from result if available
-            records_saved=result.get("records_saved", 0),
-            workouts_saved=result.get("workouts_saved", 0),
-            sleep_saved=result.get("sleep_saved", 0),
-        )
+            result = import_service.import_data_from_request(
+                db, content, content_type, user_id, batch_id=batch_id
+            ).model_dump()
 
-        status_code = result.get("status_code", 200)
-        records_saved = int(result.get("records_saved", 0) or 0)
-        workouts_saved = int(result.get("workouts_saved", 0) or 0)
-        sleep_saved = int(result.get("sleep_saved", 0) or 0)
-        dropped_count = int(result.get("dropped_count", 0) or 0)
-        items_total = records_saved + workouts_saved + sleep_saved
-
-        if isinstance(status_code, int) and 200 <= status_code < 300:
-            message = f"{provider.capitalize()} batch saved"
-            if dropped_count:
-                message += f" ({dropped_count} record(s) dropped by validation)"
-            completed(
-                user_uuid,
-                provider,
-                SyncSource.SDK,
-                run_id=batch_id,
-                status=SyncStatus.SUCCESS,
-                message=message,
-                items_processed=items_total,
-                metadata={
-                    "batch_id": batch_id,
-                    "records_saved": records_saved,
-                    "workouts_saved": workouts_saved,
-                    "sleep_saved": sleep_saved,
-                    "dropped_count": dropped_count,
-                },
-            )
-        else:
-            failed(
-                user_uuid,
-                provider,
-                SyncSource.SDK,
-                run_id=batch_id,
-                error=str(result.get("response", "Unknown error")),
-                message=f"{provider.capitalize()} batch failed",
-                metadata={"batch_id": batch_id, "status_code": status_code},
+            # Log processing completion with results
+            log_structured(
+                logger,
+                "info",
+                f"{provider.capitalize()} sync batch processing completed",
+                action=f"{provider}_batch_processing_complete",
+                batch_id=batch_id,
+                user_id=user_id,
+                provider=provider,
+                status_code=result.get("status_code"),
+                response=result.get("response"),
+                # Include counts from result if available
+                records_saved=result.get("records_saved", 0),
+                workouts_saved=result.get("workouts_saved", 0),
+                sleep_saved=result.get("sleep_saved", 0),
             )
 
-        return {**result, "batch_id": batch_id}
+            status_code = result.get("status_code", 200)
+            records_saved = int(result.get("records_saved", 0) or 0)
+            workouts_saved = int(result.get("workouts_saved", 0) or 0)
+            sleep_saved = int(result.get("sleep_saved", 0) or 0)
+            dropped_count = int(result.get("dropped_count", 0) or 0)
+            items_total = records_saved + workouts_saved + sleep_saved
+
+            if isinstance(status_code, int) and 200 <= status_code < 300:
+                message = f"{provider.capitalize()} batch saved"
+                if dropped_count:
+                    message += f" ({dropped_count} record(s) dropped by validation)"
+                completed(
+                    user_uuid,
+                    provider,
+                    SyncSource.SDK,
+                    run_id=batch_id,
+                    status=SyncStatus.SUCCESS,
+                    message=message,
+                    items_processed=items_total,
+                    metadata={
+                        "batch_id": batch_id,
+                        "records_saved": records_saved,
+                        "workouts_saved": workouts_saved,
+                        "sleep_saved": sleep_saved,
+                        "dropped_count": dropped_count,
+                    },
+                )
+            else:
+                if payload_digest:
+                    release_payload(f"sdk:{user_id}", payload_digest, batch_id)
+                failed(
+                    user_uuid,
+                    provider,
+                    SyncSource.SDK,
+                    run_id=batch_id,
+                    error=str(result.get("response", "Unknown error")),
+                    message=f"{provider.capitalize()} batch failed",
+                    metadata={"batch_id": batch_id, "status_code": status_code},
+                )
+
+            return {**result, "batch_id": batch_id}
+    except Exception:
+        # Forget the claim so the client's retry of this batch is processed instead of deduplicated.
+        if payload_digest:
+            release_payload(f"sdk:{user_id}", payload_digest, batch_id)
+        raise
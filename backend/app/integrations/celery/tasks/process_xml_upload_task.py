@@ -1,20 +1,37 @@
 import os
 import tempfile
+import time
+import zipfile
+from collections.abc import Iterable
+from contextlib import ExitStack, nullcontext
 from logging import getLogger
 from pathlib import Path
 from typing import Any
 from uuid import UUID
 
-from celery import shared_task
+from celery import Task, chord, group, shared_task
+from sqlalchemy.exc import OperationalError
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.database import SessionLocal
 from app.schemas.providers.apple.apple_xml import XMLParseStats
+from app.schemas.providers.mobile_sdk import SleepRecord
 from app.schemas.sync_status import SyncSource, SyncStatus
 from app.services import event_record_service
-from app.services.apple.apple_xml.xml_service import XMLService
-from app.services.apple.healthkit.sleep_service import handle_sleep_data
-from app.services.sync_status_service import completed, failed, new_run_id, started
+from app.services.apple.apple_xml.import_checkpoint import (
+    ImportCheckpoint,
+    clear_checkpoint,
+    import_lease,
+    load_checkpoint,
+    save_checkpoint,
+)
+from app.services.apple.apple_xml.pipeline import prefetch_chunks
+from app.services.apple.apple_xml.sharding import ExportShard, plan_export_shards
+from app.services.apple.apple_xml.upload_spool import discard_upload, local_upload, publish_local, spool_local
+from app.services.apple.apple_xml.xml_service import ChunkPosition, XMLChunk, XMLService
+from app.services.apple.healthkit.sleep_service import import_sleep_history
+from app.services.sync_status_service import completed, failed, new_run_id, progress, started
 from app.services.timeseries_service import timeseries_service
 from app.utils.sentry_helpers import log_and_capture_error
 from app.utils.structured_logging import log_structured
@@ -22,46 +39,118 @@ from app.utils.structured_logging import log_structured
 log = getLogger(__name__)
 
 
-@shared_task
-def process_xml_upload(file_contents: bytes, filename: str, user_id: str) -> dict[str, Any]:
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=3, default_retry_delay=60)
+def process_xml_upload(
+    self: Task,
+    filename: str,
+    user_id: str,
+    file_path: str | None = None,
+    file_contents: bytes | None = None,
+) -> dict[str, Any]:
     """
-    Process XML file and import to Postgres database.
+    Process an Apple Health export (XML or zip) and import to Postgres database.
+
+    A redelivered (worker lost) or retried (database connection lost) task
+    resumes from the last byte-offset checkpoint saved under its task id.
 
     Args:
-        file_contents: XML file contents as bytes
         filename: Original filename
         user_id: User ID to associate with the data
+        file_path: Reference of the export spooled by the upload route (local path
+            or s3:// URI); removed when done
+        file_contents: Export contents as bytes (legacy messages enqueued before
+            uploads were spooled to disk)
 
     Returns:
         Dict with status, message, and import statistics
     """
-    temp_xml_file = None
+    import_id: str | None = self.request.id
+    with import_lease(import_id) if import_id else nullcontext(True) as leased:
+        if not leased:
+            # Redelivered while the original run is still importing (its lease is alive):
+            # that run owns the upload and checkpoint, so leave both alone.
+            log_structured(
+                log,
+                "warning",
+                "XML import already running, dropping duplicate delivery",
+                provider="apple_xml",
+                task="process_xml_upload",
+                filename=filename,
+                user_id=user_id,
+                import_id=import_id,
+            )
+            return {"user_id": user_id, "status": "duplicate", "message": "Import already running"}
+        return _run_import(self, filename, user_id, file_path, file_contents, import_id)
+
+
+def _run_import(
+    task: Task,
+    filename: str,
+    user_id: str,
+    file_path: str | None,
+    file_contents: bytes | None,
+    import_id: str | None,
+) -> dict[str, Any]:
+    temp_xml_file = file_path
+    keep_upload = False
 
     try:
         user_uuid: UUID | None = UUID(user_id)
     except (ValueError, TypeError):
         user_uuid = None
 
-    run_id = new_run_id(prefix="xml")
+    resume = load_checkpoint(import_id) if import_id else None
+    run_id = resume.run_id if resume is not None else new_run_id(prefix="xml")
     if user_uuid is not None:
-        started(
-            user_uuid,
-            "apple",
-            SyncSource.XML_IMPORT,
-            run_id=run_id,
-            message=f"Importing Apple Health XML file {filename}",
-            metadata={"filename": filename},
-        )
+        if resume is not None:
+            progress(
+                user_uuid,
+                "apple",
+                SyncSource.XML_IMPORT,
+                run_id=run_id,
+                message=f"Resuming import of Apple Health XML file {filename}",
+                metadata={"filename": filename, "resume_offset": resume.offset},
+            )
+        else:
+            started(
+                user_uuid,
+                "apple",
+                SyncSource.XML_IMPORT,
+                run_id=run_id,
+                message=f"Importing Apple Health XML file {filename}",
+                metadata={"filename": filename},
+            )
 
-    with SessionLocal() as db:
+    with SessionLocal() as db, ExitStack() as downloads:
         try:
-            temp_dir = tempfile.gettempdir()
-            temp_xml_file = os.path.join(temp_dir, f"temp_import_{filename}")
+            if temp_xml_file is None:
+                temp_dir = tempfile.gettempdir()
+                temp_xml_file = os.path.join(temp_dir, f"temp_import_{filename}")
+
+                with open(temp_xml_file, "wb") as f:
+                    f.write(file_contents or b"")
+                xml_file = temp_xml_file
+            else:
+                xml_file = str(downloads.enter_context(local_upload(temp_xml_file)))
 
-            with open(temp_xml_file, "wb") as f:
-                f.write(file_contents)
+            # Shards need the export in upload storage, which legacy byte payloads never reach.
+            if file_path is not None and user_uuid is not None and resume is None and settings.xml_sharded_import:
+                sharded = _start_sharded_import(file_path, Path(xml_file), filename, user_id, run_id)
+                if sharded is not None:
+                    # The spooled export now belongs to the shard chord, which removes it when done.
+                    temp_xml_file = None
+                    return sharded
 
-            stats = _import_xml_data(db, temp_xml_file, user_id)
+            stats = _import_xml_data(
+                db,
+                xml_file,
+                user_id,
+                run_id=run_id if user_uuid is not None else None,
+                import_id=import_id,
+                resume=resume,
+            )
+            if import_id:
+                clear_checkpoint(import_id)
 
             if user_uuid is not None:
                 completed(
@@ -79,94 +168,498 @@ def process_xml_upload(file_contents: bytes, filename: str, user_id: str) -> dic
                 "user_id": user_id,
                 "status": "success",
                 "message": "Import completed successfully",
-                "stats": {
-                    "records_processed": stats.records.processed,
-                    "records_skipped": stats.records.skipped,
-                    "workouts_processed": stats.workouts.processed,
-                    "workouts_skipped": stats.workouts.skipped,
-                    "sleep_processed": stats.sleep.processed,
-                    "sleep_skipped": stats.sleep.skipped,
-                    "skip_reasons": stats.get_skip_summary(),
-                },
+                "stats": _stats_summary(stats),
             }
 
-        except Exception as e:
+        except OperationalError as e:
             db.rollback()
-            if user_uuid is not None:
-                failed(
-                    user_uuid,
-                    "apple",
-                    SyncSource.XML_IMPORT,
-                    run_id=run_id,
-                    error=str(e),
-                    message=f"Apple Health XML import failed: {filename}",
-                    metadata={"filename": filename},
-                )
+            if task.request.retries >= task.max_retries:
+                _fail_import(e, filename, user_id, user_uuid, run_id, import_id)
+                raise e
+            # Lost the database mid-import: keep the upload and checkpoint so the retry resumes.
+            keep_upload = True
             log_structured(
                 log,
-                "error",
-                "Failed to import XML file %s for user %s",
+                "warning",
+                "XML import lost its database connection, retrying",
                 provider="apple_xml",
                 task="process_xml_upload",
                 filename=filename,
                 user_id=user_id,
+                run_id=run_id,
+                error=str(e),
             )
-            log_and_capture_error(
-                e,
-                log,
-                "Failed to import XML file %s for user %s",
-                extra={"filename": filename, "user_id": user_id},
-            )
+            raise task.retry(exc=e)
+
+        except Exception as e:
+            db.rollback()
+            _fail_import(e, filename, user_id, user_uuid, run_id, import_id)
             raise e
 
         finally:
-            if temp_xml_file and os.path.exists(temp_xml_file):
-                os.remove(temp_xml_file)
+            if temp_xml_file and not keep_upload:
+                discard_upload(temp_xml_file)
 
 
-def _import_xml_data(db: Session, xml_path: str, user_id: str) -> XMLParseStats:
+def _fail_import(
+    e: Exception,
+    filename: str,
+    user_id: str,
+    user_uuid: UUID | None,
+    run_id: str,
+    import_id: str | None,
+) -> None:
+    if import_id:
+        clear_checkpoint(import_id)
+    if user_uuid is not None:
+        failed(
+            user_uuid,
+            "apple",
+            SyncSource.XML_IMPORT,
+            run_id=run_id,
+            error=str(e),
+            message=f"Apple Health XML import failed: {filename}",
+            metadata={"filename": filename},
+        )
+    log_structured(
+        log,
+        "error",
+        "Failed to import XML file %s for user %s",
+        provider="apple_xml",
+        task="process_xml_upload",
+        filename=filename,
+        user_id=user_id,
+    )
+    log_and_capture_error(
+        e,
+        log,
+        "Failed to import XML file %s for user %s",
+        extra={"filename": filename, "user_id": user_id},
+    )
+
+
+def _stats_summary(stats: XMLParseStats) -> dict[str, Any]:
+    return {
+        "records_processed": stats.records.processed,
+        "records_skipped": stats.records.skipped,
+        "workouts_processed": stats.workouts.processed,
+        "workouts_skipped": stats.workouts.skipped,
+        "sleep_processed": stats.sleep.processed,
+        "sleep_skipped": stats.sleep.skipped,
+        "skip_reasons": stats.get_skip_summary(),
+    }
+
+
+def _import_xml_data(
+    db: Session,
+    xml_path: str,
+    user_id: str,
+    shard: ExportShard | None = None,
+    sleep_sink: list[SleepRecord] | None = None,
+    run_id: str | None = None,
+    import_id: str | None = None,
+    resume: ImportCheckpoint | None = None,
+) -> XMLParseStats:
     """
     Parse XML file and import data to database using XMLService.
 
+    Parsing runs in a background thread up to ``xml_pipeline_depth`` chunks
+    ahead, so the next chunk is parsed while the current one is written.
+
     Args:
         db: Database session
         xml_path: Path to the XML file
         user_id: User ID to associate with the data
+        shard: Only import this byte range of the export (sharded imports)
+        sleep_sink: Collect sleep records here instead of sessionizing them
+            (sharded imports process sleep once, over all shards)
+        run_id: Sync-status run to report byte/record progress to after every chunk
+        import_id: Save a resume checkpoint under this id after every written segment
+        resume: Checkpoint to continue from instead of the start of the export
 
     Returns:
         XMLParseStats with parsing statistics
     """
-    xml_service = XMLService(Path(xml_path), log)
+    xml_service = XMLService(Path(xml_path), log, shard=shard)
+    # The parser thread owns xml_service.stats until parsing ends; write failures are merged afterwards.
+    workout_db_errors: list[str] = []
+    write_seconds = 0.0
+    started_at = time.monotonic()
+
+    chunks: Iterable[tuple[XMLChunk, ChunkPosition | None]]
+    if shard is None:
+        chunks = xml_service.parse_xml_resumable(
+            user_id,
+            settings.xml_checkpoint_bytes,
+            resume_from=resume.offset if resume is not None else 0,
+            stats=resume.stats if resume is not None else None,
+        )
+        bytes_total = xml_service.export_size()
+    else:
+        chunks = ((chunk, None) for chunk in xml_service.parse_xml(user_id))
+        bytes_total = 0
+    resumed_at = resume.offset if resume is not None else 0
+    items_written = 0
+    # Sleep is sessionized once over the whole export: sessions can span checkpoint segments.
+    # Records read before a checkpoint are saved with it, and come back on resume.
+    sleep_records = sleep_sink if sleep_sink is not None else list(resume.sleep if resume is not None else [])
+    unsaved_sleep: list[SleepRecord] = []
 
-    for time_series_records, workouts, sync_request in xml_service.parse_xml(user_id):
-        for record, detail in workouts:
+    for (time_series_records, workouts, sync_request), position in prefetch_chunks(
+        chunks,
+        settings.xml_pipeline_depth,
+    ):
+        write_started_at = time.monotonic()
+        if workouts:
+            # Savepoint so a failed batch skips only this chunk's workouts, not its samples.
+            nested = db.begin_nested()
             try:
-                created_record = event_record_service.create(db, record)
-                detail_for_record = detail.model_copy(update={"record_id": created_record.id})
-                event_record_service.create_detail(db, detail_for_record)
+                event_record_service.bulk_create_with_details(db, workouts, detail_type="workout")
+                nested.commit()
             except Exception as e:
+                nested.rollback()
                 log_structured(
                     log,
                     "warning",
-                    "Failed to save workout record %s: %s - skipping",
+                    "Failed to save workout batch - skipping",
                     provider="apple_xml",
                     task="process_xml_upload",
-                    record_type=record.type if hasattr(record, "type") else "unknown",
+                    workout_count=len(workouts),
                     error=str(e),
                 )
                 log_and_capture_error(
                     e,
                     log,
-                    "Failed to save workout record %s: %s - skipping",
-                    extra={"record_type": record.type if hasattr(record, "type") else "unknown", "user_id": user_id},
+                    "Failed to save workout batch - skipping",
+                    extra={"workout_count": len(workouts), "user_id": user_id},
                 )
-                xml_service.stats.workouts.skip(f"db_error:{type(e).__name__}")
+                workout_db_errors.extend([f"db_error:{type(e).__name__}"] * len(workouts))
 
         if time_series_records:
             timeseries_service.bulk_create_samples(db, time_series_records)
-            db.commit()
+        db.commit()
 
         if sync_request and sync_request.data.sleep:
-            handle_sleep_data(db, sync_request, user_id)
+            sleep_records.extend(sync_request.data.sleep)
+            unsaved_sleep.extend(sync_request.data.sleep)
+        write_seconds += time.monotonic() - write_started_at
+        items_written += len(time_series_records) + len(workouts) + len(sync_request.data.sleep)
+
+        if position is None:
+            continue
+        if import_id and run_id and position.resume_offset is not None and position.stats is not None:
+            checkpoint_stats = position.stats
+            for reason in workout_db_errors:
+                checkpoint_stats.workouts.skip(reason)
+            save_checkpoint(
+                import_id,
+                ImportCheckpoint(position.resume_offset, run_id, checkpoint_stats),
+                new_sleep=unsaved_sleep,
+            )
+            unsaved_sleep = []
+        if run_id:
+            _report_progress(
+                user_id,
+                run_id,
+                bytes_read=position.bytes_read,
+                bytes_total=bytes_total,
+                bytes_this_run=position.bytes_read - resumed_at,
+                items_written=items_written,
+                elapsed_seconds=time.monotonic() - started_at,
+            )
+
+    if sleep_sink is None:
+        write_started_at = time.monotonic()
+        _import_sleep(db, user_id, sleep_records)
+        write_seconds += time.monotonic() - write_started_at
+
+    for reason in workout_db_errors:
+        xml_service.stats.workouts.skip(reason)
+
+    total_seconds = time.monotonic() - started_at
+    log_structured(
+        log,
+        "info",
+        "XML import pipeline finished",
+        provider="apple_xml",
+        task="process_xml_upload",
+        user_id=user_id,
+        total_seconds=round(total_seconds, 2),
+        write_seconds=round(write_seconds, 2),
+        parse_wait_seconds=round(total_seconds - write_seconds, 2),
+        pipeline_depth=settings.xml_pipeline_depth,
+    )
 
     return xml_service.stats
+
+
+def _import_sleep(db: Session, user_id: str, sleep_records: list[SleepRecord]) -> None:
+    """Sessionize and save the collected sleep records in one pass."""
+    if not sleep_records:
+        return
+    import_sleep_history(db, user_id, sleep_records)
+    db.commit()
+
+
+def _report_progress(
+    user_id: str,
+    run_id: str,
+    *,
+    bytes_read: int,
+    bytes_total: int,
+    bytes_this_run: int,
+    items_written: int,
+    elapsed_seconds: float,
+) -> None:
+    """Emit a progress event with throughput and ETA after a written chunk."""
+    bytes_per_second = bytes_this_run / elapsed_seconds if elapsed_seconds > 0 else 0.0
+    remaining = max(0, bytes_total - bytes_read)
+    eta_seconds = round(remaining / bytes_per_second) if bytes_per_second > 0 else None
+    progress(
+        user_id,
+        "apple",
+        SyncSource.XML_IMPORT,
+        run_id=run_id,
+        message=f"Imported {bytes_read / 1024**2:,.0f} of {bytes_total / 1024**2:,.0f} MB",
+        progress_value=min(1.0, bytes_read / bytes_total) if bytes_total else None,
+        items_processed=items_written,
+        metadata={
+            "bytes_processed": bytes_read,
+            "bytes_total": bytes_total,
+            "bytes_per_second": round(bytes_per_second),
+            "records_per_second": round(items_written / elapsed_seconds) if elapsed_seconds > 0 else 0,
+            "eta_seconds": eta_seconds,
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Sharded imports
+# ---------------------------------------------------------------------------
+
+
+def _start_sharded_import(
+    upload_ref: str,
+    source: Path,
+    filename: str,
+    user_id: str,
+    run_id: str,
+) -> dict[str, Any] | None:
+    """Split a large spooled export into byte-range shards and import them in parallel.
+
+    *upload_ref* is the spooled upload and *source* a local copy of it. Returns
+    the coordinator's task result once the shard chord is dispatched, or None
+    when the export should be imported by this task (too small, or a layout the
+    shard planner does not recognise).
+    """
+    if XMLService(source, log).export_size() < settings.xml_shard_min_bytes:
+        return None
+
+    # Byte offsets need a plain file: pull export.xml out of a zip once, next to the upload.
+    xml_path = source
+    if zipfile.is_zipfile(source):
+        with XMLService(source, log).open_export() as stream:
+            xml_path = spool_local(stream, XMLService.EXPORT_XML_NAME)
+
+    try:
+        shards = plan_export_shards(xml_path, settings.xml_shard_target_bytes, settings.xml_max_shards)
+    except Exception:
+        if xml_path != source:
+            discard_upload(xml_path)
+        raise
+    if len(shards) < 2:
+        if xml_path != source:
+            discard_upload(xml_path)
+        return None
+    export_bytes = xml_path.stat().st_size
+    xml_ref = upload_ref
+    if xml_path != source:
+        xml_ref = publish_local(xml_path)
+        discard_upload(upload_ref)
+
+    common = {"file_path": xml_ref, "filename": filename, "user_id": user_id, "run_id": run_id}
+    header = group(
+        process_xml_shard.s(
+            shard={"header_end": shard.header_end, "start": shard.start, "end": shard.end},
+            shard_index=index,
+            shard_count=len(shards),
+            **common,
+        )
+        for index, shard in enumerate(shards)
+    )
+    callback = finalize_sharded_xml_import.s(**common).on_error(fail_sharded_xml_import.s(**common))
+    chord(header)(callback)
+
+    log_structured(
+        log,
+        "info",
+        "Dispatched sharded XML import",
+        provider="apple_xml",
+        task="process_xml_upload",
+        user_id=user_id,
+        run_id=run_id,
+        shard_count=len(shards),
+        export_bytes=export_bytes,
+    )
+    progress(
+        user_id,
+        "apple",
+        SyncSource.XML_IMPORT,
+        run_id=run_id,
+        message=f"Importing {filename} in {len(shards)} parallel parts",
+        metadata={"filename": filename, "shard_count": len(shards)},
+    )
+    return {
+        "user_id": user_id,
+        "status": "sharded",
+        "message": f"Import split into {len(shards)} shards",
+        "shard_count": len(shards),
+    }
+
+
+@shared_task(bind=True, acks_late=True, max_retries=3, default_retry_delay=30)
+def process_xml_shard(
+    self: Any,
+    *,
+    file_path: str,
+    filename: str,
+    user_id: str,
+    run_id: str,
+    shard: dict[str, int],
+    shard_index: int,
+    shard_count: int,
+) -> dict[str, Any]:
+    """Import one byte range of a sharded export.
+
+    Samples and workouts are written here; sleep records are returned to the
+    chord callback so sessions spanning a shard boundary are built in order.
+    Writes are idempotent upserts, so a retried or redelivered shard simply
+    rewrites the same rows.
+    """
+    sleep_records: list[SleepRecord] = []
+    export_shard = ExportShard(**shard)
+    ranges = [(0, export_shard.header_end), (export_shard.start, export_shard.end)]
+    with SessionLocal() as db:
+        try:
+            with local_upload(file_path, ranges) as xml_path:
+                stats = _import_xml_data(db, str(xml_path), user_id, shard=export_shard, sleep_sink=sleep_records)
+        except Exception as exc:
+            db.rollback()
+            log_structured(
+                log,
+                "warning",
+                "XML import shard failed, retrying",
+                provider="apple_xml",
+                task="process_xml_shard",
+                user_id=user_id,
+                run_id=run_id,
+                shard_index=shard_index,
+                error=str(exc),
+            )
+            raise self.retry(exc=exc)
+
+    progress(
+        user_id,
+        "apple",
+        SyncSource.XML_IMPORT,
+        run_id=run_id,
+        message=f"Imported part {shard_index + 1} of {shard_count} of {filename}",
+        items_processed=stats.records.processed + stats.workouts.processed,
+        metadata={"filename": filename, "shard_index": shard_index, "shard_count": shard_count},
+    )
+    return {
+        "stats": stats.to_dict(),
+        "sleep": [record.model_dump(mode="json") for record in sleep_records],
+    }
+
+
+@shared_task
+def finalize_sharded_xml_import(
+    shard_results: list[dict[str, Any]],
+    *,
+    file_path: str,
+    filename: str,
+    user_id: str,
+    run_id: str,
+) -> dict[str, Any]:
+    """Chord callback: sessionize the collected sleep records and complete the import."""
+    stats = XMLParseStats()
+    sleep_records: list[SleepRecord] = []
+    for result in shard_results:
+        stats.merge(XMLParseStats.from_dict(result["stats"]))
+        sleep_records.extend(SleepRecord.model_validate(record) for record in result["sleep"])
+
+    try:
+        with SessionLocal() as db:
+            _import_sleep(db, user_id, sleep_records)
+    except Exception as exc:
+        failed(
+            user_id,
+            "apple",
+            SyncSource.XML_IMPORT,
+            run_id=run_id,
+            error=str(exc),
+            message=f"Apple Health XML import failed: {filename}",
+            metadata={"filename": filename},
+        )
+        log_and_capture_error(
+            exc,
+            log,
+            "Failed to finalize sharded XML import %s for user %s",
+            extra={"filename": filename, "user_id": user_id},
+        )
+        raise
+    finally:
+        discard_upload(file_path)
+
+    completed(
+        user_id,
+        "apple",
+        SyncSource.XML_IMPORT,
+        run_id=run_id,
+        status=SyncStatus.SUCCESS,
+        message="Apple Health XML import completed",
+        items_processed=stats.records.processed + stats.workouts.processed + stats.sleep.processed,
+        metadata={"filename": filename, "shard_count": len(shard_results)},
+    )
+    return {
+        "user_id": user_id,
+        "status": "success",
+        "message": "Import completed successfully",
+        "stats": _stats_summary(stats),
+    }
+
+
+@shared_task
+def fail_sharded_xml_import(
+    request: Any,
+    exc: BaseException,
+    traceback: Any,
+    *,
+    file_path: str,
+    filename: str,
+    user_id: str,
+    run_id: str,
+) -> None:
+    """Chord error callback: a shard ran out of retries, so the import as a whole failed."""
+    discard_upload(file_path)
+    failed(
+        user_id,
+        "apple",
+        SyncSource.XML_IMPORT,
+        run_id=run_id,
+        error=str(exc),
+        message=f"Apple Health XML import failed: {filename}",
+        metadata={"filename": filename},
+    )
+    log_structured(
+        log,
+        "error",
+        "Sharded XML import failed",
+        provider="apple_xml",
+        task="process_xml_shard",
+        user_id=user_id,
+        run_id=run_id,
+        failed_task_id=getattr(request, "id", None),
+        error=str(exc),
+    )
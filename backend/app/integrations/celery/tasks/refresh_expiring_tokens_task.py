@@ -0,0 +1,83 @@
+"""Celery task renewing provider access tokens before they expire.
+
+Refreshing ahead of time keeps token refreshes off the sync and webhook hot
+paths: by the time a task needs the token, it is normally still valid.  The
+refresh goes through the same single-flight lock as inline refreshes, so it
+never races a sync that got there first.
+"""
+
+from datetime import timedelta
+from logging import getLogger
+
+from celery import shared_task
+from fastapi import HTTPException
+
+from app.config import settings
+from app.database import SessionLocal
+from app.repositories.user_connection_repository import UserConnectionRepository
+from app.services.providers.factory import ProviderFactory
+from app.services.providers.templates.base_oauth import BaseOAuthTemplate
+from app.services.providers.token_refresh import refresh_single_flight
+from app.utils.structured_logging import log_structured
+
+logger = getLogger(__name__)
+
+
+@shared_task
+def refresh_expiring_tokens() -> dict:
+    """Refresh every active connection whose token expires within ``oauth_proactive_refresh_minutes``."""
+    window = settings.oauth_proactive_refresh_minutes
+    if window <= 0:
+        return {"refreshed": 0, "failed": 0}
+
+    factory = ProviderFactory()
+    oauth_by_provider: dict[str, BaseOAuthTemplate | None] = {}
+    refreshed = failed = 0
+    with SessionLocal() as db:
+        for connection in UserConnectionRepository().get_expiring_tokens(db, minutes_threshold=window):
+            if not connection.refresh_token:
+                continue
+            if connection.provider not in oauth_by_provider:
+                try:
+                    oauth_by_provider[connection.provider] = factory.get_provider(connection.provider).oauth
+                except Exception as exc:
+                    # One unknown or misconfigured provider must not stop the other refreshes.
+                    oauth_by_provider[connection.provider] = None
+                    log_structured(
+                        logger,
+                        "warning",
+                        "Skipping proactive refresh for provider that cannot be loaded",
+                        provider=connection.provider,
+                        task="refresh_expiring_tokens",
+                        error=str(exc),
+                    )
+            oauth = oauth_by_provider[connection.provider]
+            if oauth is None:
+                continue
+            try:
+                refresh_single_flight(db, connection, oauth, margin=timedelta(minutes=window))
+                refreshed += 1
+            except HTTPException as exc:
+                # Dead refresh tokens already revoked the connection inside refresh_access_token.
+                failed += 1
+                db.rollback()
+                log_structured(
+                    logger,
+                    "warning",
+                    "Proactive OAuth token refresh failed",
+                    provider=connection.provider,
+                    task="refresh_expiring_tokens",
+                    user_id=str(connection.user_id),
+                    status_code=exc.status_code,
+                    error=str(exc.detail),
+                )
+
+    log_structured(
+        logger,
+        "info",
+        "Expiring OAuth tokens refreshed",
+        action="refresh_expiring_tokens_complete",
+        refreshed=refreshed,
+        failed=failed,
+    )
+    return {"refreshed": refreshed, "failed": failed}
@@ -1,3 +1,4 @@
+import math
 from contextlib import suppress
 from datetime import datetime, timedelta, timezone
 from logging import getLogger
@@ -14,6 +15,7 @@ from app.schemas.auth import LiveSyncMode
 from app.schemas.responses.upload import ProviderSyncResult, SyncVendorDataResult
 from app.schemas.sync_status import SyncSource, SyncStage, SyncStatus
 from app.services.providers.factory import ProviderFactory
+from app.services.providers.rate_limiter import rate_limit_deferrals
 from app.services.sync_coordination import release_primary, release_stale_primary, try_become_primary
 from app.services.sync_status_service import completed, failed, new_run_id, progress, started
 from app.utils.config_utils import format_duration
@@ -60,6 +62,7 @@ def sync_vendor_data(
     is_historical: bool = False,
     _skip_linked_fan_out: bool = False,
     _linked_primary_user_id: str | None = None,
+    _rate_limit_reschedules: int = 0,
 ) -> dict[str, Any]:
     """
     Synchronize workout/exercise/activity data from all providers the user is connected to.
@@ -75,6 +78,8 @@ def sync_vendor_data(
             cursor is not clobbered by a user-initiated historical pull.
         _skip_linked_fan_out: Internal flag set to True when this task was triggered
             by another profile's fan-out.  Prevents infinite fan-out loops.
+        _rate_limit_reschedules: Internal count of rate-limit reschedules that led to
+            this run; at provider_rate_limit_max_reschedules the sync is failed instead.
 
     Returns:
         dict with sync results per provider
@@ -253,6 +258,7 @@ def sync_vendor_data(
                 try:
                     strategy = factory.get_provider(provider_name)
                     provider_result = ProviderSyncResult(success=True, params={})
+                    rate_limit_deferred: dict[str, float] = {}
 
                     # New-vs-updated split for the sync-log (timeseries upserts report it
                     # via WriteCounts). items_processed is derived from these so the headline
@@ -296,7 +302,8 @@ def sync_vendor_data(
                             message=f"Fetching workouts from {provider_name}",
                         )
                         try:
-                            success = strategy.workouts.load_data(db, user_uuid, **params)
+                            with rate_limit_deferrals(rate_limit_deferred):
+                                success = strategy.workouts.load_data(db, user_uuid, **params)
                             provider_result.params["workouts"] = {"success": success, **params}
                         except Exception as e:
                             log_structured(
@@ -347,24 +354,26 @@ def sync_vendor_data(
                             # Otherwise fallback to load_all_247_data (just returns data)
                             provider_any = cast(Any, strategy.data_247)
                             if hasattr(provider_any, "load_and_save_all"):
-                                results_247 = provider_any.load_and_save_all(
-                                    db,
-                                    user_uuid,
-                                    start_time=start_dt,
-                                    end_time=end_dt,
-                                    is_first_sync=is_first_sync,
-                                )
+                                with rate_limit_deferrals(rate_limit_deferred):
+                                    results_247 = provider_any.load_and_save_all(
+                                        db,
+                                        user_uuid,
+                                        start_time=start_dt,
+                                        end_time=end_dt,
+                                        is_first_sync=is_first_sync,
+                                    )
                                 provider_result.params["data_247"] = {"success": True, "saved": True, **results_247}
                                 for _count in results_247.values():
                                     pull_inserted += getattr(_count, "inserted", 0)
                                     pull_updated += getattr(_count, "updated", 0)
                             else:
-                                results_247 = strategy.data_247.load_all_247_data(
-                                    db,
-                                    user_uuid,
-                                    start_time=start_dt,
-                                    end_time=end_dt,
-                                )
+                                with rate_limit_deferrals(rate_limit_deferred):
+                                    results_247 = strategy.data_247.load_all_247_data(
+                                        db,
+                                        user_uuid,
+                                        start_time=start_dt,
+                                        end_time=end_dt,
+                                    )
                                 provider_result.params["data_247"] = {"success": True, "saved": False, **results_247}
                             log_structured(
                                 logger,
@@ -396,7 +405,53 @@ def sync_vendor_data(
                             )
                             provider_result.params["data_247"] = {"success": False, "error": str(e)}
 
-                    if not is_historical:
+                    # Out of rate budget: run this provider again once the limit resets instead
+                    # of holding the worker, and keep last_synced_at so that run covers the gap.
+                    # After provider_rate_limit_max_reschedules the sync fails; the next periodic
+                    # sync still covers the gap.
+                    rate_limited_for = math.ceil(max(rate_limit_deferred.values(), default=0.0))
+                    rate_limit_exhausted = bool(rate_limited_for) and (
+                        _rate_limit_reschedules >= settings.provider_rate_limit_max_reschedules
+                    )
+                    if rate_limit_exhausted:
+                        provider_result.params["rate_limited"] = {
+                            "success": False,
+                            "error": f"Rate limited after {_rate_limit_reschedules} reschedules",
+                            "retry_after_seconds": rate_limited_for,
+                        }
+                        log_structured(
+                            logger,
+                            "warning",
+                            f"{provider_name} still rate limited after {_rate_limit_reschedules} reschedules, "
+                            "giving up",
+                            provider=provider_name,
+                            task="sync_vendor_data",
+                            user_id=user_id,
+                        )
+                    elif rate_limited_for:
+                        provider_result.params["rate_limited"] = {"retry_after_seconds": rate_limited_for}
+                        log_structured(
+                            logger,
+                            "warning",
+                            f"{provider_name} rate limit reached, rescheduling sync in {rate_limited_for}s",
+                            provider=provider_name,
+                            task="sync_vendor_data",
+                            user_id=user_id,
+                        )
+                        sync_vendor_data.apply_async(
+                            kwargs={
+                                "user_id": user_id,
+                                "start_date": start_date,
+                                "end_date": end_date,
+                                "providers": [provider_name],
+                                "is_historical": is_historical,
+                                "_skip_linked_fan_out": _skip_linked_fan_out,
+                                "_linked_primary_user_id": _linked_primary_user_id,
+                                "_rate_limit_reschedules": _rate_limit_reschedules + 1,
+                            },
+                            countdown=rate_limited_for,
+                        )
+                    elif not is_historical:
                         user_connection_repo.update_last_synced_at(db, connection)
 
                     if shared_token and connection.provider_user_id:
@@ -449,7 +504,7 @@ def sync_vendor_data(
                         isinstance(r, dict) and r.get("success") is False for r in sub_results
                     )
                     any_failed = any(isinstance(r, dict) and r.get("success") is False for r in sub_results)
-                    if all_failed:
+                    if all_failed or rate_limit_exhausted:
                         final_status = SyncStatus.FAILED
                     elif any_failed:
                         final_status = SyncStatus.PARTIAL
@@ -463,7 +518,9 @@ def sync_vendor_data(
                             provider_name,
                             sync_source,
                             run_id=run_id,
-                            error="All sync sub-tasks failed",
+                            error=provider_result.params["rate_limited"]["error"]
+                            if rate_limit_exhausted
+                            else "All sync sub-tasks failed",
                             message=f"Sync from {provider_name} failed",
                             primary_user_id=primary_uuid,
                             metadata={"is_historical": is_historical, "params": provider_result.params},
@@ -1,23 +1,43 @@
-"""Celery task for processing full-payload (webhook_stream) provider push events.
+"""Celery tasks for processing incoming provider webhooks.
 
-A single shared task handles all webhook_stream providers (Garmin, Suunto, …).
-The provider-specific logic lives in each provider's WebhookHandler.process_payload;
-this task is a thin async wrapper providing acks_late and retry guarantees.
+``process_webhook_body`` is the second half of the fast-ack path: the request
+thread only verifies the signature and parks the raw body in the claim-check
+store; this task loads it and runs the handler's ``parse_payload`` and
+``dispatch``.
+
+A single shared ``process_webhook_push`` task handles the payloads enqueued by
+``dispatch`` for every provider (Garmin, Suunto, Oura, …). The provider-specific
+logic lives in each provider's WebhookHandler.process_payload; this task is a
+thin async wrapper providing acks_late and retry guarantees.
+
+Notify-only providers buffer their notifications in ``webhook_coalescer``
+instead; ``flush_coalesced_webhooks`` then processes one window's worth per
+user in a single task.
 
 Queue and retry policy are configured per-provider at the call site (send_task with queue= kwarg).
 """
 
+import math
 from logging import getLogger
 from typing import Any
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from celery import Task, shared_task
 from fastapi import HTTPException
 
+from app.config import settings
 from app.database import SessionLocal
 from app.schemas.sync_status import SyncStatus
-from app.services import sync_status_service
+from app.services import sync_status_service, webhook_claim_check, webhook_coalescer
+from app.services.payload_dedup import (
+    claim_payload,
+    delivery_scope,
+    payload_digest,
+    release_payload,
+    webhook_scope,
+)
 from app.services.providers.factory import ProviderFactory
+from app.services.providers.rate_limiter import ProviderRateLimitedError
 from app.utils.structured_logging import log_structured
 
 logger = getLogger(__name__)
@@ -144,9 +164,28 @@ def process_webhook_push(
     Uses ProviderFactory to resolve the provider's WebhookHandler, then calls
     process_payload() with a fresh DB session. Retries up to 3 times on
     unexpected infrastructure errors.
+
+    A payload identical to one already processed within the dedup TTL (provider
+    redelivery, raw payload replay) is acknowledged without touching the DB.
+    The claim is keyed by task id, so retries and redeliveries of this task are
+    not treated as duplicates, and it is released on failure so a later
+    redelivery of the same payload still gets processed.
     """
     handler = None
     provider_user_id: str | None = None
+    dedup_scope = webhook_scope(provider_name)
+    digest = payload_digest(payload)
+    owner = self.request.id or request_trace_id
+    if not claim_payload(dedup_scope, digest, owner, ttl=settings.webhook_dedup_ttl_seconds):
+        log_structured(
+            logger,
+            "info",
+            "Webhook push skipped — duplicate payload",
+            provider=provider_name,
+            trace_id=request_trace_id,
+            payload_digest=digest,
+        )
+        return {"status": "duplicate", "reason": "duplicate_payload"}
     try:
         strategy = ProviderFactory().get_provider(provider_name)
         handler = strategy.webhooks
@@ -168,6 +207,7 @@ def process_webhook_push(
             provider_user_id=provider_user_id,
             error=str(exc),
         )
+        release_payload(dedup_scope, digest, owner)
         raise
     except HTTPException as exc:
         # Non-retriable upstream 4xx (deleted/unqueryable object): ack so the task
@@ -200,7 +240,10 @@ def process_webhook_push(
             attempt=self.request.retries,
             max_retries=self.max_retries,
         )
-        raise self.retry(exc=exc)
+        release_payload(dedup_scope, digest, owner)
+        # A provider rate limit says when to come back; retry then rather than after the default delay.
+        countdown = math.ceil(exc.retry_after) if isinstance(exc, ProviderRateLimitedError) else None
+        raise self.retry(exc=exc, countdown=countdown)
     except Exception as exc:
         log_structured(
             logger,
@@ -213,4 +256,217 @@ def process_webhook_push(
             attempt=self.request.retries,
             max_retries=self.max_retries,
         )
+        release_payload(dedup_scope, digest, owner)
+        raise self.retry(exc=exc)
+
+
+def _release_delivery(provider_name: str, delivery_key: str | None, delivery_owner: str | None) -> None:
+    """Let the provider's redelivery of a body this task gave up on be processed."""
+    if delivery_key and delivery_owner:
+        release_payload(delivery_scope(provider_name), delivery_key, delivery_owner)
+
+
+@shared_task(
+    bind=True,
+    acks_late=True,
+    reject_on_worker_lost=True,
+    max_retries=3,
+    default_retry_delay=10,
+)
+def process_webhook_body(
+    self: Task,
+    provider_name: str,
+    body_ref: str,
+    request_trace_id: str,
+    delivery_key: str | None = None,
+    delivery_owner: str | None = None,
+) -> dict[str, Any]:
+    """Parse and dispatch a webhook body acknowledged by ``BaseWebhookHandler.handle``.
+
+    The body is deleted from the claim-check store once dispatched (or found
+    malformed); after a failure it stays until the retry reads it again or it
+    expires.  When the task gives up on a body, it releases the delivery's
+    idempotency claim so the provider's redelivery is processed.
+    """
+    try:
+        body = webhook_claim_check.get_body(body_ref)
+    except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            _release_delivery(provider_name, delivery_key, delivery_owner)
+        raise self.retry(exc=exc)
+    if body is None:
+        _release_delivery(provider_name, delivery_key, delivery_owner)
+        log_structured(
+            logger,
+            "error",
+            "Webhook body expired before it was processed",
+            provider=provider_name,
+            trace_id=request_trace_id,
+            body_ref=body_ref,
+        )
+        return {"status": "skipped", "reason": "body_expired"}
+
+    strategy = ProviderFactory().get_provider(provider_name)
+    handler = strategy.webhooks
+    if handler is None:
+        raise ValueError(f"Provider '{provider_name}' has no webhook handler")
+
+    try:
+        payload = handler.parse_payload(body)
+    except HTTPException as exc:
+        log_structured(
+            logger,
+            "warning",
+            "Dropping malformed webhook body",
+            provider=provider_name,
+            trace_id=request_trace_id,
+            size_bytes=len(body),
+            error=str(exc.detail),
+        )
+        webhook_claim_check.delete_body(body_ref)
+        return {"status": "error", "reason": "invalid_payload", "error": str(exc.detail)}
+
+    try:
+        with SessionLocal() as db:
+            result = handler.dispatch(db, payload)
+    except HTTPException as exc:
+        if exc.status_code in _NONRETRIABLE_UPSTREAM_STATUSES:
+            # Same as process_webhook_push: a permanent 4xx will not succeed on retry.
+            log_structured(
+                logger,
+                "warning",
+                "Webhook body skipped — upstream non-retriable response",
+                provider=provider_name,
+                trace_id=request_trace_id,
+                upstream_status=exc.status_code,
+                error=str(exc.detail),
+            )
+            webhook_claim_check.delete_body(body_ref)
+            return {"status": "skipped", "reason": "upstream_non_retriable", "upstream_status": exc.status_code}
+        log_structured(
+            logger,
+            "error",
+            "Webhook dispatch failed, scheduling retry",
+            provider=provider_name,
+            trace_id=request_trace_id,
+            upstream_status=exc.status_code,
+            error=str(exc.detail),
+            attempt=self.request.retries,
+            max_retries=self.max_retries,
+        )
+        if self.request.retries >= self.max_retries:
+            _release_delivery(provider_name, delivery_key, delivery_owner)
+        countdown = math.ceil(exc.retry_after) if isinstance(exc, ProviderRateLimitedError) else None
+        raise self.retry(exc=exc, countdown=countdown)
+    except Exception as exc:
+        log_structured(
+            logger,
+            "error",
+            "Webhook dispatch failed, scheduling retry",
+            provider=provider_name,
+            trace_id=request_trace_id,
+            error=str(exc),
+            attempt=self.request.retries,
+            max_retries=self.max_retries,
+        )
+        if self.request.retries >= self.max_retries:
+            _release_delivery(provider_name, delivery_key, delivery_owner)
+        raise self.retry(exc=exc)
+    webhook_claim_check.delete_body(body_ref)
+    return result
+
+
+def _hand_off(provider_name: str, provider_user_id: str, pending: list[tuple[Any, str]], exc: Exception) -> int:
+    """Enqueue *pending* as individual ``process_webhook_push`` tasks, which retry on their own."""
+    log_structured(
+        logger,
+        "error",
+        "Coalesced webhook processing failed, handing remaining payloads to process_webhook_push",
+        provider=provider_name,
+        trace_id=pending[0][1],
+        provider_user_id=provider_user_id,
+        remaining=len(pending),
+        error=str(exc),
+    )
+    for payload, trace_id in pending:
+        process_webhook_push.apply_async(args=[provider_name, payload, trace_id], queue="webhook_sync")
+    return len(pending)
+
+
+@shared_task(bind=True, acks_late=True, reject_on_worker_lost=True, max_retries=3, default_retry_delay=10)
+def flush_coalesced_webhooks(self: Task, provider_name: str, provider_user_id: str) -> dict[str, Any]:
+    """Process the notifications buffered for one provider user during the coalescing window.
+
+    Every changed object is pulled once, in one DB session.  Payloads already
+    processed within the dedup TTL are skipped as in ``process_webhook_push``.
+    If processing fails, the failed payload and the ones after it are handed
+    to ``process_webhook_push``, which retries them individually.  The
+    notifications are cleared from the buffer only afterwards, so a
+    redelivery after a worker crash picks them up again.
+    """
+    try:
+        pending, received = webhook_coalescer.take(provider_name, provider_user_id)
+    except Exception as exc:
         raise self.retry(exc=exc)
+    if not pending:
+        webhook_coalescer.done(provider_name, provider_user_id)
+        return {"status": "empty", "received": received}
+
+    handler = ProviderFactory().get_provider(provider_name).webhooks
+    if handler is None:
+        raise ValueError(f"Provider '{provider_name}' has no webhook handler")
+
+    dedup_scope = webhook_scope(provider_name)
+    owner = self.request.id or uuid4().hex
+    processed = duplicates = handed_off = 0
+    with SessionLocal() as db:
+        for index, (payload, trace_id) in enumerate(pending):
+            digest = payload_digest(payload)
+            if not claim_payload(dedup_scope, digest, owner, ttl=settings.webhook_dedup_ttl_seconds):
+                duplicates += 1
+                continue
+            try:
+                result = handler.process_payload(db, payload, trace_id)
+            except HTTPException as exc:
+                if exc.status_code not in _NONRETRIABLE_UPSTREAM_STATUSES:
+                    release_payload(dedup_scope, digest, owner)
+                    handed_off = _hand_off(provider_name, provider_user_id, pending[index:], exc)
+                    break
+                log_structured(
+                    logger,
+                    "warning",
+                    "Coalesced webhook skipped — upstream non-retriable response",
+                    provider=provider_name,
+                    trace_id=trace_id,
+                    provider_user_id=provider_user_id,
+                    upstream_status=exc.status_code,
+                    error=str(exc.detail),
+                )
+                continue
+            except Exception as exc:
+                release_payload(dedup_scope, digest, owner)
+                handed_off = _hand_off(provider_name, provider_user_id, pending[index:], exc)
+                break
+            _emit_webhook_sync_status(provider_name, result)
+            processed += 1
+    webhook_coalescer.done(provider_name, provider_user_id)
+
+    log_structured(
+        logger,
+        "info",
+        "Coalesced webhook notifications processed",
+        provider=provider_name,
+        action="webhook_coalesced_flush",
+        provider_user_id=provider_user_id,
+        received=received,
+        pulled=processed,
+        duplicates=duplicates,
+        handed_off=handed_off,
+    )
+    return {
+        "status": "processed",
+        "received": received,
+        "processed": processed,
+        "duplicates": duplicates,
+        "handed_off": handed_off,
+    }
@@ -22,3 +22,20 @@ def get_redis_client() -> redis.Redis:
         settings.redis_url,
         decode_responses=True,
     )
+
+
+@lru_cache()
+def get_binary_redis_client() -> redis.Redis:
+    """
+    Get a singleton Redis client that returns raw bytes.
+
+    For values that are not UTF-8 text (e.g. webhook request bodies), which
+    the decoding client of get_redis_client() cannot read back.
+
+    Returns:
+        redis.Redis: Redis client instance without response decoding
+    """
+    return redis.from_url(
+        settings.redis_url,
+        decode_responses=False,
+    )
@@ -18,6 +18,7 @@ from app.integrations.celery import create_celery
 from app.integrations.sentry import init_sentry
 from app.middlewares import add_access_log_middleware, add_cors_middleware
 from app.services import raw_payload_storage
+from app.services.apple.apple_xml.upload_spool import check_upload_storage
 from app.services.outgoing_webhooks import svix as svix_service
 from app.utils.exceptions import DatetimeParseError, handle_exception
 
@@ -49,6 +50,7 @@ async def _lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
     # dictConfig that re-creates the logger and undoes an import-time disable. Lifespan
     # runs after it, so add_access_log_middleware stays the single access-log source.
     logging.getLogger("uvicorn.access").disabled = True
+    check_upload_storage()
     svix_service.register_event_types()
     yield
 
@@ -63,6 +65,11 @@ raw_payload_storage.configure(
     s3_prefix=settings.raw_payload_s3_prefix,
     s3_endpoint_url=settings.raw_payload_s3_endpoint_url,
     fit_files_enabled=settings.store_fit_files,
+    batch_max_bytes=settings.raw_payload_batch_max_bytes,
+    queue_size=settings.raw_payload_queue_size,
+    local_dir=settings.raw_payload_local_dir,
+    segment_max_bytes=settings.raw_payload_segment_max_bytes,
+    segment_max_seconds=settings.raw_payload_segment_max_seconds,
 )
 
 add_cors_middleware(api)
@@ -20,6 +20,7 @@ from .sleep_details import SleepDetails
 from .user import User
 from .user_connection import UserConnection
 from .user_invitation_code import UserInvitationCode
+from .webhook_outbox import WebhookOutbox
 from .workout_details import WorkoutDetails
 
 # Single source of truth mapping detail_type -> concrete model, derived from the
@@ -53,6 +54,7 @@ __all__ = [
     "DataPointSeries",
     "SeriesTypeDefinition",
     "HealthScore",
+    "WebhookOutbox",
     "DetailType",
     "DETAIL_MODELS",
 ]
@@ -0,0 +1,40 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import BigInteger, Identity, Index, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.database import BaseDbModel
+
+
+class WebhookOutbox(BaseDbModel):
+    """Outgoing webhook event written in the same transaction as the data it announces.
+
+    Rows are drained in ``id`` order by the ``drain_webhook_outbox`` task and
+    deleted once Svix accepted every delivery.  Failed rows are retried after
+    ``available_at``; rows that exhausted their attempts keep ``failed_at``
+    set and are no longer drained; they are deleted after
+    ``webhook_outbox_parked_retention_days``.
+
+    - event: batch entry as built by ``events.batched_webhooks`` (event types,
+      shared ``data``, idempotency keys, channels).  Timeseries entries carry
+      their own chunk of at most ``SVIX_MAX_SAMPLES_PER_EVENT`` samples.
+    """
+
+    __tablename__ = "webhook_outbox"
+    __table_args__ = (
+        Index(
+            "idx_webhook_outbox_pending",
+            "available_at",
+            "id",
+            postgresql_where="failed_at IS NULL",
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    event: Mapped[dict[str, Any]] = mapped_column(JSONB)
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    available_at: Mapped[datetime] = mapped_column(server_default=func.now())
+    last_error: Mapped[str | None]
+    failed_at: Mapped[datetime | None]
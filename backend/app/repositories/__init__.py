@@ -12,6 +12,7 @@ from .refresh_token_repository import RefreshTokenRepository, refresh_token_repo
 from .repositories import CrudRepository
 from .user_connection_repository import UserConnectionRepository
 from .user_repository import UserRepository
+from .webhook_outbox_repository import WebhookOutboxRepository
 
 __all__ = [
     "UserRepository",
@@ -30,4 +31,5 @@ __all__ = [
     "InvitationRepository",
     "CrudRepository",
     "HealthScoreRepository",
+    "WebhookOutboxRepository",
 ]
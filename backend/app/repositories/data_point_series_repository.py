@@ -3,7 +3,21 @@ from datetime import datetime, time, timedelta
 from uuid import UUID
 
 from psycopg.errors import UniqueViolation
-from sqlalchemy import ColumnElement, Date, Interval, String, and_, asc, case, cast, func, literal_column, text, tuple_
+from sqlalchemy import (
+    ColumnElement,
+    Date,
+    Interval,
+    String,
+    and_,
+    asc,
+    case,
+    cast,
+    func,
+    literal_column,
+    or_,
+    text,
+    tuple_,
+)
 from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.exc import IntegrityError as SQLAIntegrityError
 
@@ -41,9 +55,10 @@ class WriteCounts(int):
     Behaves as ``inserted + updated`` so existing int-based callers (sums,
     ``records_saved`` logging, ``dict[str, int]`` results) keep working
     unchanged, while callers that care about the difference can read
-    ``.inserted`` (rows that did not exist) and ``.updated`` (rows refreshed
-    in place via ON CONFLICT). Distinguishing the two is what stops a pure
-    upsert-in-place from looking like newly arrived data.
+    ``.inserted`` (rows that did not exist) and ``.updated`` (rows whose values
+    actually changed via ON CONFLICT). Distinguishing the two is what stops a pure
+    upsert-in-place from looking like newly arrived data; conflicting rows with
+    identical values (replays, retries) are not rewritten and count as neither.
     """
 
     inserted: int
@@ -112,7 +127,7 @@ class DataPointSeriesRepository(
         - Inserts data points in a single batch
 
         Returns the number of rows actually written, split into inserted (new)
-        vs updated (refreshed in place via ON CONFLICT).
+        vs updated (changed in place via ON CONFLICT). Unchanged rows are skipped.
         """
         if not creators:
             return WriteCounts(0, 0)
@@ -163,7 +178,8 @@ class DataPointSeriesRepository(
         Returns the split of rows actually written (inserted vs updated). The split
         is derived from ``RETURNING (xmax = 0)`` on the same upsert statement — a
         freshly inserted row has ``xmax = 0``, an updated (conflicting) row does
-        not — so it costs no extra query or round-trip.
+        not — so it costs no extra query or round-trip. Conflicting rows whose
+        values are unchanged are left untouched (no dead tuple, not returned).
         """
         values_list = []
         for creator in creators:
@@ -209,6 +225,14 @@ class DataPointSeriesRepository(
                         "zone_offset": stmt.excluded.zone_offset,
                         "is_daily_total": stmt.excluded.is_daily_total,
                     },
+                    # Skip the rewrite when a replayed sample carries identical values, so
+                    # re-uploads don't bloat the table and `updated` only counts real changes.
+                    where=or_(
+                        self.model.value.is_distinct_from(stmt.excluded.value),
+                        self.model.external_id.is_distinct_from(stmt.excluded.external_id),
+                        self.model.zone_offset.is_distinct_from(stmt.excluded.zone_offset),
+                        self.model.is_daily_total.is_distinct_from(stmt.excluded.is_daily_total),
+                    ),
                     # RETURNING (xmax = 0): true = row freshly inserted, false = hit a
                     # conflict and was updated in place. Same statement, no extra round-trip.
                 ).returning(literal_column("(xmax = 0)"))
@@ -294,6 +318,9 @@ class DataPointSeriesRepository(
         if params.source:
             query = query.filter(DataSource.source == params.source)
 
+        if params.provider:
+            query = query.filter(self._webhook_provider_filter(params.provider))
+
         if params.start_datetime:
             query = query.filter(self.model.recorded_at >= params.start_datetime)
 
@@ -336,6 +363,17 @@ class DataPointSeriesRepository(
         limit = params.limit or 50
         return query.limit(limit + 1).all(), total_count  # ty:ignore[invalid-return-type]
 
+    @staticmethod
+    def _webhook_provider_filter(provider: str) -> ColumnElement[bool]:
+        """Filter on the provider a timeseries webhook names.
+
+        Webhooks name the sample's provider, or its source when it had none.
+        """
+        try:
+            return DataSource.provider == ProviderName(provider)
+        except ValueError:
+            return DataSource.source == provider
+
     def get_total_count(self, db_session: DbSession) -> int:
         """Get total count of all data points."""
         return db_session.query(func.count(self.model.id)).scalar() or 0
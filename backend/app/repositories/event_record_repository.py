@@ -969,6 +969,29 @@ class EventRecordRepository(
             .first()
         )
 
+    def get_sleep_session_windows(
+        self,
+        db_session: DbSession,
+        user_id: UUID,
+        start_dt: datetime,
+        end_dt: datetime,
+    ) -> list[tuple[datetime, datetime]]:
+        """Return ``(start, end)`` of the user's sleep sessions overlapping [start_dt, end_dt], ordered by start."""
+        rows = (
+            db_session.query(self.model.start_datetime, self.model.end_datetime)
+            .join(DataSource, self.model.data_source_id == DataSource.id)
+            .filter(
+                DataSource.user_id == user_id,
+                self.model.category == "sleep",
+                self.model.type == "sleep_session",
+                self.model.end_datetime >= start_dt,
+                self.model.start_datetime <= end_dt,
+            )
+            .order_by(self.model.start_datetime)
+            .all()
+        )
+        return [(start, end) for start, end in rows]
+
     def get_sleep_records_with_details(
         self,
         db_session: DbSession,
@@ -0,0 +1,67 @@
+"""Repository for the outgoing webhook outbox."""
+
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, delete, func, insert, select
+
+from app.database import DbSession
+from app.models import WebhookOutbox
+
+# Upper bound on the delay between two delivery attempts of one row.
+MAX_RETRY_DELAY = timedelta(hours=1)
+
+
+class WebhookOutboxRepository:
+    """Writes outbox rows with the data they announce and claims them for delivery."""
+
+    def add(self, db: DbSession, events: Sequence[dict[str, Any]]) -> None:
+        """Insert one row per event in the session's transaction (the caller commits)."""
+        if events:
+            db.execute(insert(WebhookOutbox), [{"event": event} for event in events])
+
+    def claim(self, db: DbSession, limit: int) -> list[WebhookOutbox]:
+        """Lock the oldest deliverable rows, skipping rows another drainer holds."""
+        return list(
+            db.scalars(
+                select(WebhookOutbox)
+                .where(WebhookOutbox.failed_at.is_(None), WebhookOutbox.available_at <= func.now())
+                .order_by(WebhookOutbox.id)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        )
+
+    def delete(self, db: DbSession, ids: Sequence[int]) -> None:
+        if ids:
+            db.execute(delete(WebhookOutbox).where(WebhookOutbox.id.in_(ids)))
+
+    def purge_parked(self, db: DbSession, older_than: datetime) -> int:
+        """Delete rows parked before *older_than*; return how many."""
+        stmt = delete(WebhookOutbox).where(WebhookOutbox.failed_at.is_not(None), WebhookOutbox.failed_at < older_than)
+        result = cast(CursorResult[tuple[()]], db.execute(stmt))
+        return result.rowcount or 0
+
+    def reschedule(
+        self,
+        db: DbSession,
+        rows: Sequence[WebhookOutbox],
+        error: str,
+        *,
+        max_attempts: int,
+        base_delay_seconds: int,
+    ) -> list[WebhookOutbox]:
+        """Record a failed attempt with exponential backoff; return the rows that are now parked."""
+        now = datetime.now(timezone.utc)
+        parked: list[WebhookOutbox] = []
+        for row in rows:
+            row.attempts += 1
+            row.last_error = error
+            if row.attempts >= max_attempts:
+                row.failed_at = now
+                parked.append(row)
+            else:
+                delay = timedelta(seconds=base_delay_seconds * 2 ** (row.attempts - 1))
+                row.available_at = now + min(delay, MAX_RETRY_DELAY)
+        return parked
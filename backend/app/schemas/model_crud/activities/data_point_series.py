@@ -67,6 +67,10 @@ class TimeSeriesQueryParams(BaseModel):
         description="Device model filter",
     )
     source: str | None = Field(None, description="Optional data source filter")
+    provider: str | None = Field(
+        None,
+        description="Provider named by a timeseries webhook (the source for samples without a provider)",
+    )
     data_source_id: UUID | None = Field(
         None,
         description="Direct data source identifier filter.",
@@ -1,5 +1,6 @@
 from collections import Counter
 from dataclasses import dataclass, field
+from typing import Any
 
 
 @dataclass
@@ -15,6 +16,11 @@ class ParseMetric:
         self.skipped += 1
         self.reasons[reason] += 1
 
+    def merge(self, other: "ParseMetric") -> None:
+        self.processed += other.processed
+        self.skipped += other.skipped
+        self.reasons.update(other.reasons)
+
 
 @dataclass
 class XMLParseStats:
@@ -32,3 +38,29 @@ class XMLParseStats:
         workout_reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.workouts.reasons.items()))
         sleep_reasons = ", ".join(f"{reason}: {count}" for reason, count in sorted(self.sleep.reasons.items()))
         return {"records": record_reasons, "workouts": workout_reasons, "sleep": sleep_reasons}
+
+    def merge(self, other: "XMLParseStats") -> None:
+        """Add another run's counts (e.g. one shard of a sharded import) to these stats."""
+        self.records.merge(other.records)
+        self.workouts.merge(other.workouts)
+        self.sleep.merge(other.sleep)
+
+    def to_dict(self) -> dict[str, Any]:
+        """JSON-serializable form, for passing stats between Celery tasks."""
+        return {
+            name: {"processed": metric.processed, "skipped": metric.skipped, "reasons": dict(metric.reasons)}
+            for name, metric in (("records", self.records), ("workouts", self.workouts), ("sleep", self.sleep))
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "XMLParseStats":
+        return cls(
+            **{
+                name: ParseMetric(
+                    processed=metric["processed"],
+                    skipped=metric["skipped"],
+                    reasons=Counter(metric["reasons"]),
+                )
+                for name, metric in data.items()
+            }
+        )
@@ -6,6 +6,7 @@ from .sync_results import (
 from .system_info import (
     ConnectionsCoverage,
     DataPointsInfo,
+    DedupCounts,
     EventRecordsInfo,
     MetricCount,
     ProviderConnectionCount,
@@ -25,6 +26,7 @@ __all__ = [
     # System info
     "ConnectionsCoverage",
     "DataPointsInfo",
+    "DedupCounts",
     "EventRecordsInfo",
     "MetricCount",
     "ProviderConnectionCount",
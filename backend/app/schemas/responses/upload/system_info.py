@@ -38,6 +38,13 @@ class ConnectionsCoverage(BaseModel):
     top_providers: list[ProviderConnectionCount]
 
 
+class DedupCounts(BaseModel):
+    """Payloads skipped as duplicates (hits) and first seen (misses) for one dedup metric."""
+
+    hits: int
+    misses: int
+
+
 class SystemInfoResponse(BaseModel):
     """Dashboard system information response."""
 
@@ -46,3 +53,4 @@ class SystemInfoResponse(BaseModel):
     data_points: DataPointsInfo
     event_records: EventRecordsInfo
     connections_coverage: ConnectionsCoverage
+    payload_dedup: dict[str, DedupCounts]
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from enum import StrEnum
 from uuid import UUID
 
 from pydantic import AnyHttpUrl, BaseModel, Field, field_validator
@@ -16,6 +17,14 @@ def _validate_url(value: str) -> str:
     return value
 
 
+class WebhookPayloadMode(StrEnum):
+    """How timeseries events are shaped for an endpoint (other events are always delivered in full)."""
+
+    FULL = "full"  # every sample as an object
+    COLUMNAR = "columnar"  # parallel arrays, unit and source listed once
+    REFERENCE = "reference"  # counts, time bounds and a signed URL to fetch the samples
+
+
 class EndpointCreateRequest(BaseModel):
     url: str = Field(description="HTTPS URL where webhook payloads will be sent.")
     description: str | None = Field(None, description="Human-readable label for this endpoint.")
@@ -27,6 +36,10 @@ class EndpointCreateRequest(BaseModel):
         None,
         description="Subscribe only to events for this user. Empty / None = all users.",
     )
+    payload_mode: WebhookPayloadMode = Field(
+        WebhookPayloadMode.FULL,
+        description="Shape of timeseries event payloads delivered to this endpoint.",
+    )
 
     @field_validator("url")
     @classmethod
@@ -42,6 +55,7 @@ class EndpointUpdateRequest(BaseModel):
         None,
         description="Subscribe only to events for this user. Pass null to remove the filter.",
     )
+    payload_mode: WebhookPayloadMode | None = None
 
     @field_validator("url")
     @classmethod
@@ -57,6 +71,7 @@ class EndpointResponse(BaseModel):
     description: str | None = None
     filter_types: list[str] | None = None
     user_id: UUID | None = None
+    payload_mode: WebhookPayloadMode = WebhookPayloadMode.FULL
 
     model_config = {"from_attributes": True}
 
@@ -0,0 +1,173 @@
+"""Byte-offset checkpoints for resumable Apple Health XML imports.
+
+An import that dies halfway (worker killed, redeploy, lost database
+connection) is redelivered or retried under the same Celery task id.  After
+every written export segment the task records how far it got, so the next
+attempt skips the part that is already in the database instead of starting
+over from byte 0.
+
+Redis keys:
+
+  xml_import:checkpoint:{import_id}
+      JSON ``{"offset", "run_id", "stats"}``: the export offset the import
+      can resume from, the sync-status run it reports to, and the parse
+      stats up to that offset.  Expires after ``xml_checkpoint_ttl_seconds``.
+
+  xml_import:sleep:{import_id}
+      List of JSON sleep records parsed before the checkpoint offset.  Sleep
+      is sessionized once, over the whole export, when the import finishes,
+      so the records read before an interruption are kept here until then.
+      Appended in the same transaction as the checkpoint; same expiry.
+
+  xml_import:lease:{import_id}
+      Token of the run currently importing *import_id*.  Kept alive by a
+      heartbeat every third of ``xml_import_lease_seconds``, so it expires
+      shortly after its worker dies.  A broker redelivery that finds the
+      lease held exits instead of importing the same export concurrently.
+
+Redis failures never fail an import: a checkpoint that cannot be saved or
+read only means a retry starts from the beginning again, which is safe
+because every write is an idempotent upsert.  For the same reason a lease
+that cannot be taken is treated as free.
+"""
+
+import json
+import logging
+import threading
+import uuid
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.schemas.providers.apple.apple_xml import XMLParseStats
+from app.schemas.providers.mobile_sdk import SleepRecord
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "xml_import:checkpoint"
+_SLEEP_PREFIX = "xml_import:sleep"
+_LEASE_PREFIX = "xml_import:lease"
+
+# Extend / release the lease only while it still holds this run's token.
+_RENEW_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("pexpire", KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class ImportCheckpoint:
+    offset: int
+    run_id: str
+    stats: XMLParseStats
+    # Sleep records before ``offset``; only filled in by load_checkpoint.
+    sleep: list[SleepRecord] = field(default_factory=list)
+
+
+def _key(import_id: str) -> str:
+    return f"{_PREFIX}:{import_id}"
+
+
+def _sleep_key(import_id: str) -> str:
+    return f"{_SLEEP_PREFIX}:{import_id}"
+
+
+def load_checkpoint(import_id: str) -> ImportCheckpoint | None:
+    """Return the last checkpoint saved for *import_id*, if any."""
+    try:
+        client = get_redis_client()
+        raw = client.get(_key(import_id))
+        if raw is None:
+            return None
+        data = json.loads(raw)
+        return ImportCheckpoint(
+            offset=int(data["offset"]),
+            run_id=str(data["run_id"]),
+            stats=XMLParseStats.from_dict(data["stats"]),
+            sleep=[SleepRecord.model_validate_json(record) for record in client.lrange(_sleep_key(import_id), 0, -1)],
+        )
+    except Exception as exc:
+        logger.warning("Failed to load XML import checkpoint, starting from the beginning: %s", exc)
+        return None
+
+
+def save_checkpoint(import_id: str, checkpoint: ImportCheckpoint, new_sleep: Sequence[SleepRecord] = ()) -> None:
+    """Record that everything before ``checkpoint.offset`` has been read.
+
+    *new_sleep* are the sleep records parsed since the previous checkpoint;
+    they are appended to the ones already saved.
+    """
+    payload = json.dumps(
+        {"offset": checkpoint.offset, "run_id": checkpoint.run_id, "stats": checkpoint.stats.to_dict()},
+        separators=(",", ":"),
+    )
+    ttl = settings.xml_checkpoint_ttl_seconds
+    try:
+        pipe = get_redis_client().pipeline(transaction=True)
+        if new_sleep:
+            pipe.rpush(_sleep_key(import_id), *(record.model_dump_json() for record in new_sleep))
+        pipe.expire(_sleep_key(import_id), ttl)
+        pipe.set(_key(import_id), payload, ex=ttl)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to save XML import checkpoint at byte %s: %s", checkpoint.offset, exc)
+
+
+def clear_checkpoint(import_id: str) -> None:
+    """Forget the checkpoint of a finished (or permanently failed) import."""
+    try:
+        get_redis_client().delete(_key(import_id), _sleep_key(import_id))
+    except Exception as exc:
+        logger.warning("Failed to clear XML import checkpoint: %s", exc)
+
+
+@contextmanager
+def import_lease(import_id: str) -> Generator[bool, None, None]:
+    """Hold the import lease for *import_id* for the duration of the block.
+
+    Yields False when another live run holds it; the caller must then leave
+    the import (and its upload and checkpoint) alone.
+    """
+    key = f"{_LEASE_PREFIX}:{import_id}"
+    token = uuid.uuid4().hex
+    ttl_ms = settings.xml_import_lease_seconds * 1000
+    try:
+        client = get_redis_client()
+        if not client.set(key, token, nx=True, px=ttl_ms):
+            yield False
+            return
+    except Exception as exc:
+        logger.warning("Failed to take XML import lease, importing without it: %s", exc)
+        yield True
+        return
+
+    stop = threading.Event()
+
+    def heartbeat() -> None:
+        while not stop.wait(settings.xml_import_lease_seconds / 3):
+            try:
+                client.eval(_RENEW_LUA, 1, key, token, ttl_ms)
+            except Exception as exc:
+                logger.warning("Failed to renew XML import lease: %s", exc)
+
+    thread = threading.Thread(target=heartbeat, name=f"xml-lease-{import_id}", daemon=True)
+    thread.start()
+    try:
+        yield True
+    finally:
+        stop.set()
+        thread.join()
+        try:
+            client.eval(_RELEASE_LUA, 1, key, token)
+        except Exception as exc:
+            logger.warning("Failed to release XML import lease: %s", exc)
@@ -0,0 +1,90 @@
+"""Overlap export parsing with database writes.
+
+Without a pipeline an import alternates between parsing a chunk (CPU) and
+writing it (mostly waiting on Postgres), so its wall-clock time is the sum of
+both.  :func:`prefetch_chunks` runs the parser in a background thread that
+stays up to ``depth`` chunks ahead of the caller, bringing the import down to
+roughly ``max(parse, write)``.
+
+The database session never leaves the calling thread — only parsed chunks
+cross the queue.  ``depth`` bounds how many parsed-but-unwritten chunks are
+held in memory (each is up to ``xml_chunk_size`` records).
+"""
+
+import contextvars
+import queue
+import threading
+from collections.abc import Generator, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+# How often a producer blocked on a full queue checks whether the consumer gave up.
+_PUT_POLL_SECONDS = 0.5
+
+_DONE = object()
+
+
+@dataclass(frozen=True)
+class _ProducerError:
+    error: BaseException
+
+
+def prefetch_chunks[T](chunks: Iterable[T], depth: int) -> Generator[T, None, None]:
+    """Yield items of *chunks* while a background thread produces the next ones.
+
+    Exceptions raised while producing are re-raised in the consumer at the
+    point the failed chunk would have been yielded.  If the consumer stops
+    early (error or ``close()``), the producer is told to stop, the source
+    iterator is closed in the producer thread, and the thread is joined
+    before this generator returns.  ``depth <= 0`` disables prefetching.
+    """
+    if depth <= 0:
+        yield from chunks
+        return
+
+    buffer: queue.Queue[Any] = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+
+    def _offer(item: object) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=_PUT_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _produce() -> None:
+        iterator = iter(chunks)
+        try:
+            for chunk in iterator:
+                if not _offer(chunk):
+                    return
+        except BaseException as exc:  # re-raised in the consumer thread
+            _offer(_ProducerError(exc))
+            return
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+        _offer(_DONE)
+
+    # copy_context keeps trace ids and other ContextVars visible to the parser's log lines.
+    producer = threading.Thread(
+        target=contextvars.copy_context().run,
+        args=(_produce,),
+        name="xml-import-parser",
+        daemon=True,
+    )
+    producer.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _DONE:
+                return
+            if isinstance(item, _ProducerError):
+                raise item.error
+            yield item
+    finally:
+        stop.set()
+        producer.join()
@@ -0,0 +1,285 @@
+"""Byte-range sharding of a plain Apple Health export.xml.
+
+A sharded import splits the body of ``<HealthData>`` into byte ranges that
+start on a top-level element, so each range can be parsed independently by a
+separate worker.  A shard is read as a standalone document: the export's
+prolog (XML declaration, DOCTYPE and the ``<HealthData>`` start tag), the
+shard's byte range, and a closing ``</HealthData>``.
+
+Boundaries rely on the layout the Health app writes: every top-level element
+starts on its own line indented by exactly one space, nested elements (the
+Records inside a Correlation, a Workout's statistics) by two or more.  Files
+that do not follow that layout get a single shard, and the caller imports
+them the regular way.
+
+:func:`iter_export_segments` applies the same boundaries to a forward-only
+stream (e.g. export.xml read straight out of a zip): it cuts the export into
+consecutive segments one after another, so an import can record the offset
+of every finished segment and later resume from it.
+"""
+
+import io
+import math
+import re
+from collections.abc import Buffer, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+from typing import IO, BinaryIO
+
+# Bytes kept between scanned blocks so an element start split across two reads is still found.
+_BOUNDARY_OVERLAP = 32
+
+_HEAD_BYTES = 1024 * 1024  # the DOCTYPE of a real export is ~10 KB
+_TAIL_BYTES = 64 * 1024  # ActivitySummary lines after the last record are short
+_SCAN_BYTES = 1024 * 1024
+_READ_BUFFER_BYTES = 1024 * 1024
+
+_HEALTH_DATA_OPEN = re.compile(rb"<HealthData\b[^>]*>")
+_HEALTH_DATA_CLOSE = b"</HealthData>"
+_TOP_LEVEL_ELEMENT = re.compile(rb"\n <(?:Record|Workout|Correlation|ActivitySummary)\b")
+
+
+@dataclass(frozen=True)
+class ExportShard:
+    """Byte range ``[start, end)`` of an export, plus where its prolog ends."""
+
+    header_end: int
+    start: int
+    end: int
+
+
+def _next_top_level_element(file: BinaryIO, offset: int, limit: int) -> int | None:
+    """Return the offset of the first top-level element starting at or after *offset*."""
+    position = max(0, offset - 1)  # include the newline in front of an element starting exactly at offset
+    file.seek(position)
+    carry = b""
+    while position < limit:
+        block = file.read(min(_SCAN_BYTES, limit - position))
+        if not block:
+            return None
+        window = carry + block
+        match = _TOP_LEVEL_ELEMENT.search(window)
+        if match is not None:
+            return position - len(carry) + match.start() + 1
+        position += len(block)
+        carry = window[-32:]
+    return None
+
+
+def plan_export_shards(path: Path, shard_bytes: int, max_shards: int) -> list[ExportShard]:
+    """Split the body of an export.xml into at most *max_shards* ranges of about *shard_bytes*.
+
+    Returns a single shard when the file is small or its layout is not recognised.
+    Returns an empty list when it does not look like an Apple Health export at all.
+    """
+    size = path.stat().st_size
+    with path.open("rb") as file:
+        opening = _HEALTH_DATA_OPEN.search(file.read(_HEAD_BYTES))
+        if opening is None:
+            return []
+        header_end = opening.end()
+
+        tail_start = max(header_end, size - _TAIL_BYTES)
+        file.seek(tail_start)
+        closing = file.read().rfind(_HEALTH_DATA_CLOSE)
+        if closing < 0:
+            return []
+        body_end = tail_start + closing
+
+        body = body_end - header_end
+        count = min(max_shards, math.ceil(body / max(1, shard_bytes)))
+        boundaries = [header_end]
+        for index in range(1, count):
+            target = header_end + body * index // count
+            if target <= boundaries[-1]:
+                continue
+            boundary = _next_top_level_element(file, target, body_end)
+            if boundary is None:
+                break
+            if boundary > boundaries[-1]:
+                boundaries.append(boundary)
+        boundaries.append(body_end)
+
+    return [ExportShard(header_end=header_end, start=start, end=end) for start, end in pairwise(boundaries)]
+
+
+class _ShardReader(io.RawIOBase):
+    """Raw stream over the prolog, one byte range, and the closing tag."""
+
+    def __init__(self, file: io.FileIO, shard: ExportShard) -> None:
+        super().__init__()
+        self._file = file
+        self._ranges = [(0, shard.header_end), (shard.start, shard.end)]
+        self._trailer = b"\n" + _HEALTH_DATA_CLOSE + b"\n"
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer: Buffer, /) -> int:
+        view = memoryview(buffer).cast("B")
+        while self._ranges:
+            start, end = self._ranges[0]
+            if start >= end:
+                self._ranges.pop(0)
+                continue
+            self._file.seek(start)
+            read = self._file.readinto(view[: min(len(view), end - start)])
+            if not read:
+                raise EOFError(f"Export ended at byte {start}, expected data up to byte {end}")
+            self._ranges[0] = (start + read, end)
+            return read
+        read = min(len(view), len(self._trailer))
+        view[:read] = self._trailer[:read]
+        self._trailer = self._trailer[read:]
+        return read
+
+
+@contextmanager
+def open_export_shard(path: Path, shard: ExportShard) -> Generator[IO[bytes], None, None]:
+    """Open one shard of an export.xml as a well-formed XML byte stream."""
+    with path.open("rb", buffering=0) as file:
+        yield io.BufferedReader(_ShardReader(file, shard), _READ_BUFFER_BYTES)
+
+
+class _ExportCursor:
+    """Forward-only reader over an export stream that can push back bytes read past a boundary."""
+
+    def __init__(self, stream: IO[bytes], position: int, pending: bytes) -> None:
+        self._stream = stream
+        self._pending = pending
+        self.position = position
+
+    def read(self, size: int) -> bytes:
+        if self._pending:
+            data, self._pending = self._pending[:size], self._pending[size:]
+        else:
+            data = self._stream.read(size)
+        self.position += len(data)
+        return data
+
+    def unread(self, data: bytes) -> None:
+        self._pending = data + self._pending
+        self.position -= len(data)
+
+    def skip_to(self, offset: int) -> None:
+        while self.position < offset:
+            if not self.read(min(_SCAN_BYTES, offset - self.position)):
+                raise EOFError(f"Export ended at byte {self.position}, cannot resume from byte {offset}")
+
+
+class ExportSegment(io.RawIOBase):
+    """One segment of an export read sequentially, as a standalone XML document.
+
+    Emits the export's prolog, the body from ``start`` up to the first
+    top-level element at or after ``start + segment_bytes``, and a closing
+    ``</HealthData>``.  The last segment runs to the end of the stream and
+    keeps the export's own closing tag.
+    """
+
+    def __init__(self, cursor: _ExportCursor, prolog: bytes, segment_bytes: int) -> None:
+        super().__init__()
+        self._cursor = cursor
+        self.start = cursor.position
+        self._split_at = self.start + segment_bytes if segment_bytes > 0 else None
+        self._out = memoryview(prolog)
+        self._carry = b""
+        self._body_done = False
+        self._trailer = b""
+        self._end: int | None = None
+        self._final = False
+
+    def readable(self) -> bool:
+        return True
+
+    @property
+    def position(self) -> int:
+        """Export offset up to which this segment has been read."""
+        return self._cursor.position
+
+    @property
+    def end(self) -> int:
+        """Offset where the segment ends and the next one starts; reads through any unconsumed rest first."""
+        self._drain()
+        assert self._end is not None
+        return self._end
+
+    @property
+    def final(self) -> bool:
+        """Whether this segment runs to the end of the export."""
+        self._drain()
+        return self._final
+
+    def _drain(self) -> None:
+        while self.read(_SCAN_BYTES):
+            pass
+
+    def _next_body_block(self) -> None:
+        data = self._cursor.read(_SCAN_BYTES)
+        window = self._carry + data
+        if not data:
+            self._out = memoryview(window)
+            self._body_done, self._final, self._end = True, True, self._cursor.position
+            return
+        window_start = self._cursor.position - len(window)
+        if self._split_at is not None and window_start + len(window) > self._split_at:
+            # Search from the newline in front of an element starting exactly at the split offset.
+            match = _TOP_LEVEL_ELEMENT.search(window, max(0, self._split_at - 1 - window_start))
+            if match is not None:
+                boundary = match.start() + 1
+                self._cursor.unread(window[boundary:])
+                self._out = memoryview(window[:boundary])
+                self._body_done, self._end = True, window_start + boundary
+                self._trailer = b"\n" + _HEALTH_DATA_CLOSE + b"\n"
+                return
+        self._out = memoryview(window[:-_BOUNDARY_OVERLAP])
+        self._carry = window[-_BOUNDARY_OVERLAP:]
+
+    def readinto(self, buffer: Buffer, /) -> int:
+        view = memoryview(buffer).cast("B")
+        while not self._out:
+            if self._body_done:
+                self._out, self._trailer = memoryview(self._trailer), b""
+                if not self._out:
+                    return 0
+            else:
+                self._next_body_block()
+        read = min(len(view), len(self._out))
+        view[:read] = self._out[:read]
+        self._out = self._out[read:]
+        return read
+
+
+def iter_export_segments(
+    stream: IO[bytes], segment_bytes: int, resume_from: int = 0
+) -> Generator[ExportSegment, None, None]:
+    """Cut an export stream into consecutive segments of about *segment_bytes*.
+
+    Each segment must be parsed (or left alone) before the next one is
+    requested; whatever the caller did not read is skipped.  *resume_from* is
+    the ``end`` of a previously finished segment of the same export — the
+    bytes before it are skipped without being parsed.  ``segment_bytes <= 0``
+    yields the whole export as a single segment.  A stream that does not look
+    like an Apple Health export is yielded unchanged, as a single segment.
+    """
+    head = stream.read(_HEAD_BYTES)
+    opening = _HEALTH_DATA_OPEN.search(head)
+    if opening is None:
+        yield ExportSegment(_ExportCursor(stream, 0, head), b"", 0)
+        return
+
+    header_end = opening.end()
+    cursor = _ExportCursor(stream, header_end, head[header_end:])
+    if resume_from > header_end:
+        cursor.skip_to(resume_from)
+        lead = cursor.read(2)
+        cursor.unread(lead)
+        if lead != b" <":
+            raise ValueError(f"Byte {resume_from} is not the start of a top-level element, cannot resume there")
+
+    while True:
+        segment = ExportSegment(cursor, head[:header_end], segment_bytes)
+        yield segment
+        if segment.final:
+            return
@@ -0,0 +1,164 @@
+"""Spooling for direct Apple Health export uploads.
+
+Exports routinely exceed 1-2 GB, so the direct-upload route never holds the
+file in memory or ships it through the Celery broker. The request body is
+copied to upload storage in fixed-size chunks and only a reference to it is
+enqueued; the worker imports it and discards it when done.
+
+Upload storage (``settings.xml_upload_storage``):
+
+  local
+      ``settings.xml_upload_dir``; the reference is the file path.  The API
+      and every worker must share this directory (docker-compose mounts a
+      volume there).
+  s3
+      ``s3://{aws_bucket_name}/{xml_upload_s3_prefix}/...``; workers download
+      their own local copy, so the API and workers need no shared disk (e.g.
+      separate Railway services).
+  auto (default)
+      s3 when ``aws_bucket_name`` is configured, local otherwise.
+"""
+
+import shutil
+import tempfile
+from collections.abc import Generator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+from uuid import uuid4
+
+from app.config import DEFAULT_XML_UPLOAD_DIR, settings
+from app.services.apple.apple_xml.aws_service import get_s3_client
+from app.utils.config_utils import EnvironmentType
+
+# Copy buffer for spooling uploads — bounds API memory regardless of file size.
+SPOOL_CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+_S3_SCHEME = "s3://"
+
+
+def _clean_filename(filename: str) -> str:
+    return "".join(c for c in filename if c.isalnum() or c in ".-_") or "upload.xml"
+
+
+def upload_storage() -> str:
+    """The effective upload storage, ``local`` or ``s3``."""
+    if settings.xml_upload_storage == "auto":
+        return "s3" if settings.aws_bucket_name else "local"
+    return settings.xml_upload_storage
+
+
+def check_upload_storage() -> None:
+    """Refuse to serve direct uploads that workers on other hosts could not read.
+
+    Production with local storage in the default temp directory means the API
+    and workers are not known to share a volume; spooled exports would vanish
+    for workers running as separate services.
+    """
+    if settings.xml_upload_storage not in ("auto", "local", "s3"):
+        raise RuntimeError(f"Unknown XML_UPLOAD_STORAGE {settings.xml_upload_storage!r} (auto, local or s3)")
+    if (
+        settings.environment == EnvironmentType.PRODUCTION
+        and upload_storage() == "local"
+        and Path(settings.xml_upload_dir) == DEFAULT_XML_UPLOAD_DIR
+    ):
+        raise RuntimeError(
+            "XML uploads would be spooled to the local temp directory, which workers on other hosts cannot "
+            "read. Set AWS_BUCKET_NAME (or XML_UPLOAD_STORAGE=s3), or point XML_UPLOAD_DIR at a volume "
+            "shared by the API and every Celery worker."
+        )
+
+
+def _split_s3_ref(ref: str) -> tuple[str, str]:
+    bucket, _, key = ref.removeprefix(_S3_SCHEME).partition("/")
+    return bucket, key
+
+
+def _s3_client():  # noqa: ANN202
+    client = get_s3_client()
+    if client is None:
+        raise RuntimeError("S3 client not configured — cannot use S3 upload storage")
+    return client
+
+
+def spool_local(stream: IO[bytes], filename: str) -> Path:
+    """Copy *stream* to a new file in ``settings.xml_upload_dir`` in chunks."""
+    upload_dir = Path(settings.xml_upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    target = upload_dir / f"{uuid4().hex}_{_clean_filename(filename)}"
+    try:
+        with target.open("wb") as out:
+            shutil.copyfileobj(stream, out, SPOOL_CHUNK_SIZE)
+    except Exception:
+        target.unlink(missing_ok=True)
+        raise
+    return target
+
+
+def spool_upload(stream: IO[bytes], filename: str) -> str:
+    """Copy an uploaded export to upload storage in chunks.
+
+    Returns the reference to enqueue. The caller owns the upload and must
+    remove it (see :func:`discard_upload`) once it has been processed.
+    """
+    if upload_storage() != "s3":
+        return str(spool_local(stream, filename))
+    if not settings.aws_bucket_name:
+        raise RuntimeError("XML_UPLOAD_STORAGE=s3 requires AWS_BUCKET_NAME")
+    key = f"{settings.xml_upload_s3_prefix}/{uuid4().hex}_{_clean_filename(filename)}"
+    # Multipart upload in parts read from the stream; memory stays bounded.
+    _s3_client().upload_fileobj(stream, settings.aws_bucket_name, key)
+    return f"{_S3_SCHEME}{settings.aws_bucket_name}/{key}"
+
+
+def publish_local(path: Path) -> str:
+    """Make a file spooled with :func:`spool_local` available to every worker and return its reference."""
+    if upload_storage() != "s3":
+        return str(path)
+    with path.open("rb") as stream:
+        ref = spool_upload(stream, path.name.partition("_")[2] or path.name)
+    path.unlink(missing_ok=True)
+    return ref
+
+
+@contextmanager
+def local_upload(ref: str, ranges: Sequence[tuple[int, int]] | None = None) -> Generator[Path, None, None]:
+    """A local path to read the upload *ref* from.
+
+    S3 uploads are downloaded to a temporary file, removed on exit; local
+    uploads are used in place and left alone (see :func:`discard_upload`).
+    With *ranges*, only those ``[start, end)`` byte ranges are fetched into a
+    sparse file at their original offsets — enough for a shard import.
+    """
+    if not ref.startswith(_S3_SCHEME):
+        yield Path(ref)
+        return
+    bucket, key = _split_s3_ref(ref)
+    upload_dir = Path(settings.xml_upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    fd, name = tempfile.mkstemp(dir=upload_dir, suffix=f"_{_clean_filename(key.rpartition('/')[2])}")
+    local = Path(name)
+    try:
+        client = _s3_client()
+        with open(fd, "wb") as out:
+            if ranges is None:
+                client.download_fileobj(bucket, key, out)
+            for start, end in ranges or ():
+                if start >= end:
+                    continue
+                body = client.get_object(Bucket=bucket, Key=key, Range=f"bytes={start}-{end - 1}")["Body"]
+                out.seek(start)
+                shutil.copyfileobj(body, out, SPOOL_CHUNK_SIZE)
+        yield local
+    finally:
+        local.unlink(missing_ok=True)
+
+
+def discard_upload(ref: str | Path) -> None:
+    """Remove a spooled upload, ignoring uploads that are already gone."""
+    ref = str(ref)
+    if ref.startswith(_S3_SCHEME):
+        bucket, key = _split_s3_ref(ref)
+        _s3_client().delete_object(Bucket=bucket, Key=key)
+        return
+    Path(ref).unlink(missing_ok=True)
@@ -1,11 +1,19 @@
-from datetime import datetime
+import io
+import zipfile
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import dataclass
+from datetime import datetime, tzinfo
 from decimal import Decimal, InvalidOperation
+from functools import lru_cache
 from logging import Logger
-from pathlib import Path
-from typing import Any, Generator
+from pathlib import Path, PurePosixPath
+from typing import IO, Any, Generator
 from uuid import UUID, uuid4
 from xml.etree import ElementTree as ET
 
+from lxml import etree  # ty:ignore[unresolved-import]
+
 from app.config import settings
 from app.constants.series_types.sdk import SleepPhase, get_series_type_from_metric_type
 from app.constants.workout_types import get_unified_apple_workout_type_xml
@@ -25,15 +33,78 @@ from app.schemas.providers.mobile_sdk import (
     SyncRequest,
     SyncRequestData,
 )
+from app.services.apple.apple_xml.sharding import ExportShard, iter_export_segments, open_export_shard
 from app.utils.structured_logging import log_structured
 
+# One parsed chunk: time series samples, (workout, detail) pairs, and sleep wrapped for handle_sleep_data.
+type XMLChunk = tuple[
+    list[TimeSeriesSampleCreate],
+    list[tuple[EventRecordCreate, EventRecordDetailCreate]],
+    SyncRequest,
+]
+
+
+@dataclass(frozen=True)
+class ChunkPosition:
+    """How far into the export a chunk yielded by :meth:`XMLService.parse_xml_resumable` reaches."""
+
+    # Uncompressed export bytes read by the parser when the chunk was handed out (for progress and ETA).
+    bytes_read: int
+    # Set on the last chunk of a segment: once it and every earlier chunk are written, an
+    # interrupted import can resume from this offset with ``stats`` as its starting point.
+    resume_offset: int | None = None
+    stats: XMLParseStats | None = None
+
+
+EXPORT_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+
+@lru_cache(maxsize=256)
+def _zone_from_suffix(suffix: str) -> tzinfo | None:
+    """Exports repeat a handful of offsets ("+0100", "-0500") millions of times; build each tzinfo once."""
+    return datetime.strptime(suffix, "%z").tzinfo
+
+
+def parse_export_datetime(value: str) -> datetime:
+    """Parse an export timestamp ("2024-01-01 10:00:00 +0100").
+
+    Slices the fixed-width layout directly instead of going through strptime;
+    anything that does not match the layout falls back to strptime so malformed
+    values raise the same ValueError.
+    """
+    if (
+        len(value) == 25
+        and value[4] == value[7] == "-"
+        and value[13] == value[16] == ":"
+        and value[10] == value[19] == " "
+    ):
+        try:
+            return datetime(
+                int(value[0:4]),
+                int(value[5:7]),
+                int(value[8:10]),
+                int(value[11:13]),
+                int(value[14:16]),
+                int(value[17:19]),
+                tzinfo=_zone_from_suffix(value[20:]),
+            )
+        except ValueError:
+            pass
+    return datetime.strptime(value, EXPORT_DATE_FORMAT)
+
 
 class XMLService:
-    def __init__(self, path: Path, log: Logger):
+    EXPORT_XML_NAME: str = "export.xml"
+
+    def __init__(self, path: Path, log: Logger, shard: ExportShard | None = None):
         self.xml_path: Path = path
+        # When set, only this byte range of a plain export.xml is parsed (sharded imports).
+        self.shard: ExportShard | None = shard
         self.chunk_size: int = settings.xml_chunk_size
         self.log: Logger = log
         self.stats: XMLParseStats = XMLParseStats()
+        # device attribute -> (model, software version); a user has only a few distinct devices
+        self._device_cache: dict[str, tuple[str | None, str | None]] = {}
 
     DATE_FIELDS: tuple[str, ...] = ("startDate", "endDate", "creationDate")
     RECORD_COLUMNS: tuple[str, ...] = (
@@ -66,6 +137,11 @@ class XMLService:
         "minimum",
         "unit",
     )
+    SLEEP_TYPE: str = "HKCategoryTypeIdentifierSleepAnalysis"
+    SAMPLE_CLASSES: dict[SeriesType, type[TimeSeriesSampleCreate]] = {
+        SeriesType.heart_rate: HeartRateSampleCreate,
+        SeriesType.steps: StepSampleCreate,
+    }
     SLEEP_VALUE_TO_STAGE: dict[str, SleepPhase] = {
         "HKCategoryValueSleepAnalysisAsleepCore": SleepPhase.ASLEEP_LIGHT,
         "HKCategoryValueSleepAnalysisAsleepDeep": SleepPhase.ASLEEP_DEEP,
@@ -80,7 +156,7 @@ class XMLService:
         for date_field in self.DATE_FIELDS:
             if date_field in document:
                 try:
-                    document[date_field] = datetime.strptime(document[date_field], "%Y-%m-%d %H:%M:%S %z")
+                    document[date_field] = datetime.strptime(document[date_field], EXPORT_DATE_FORMAT)
                 except ValueError as e:
                     raise ValueError(f"Invalid date format for field {date_field}: {document[date_field]}") from e
         return document
@@ -225,6 +301,71 @@ class XMLService:
             case _:
                 return sample
 
+    def _device_fields(self, raw_source: str | None) -> tuple[str | None, str | None]:
+        """Cached (device_model, software_version) for a raw device attribute."""
+        if not raw_source:
+            return None, None
+        fields = self._device_cache.get(raw_source)
+        if fields is None:
+            info = self._extract_device_info(raw_source)
+            fields = (info.device_model, info.device_software_version)
+            self._device_cache[raw_source] = fields
+        return fields
+
+    def _create_record_fast(
+        self,
+        attributes: tuple[str | None, ...],
+        series_type: SeriesType,
+        user_id: UUID,
+    ) -> TimeSeriesSampleCreate | None:
+        """Equivalent of :meth:`_create_record` for the lxml parser.
+
+        Takes the ``(type, value, startDate, endDate, creationDate, device)``
+        attribute tuple instead of a copied attribute dict, and builds the sample
+        without re-validating fields that are already typed.
+        """
+        metric_type, raw_value, start, end, creation, device = attributes
+
+        value = self._parse_decimal_value(raw_value, metric_type or "")
+        if value is None:
+            self.stats.records.skip(f"invalid_value:{metric_type}")
+            return None
+
+        try:
+            recorded_at = parse_export_datetime(start) if start is not None else None
+            if end is not None:
+                parse_export_datetime(end)
+            if creation is not None:
+                parse_export_datetime(creation)
+        except ValueError as e:
+            self.log.warning("Failed to parse date for metric type %s: %s", metric_type, str(e))
+            self.stats.records.skip(f"invalid_date:{metric_type}")
+            return None
+
+        if recorded_at is None:
+            self.log.warning("Missing startDate for metric type %s", metric_type)
+            self.stats.records.skip(f"missing_startDate:{metric_type}")
+            return None
+
+        device_model, software_version = self._device_fields(device)
+
+        return self.SAMPLE_CLASSES.get(series_type, TimeSeriesSampleCreate).model_construct(
+            id=uuid4(),
+            external_id=None,
+            user_id=user_id,
+            source="apple_health_xml",
+            device_model=device_model,
+            software_version=software_version,
+            recorded_at=recorded_at,
+            value=value,
+            series_type=series_type,
+            is_daily_total=daily_total_flag(series_type, is_daily=False),
+            data_source_id=None,
+            zone_offset=None,
+            provider=None,
+            user_connection_id=None,
+        )
+
     def _create_workout(
         self,
         document: dict[str, Any],
@@ -303,7 +444,8 @@ class XMLService:
         if "energyburned" in lowered and metrics["energy_burned"] is not None:
             metrics["energy_burned"] += self._decimal_from_stat(statistic.get("sum")) or Decimal("0")
 
-    def _wrap_sleep_data(self, sleep_records: list[SleepRecord]) -> SyncRequest:
+    @staticmethod
+    def wrap_sleep_data(sleep_records: list[SleepRecord]) -> SyncRequest:
         """Wrap sleep data in a SyncRequest
         to be sent to the handle_sleep_data function."""
         return SyncRequest(
@@ -317,39 +459,128 @@ class XMLService:
             ),
         )
 
+    def _find_export_member(self, archive: zipfile.ZipFile) -> str:
+        """Locate export.xml inside an Apple Health export.zip (apple_health_export/export.xml)."""
+        candidates = [name for name in archive.namelist() if PurePosixPath(name).name.lower() == self.EXPORT_XML_NAME]
+        if not candidates:
+            raise ValueError(f"No {self.EXPORT_XML_NAME} found in zip archive {self.xml_path.name}")
+        return min(candidates, key=len)
+
+    def export_size(self) -> int:
+        """Uncompressed size of export.xml in bytes (the member size for a zip)."""
+        if zipfile.is_zipfile(self.xml_path):
+            with zipfile.ZipFile(self.xml_path) as archive:
+                return archive.getinfo(self._find_export_member(archive)).file_size
+        return self.xml_path.stat().st_size
+
+    @contextmanager
+    def open_export(self) -> Generator[IO[bytes], None, None]:
+        """Open the export as a byte stream, reading export.xml straight out of a zip without extracting it."""
+        if self.shard is not None:
+            with open_export_shard(self.xml_path, self.shard) as stream:
+                yield stream
+        elif zipfile.is_zipfile(self.xml_path):
+            with zipfile.ZipFile(self.xml_path) as archive, archive.open(self._find_export_member(archive)) as stream:
+                yield stream
+        else:
+            with self.xml_path.open("rb") as stream:
+                yield stream
+
     def parse_xml(
         self,
         user_id: str,
-    ) -> Generator[
-        tuple[
-            list[TimeSeriesSampleCreate],
-            list[tuple[EventRecordCreate, EventRecordDetailCreate]],
-            SyncRequest,
-        ],
-        None,
-        None,
-    ]:
+    ) -> Generator[XMLChunk, None, None]:
         """
         Parses the XML file and yields tuples of workouts and statistics.
         Extracts attributes from each Record/Workout element.
 
+        Accepts either a plain export.xml or the export.zip archive; the XML is
+        streamed and processed elements are detached from the tree, so memory
+        stays flat regardless of export size.
+
         Invalid records are skipped with warnings logged. Stats are tracked
         and can be accessed via self.stats after parsing.
 
         Args:
             user_id: User ID to associate with parsed records
         """
-        time_series_records: list[TimeSeriesSampleCreate] = []
-        workouts: list[tuple[EventRecordCreate, EventRecordDetailCreate]] = []
-        sleep_records: list[SleepRecord] = []
-
         uuid_user = UUID(user_id)
 
         # Reset stats for this parse run
         self.stats = XMLParseStats()
 
-        for event, elem in ET.iterparse(self.xml_path, events=("end",)):
-            if elem.tag == "Record" and event == "end":
+        parse_elements = self._parse_elements_lxml if settings.xml_parser == "lxml" else self._parse_elements
+        with self.open_export() as source:
+            yield from parse_elements(source, uuid_user)
+
+        # Log final stats
+        self._log_parse_summary()
+
+    def parse_xml_resumable(
+        self,
+        user_id: str,
+        segment_bytes: int,
+        resume_from: int = 0,
+        stats: XMLParseStats | None = None,
+    ) -> Generator[tuple[XMLChunk, ChunkPosition], None, None]:
+        """
+        Like :meth:`parse_xml`, but reads the export in segments of about
+        *segment_bytes* and reports how far each chunk reaches.
+
+        The last chunk of every segment but the final one carries a resume
+        offset and a snapshot of the parse stats at that point. Passing both
+        back as *resume_from* and *stats* continues an interrupted import
+        without re-reading the part that was already written (for a zip the
+        skipped part is only decompressed).
+
+        Args:
+            user_id: User ID to associate with parsed records
+            segment_bytes: Checkpoint interval in uncompressed bytes (0 = no checkpoints)
+            resume_from: Resume offset of a previously written chunk
+            stats: Parse stats saved together with *resume_from*
+        """
+        uuid_user = UUID(user_id)
+        self.stats = deepcopy(stats) if stats is not None else XMLParseStats()
+
+        parse_elements = self._parse_elements_lxml if settings.xml_parser == "lxml" else self._parse_elements
+        with self.open_export() as source:
+            for segment in iter_export_segments(source, segment_bytes, resume_from):
+                # Hold each chunk back by one so the segment's last chunk can carry the resume offset.
+                pending: XMLChunk | None = None
+                for chunk in parse_elements(io.BufferedReader(segment), uuid_user):
+                    if pending is not None:
+                        yield pending, ChunkPosition(bytes_read=segment.position)
+                    pending = chunk
+                if pending is None:
+                    continue
+                if segment.final:
+                    yield pending, ChunkPosition(bytes_read=segment.end)
+                else:
+                    yield (
+                        pending,
+                        ChunkPosition(bytes_read=segment.end, resume_offset=segment.end, stats=deepcopy(self.stats)),
+                    )
+
+        self._log_parse_summary()
+
+    def _parse_elements(
+        self,
+        source: IO[bytes],
+        uuid_user: UUID,
+    ) -> Generator[XMLChunk, None, None]:
+        time_series_records: list[TimeSeriesSampleCreate] = []
+        workouts: list[tuple[EventRecordCreate, EventRecordDetailCreate]] = []
+        sleep_records: list[SleepRecord] = []
+
+        context = ET.iterparse(source, events=("start", "end"))
+        # Keep a handle on <HealthData> so processed children can be detached; elem.clear()
+        # alone leaves every empty element attached to the root for the whole parse.
+        _, root = next(context)
+
+        for event, elem in context:
+            if event != "end":
+                continue
+            if elem.tag == "Record":
                 if len(workouts) + len(time_series_records) + len(sleep_records) >= self.chunk_size:
                     self.log.info(
                         "Yielding chunk: %s time series records, %s workouts, %s sleep records \
@@ -361,7 +592,7 @@ class XMLService:
                         self.stats.workouts.skipped,
                         self.stats.sleep.skipped,
                     )
-                    sync_request = self._wrap_sleep_data(sleep_records)
+                    sync_request = self.wrap_sleep_data(sleep_records)
                     yield time_series_records, workouts, sync_request
                     time_series_records = []
                     workouts = []
@@ -400,8 +631,9 @@ class XMLService:
                     self.stats.records.skip(f"unexpected_error:{type(e).__name__}")
                 finally:
                     elem.clear()
+                    root.clear()
 
-            elif elem.tag == "Workout" and event == "end":
+            elif elem.tag == "Workout":
                 if len(workouts) + len(time_series_records) >= self.chunk_size:
                     self.log.info(
                         "Yielding chunk: %s time series records, %s workouts (skipped so far: %s records, %s workouts)",
@@ -410,7 +642,7 @@ class XMLService:
                         self.stats.records.skipped,
                         self.stats.workouts.skipped,
                     )
-                    sync_request = self._wrap_sleep_data(sleep_records)
+                    sync_request = self.wrap_sleep_data(sleep_records)
                     yield time_series_records, workouts, sync_request
                     time_series_records = []
                     workouts = []
@@ -438,6 +670,7 @@ class XMLService:
                     self.stats.workouts.skip(f"unexpected_error:{type(e).__name__}")
                 finally:
                     elem.clear()
+                    root.clear()
 
         # yield remaining records and workout pairs
         log_structured(
@@ -450,11 +683,162 @@ class XMLService:
             workout_count=len(workouts),
             sleep_count=len(sleep_records),
         )
-        sync_request = self._wrap_sleep_data(sleep_records)
+        sync_request = self.wrap_sleep_data(sleep_records)
         yield time_series_records, workouts, sync_request
 
-        # Log final stats
-        self._log_parse_summary()
+    def _parse_elements_lxml(
+        self,
+        source: IO[bytes],
+        uuid_user: UUID,
+    ) -> Generator[XMLChunk, None, None]:
+        """Same chunks as :meth:`_parse_elements`, using lxml's C iterparse.
+
+        Each record reads just the attributes it needs, and processed elements
+        are detached together with their already-processed preceding siblings.
+        Every other element directly under ``<HealthData>`` (``Correlation``,
+        ``ActivitySummary``, ``ClinicalRecord``, ...) is released the same way
+        when it ends, so a long run of them at the end of an export cannot pile
+        up in the tree.
+        """
+        time_series_records: list[TimeSeriesSampleCreate] = []
+        workouts: list[tuple[EventRecordCreate, EventRecordDetailCreate]] = []
+        sleep_records: list[SleepRecord] = []
+        series_types: dict[str, SeriesType | None] = {}
+
+        context = etree.iterparse(
+            source,
+            events=("end",),
+            huge_tree=True,
+            resolve_entities=False,
+            no_network=True,
+        )
+
+        for _, elem in context:
+            if elem.tag == "Record":
+                if len(workouts) + len(time_series_records) + len(sleep_records) >= self.chunk_size:
+                    self.log.info(
+                        "Yielding chunk: %s time series records, %s workouts, %s sleep records \
+                            (skipped so far: %s records, %s workouts, %s sleep records)",
+                        len(time_series_records),
+                        len(workouts),
+                        len(sleep_records),
+                        self.stats.records.skipped,
+                        self.stats.workouts.skipped,
+                        self.stats.sleep.skipped,
+                    )
+                    sync_request = self.wrap_sleep_data(sleep_records)
+                    yield time_series_records, workouts, sync_request
+                    time_series_records = []
+                    workouts = []
+                    sleep_records = []
+
+                try:
+                    get = elem.get
+                    metric_type = get("type")
+
+                    if metric_type == self.SLEEP_TYPE:
+                        sleep_record = self._normalize_sleep_record(dict(elem.attrib))
+                        if sleep_record is not None:
+                            sleep_records.append(sleep_record)
+                            self.stats.sleep.mark_processed()
+                        else:
+                            self.log.warning("Skipping sleep record with unsupported stage %s", get("value"))
+                            self.stats.sleep.skip(f"unknown_sleep_stage:{get('value')}")
+                        continue
+
+                    if metric_type not in series_types:
+                        series_types[metric_type] = get_series_type_from_metric_type(metric_type or "")
+                    series_type = series_types[metric_type]
+                    if series_type is None:
+                        continue
+
+                    record_create = self._create_record_fast(
+                        (
+                            metric_type,
+                            get("value"),
+                            get("startDate"),
+                            get("endDate"),
+                            get("creationDate"),
+                            get("device"),
+                        ),
+                        series_type,
+                        uuid_user,
+                    )
+                    if record_create is not None:
+                        time_series_records.append(record_create)
+                        self.stats.records.mark_processed()
+                except Exception as e:
+                    # Catch any unexpected errors to prevent entire import from failing
+                    self.log.warning(
+                        "Unexpected error parsing record of type %s: %s - skipping",
+                        elem.get("type", "unknown"),
+                        str(e),
+                    )
+                    self.stats.records.skip(f"unexpected_error:{type(e).__name__}")
+                finally:
+                    self._release_element(elem)
+
+            elif elem.tag == "Workout":
+                if len(workouts) + len(time_series_records) >= self.chunk_size:
+                    self.log.info(
+                        "Yielding chunk: %s time series records, %s workouts (skipped so far: %s records, %s workouts)",
+                        len(time_series_records),
+                        len(workouts),
+                        self.stats.records.skipped,
+                        self.stats.workouts.skipped,
+                    )
+                    sync_request = self.wrap_sleep_data(sleep_records)
+                    yield time_series_records, workouts, sync_request
+                    time_series_records = []
+                    workouts = []
+                    sleep_records = []
+
+                try:
+                    metrics = self._init_metrics()
+                    for stat in elem.iterchildren("WorkoutStatistics"):
+                        self._update_metrics_from_stat(metrics, dict(stat.attrib))
+                    workout_record, workout_detail = self._create_workout(dict(elem.attrib), uuid_user, metrics)
+                    workouts.append((workout_record, workout_detail))
+                    self.stats.workouts.mark_processed()
+                except Exception as e:
+                    # Catch any unexpected errors to prevent entire import from failing
+                    self.log.warning(
+                        "Unexpected error parsing workout of type %s: %s - skipping",
+                        elem.get("workoutActivityType", "unknown"),
+                        str(e),
+                    )
+                    self.stats.workouts.skip(f"unexpected_error:{type(e).__name__}")
+                finally:
+                    self._release_element(elem)
+
+            else:
+                # Children of records and workouts are read when their parent ends; only
+                # release elements sitting directly under the root.
+                parent = elem.getparent()
+                if parent is not None and parent.getparent() is None:
+                    self._release_element(elem)
+
+        log_structured(
+            self.log,
+            "info",
+            "Final chunk",
+            provider="apple_xml",
+            task="process_xml_upload",
+            record_count=len(time_series_records),
+            workout_count=len(workouts),
+            sleep_count=len(sleep_records),
+        )
+        sync_request = self.wrap_sleep_data(sleep_records)
+        yield time_series_records, workouts, sync_request
+
+    @staticmethod
+    def _release_element(elem: "etree._Element") -> None:
+        """Free a processed element and the siblings before it so the tree never grows."""
+        elem.clear(keep_tail=True)
+        parent = elem.getparent()
+        if parent is not None:
+            while elem.getprevious() is not None:
+                del parent[0]
 
     def _log_parse_summary(self) -> None:
         """Log a summary of the parsing results."""
@@ -1,7 +1,9 @@
 import contextlib
 import json
+from bisect import bisect_right
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+from itertools import accumulate
 from logging import getLogger
 from uuid import UUID, uuid4
 
@@ -20,6 +22,7 @@ from app.schemas.model_crud.activities import (
 )
 from app.schemas.providers.mobile_sdk import (
     SLEEP_START_STATES,
+    SleepRecord,
     SleepState,
     SleepStateStage,
 )
@@ -40,6 +43,9 @@ _STAGE_TO_METRIC: dict[str, str] = {
     "rem": "rem_seconds",
 }
 
+# Sessions per bulk insert when importing sleep history (keeps the detail insert under the bind-parameter limit).
+_BULK_SESSION_BATCH = 1000
+
 
 def key(user_id: str) -> str:
     """Generate a key for the sleep state."""
@@ -111,21 +117,8 @@ def _create_new_sleep_state(
     )
 
 
-def _apply_transition(
-    db_session: DbSession,
-    user_id: str,
-    state: SleepState,
-    sleep_phase: SleepPhase,
-    start_time: datetime,
-    end_time: datetime,
-    provider: str,
-    uuid: str | None = None,
-    source_name: str | None = None,
-    device_model: str | None = None,
-    zone_offset: str | None = None,
-) -> SleepState:
-    """Apply a transition to the sleep state."""
-
+def _session_gap_seconds(state: SleepState, start_time: datetime, end_time: datetime) -> float:
+    """Return the distance in seconds between a sample and the session window (0 when they overlap)."""
     # Compute the gap using session boundaries (start_time / end_time) rather than
     # the timestamps of the last-processed sample.  This correctly handles payloads
     # that arrive out of chronological order: a sample that chains directly onto an
@@ -133,18 +126,22 @@ def _apply_transition(
     # even if it was enqueued after a later-night payload was already processed.
     if start_time <= state.end_time and end_time >= state.start_time:
         # New sample overlaps with the current session window → same session.
-        delta_seconds = 0.0
-    elif end_time <= state.start_time:
+        return 0.0
+    if end_time <= state.start_time:
         # New sample is entirely before the session start.
-        delta_seconds = (state.start_time - end_time).total_seconds()
-    else:
-        # New sample is entirely after the session end.
-        delta_seconds = (start_time - state.end_time).total_seconds()
+        return (state.start_time - end_time).total_seconds()
+    # New sample is entirely after the session end.
+    return (start_time - state.end_time).total_seconds()
 
-    if delta_seconds > settings.sleep_end_gap_minutes * 60:
-        finish_sleep(db_session, user_id, state)
-        state = _create_new_sleep_state(start_time, end_time, uuid, provider, source_name, device_model, zone_offset)
 
+def _add_stage(
+    state: SleepState,
+    sleep_phase: SleepPhase,
+    start_time: datetime,
+    end_time: datetime,
+    zone_offset: str | None = None,
+) -> None:
+    """Accumulate one sample into the session: stage durations, window and stage list."""
     if zone_offset and not state.zone_offset:
         state.zone_offset = zone_offset
 
@@ -190,9 +187,50 @@ def _apply_transition(
         )
     )
 
+
+def _apply_transition(
+    db_session: DbSession,
+    user_id: str,
+    state: SleepState,
+    sleep_phase: SleepPhase,
+    start_time: datetime,
+    end_time: datetime,
+    provider: str,
+    uuid: str | None = None,
+    source_name: str | None = None,
+    device_model: str | None = None,
+    zone_offset: str | None = None,
+) -> SleepState:
+    """Apply a transition to the sleep state."""
+
+    if _session_gap_seconds(state, start_time, end_time) > settings.sleep_end_gap_minutes * 60:
+        finish_sleep(db_session, user_id, state)
+        state = _create_new_sleep_state(start_time, end_time, uuid, provider, source_name, device_model, zone_offset)
+
+    _add_stage(state, sleep_phase, start_time, end_time, zone_offset)
+
     return state
 
 
+def _unique_sorted_samples(samples: list[SleepRecord]) -> list[SleepRecord]:
+    """Sort samples by start date and drop duplicates (same start/end/stage/source)."""
+    seen = set()
+    unique_data = []
+
+    # Sort first by startDate to ensure chronological processing
+    for item in sorted(samples, key=lambda x: x.startDate):
+        # Create a unique key for deduplication
+        # SourceInfo is not hashable, use JSON dump
+        source_key = item.source.model_dump_json() if item.source else None
+        key_tuple = (item.startDate, item.endDate, item.stage, source_key)
+
+        if key_tuple not in seen:
+            seen.add(key_tuple)
+            unique_data.append(item)
+
+    return unique_data
+
+
 def handle_sleep_data(
     db_session: DbSession,
     request: SDKSyncRequest,
@@ -240,22 +278,7 @@ def handle_sleep_data(
         current_state = load_sleep_state(user_id)
         provider = request.provider
 
-        # Deduplicate and sort
-        seen = set()
-        unique_data = []
-
-        # Sort first by startDate to ensure chronological processing
-        sorted_raw = sorted(request.data.sleep, key=lambda x: x.startDate)
-
-        for item in sorted_raw:
-            # Create a unique key for deduplication
-            # SourceInfo is not hashable, use JSON dump
-            source_key = item.source.model_dump_json() if item.source else None
-            key_tuple = (item.startDate, item.endDate, item.stage, source_key)
-
-            if key_tuple not in seen:
-                seen.add(key_tuple)
-                unique_data.append(item)
+        unique_data = _unique_sorted_samples(request.data.sleep)
 
         for sjson in unique_data:
             # Extract device info
@@ -422,6 +445,61 @@ def _calculate_final_metrics(stages: list[SleepStateStage]) -> tuple[dict, list[
     return metrics, cleaned_stages
 
 
+def _build_sleep_record(
+    user_id: str,
+    state: SleepState,
+    metrics: dict,
+    cleaned_stages: list[SleepStage],
+    start_time: datetime,
+    end_time: datetime,
+) -> tuple[EventRecordCreate, EventRecordDetailCreate]:
+    """Build the sleep session record and its detail from finalized metrics."""
+    total_duration = (end_time - start_time).total_seconds()
+    total_sleep_seconds = (
+        metrics["sleeping_seconds"] + metrics["light_seconds"] + metrics["deep_seconds"] + metrics["rem_seconds"]
+    )
+    time_in_bed_seconds = max(metrics["in_bed_seconds"], total_sleep_seconds + metrics["awake_seconds"])
+    sleep_efficiency = (
+        Decimal(str(total_sleep_seconds / time_in_bed_seconds * 100)) if time_in_bed_seconds > 0 else None
+    )
+
+    sleep_record = EventRecordCreate(
+        id=uuid4(),
+        external_id=state.uuid,
+        user_id=UUID(user_id),
+        start_datetime=start_time,
+        end_datetime=end_time,
+        zone_offset=state.zone_offset,
+        duration_seconds=int(total_duration),
+        category="sleep",
+        type="sleep_session",
+        source_name=state.source_name or "unknown",
+        source=state.source_name if state.source_name != "unknown" else None,
+        provider=state.provider,
+        device_model=state.device_model,
+    )
+
+    detail = EventRecordDetailCreate(
+        record_id=sleep_record.id,
+        sleep_total_duration_minutes=int(total_sleep_seconds // 60),
+        sleep_time_in_bed_minutes=int(time_in_bed_seconds // 60),
+        sleep_deep_minutes=int(metrics["deep_seconds"] // 60),
+        sleep_rem_minutes=int(metrics["rem_seconds"] // 60),
+        sleep_light_minutes=int(metrics["light_seconds"] // 60),
+        sleep_awake_minutes=int(metrics["awake_seconds"] // 60),
+        sleep_efficiency_score=sleep_efficiency,
+        is_nap=False,
+        sleep_stages=cleaned_stages or None,
+    )
+    return sleep_record, detail
+
+
+def _session_window(state: SleepState, cleaned_stages: list[SleepStage]) -> tuple[datetime, datetime]:
+    if cleaned_stages:
+        return cleaned_stages[0].start_time, cleaned_stages[-1].end_time
+    return state.start_time, state.end_time
+
+
 def finish_sleep(db_session: DbSession, user_id: str, state: SleepState) -> None:
     """Finish a sleep session and save the record to the database.
 
@@ -434,17 +512,19 @@ def finish_sleep(db_session: DbSession, user_id: str, state: SleepState) -> None
     each merge step extends the accumulated DB record until the whole night is
     represented as a single session.
     """
+    if _save_sleep_session(db_session, user_id, state):
+        # Delete from Redis only after a successful DB write so a transient error
+        # keeps the session available for the next periodic finalization attempt.
+        delete_sleep_state(user_id)
+
+
+def _save_sleep_session(db_session: DbSession, user_id: str, state: SleepState) -> bool:
+    """Save one session, merged with an adjacent DB session if any; return whether it was written."""
 
     # Recalculate metrics from stages to handle overlaps/duplicates
     # state.stages is a list[SleepStateStage]
     metrics, cleaned_stages = _calculate_final_metrics(state.stages)
-
-    if cleaned_stages:
-        start_time = cleaned_stages[0].start_time
-        end_time = cleaned_stages[-1].end_time
-    else:
-        end_time = state.end_time
-        start_time = state.start_time
+    start_time, end_time = _session_window(state, cleaned_stages)
 
     # --- Merge with an adjacent existing session if one exists ---
     source_for_lookup = state.source_name if state.source_name != "unknown" else None
@@ -482,52 +562,14 @@ def finish_sleep(db_session: DbSession, user_id: str, state: SleepState) -> None
 
     # ---
 
-    total_duration = (end_time - start_time).total_seconds()
-    total_sleep_seconds = (
-        metrics["sleeping_seconds"] + metrics["light_seconds"] + metrics["deep_seconds"] + metrics["rem_seconds"]
-    )
-    time_in_bed_seconds = max(metrics["in_bed_seconds"], total_sleep_seconds + metrics["awake_seconds"])
-    sleep_efficiency = (
-        Decimal(str(total_sleep_seconds / time_in_bed_seconds * 100)) if time_in_bed_seconds > 0 else None
-    )
-
-    sleep_record = EventRecordCreate(
-        id=uuid4(),
-        external_id=state.uuid,
-        user_id=UUID(user_id),
-        start_datetime=start_time,
-        end_datetime=end_time,
-        zone_offset=state.zone_offset,
-        duration_seconds=int(total_duration),
-        category="sleep",
-        type="sleep_session",
-        source_name=state.source_name or "unknown",
-        source=source_for_lookup,
-        provider=state.provider,
-        device_model=state.device_model,
-    )
-
-    detail = EventRecordDetailCreate(
-        record_id=sleep_record.id,
-        sleep_total_duration_minutes=int(total_sleep_seconds // 60),
-        sleep_time_in_bed_minutes=int(time_in_bed_seconds // 60),
-        sleep_deep_minutes=int(metrics["deep_seconds"] // 60),
-        sleep_rem_minutes=int(metrics["rem_seconds"] // 60),
-        sleep_light_minutes=int(metrics["light_seconds"] // 60),
-        sleep_awake_minutes=int(metrics["awake_seconds"] // 60),
-        sleep_efficiency_score=sleep_efficiency,
-        is_nap=False,
-        sleep_stages=cleaned_stages or None,
-    )
+    sleep_record, detail = _build_sleep_record(user_id, state, metrics, cleaned_stages, start_time, end_time)
 
     try:
         created_or_existing_record = event_record_service.create(db_session, sleep_record)
         # Always use the returned record's ID (whether newly created or existing)
         detail_for_record = detail.model_copy(update={"record_id": created_or_existing_record.id})
         event_record_service.create_detail(db_session, detail_for_record, detail_type="sleep")
-        # Delete from Redis only after a successful DB write so a transient error
-        # keeps the session available for the next periodic finalization attempt.
-        delete_sleep_state(user_id)
+        return True
     except Exception as e:
         log_structured(
             logger,
@@ -539,3 +581,110 @@ def finish_sleep(db_session: DbSession, user_id: str, state: SleepState) -> None
             sleep_record_id=sleep_record.id,
             error=str(e),
         )
+        return False
+
+
+def sessionize_sleep(samples: list[SleepRecord], provider: str) -> list[SleepState]:
+    """Split a complete set of sleep samples into sessions, in memory.
+
+    Applies the same rules as :func:`handle_sleep_data` — deduplication, a
+    session only starts on a start state, and a gap of more than
+    ``sleep_end_gap_minutes`` closes it — but over one sorted pass instead of
+    a Redis-backed state machine.
+    """
+    sessions: list[SleepState] = []
+    current: SleepState | None = None
+    max_gap_seconds = settings.sleep_end_gap_minutes * 60
+
+    for sample in _unique_sorted_samples(samples):
+        sleep_phase = get_apple_sleep_phase(sample.stage)
+        if sleep_phase is None:
+            continue
+
+        device_model, _, source_name = extract_device_info(sample.source)
+        if current is None:
+            if sleep_phase not in SLEEP_START_STATES:
+                continue
+        elif _session_gap_seconds(current, sample.startDate, sample.endDate) > max_gap_seconds:
+            sessions.append(current)
+        else:
+            _add_stage(current, sleep_phase, sample.startDate, sample.endDate, sample.zoneOffset)
+            continue
+
+        current = _create_new_sleep_state(
+            sample.startDate,
+            sample.endDate,
+            sample.id,
+            provider,
+            source_name,
+            device_model,
+            sample.zoneOffset,
+        )
+        _add_stage(current, sleep_phase, sample.startDate, sample.endDate, sample.zoneOffset)
+
+    if current is not None:
+        sessions.append(current)
+    return sessions
+
+
+def import_sleep_history(
+    db_session: DbSession,
+    user_id: str,
+    samples: list[SleepRecord],
+    provider: str = "apple_health_xml",
+) -> int:
+    """Sessionize and save a historical batch of sleep samples (e.g. a whole XML export).
+
+    Unlike :func:`handle_sleep_data` this takes no Redis lock and keeps no
+    ``SleepState`` in Redis: the batch is split into sessions in memory and
+    the sessions are bulk-inserted.  Only sessions that lie within
+    ``sleep_end_gap_minutes`` of a sleep session already in the database go
+    through the merging path of :func:`finish_sleep`, one by one.  Samples of
+    one session must all be in *samples*.  Caller commits.
+
+    Returns the number of sessions saved.
+    """
+    sessions = sessionize_sleep(samples, provider)
+    if not sessions:
+        return 0
+
+    gap = timedelta(minutes=settings.sleep_end_gap_minutes)
+    existing = event_record_service.get_sleep_session_windows(
+        db_session,
+        UUID(user_id),
+        min(state.start_time for state in sessions) - gap,
+        max(state.end_time for state in sessions) + gap,
+    )
+    # Windows sorted by start plus the running maximum of their ends: a session has an existing
+    # neighbour iff some window starting before session end + gap ends after session start - gap.
+    existing_starts = [start for start, _ in existing]
+    max_end_so_far = list(accumulate((end for _, end in existing), max))
+
+    new_sessions: list[tuple[EventRecordCreate, EventRecordDetailCreate]] = []
+    saved = 0
+    for state in sessions:
+        metrics, cleaned_stages = _calculate_final_metrics(state.stages)
+        start_time, end_time = _session_window(state, cleaned_stages)
+        before = bisect_right(existing_starts, end_time + gap)
+        if before and max_end_so_far[before - 1] >= start_time - gap:
+            saved += _save_sleep_session(db_session, user_id, state)
+        else:
+            new_sessions.append(_build_sleep_record(user_id, state, metrics, cleaned_stages, start_time, end_time))
+
+    for offset in range(0, len(new_sessions), _BULK_SESSION_BATCH):
+        batch = new_sessions[offset : offset + _BULK_SESSION_BATCH]
+        saved += len(event_record_service.bulk_create_with_details(db_session, batch, detail_type="sleep"))
+
+    log_structured(
+        logger,
+        "info",
+        "Imported sleep history",
+        provider=provider,
+        action="sleep_history_import",
+        user_id=user_id,
+        samples=len(samples),
+        sessions=len(sessions),
+        merged_sessions=len(sessions) - len(new_sessions),
+        saved_sessions=saved,
+    )
+    return saved
@@ -10,6 +10,7 @@ from app.schemas.model_crud.user_management import (
     DeveloperUpdate,
     DeveloperUpdateInternal,
 )
+from app.services.outgoing_webhooks import app_registry
 from app.services.services import AppService
 from app.utils.security import get_password_hash
 
@@ -30,7 +31,9 @@ class DeveloperService(AppService[DeveloperRepository, Developer, DeveloperCreat
             **creation_data,
             hashed_password=get_password_hash(creator.password),
         )
-        return super().create(db_session, internal_creator)
+        developer = super().create(db_session, internal_creator)
+        app_registry.invalidate()
+        return developer
 
     def update_developer_info(
         self,
@@ -52,5 +55,12 @@ class DeveloperService(AppService[DeveloperRepository, Developer, DeveloperCreat
 
         return self.crud.update(db_session, developer, internal_updater)
 
+    def delete(self, db_session: DbSession, object_id: UUID | str | int, raise_404: bool = False) -> Developer | None:
+        """Delete a developer and stop delivering outgoing webhooks to their Svix application."""
+        deleted = super().delete(db_session, object_id, raise_404=raise_404)
+        if deleted:
+            app_registry.invalidate()
+        return deleted
+
 
 developer_service = DeveloperService(log=getLogger(__name__))
@@ -3,7 +3,6 @@ from decimal import Decimal
 from logging import Logger, getLogger
 from uuid import UUID, uuid4
 
-from sqlalchemy import event as sa_event
 from sqlalchemy.orm import Query
 
 from app.database import DbSession
@@ -52,7 +51,12 @@ from app.schemas.utils import (
     SourceMetadata as DataSourceSchema,
 )
 from app.services.outgoing_webhooks import svix as svix_service
-from app.services.outgoing_webhooks.events import on_menstrual_cycle_created, on_sleep_created, on_workout_created
+from app.services.outgoing_webhooks.events import (
+    batched_webhooks,
+    on_menstrual_cycle_created,
+    on_sleep_created,
+    on_workout_created,
+)
 from app.services.priority_service import priority_service
 from app.services.scores.sleep_service import sleep_score_service
 from app.services.services import AppService
@@ -202,6 +206,16 @@ class EventRecordService(
             db_session, user_id, start_time, end_time, threshold_minutes, source=source, provider=provider
         )
 
+    def get_sleep_session_windows(
+        self,
+        db_session: DbSession,
+        user_id: UUID,
+        start_dt: datetime,
+        end_dt: datetime,
+    ) -> list[tuple[datetime, datetime]]:
+        """Return the windows of the user's sleep sessions overlapping [start_dt, end_dt], ordered by start."""
+        return self.crud.get_sleep_session_windows(db_session, user_id, start_dt, end_dt)
+
     def create_or_merge_sleep(
         self,
         db_session: DbSession,
@@ -580,13 +594,36 @@ class EventRecordService(
         # bulk_create_details() when the matching details are inserted.
         return self.crud.bulk_create(db_session, records)
 
+    def bulk_create_with_details(
+        self,
+        db_session: DbSession,
+        records_with_details: list[tuple[EventRecordCreate, EventRecordDetailCreate]],
+        detail_type: str = "workout",
+    ) -> list[UUID]:
+        """Bulk create records plus the details of the records that were actually inserted.
+
+        Each detail must carry its record's pre-assigned id (``detail.record_id == record.id``).
+        Records that already exist are skipped together with their details. Caller commits.
+        """
+        if not records_with_details:
+            return []
+        inserted_ids = self.bulk_create(db_session, [record for record, _ in records_with_details])
+        db_session.flush()
+
+        # Only insert details whose record was inserted (avoid FK violations)
+        details_by_id = {detail.record_id: detail for _, detail in records_with_details}
+        details_to_insert = [details_by_id[rid] for rid in inserted_ids if rid in details_by_id]
+        if details_to_insert:
+            self.bulk_create_details(db_session, details_to_insert, detail_type=detail_type)
+        return inserted_ids
+
     def bulk_create_details(
         self,
         db_session: DbSession,
         details: list[EventRecordDetailCreate],
         detail_type: str = "workout",
     ) -> None:
-        """Bulk create event record details and fire one webhook per detail on commit."""
+        """Bulk create event record details and write one webhook event per detail to the outbox."""
         self.event_record_detail_repo.bulk_create(db_session, details, detail_type=detail_type)  # ty:ignore[invalid-argument-type]
 
         if not details or not svix_service.is_enabled():
@@ -618,16 +655,8 @@ class EventRecordService(
         if not dispatches:
             return
 
-        # Detach so expire_on_commit doesn't expire these; reading expired attributes
-        # inside after_commit (committed session) would raise. Only loaded scalars are
-        # read, and these objects are local (callers get only IDs), so detaching is safe.
-        for record in records:
-            db_session.expunge(record)
-        for data_source in data_sources:
-            db_session.expunge(data_source)
-
-        @sa_event.listens_for(db_session, "after_commit", once=True)
-        def _dispatch_bulk_webhooks(session: DbSession) -> None:  # noqa: ARG001
+        # Written to the webhook outbox in this transaction: the events commit (or roll back) with the details.
+        with batched_webhooks(outbox=db_session):
             for record, data_source, detail in dispatches:
                 self._emit_event_record_webhook(record, data_source, detail)
 
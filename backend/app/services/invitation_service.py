@@ -18,6 +18,7 @@ from app.schemas.model_crud.user_management import (
     InvitationStatus,
 )
 from app.services.developer_service import developer_service
+from app.services.outgoing_webhooks import app_registry
 from app.utils.security import get_password_hash
 from app.utils.structured_logging import log_structured
 
@@ -163,6 +164,7 @@ class InvitationService:
                 detail="Failed to create developer account",
             )
 
+        app_registry.invalidate()
         self.logger.info("Invitation accepted")
         return developer
 
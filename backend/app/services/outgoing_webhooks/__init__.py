@@ -1,3 +1,3 @@
-from app.services.outgoing_webhooks import events, svix
+from app.services.outgoing_webhooks import app_registry, events, payload_modes, svix
 
-__all__ = ["events", "svix"]
+__all__ = ["app_registry", "events", "payload_modes", "svix"]
@@ -0,0 +1,140 @@
+"""Cached registry of the Svix applications outgoing webhooks are delivered to.
+
+Every event is broadcast to one Svix application per developer (the app UID
+is the developer id).  Resolving that list used to page through the
+developers table and make an ``application.get_or_create`` call per developer
+for every single event; the registry keeps the resolved list in Redis, so
+steady-state delivery is one ``message.create`` per developer and event (plus
+one per compact timeseries payload mode the developer's endpoints use).
+
+Redis keys:
+
+  svix_apps:registry
+      JSON object mapping the app UIDs to deliver to (every one of them
+      ensured to exist in Svix) to the compact payload modes their endpoints
+      use.  Expires after ``svix_app_registry_ttl_seconds``.
+
+  svix_apps:ensured
+      Set of app UIDs whose Svix application is known to exist, so rebuilding
+      the registry only calls Svix for developers added since.
+
+  svix_apps:version
+      Bumped by :func:`invalidate` (developer or endpoint created, changed or
+      deleted); a rebuild that raced an invalidation does not store its stale
+      registry.
+
+Redis failures never stop delivery: without the cache every event resolves
+the developers from the database and ensures their applications, as before.
+"""
+
+import json
+import logging
+
+from app.config import settings
+from app.database import DbSession
+from app.integrations.redis_client import get_redis_client
+from app.models import Developer
+from app.repositories.developer_repository import DeveloperRepository
+from app.services.outgoing_webhooks import svix as svix_service
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "svix_apps"
+_REGISTRY_KEY = f"{_PREFIX}:registry"
+_ENSURED_KEY = f"{_PREFIX}:ensured"
+_VERSION_KEY = f"{_PREFIX}:version"
+
+_PAGE_SIZE = 100
+
+_developers = DeveloperRepository(Developer)
+
+# Store the rebuilt registry only if no invalidation happened since the rebuild started.
+# KEYS: registry, version.  ARGV: version seen at start, registry JSON, TTL (s).
+_STORE_IF_CURRENT_LUA = """
+local version = redis.call("get", KEYS[2]) or "0"
+if version == ARGV[1] then
+    redis.call("set", KEYS[1], ARGV[2], "EX", ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+def cached_apps() -> dict[str, list[str]] | None:
+    """The registered app UIDs with their compact payload modes, or None when the registry has to be rebuilt."""
+    try:
+        raw = get_redis_client().get(_REGISTRY_KEY)
+        return None if raw is None else json.loads(raw)
+    except Exception as exc:
+        logger.warning("Svix app registry unavailable, resolving developers from the database: %s", exc)
+        return None
+
+
+def load_apps(db: DbSession) -> dict[str, list[str]]:
+    """Resolve every developer's app UID and payload modes, ensure the new apps exist in Svix and cache them."""
+    try:
+        client = get_redis_client()
+        version = client.get(_VERSION_KEY) or "0"
+        ensured = {str(uid) for uid in client.smembers(_ENSURED_KEY)}
+    except Exception as exc:
+        logger.warning("Svix app registry unavailable, ensuring every application: %s", exc)
+        client, version, ensured = None, None, set()
+
+    apps: dict[str, list[str]] = {}
+    complete = True
+    offset = 0
+    while True:
+        batch = _developers.get_all(db, filters={}, offset=offset, limit=_PAGE_SIZE, sort_by=None)
+        for developer in batch:
+            uid = str(developer.id)
+            if uid not in ensured:
+                svix_service.ensure_application(uid, developer.email)
+            try:
+                apps[uid] = [str(mode) for mode in svix_service.payload_modes(uid)]
+            except Exception as exc:
+                # Deliver full payloads only for now, and do not cache the incomplete registry.
+                logger.warning("Could not list Svix endpoints of app %s: %s", uid, exc)
+                apps[uid] = []
+                complete = False
+        if len(batch) < _PAGE_SIZE:
+            break
+        offset += _PAGE_SIZE
+
+    if client is not None and complete:
+        try:
+            new = [uid for uid in apps if uid not in ensured]
+            if new:
+                client.sadd(_ENSURED_KEY, *new)
+            client.eval(
+                _STORE_IF_CURRENT_LUA,
+                2,
+                _REGISTRY_KEY,
+                _VERSION_KEY,
+                str(version),
+                json.dumps(apps),
+                settings.svix_app_registry_ttl_seconds,
+            )
+        except Exception as exc:
+            logger.warning("Failed to cache Svix app registry: %s", exc)
+    return apps
+
+
+def invalidate() -> None:
+    """Drop the cached registry; call whenever developers or their endpoints are created, changed or deleted."""
+    try:
+        client = get_redis_client()
+        client.incr(_VERSION_KEY)
+        client.delete(_REGISTRY_KEY)
+    except Exception as exc:
+        logger.warning("Failed to invalidate Svix app registry: %s", exc)
+
+
+def forget(app_id: str) -> None:
+    """Stop assuming *app_id* exists in Svix (e.g. delivery to it failed), so the next rebuild ensures it."""
+    try:
+        client = get_redis_client()
+        client.srem(_ENSURED_KEY, app_id)
+        client.incr(_VERSION_KEY)
+        client.delete(_REGISTRY_KEY)
+    except Exception as exc:
+        logger.warning("Failed to drop Svix app %s from the registry: %s", app_id, exc)
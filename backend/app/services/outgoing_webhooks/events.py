@@ -3,16 +3,34 @@
 Call these functions after data is committed to the database.
 Each schedules a Celery task and returns immediately — Svix delivery
 happens in the worker process.
+
+Code that emits many events for one commit (a timeseries batch, a bulk
+event-record insert) wraps them in :func:`batched_webhooks`: the events are
+collected and enqueued together as one ``emit_webhook_events`` task instead
+of one task per event type and chunk.
+
+``batched_webhooks(outbox=db_session)`` instead writes the collected events
+to the ``webhook_outbox`` table in the session's open transaction, before
+the caller commits: the events are stored if and only if the data is, and
+the ``drain_webhook_outbox`` task delivers them (at least once) afterwards.
+Timeseries events are stored with their own samples, already split into
+``SVIX_MAX_SAMPLES_PER_EVENT`` chunks, so each row stays well under Svix's
+payload limit and delivers exactly the samples of its batch.
 """
 
 from __future__ import annotations
 
 import logging
 import re
+from collections.abc import Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from typing import Any
 from uuid import UUID
 
 from app.constants.webhooks.events import SERIES_TYPE_TO_GRANULAR_EVENT, SERIES_TYPE_TO_GROUP_EVENT
+from app.database import DbSession
+from app.repositories.webhook_outbox_repository import WebhookOutboxRepository
 from app.schemas.webhooks.event_types import WebhookEventType
 from app.services.outgoing_webhooks import svix as svix_service
 
@@ -35,6 +53,92 @@ def _safe_key(raw: str) -> str:
     return _SVIX_ID_SAFE.sub("_", raw)
 
 
+# Bounds on one emit_webhook_events message, so a huge commit is split over a few tasks
+# instead of producing a single multi-megabyte broker message.
+MAX_EVENTS_PER_BATCH = 200
+MAX_SAMPLES_PER_BATCH = 4 * SVIX_MAX_SAMPLES_PER_EVENT
+
+# Events collected by the enclosing batched_webhooks() block, if any.
+_batch: ContextVar[list[dict[str, Any]] | None] = ContextVar("outgoing_webhook_batch", default=None)
+
+_outbox = WebhookOutboxRepository()
+
+
+@contextmanager
+def batched_webhooks(outbox: DbSession | None = None) -> Generator[None, None, None]:
+    """Collect the events emitted inside the block and enqueue them together on exit.
+
+    With *outbox*, the events are written to the webhook outbox in that
+    session's transaction instead (only if the block completes), so they
+    commit or roll back together with the data.
+
+    Nested blocks join the outermost one.  Events sharing a payload (the
+    group and granular events of a timeseries batch) are stored once.
+    """
+    if _batch.get() is not None:
+        yield
+        return
+    events: list[dict[str, Any]] = []
+    reset = _batch.set(events)
+    if outbox is not None:
+        try:
+            yield
+        finally:
+            _batch.reset(reset)
+        _outbox.add(outbox, events)
+        return
+    try:
+        yield
+    finally:
+        _batch.reset(reset)
+        _enqueue_batch(events)
+
+
+def _enqueue_batch(events: list[dict[str, Any]]) -> None:
+    if not events:
+        return
+    try:
+        from app.integrations.celery.tasks.emit_webhook_event_task import emit_webhook_events
+
+        chunk: list[dict[str, Any]] = []
+        samples = 0
+        for event in events:
+            event_samples = len(event["data"].get("samples") or ())
+            if chunk and (len(chunk) >= MAX_EVENTS_PER_BATCH or samples + event_samples > MAX_SAMPLES_PER_BATCH):
+                emit_webhook_events.delay(chunk)
+                chunk, samples = [], 0
+            chunk.append(event)
+            samples += event_samples
+        emit_webhook_events.delay(chunk)
+    except Exception:
+        logger.warning("Could not enqueue batch of %d webhook events", len(events), exc_info=True)
+
+
+def _dispatch_shared(
+    event_types: list[str],
+    data: dict[str, Any],
+    *,
+    idempotency_keys: list[str | None],
+    channels: list[str] | None = None,
+) -> None:
+    """Emit several event types carrying the same ``data`` (each with its own idempotency key)."""
+    if not svix_service.is_enabled():
+        return
+    batch = _batch.get()
+    if batch is not None:
+        batch.append(
+            {
+                "event_types": event_types,
+                "data": data,
+                "idempotency_keys": idempotency_keys,
+                "channels": channels,
+            }
+        )
+        return
+    for event_type, idempotency_key in zip(event_types, idempotency_keys, strict=True):
+        _dispatch(event_type, {"type": event_type, "data": data}, channels=channels, idempotency_key=idempotency_key)
+
+
 def _dispatch(
     event_type: str,
     payload: dict[str, Any],
@@ -42,7 +146,7 @@ def _dispatch(
     channels: list[str] | None = None,
     idempotency_key: str | None = None,
 ) -> None:
-    """Schedule the Celery emit task.
+    """Schedule the Celery emit task (or add the event to the enclosing batch).
 
     Silently drops the event when Svix is not configured or the broker
     (Redis) is unreachable so that data ingestion is never blocked by
@@ -50,6 +154,17 @@ def _dispatch(
     """
     if not svix_service.is_enabled():
         return
+    batch = _batch.get()
+    if batch is not None:
+        batch.append(
+            {
+                "event_types": [event_type],
+                "data": payload["data"],
+                "idempotency_keys": [idempotency_key],
+                "channels": channels,
+            }
+        )
+        return
     try:
         from app.integrations.celery.tasks.emit_webhook_event_task import emit_webhook_event
 
@@ -212,11 +327,11 @@ def on_timeseries_batch_saved(
         event_types_to_emit = [group_event]
     samples = samples or []
 
-    def _emit(event_type: str, payload_data: dict[str, Any], ikey: str) -> None:
-        _dispatch(
-            event_type,
-            {"type": event_type, "data": payload_data},
-            idempotency_key=_safe_key(f"{ikey}.{event_type}"),
+    def _emit(payload_data: dict[str, Any], ikey: str) -> None:
+        _dispatch_shared(
+            event_types_to_emit,
+            payload_data,
+            idempotency_keys=[_safe_key(f"{ikey}.{event_type}") for event_type in event_types_to_emit],
             channels=[f"user.{user_id}"],
         )
 
@@ -231,8 +346,7 @@ def on_timeseries_batch_saved(
             "end_time": end_time,
             "samples": samples,
         }
-        for event_type in event_types_to_emit:
-            _emit(event_type, data, base_key)
+        _emit(data, base_key)
     else:
         chunks = [
             samples[i : i + SVIX_MAX_SAMPLES_PER_EVENT] for i in range(0, len(samples), SVIX_MAX_SAMPLES_PER_EVENT)
@@ -255,8 +369,7 @@ def on_timeseries_batch_saved(
                 "chunk_index": chunk_index,
                 "total_chunks": total_chunks,
             }
-            for event_type in event_types_to_emit:
-                _emit(event_type, data, base_key)
+            _emit(data, base_key)
 
 
 def on_connection_created(
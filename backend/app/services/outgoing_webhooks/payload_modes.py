@@ -0,0 +1,102 @@
+"""Compact payload shapes for timeseries webhook events.
+
+Timeseries events are built (and stored in the outbox) in the ``full``
+shape: every sample as an object.  Endpoints can instead subscribe to
+
+- ``columnar``: the same samples as parallel arrays, with the unit and the
+  source listed once, and
+- ``reference``: only counts and time bounds, plus a signed URL from which
+  the consumer fetches the samples when it needs them.
+
+The compact shapes are rendered at delivery time, once per event and mode,
+for the applications that have an endpoint using them (see
+``svix.payload_modes``).  Every other event is delivered unchanged.
+"""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from urllib.parse import urlencode
+from uuid import UUID
+
+from jose import JWTError, jwt
+
+from app.config import settings
+from app.schemas.webhooks.endpoints import WebhookPayloadMode
+
+# Audience of fetch tokens, so they are never accepted as developer access tokens.
+_FETCH_AUDIENCE = "timeseries_fetch"
+
+_SAMPLE_COLUMNS = ("timestamp", "value", "zone_offset", "is_daily_total")
+
+
+def is_shapeable(data: dict[str, Any]) -> bool:
+    """Whether *data* is a timeseries batch payload (the only kind with compact shapes)."""
+    return "series_type" in data and "samples" in data
+
+
+def render(data: dict[str, Any], mode: WebhookPayloadMode) -> dict[str, Any]:
+    """The payload ``data`` of a timeseries event in *mode*."""
+    if mode == WebhookPayloadMode.FULL:
+        return data
+    samples = data["samples"]
+    shaped = {key: value for key, value in data.items() if key != "samples"}
+    shaped["payload_mode"] = mode.value
+    if mode == WebhookPayloadMode.COLUMNAR:
+        devices = list(dict.fromkeys(sample["source"]["device"] for sample in samples))
+        columns = {column: [sample[column] for sample in samples] for column in _SAMPLE_COLUMNS}
+        if len(devices) > 1:
+            columns["device"] = [sample["source"]["device"] for sample in samples]
+        shaped["unit"] = samples[0]["unit"] if samples else None
+        shaped["source"] = {"provider": data["provider"], "device": devices[0] if len(devices) == 1 else None}
+        shaped["columns"] = columns
+    elif data.get("start_time") and data.get("end_time"):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=settings.outgoing_webhook_fetch_url_ttl_seconds)
+        shaped["fetch_url"] = fetch_url(
+            UUID(data["user_id"]),
+            data["provider"],
+            data["series_type"],
+            data["start_time"],
+            data["end_time"],
+            expires_at,
+        )
+        shaped["fetch_url_expires_at"] = expires_at.isoformat()
+    else:
+        shaped["fetch_url"] = shaped["fetch_url_expires_at"] = None
+    return shaped
+
+
+def fetch_url(
+    user_id: UUID,
+    provider: str,
+    series_type: str,
+    start_time: str,
+    end_time: str,
+    expires_at: datetime,
+) -> str:
+    """Signed URL returning the samples of one provider, series type and time range, valid until *expires_at*."""
+    token = jwt.encode(
+        {
+            "aud": _FETCH_AUDIENCE,
+            "sub": str(user_id),
+            "provider": provider,
+            "series_type": series_type,
+            "start_time": start_time,
+            "end_time": end_time,
+            "exp": expires_at,
+        },
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+    query = urlencode({"token": token})
+    return f"{settings.api_base_url}/api/v1/users/{user_id}/timeseries/fetch?{query}"
+
+
+def verify_fetch_token(token: str, user_id: UUID) -> dict[str, Any] | None:
+    """Claims of a valid, unexpired fetch token issued for *user_id*; None otherwise."""
+    try:
+        claims = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm], audience=_FETCH_AUDIENCE)
+    except JWTError:
+        return None
+    return claims if claims.get("sub") == str(user_id) else None
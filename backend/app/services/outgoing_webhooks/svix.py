@@ -19,6 +19,7 @@ from jose import jwt
 from svix.api import (
     ApplicationIn,
     EndpointIn,
+    EndpointListOptions,
     EndpointOut,
     EndpointPatch,
     EventTypeIn,
@@ -38,6 +39,7 @@ from svix.api.errors.http_error import HttpError
 
 from app.config import settings
 from app.constants.webhooks.test_payloads import get_test_payload
+from app.schemas.webhooks.endpoints import WebhookPayloadMode
 from app.schemas.webhooks.event_types import EVENT_TYPE_DESCRIPTIONS, WebhookEventType
 
 logger = logging.getLogger(__name__)
@@ -49,9 +51,30 @@ _SVIX_ORG_ID = "org_openwearables"
 # Each emitted message is tagged with "user.{user_id}".
 # An endpoint without a channel filter receives ALL messages (all users).
 # An endpoint with channels=["user.X"] receives only messages for user X.
-# Svix allows up to 5 channels per message; we always send exactly one.
+# Svix allows up to 5 channels per message; we send at most three.
 _USER_CHANNEL_PREFIX = "user."
 
+# Channels routing timeseries events by payload mode (see payload_modes).  An endpoint
+# receives a message if they share at least one channel:
+#
+#   message                           channels
+#   non-timeseries event for X        user.X, events.user.X, all
+#   timeseries event for X, full      user.X, full.all
+#   timeseries event for X, mode M    M.user.X, M.all
+#
+#   endpoint                          channels
+#   full, user X                      user.X
+#   full, all users                   none (or all, full.all once the app has compact endpoints)
+#   mode M, user X                    M.user.X, events.user.X
+#   mode M, all users                 M.all, all
+#
+# Endpoints in the default full mode keep the channels they always had; the compact
+# variants are only sent to apps that have an endpoint using them.
+_ALL_CHANNEL = "all"
+_EVENTS_CHANNEL_PREFIX = "events."
+_PINNED_FULL_CHANNELS = [_ALL_CHANNEL, f"{WebhookPayloadMode.FULL}.{_ALL_CHANNEL}"]
+_COMPACT_MODES = frozenset(mode.value for mode in WebhookPayloadMode if mode != WebhookPayloadMode.FULL)
+
 
 def _user_channels(user_id: UUID | None) -> list[str] | None:
     if user_id is None:
@@ -59,19 +82,49 @@ def _user_channels(user_id: UUID | None) -> list[str] | None:
     return [f"{_USER_CHANNEL_PREFIX}{user_id}"]
 
 
+def _endpoint_channels(user_id: UUID | None, mode: WebhookPayloadMode) -> list[str] | None:
+    if mode == WebhookPayloadMode.FULL:
+        return _user_channels(user_id)
+    if user_id is None:
+        return [f"{mode}.{_ALL_CHANNEL}", _ALL_CHANNEL]
+    user_channel = f"{_USER_CHANNEL_PREFIX}{user_id}"
+    return [f"{mode}.{user_channel}", f"{_EVENTS_CHANNEL_PREFIX}{user_channel}"]
+
+
+def message_channels(channels: list[str] | None, mode: WebhookPayloadMode | None) -> list[str] | None:
+    """Channels of a message: *mode* for a timeseries event in that shape, None for any other event."""
+    if not channels:
+        return None
+    if mode is None:
+        return [*channels, *(f"{_EVENTS_CHANNEL_PREFIX}{channel}" for channel in channels), _ALL_CHANNEL]
+    if mode == WebhookPayloadMode.FULL:
+        return [*channels, f"{mode}.{_ALL_CHANNEL}"]
+    return [*(f"{mode}.{channel}" for channel in channels), f"{mode}.{_ALL_CHANNEL}"]
+
+
 def user_id_from_endpoint(ep: EndpointOut) -> UUID | None:
     """Extract the user_id filter from an endpoint's Svix channels, if any."""
     if not ep.channels:
         return None
     for ch in ep.channels:
-        if ch.startswith(_USER_CHANNEL_PREFIX):
+        _, prefix, user_id = ch.rpartition(_USER_CHANNEL_PREFIX)
+        if prefix:
             try:
-                return UUID(ch[len(_USER_CHANNEL_PREFIX) :])
+                return UUID(user_id)
             except ValueError:
                 pass
     return None
 
 
+def payload_mode_from_endpoint(ep: EndpointOut) -> WebhookPayloadMode:
+    """The timeseries payload mode an endpoint subscribed to (encoded in its channels)."""
+    for ch in ep.channels or ():
+        mode, _, scope = ch.partition(".")
+        if mode in _COMPACT_MODES and (scope == _ALL_CHANNEL or scope.startswith(_USER_CHANNEL_PREFIX)):
+            return WebhookPayloadMode(mode)
+    return WebhookPayloadMode.FULL
+
+
 def _resolve_auth_token() -> str | None:
     """Return the Svix auth token, generating it from the JWT secret if needed.
 
@@ -192,8 +245,13 @@ def send(
     *,
     channels: list[str] | None = None,
     idempotency_key: str | None = None,
+    payload_mode: WebhookPayloadMode | None = None,
 ) -> MessageOut | None:
-    """Emit a webhook message via Svix. developer_id doubles as the Svix application UID."""
+    """Emit a webhook message via Svix. developer_id doubles as the Svix application UID.
+
+    ``payload_mode`` is set for timeseries events only, and routes the message
+    to the endpoints subscribed to that payload shape.
+    """
     if not is_enabled():
         return None
     assert _client is not None
@@ -205,7 +263,7 @@ def send(
                 event_type=event_type,
                 payload=payload,
                 event_id=idempotency_key,
-                channels=channels or None,
+                channels=message_channels(channels, payload_mode),
             ),
         )
     except httpx.ConnectError:
@@ -238,6 +296,7 @@ def create_endpoint(
     filter_types: list[str] | None = None,
     *,
     user_id: UUID | None = None,
+    payload_mode: WebhookPayloadMode = WebhookPayloadMode.FULL,
 ) -> EndpointOut:
     # Build via model_validate so that fields absent from the dict are NOT set
     # in model_fields_set.  EndpointIn uses exclude_unset=True serialisation;
@@ -251,13 +310,45 @@ def create_endpoint(
     }
     if filter_types is not None:
         endpoint_data["filter_types"] = filter_types
-    channels = _user_channels(user_id)
+    channels = _endpoint_channels(user_id, payload_mode)
+    if channels is None and payload_modes(app_id):
+        channels = _PINNED_FULL_CHANNELS
     if channels is not None:
         endpoint_data["channels"] = channels
-    return _client.endpoint.create(
+    ep = _client.endpoint.create(
         app_id,
         EndpointIn.model_validate(endpoint_data),
     )
+    if payload_mode != WebhookPayloadMode.FULL:
+        _pin_unfiltered_endpoints(app_id)
+    return ep
+
+
+def payload_modes(app_id: str) -> list[WebhookPayloadMode]:
+    """Compact payload modes used by the app's endpoints; variants in these shapes are sent too."""
+    modes = {payload_mode_from_endpoint(ep) for ep in _all_endpoints(app_id)}
+    modes.discard(WebhookPayloadMode.FULL)
+    return sorted(modes)
+
+
+def _all_endpoints(app_id: str) -> list[EndpointOut]:
+    assert _client is not None
+    endpoints: list[EndpointOut] = []
+    iterator: str | None = None
+    while True:
+        page = _client.endpoint.list(app_id, EndpointListOptions(limit=250, iterator=iterator))
+        endpoints.extend(page.data)
+        if page.done:
+            return endpoints
+        iterator = page.iterator
+
+
+def _pin_unfiltered_endpoints(app_id: str) -> None:
+    """Give endpoints without a channel filter the full-mode channels, so they skip compact variants."""
+    assert _client is not None
+    for ep in _all_endpoints(app_id):
+        if not ep.channels:
+            _client.endpoint.patch(app_id, ep.id, EndpointPatch.model_validate({"channels": _PINNED_FULL_CHANNELS}))
 
 
 def list_endpoints(app_id: str) -> ListResponseEndpointOut:
@@ -279,12 +370,14 @@ def patch_endpoint(
     filter_types: list[str] | None = None,
     user_id: UUID | None = None,
     clear_user_id: bool = False,
+    payload_mode: WebhookPayloadMode | None = None,
 ) -> EndpointOut:
     """Patch an endpoint.
 
     Pass ``user_id`` to scope the endpoint to a specific user.
     Pass ``clear_user_id=True`` (with ``user_id=None``) to remove an existing
     user scope and receive events for all users again.
+    Pass ``payload_mode`` to change the shape of its timeseries payloads.
     """
     assert _client is not None
     # Build via model_validate so only keys we actually want to update end up in
@@ -298,16 +391,25 @@ def patch_endpoint(
         patch_data["description"] = description
     if filter_types is not None:
         patch_data["filter_types"] = filter_types
-    if user_id is not None:
-        patch_data["channels"] = _user_channels(user_id)
-    elif clear_user_id:
+    if user_id is not None or clear_user_id or payload_mode is not None:
+        # User scope and payload mode are both encoded in the channels: keep the one not being changed.
+        current = _client.endpoint.get(app_id, endpoint_id)
+        if user_id is None and not clear_user_id:
+            user_id = user_id_from_endpoint(current)
+        mode = payload_mode or payload_mode_from_endpoint(current)
+        channels = _endpoint_channels(user_id, mode)
+        if channels is None and payload_modes(app_id):
+            channels = _PINNED_FULL_CHANNELS
         # Svix requires null (not []) to remove the channel filter entirely.
-        patch_data["channels"] = None
-    return _client.endpoint.patch(
+        patch_data["channels"] = channels
+    ep = _client.endpoint.patch(
         app_id,
         endpoint_id,
         EndpointPatch.model_validate(patch_data),
     )
+    if payload_mode is not None and payload_mode != WebhookPayloadMode.FULL:
+        _pin_unfiltered_endpoints(app_id)
+    return ep
 
 
 def delete_endpoint(app_id: str, endpoint_id: str) -> None:
@@ -370,6 +472,8 @@ def send_test_message(app_id: str, endpoint_id: str, event_type: str) -> Message
                 event_type=event_type,
                 payload=get_test_payload(event_type),
                 event_id=f"test.{endpoint_id}.{event_type}",
+                # Reach endpoints with a channel filter (user scope, payload mode) too.
+                channels=ep.channels[:5] if ep.channels else None,
             ),
         )
     except Exception:
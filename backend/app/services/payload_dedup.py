@@ -0,0 +1,142 @@
+"""Content-hash idempotency for replayed ingest payloads and webhook deliveries.
+
+Phones retry uploads, providers redeliver webhooks whose response timed out
+(Garmin also sends the same summary more than once) and
+``scripts/replay_raw_payloads.py`` can replay whole days of traffic. Without a
+guard every replay re-parses and re-upserts each sample and fires the same
+outgoing webhooks again.  This module records a key for every accepted
+payload in Redis so an identical payload inside the window is acknowledged
+without being processed a second time:
+
+* SDK batches — digest of the batch, for ``payload_dedup_ttl_seconds``;
+* incoming webhooks — a digest of the raw body (``BaseWebhookHandler.handle``)
+  and a digest of each enqueued payload
+  (``process_webhook_push``), for ``webhook_dedup_ttl_seconds``.
+
+Redis keys:
+
+  payload_dedup:{scope}:{digest}
+      String holding the *owner* (batch id / Celery task id) that claimed the
+      payload.  SET NX — first caller wins.  The same owner may re-claim its
+      own key, so Celery retries and ``acks_late`` redeliveries are never
+      mistaken for duplicates.
+
+  payload_dedup:stats
+      Hash of ``{metric}:hits`` / ``{metric}:misses`` counters (duplicates
+      skipped / payloads claimed), see :func:`dedup_stats`; reported by the
+      dashboard ``/stats`` endpoint.
+
+Redis failures never block ingestion: every helper fails open.
+"""
+
+import hashlib
+import json
+import logging
+from typing import Any
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.utils.structured_logging import json_serial
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "payload_dedup"
+_STATS_KEY = f"{_PREFIX}:stats"
+
+# Claim KEYS[1] for ARGV[1] (TTL ARGV[2]) and count the outcome under metric ARGV[3] in KEYS[2].
+# Returns 1 when the caller owns the key (new claim or re-claim by the same owner), 0 for a duplicate.
+_CLAIM_LUA = """
+if redis.call("set", KEYS[1], ARGV[1], "NX", "EX", ARGV[2]) then
+    redis.call("hincrby", KEYS[2], ARGV[3] .. ":misses", 1)
+    return 1
+end
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return 1
+end
+redis.call("hincrby", KEYS[2], ARGV[3] .. ":hits", 1)
+return 0
+"""
+
+# Atomically delete a key only if it is still owned by ARGV[1].
+_RELEASE_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+def _key(scope: str, digest: str) -> str:
+    return f"{_PREFIX}:{scope}:{digest}"
+
+
+def delivery_scope(provider: str) -> str:
+    """Scope of incoming webhook deliveries (raw body digests) of *provider*."""
+    return f"webhook_delivery:{provider}"
+
+
+def webhook_scope(provider: str) -> str:
+    """Scope of the payloads enqueued to ``process_webhook_push`` for *provider*."""
+    return f"webhook:{provider}"
+
+
+def payload_digest(payload: Any) -> str:
+    """Return a stable SHA-256 hex digest of a payload.
+
+    Strings are hashed as-is (the SDK route already holds the serialized
+    body); anything else is serialized with sorted keys so dict ordering
+    does not change the digest.
+    """
+    if isinstance(payload, bytes):
+        raw = payload
+    elif isinstance(payload, str):
+        raw = payload.encode("utf-8")
+    else:
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=json_serial).encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()
+
+
+def claim_payload(scope: str, digest: str, owner: str, *, ttl: int | None = None, metric: str | None = None) -> bool:
+    """Claim a payload digest for *owner*.
+
+    Returns True when the caller should process the payload: either the
+    digest was not seen within the TTL (``payload_dedup_ttl_seconds`` unless
+    *ttl* is given), or it is already owned by *owner* (a retry of the same
+    batch/task).  Returns False for a duplicate.  The outcome is counted
+    under *metric* (default: the scope).
+    """
+    ttl = settings.payload_dedup_ttl_seconds if ttl is None else ttl
+    if ttl <= 0:
+        return True
+    try:
+        claimed = get_redis_client().eval(_CLAIM_LUA, 2, _key(scope, digest), _STATS_KEY, owner, ttl, metric or scope)
+        return bool(claimed)
+    except Exception as exc:
+        logger.warning("Payload dedup check failed, processing anyway: %s", exc)
+        return True
+
+
+def release_payload(scope: str, digest: str, owner: str) -> None:
+    """Forget a claimed digest so a later retry of the payload is processed.
+
+    Only releases the key while *owner* still holds it.
+    """
+    try:
+        get_redis_client().eval(_RELEASE_LUA, 1, _key(scope, digest), owner)
+    except Exception as exc:
+        logger.warning("Failed to release payload dedup key: %s", exc)
+
+
+def dedup_stats() -> dict[str, dict[str, int]]:
+    """Hit (duplicate) and miss (first seen) counts per metric since the counters were created."""
+    try:
+        raw = get_redis_client().hgetall(_STATS_KEY)
+    except Exception as exc:
+        logger.warning("Payload dedup stats unavailable: %s", exc)
+        return {}
+    stats: dict[str, dict[str, int]] = {}
+    for field, value in raw.items():
+        metric, _, outcome = str(field).rpartition(":")
+        stats.setdefault(metric, {"hits": 0, "misses": 0})[outcome] = int(value)
+    return stats
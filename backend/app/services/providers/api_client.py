@@ -1,24 +1,86 @@
 """Simple API client for making authenticated requests to provider APIs."""
 
 import logging
-import time
-from datetime import datetime, timedelta, timezone
-from typing import Any
+import os
+import threading
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, NoReturn
 from uuid import UUID
 
 import httpx
 from fastapi import HTTPException, status
 
+from app.config import settings
 from app.database import DbSession
 from app.repositories import UserConnectionRepository
+from app.services.providers import rate_limiter
 from app.services.providers.templates.base_oauth import BaseOAuthTemplate
+from app.services.providers.token_refresh import (
+    cache_token,
+    cached_token,
+    invalidate_token,
+    needs_refresh,
+    refresh_single_flight,
+)
 from app.utils.structured_logging import log_structured
 
 logger = logging.getLogger(__name__)
 
-# Rate limiting configuration (Garmin: 100 req / 60s window)
-MAX_RETRIES = 3
-RETRY_BASE_DELAY = 15.0  # Base delay for exponential backoff (seconds): 15s, 30s, 60s
+# 429 handling: never waited out inline. The back-off is recorded for the scope and
+# ProviderRateLimitedError raised, so the sync task reschedules itself instead of holding a worker.
+RETRY_BASE_DELAY = 15.0  # Back-off when a 429 names none (seconds)
+
+# Shared keep-alive clients, one per (provider, http2) in each process.
+_http_clients: dict[tuple[str, bool], httpx.Client] = {}
+_http_clients_lock = threading.Lock()
+
+
+def get_http_client(provider_name: str, http2: bool = False) -> httpx.Client:
+    """Return this process's pooled keep-alive client for *provider_name*.
+
+    Reusing one client keeps TCP/TLS (and HTTP/2) connections open across the
+    many calls of a sync run instead of a new handshake per request and retry.
+    """
+    key = (provider_name, http2)
+    with _http_clients_lock:
+        client = _http_clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.Client(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.provider_http_max_connections,
+                    max_keepalive_connections=settings.provider_http_max_keepalive_connections,
+                    keepalive_expiry=settings.provider_http_keepalive_expiry_seconds,
+                ),
+                timeout=settings.provider_http_timeout_seconds,
+            )
+            _http_clients[key] = client
+        return client
+
+
+def close_http_clients() -> None:
+    """Close every pooled client (worker shutdown, tests)."""
+    with _http_clients_lock:
+        clients = list(_http_clients.values())
+        _http_clients.clear()
+    for client in clients:
+        client.close()
+
+
+def _forget_http_clients() -> None:
+    # A forked child (Celery prefork worker) must not share the parent's sockets; drop
+    # the inherited clients without closing them and let the child open its own.
+    global _http_clients_lock
+    _http_clients.clear()
+    _http_clients_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_forget_http_clients)
+
+# Access tokens resolved up front for a batch of concurrent fetches, see pinned_access_token.
+_pinned_tokens: ContextVar[dict[tuple[UUID, str], str]] = ContextVar("pinned_access_tokens")
 
 
 def _get_valid_token(
@@ -32,6 +94,13 @@ def _get_valid_token(
 
     Private function used internally by make_authenticated_request.
     """
+    pinned = _pinned_tokens.get({}).get((user_id, provider_name))
+    if pinned is not None:
+        return pinned
+    cached = cached_token(user_id, provider_name)
+    if cached is not None:
+        return cached
+
     connection = connection_repo.get_by_user_and_provider(db, user_id, provider_name)
     if not connection:
         raise HTTPException(
@@ -47,18 +116,115 @@ def _get_valid_token(
         )
 
     # Check if token is expired (with 5 minute buffer)
-    if connection.token_expires_at and connection.token_expires_at < datetime.now(timezone.utc) + timedelta(minutes=5):
+    if needs_refresh(connection):
         if not connection.refresh_token:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Token expired and no refresh token available for {provider_name}",
             )
-        token_response = oauth.refresh_access_token(db, user_id, connection.refresh_token)
-        return token_response.access_token
+        # Concurrent tasks for this connection wait for a single refresh instead of each rotating the token.
+        return refresh_single_flight(db, connection, oauth)
 
+    cache_token(connection)
     return connection.access_token
 
 
+@contextmanager
+def pinned_access_token(
+    db: DbSession,
+    user_id: UUID,
+    provider_name: str,
+    connection_repo: UserConnectionRepository,
+    oauth: BaseOAuthTemplate,
+) -> Generator[None, None, None]:
+    """Resolve the access token once (refreshing it if needed) and reuse it inside the block.
+
+    Requests made in this context — including worker threads running a copy of
+    it — skip the connection lookup, so they never use *db* from another thread.
+    The token is read from the database rather than this process's cache: a 401
+    inside the block cannot be retried with a fresh lookup.
+    """
+    invalidate_token(user_id, provider_name)
+    token = _get_valid_token(db, user_id, provider_name, connection_repo, oauth)
+    reset = _pinned_tokens.set({**_pinned_tokens.get({}), (user_id, provider_name): token})
+    try:
+        yield
+    finally:
+        _pinned_tokens.reset(reset)
+
+
+def _rate_limit_scope(provider_name: str, oauth: BaseOAuthTemplate, user_id: UUID) -> str:
+    try:
+        client_id = oauth.credentials.client_id
+    except Exception:
+        client_id = None
+    return rate_limiter.rate_limit_scope(provider_name, client_id, user_id)
+
+
+def _back_off_after_429(provider_name: str, scope: str, response: httpx.Response) -> NoReturn:
+    """Record the back-off a 429 asks for and defer the request to a rescheduled task."""
+    backoff_delay = rate_limiter.retry_after_from_headers(response.headers) or RETRY_BASE_DELAY
+    rate_limiter.block(scope, backoff_delay)
+    log_structured(
+        logger,
+        "warning",
+        "Rate limited (429), deferring",
+        provider_name=provider_name,
+        backoff_delay=backoff_delay,
+    )
+    raise rate_limiter.rate_limited(provider_name, backoff_delay)
+
+
+def _note_rate_limit_headers(scope: str, response: httpx.Response) -> None:
+    """Stop sending requests until the reset when the provider says the window is used up."""
+    exhausted_for = rate_limiter.exhausted_for(response.headers)
+    if exhausted_for:
+        rate_limiter.block(scope, exhausted_for)
+
+
+def _send_authenticated(
+    db: DbSession,
+    user_id: UUID,
+    provider_name: str,
+    connection_repo: UserConnectionRepository,
+    oauth: BaseOAuthTemplate,
+    send: Callable[[str], httpx.Response],
+) -> httpx.Response:
+    """Send a request with the connection's access token, retrying once with a fresh token on 401.
+
+    A 401 usually means the token cached by this process was rotated or revoked
+    elsewhere.  The cached token is dropped and the connection looked up again;
+    the request is repeated only if that yields a different token.  Pinned
+    tokens are never looked up again, as the lookup may run on a worker thread.
+    """
+    scope = _rate_limit_scope(provider_name, oauth, user_id)
+    access_token = _get_valid_token(db, user_id, provider_name, connection_repo, oauth)
+    for attempt in range(2):
+        rate_limiter.wait_for_budget(provider_name, scope)
+        response = send(access_token)
+        if response.status_code == 429:
+            _back_off_after_429(provider_name, scope, response)
+        _note_rate_limit_headers(scope, response)
+        if response.status_code != 401 or attempt:
+            break
+
+        invalidate_token(user_id, provider_name)
+        if (user_id, provider_name) in _pinned_tokens.get({}):
+            break
+        fresh_token = _get_valid_token(db, user_id, provider_name, connection_repo, oauth)
+        if fresh_token == access_token:
+            break
+        log_structured(
+            logger,
+            "info",
+            "Access token rejected (401), retrying with a fresh token",
+            provider_name=provider_name,
+            user_id=str(user_id),
+        )
+        access_token = fresh_token
+    return response
+
+
 def make_authenticated_request(
     db: DbSession,
     user_id: UUID,
@@ -95,6 +261,7 @@ def make_authenticated_request(
         http2: Enable HTTP/2 for this request (default False). Requires the h2
             package (installed via httpx[http2]).  Use for providers that require
             HTTP/2, e.g. Sensor Bio.  Other providers are unaffected.
+            HTTP/2 requests use their own pooled client.
 
     Returns:
         Any: API response JSON, or dict with status_code if expect_json=False
@@ -102,150 +269,89 @@ def make_authenticated_request(
     Raises:
         HTTPException: If API request fails
     """
-    # Get valid token (will auto-refresh if needed)
-    access_token = _get_valid_token(db, user_id, provider_name, connection_repo, oauth)
+    url = f"{api_base_url}{endpoint}"
 
-    # Prepare headers
-    request_headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Accept": "application/json",
-    }
-    if headers:
-        request_headers.update(headers)
+    def send(access_token: str) -> httpx.Response:
+        return get_http_client(provider_name, http2).request(
+            method=method,
+            url=url,
+            headers={"Authorization": f"Bearer {access_token}", "Accept": "application/json", **(headers or {})},
+            params=params or {},
+            json=json_data,
+        )
 
-    # Make request with retry logic for rate limiting
-    url = f"{api_base_url}{endpoint}"
+    try:
+        # Token is refreshed if needed; rate limiting defers instead of retrying
+        response = _send_authenticated(db, user_id, provider_name, connection_repo, oauth, send)
+        response.raise_for_status()
 
-    for attempt in range(MAX_RETRIES + 1):
-        try:
-            with httpx.Client(http2=http2) as client:
-                response = client.request(
-                    method=method,
-                    url=url,
-                    headers=request_headers,
-                    params=params or {},
-                    json=json_data,
-                    timeout=30.0,
-                )
+        # Handle non-JSON responses (e.g., 202 Accepted with empty body)
+        if not expect_json:
+            return {
+                "status_code": response.status_code,
+                "accepted": response.status_code == 202,
+            }
+
+        result = response.json()
 
-            # Handle 429 rate limiting with retry
-            if response.status_code == 429:
-                if attempt < MAX_RETRIES:
-                    backoff_delay = RETRY_BASE_DELAY * (2**attempt)  # 1s, 2s, 4s
-                    log_structured(
-                        logger,
-                        "warning",
-                        "Rate limited (429), retrying",
-                        provider_name=provider_name,
-                        attempt=attempt + 1,
-                        max_retries=MAX_RETRIES,
-                        backoff_delay=backoff_delay,
-                    )
-                    time.sleep(backoff_delay)
-                    continue
-                # Max retries exceeded
+        # Some APIs (like Suunto) return 200 OK but include error in response body
+        if isinstance(result, dict):
+            # Check for common error patterns
+            # Only treat as error if "error" field has a value (not None/null)
+            has_error = result.get("error") is not None and result.get("error")
+            has_error_code = "code" in result and result.get("code") not in (200, None)
+
+            if has_error or has_error_code:
+                error_msg = result.get("message") or result.get("error") or str(result)
                 log_structured(
                     logger,
                     "error",
-                    "Rate limited (429), max retries exceeded",
+                    "API returned error in body",
                     provider_name=provider_name,
-                    attempt=attempt + 1,
-                    max_retries=MAX_RETRIES,
+                    error_msg=error_msg,
                 )
                 raise HTTPException(
-                    status_code=429,
-                    detail=f"{provider_name.capitalize()} API error: {response.text}",
+                    status_code=result.get("code", 400),
+                    detail=f"{provider_name.capitalize()} API error: {error_msg}",
                 )
 
-            response.raise_for_status()
-
-            # Handle non-JSON responses (e.g., 202 Accepted with empty body)
-            if not expect_json:
-                return {
-                    "status_code": response.status_code,
-                    "accepted": response.status_code == 202,
-                }
-
-            result = response.json()
-
-            # Some APIs (like Suunto) return 200 OK but include error in response body
-            if isinstance(result, dict):
-                # Check for common error patterns
-                # Only treat as error if "error" field has a value (not None/null)
-                has_error = result.get("error") is not None and result.get("error")
-                has_error_code = "code" in result and result.get("code") not in (200, None)
-
-                if has_error or has_error_code:
-                    error_msg = result.get("message") or result.get("error") or str(result)
-                    log_structured(
-                        logger,
-                        "error",
-                        "API returned error in body",
-                        provider_name=provider_name,
-                        error_msg=error_msg,
-                    )
-                    raise HTTPException(
-                        status_code=result.get("code", 400),
-                        detail=f"{provider_name.capitalize()} API error: {error_msg}",
-                    )
-
-            return result
-
-        except httpx.HTTPStatusError as e:
-            # Handle 429 from raise_for_status (shouldn't happen due to early check, but just in case)
-            if e.response.status_code == 429 and attempt < MAX_RETRIES:
-                backoff_delay = RETRY_BASE_DELAY * (2**attempt)
-                log_structured(
-                    logger,
-                    "warning",
-                    "Rate limited (429), retrying",
-                    provider_name=provider_name,
-                    attempt=attempt + 1,
-                    max_retries=MAX_RETRIES,
-                    backoff_delay=backoff_delay,
-                )
-                time.sleep(backoff_delay)
-                continue
-
-            log_structured(
-                logger,
-                "error",
-                "API error",
-                provider_name=provider_name,
-                user_id=str(user_id),
-                error=e.response.text,
-            )
-            if e.response.status_code == 401:
-                raise HTTPException(
-                    status_code=401,
-                    detail=f"{provider_name.capitalize()} authorization expired. Please re-authorize.",
-                )
-            raise HTTPException(
-                status_code=e.response.status_code,
-                detail=f"{provider_name.capitalize()} API error: {e.response.text}",
-            )
-        except HTTPException:
-            # Re-raise HTTPExceptions as-is
-            raise
-        except Exception as e:
-            log_structured(
-                logger,
-                "error",
-                "API request failed",
-                provider_name=provider_name,
-                user_id=str(user_id),
-                error=str(e),
-            )
+        return result
+
+    except httpx.HTTPStatusError as e:
+        log_structured(
+            logger,
+            "error",
+            "API error",
+            provider_name=provider_name,
+            user_id=str(user_id),
+            error=e.response.text,
+        )
+        if e.response.status_code == 401:
+            invalidate_token(user_id, provider_name)
             raise HTTPException(
-                status_code=500,
-                detail=f"Failed to fetch data from {provider_name.capitalize()}: {str(e)}",
+                status_code=401,
+                detail=f"{provider_name.capitalize()} authorization expired. Please re-authorize.",
             )
-
-    # Should not reach here, but just in case
-    raise HTTPException(
-        status_code=500,
-        detail=f"Failed to complete request to {provider_name.capitalize()} after retries",
-    )
+        raise HTTPException(
+            status_code=e.response.status_code,
+            detail=f"{provider_name.capitalize()} API error: {e.response.text}",
+        )
+    except HTTPException:
+        # Re-raise HTTPExceptions as-is
+        raise
+    except Exception as e:
+        log_structured(
+            logger,
+            "error",
+            "API request failed",
+            provider_name=provider_name,
+            user_id=str(user_id),
+            error=str(e),
+        )
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch data from {provider_name.capitalize()}: {str(e)}",
+        )
 
 
 def download_binary_content(
@@ -260,27 +366,14 @@ def download_binary_content(
 
     Used for endpoints that return binary data (e.g. Garmin activityFiles FIT download).
     The URL may contain additional auth params (e.g. token=...) alongside the Bearer header.
-    Retries up to MAX_RETRIES times on 429 with exponential backoff.
+    A 429 raises ProviderRateLimitedError so the calling task is rescheduled.
     """
-    access_token = _get_valid_token(db, user_id, provider_name, connection_repo, oauth)
-    headers = {"Authorization": f"Bearer {access_token}"}
-
-    for attempt in range(MAX_RETRIES + 1):
-        response = httpx.get(url, headers=headers, timeout=30.0, follow_redirects=True)
-        if response.status_code == 429 and attempt < MAX_RETRIES:
-            backoff_delay = RETRY_BASE_DELAY * (2**attempt)
-            log_structured(
-                logger,
-                "warning",
-                "Rate limited (429) on binary download, retrying",
-                provider_name=provider_name,
-                attempt=attempt + 1,
-                max_retries=MAX_RETRIES,
-                backoff_delay=backoff_delay,
-            )
-            time.sleep(backoff_delay)
-            continue
-        response.raise_for_status()
-        return response.content
 
-    raise HTTPException(status_code=500, detail=f"Failed to download binary content from {provider_name}")
+    def send(access_token: str) -> httpx.Response:
+        return get_http_client(provider_name).get(
+            url, headers={"Authorization": f"Bearer {access_token}"}, follow_redirects=True
+        )
+
+    response = _send_authenticated(db, user_id, provider_name, connection_repo, oauth, send)
+    response.raise_for_status()
+    return response.content
@@ -118,6 +118,8 @@ class Garmin247Data(Base247DataTemplate):
     ) -> list[dict[str, Any]]:
         """Fetch data in 24-hour chunks to comply with Garmin API limits.
 
+        Chunks are fetched concurrently and combined in chronological order.
+
         Args:
             db: Database session
             user_id: User ID
@@ -129,34 +131,36 @@ class Garmin247Data(Base247DataTemplate):
         Returns:
             List of all fetched records combined from all chunks
         """
-        all_data: list[dict[str, Any]] = []
+        chunks: list[tuple[datetime, datetime]] = []
         current_start = start_time
-
         while current_start < end_time:
             current_end = min(current_start + timedelta(hours=chunk_hours), end_time)
+            chunks.append((current_start, current_end))
+            current_start = current_end
 
+        def fetch_chunk(chunk: tuple[datetime, datetime]) -> Any:
             params = {
-                "uploadStartTimeInSeconds": self._epoch_seconds(current_start),
-                "uploadEndTimeInSeconds": self._epoch_seconds(current_end),
+                "uploadStartTimeInSeconds": self._epoch_seconds(chunk[0]),
+                "uploadEndTimeInSeconds": self._epoch_seconds(chunk[1]),
             }
+            return self._make_api_request(db, user_id, endpoint, params=params)
 
-            try:
-                response = self._make_api_request(db, user_id, endpoint, params=params)
-                if isinstance(response, list):
-                    all_data.extend(response)
-                elif response:
-                    all_data.append(response)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching {endpoint} chunk ({current_start.isoformat()} to {current_end.isoformat()}): {e}",
-                    provider="garmin",
-                    task="fetch_in_chunks",
-                    user_id=str(user_id),
-                )
+        def log_failed_chunk(chunk: tuple[datetime, datetime], e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching {endpoint} chunk ({chunk[0].isoformat()} to {chunk[1].isoformat()}): {e}",
+                provider="garmin",
+                task="fetch_in_chunks",
+                user_id=str(user_id),
+            )
 
-            current_start = current_end
+        all_data: list[dict[str, Any]] = []
+        for response in self.fetch_windows(db, user_id, chunks, fetch_chunk, on_error=log_failed_chunk):
+            if isinstance(response, list):
+                all_data.extend(response)
+            elif response:
+                all_data.append(response)
 
         return all_data
 
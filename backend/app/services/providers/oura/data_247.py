@@ -1259,46 +1259,43 @@ class Oura247Data(Base247DataTemplate):
         if not end_time:
             end_time = datetime.now(timezone.utc)
 
-        tasks: dict[str, Callable[[], int]] = {
-            "activity": lambda: self.save_activity_data(
-                db,
-                user_id,
-                self.normalize_activity_samples(self.get_activity_samples(db, user_id, start_time, end_time), user_id),
-            ),
-            "cardiovascular_age": lambda: self.save_cardiovascular_age_data(
-                db,
-                user_id,
-                self.normalize_cardiovascular_age_samples(
-                    self.get_cardiovascular_age_samples(db, user_id, start_time, end_time), user_id
-                ),
-            ),
-            "readiness": lambda: self.save_readiness_data(
-                db,
-                user_id,
-                self.normalize_readiness(self.get_readiness_data(db, user_id, start_time, end_time), user_id),
-            ),
-            "sleep": lambda: self.save_sleep_data(
-                db, user_id, self.normalize_sleeps(self.get_sleep_data(db, user_id, start_time, end_time), user_id)
-            ),
-            "sleep_score": lambda: self.save_daily_sleep_scores(
-                db,
-                user_id,
-                self.normalize_daily_sleep_scores(
-                    self.get_daily_sleep_score_data(db, user_id, start_time, end_time), user_id
-                ),
+        # Fetch every endpoint concurrently, then save one by one on the DB session.
+        fetched = self.fetch_concurrently(
+            db,
+            user_id,
+            {
+                "activity": lambda: self.get_activity_samples(db, user_id, start_time, end_time),
+                "cardiovascular_age": lambda: self.get_cardiovascular_age_samples(db, user_id, start_time, end_time),
+                "readiness": lambda: self.get_readiness_data(db, user_id, start_time, end_time),
+                "sleep": lambda: self.get_sleep_data(db, user_id, start_time, end_time),
+                "sleep_score": lambda: self.get_daily_sleep_score_data(db, user_id, start_time, end_time),
+                "spo2": lambda: self.get_spo2_data(db, user_id, start_time, end_time),
+                "heart_rate": lambda: self.get_heart_rate_data(db, user_id, start_time, end_time),
+                "personal_info": lambda: self.get_personal_info(db, user_id),
+                "vo2_max": lambda: self.get_vo2_data(db, user_id, start_time, end_time),
+            },
+        )
+
+        savers: dict[str, Callable[[Any], int]] = {
+            "activity": lambda raw: self.save_activity_data(db, user_id, self.normalize_activity_samples(raw, user_id)),
+            "cardiovascular_age": lambda raw: self.save_cardiovascular_age_data(
+                db, user_id, self.normalize_cardiovascular_age_samples(raw, user_id)
             ),
-            "spo2": lambda: self.save_spo2_data(db, user_id, self.get_spo2_data(db, user_id, start_time, end_time)),
-            "heart_rate": lambda: self.save_heart_rate_data(
-                db, user_id, self.get_heart_rate_data(db, user_id, start_time, end_time)
+            "readiness": lambda raw: self.save_readiness_data(db, user_id, self.normalize_readiness(raw, user_id)),
+            "sleep": lambda raw: self.save_sleep_data(db, user_id, self.normalize_sleeps(raw, user_id)),
+            "sleep_score": lambda raw: self.save_daily_sleep_scores(
+                db, user_id, self.normalize_daily_sleep_scores(raw, user_id)
             ),
-            "personal_info": lambda: self.save_personal_info(db, user_id, self.get_personal_info(db, user_id)),
-            "vo2_max": lambda: self.save_vo2_data(db, user_id, self.get_vo2_data(db, user_id, start_time, end_time)),
+            "spo2": lambda raw: self.save_spo2_data(db, user_id, raw),
+            "heart_rate": lambda raw: self.save_heart_rate_data(db, user_id, raw),
+            "personal_info": lambda raw: self.save_personal_info(db, user_id, raw),
+            "vo2_max": lambda raw: self.save_vo2_data(db, user_id, raw),
         }
 
         results: dict[str, int] = {}
-        for data_type, fn in tasks.items():
+        for data_type, save in savers.items():
             try:
-                results[data_type] = fn()
+                results[data_type] = save(self.fetch_result(fetched[data_type]))
             except Exception as e:
                 db.rollback()
                 results[data_type] = 0
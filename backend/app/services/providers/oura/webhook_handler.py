@@ -41,6 +41,7 @@ from app.config import settings
 from app.database import DbSession
 from app.repositories import UserConnectionRepository
 from app.schemas.providers.oura import OuraWebhookNotification
+from app.services import webhook_coalescer
 from app.services.providers.oura.data_247 import Oura247Data
 from app.services.providers.oura.workouts import OuraWorkouts
 from app.services.providers.templates.base_webhook_handler import BaseWebhookHandler
@@ -146,6 +147,10 @@ class OuraWebhookHandler(BaseWebhookHandler):
 
         store_raw_payload(source="webhook", provider="oura", payload=payload, trace_id=request_trace_id)
 
+        object_key = f"{data_type}:{payload.get('object_id')}"
+        if webhook_coalescer.defer("oura", payload.get("user_id"), object_key, payload, request_trace_id):
+            return {"status": "accepted"}
+
         task = celery_app.send_task(_PROCESS_PUSH_TASK, args=["oura", payload, request_trace_id], queue="webhook_sync")
         log_structured(
             logger,
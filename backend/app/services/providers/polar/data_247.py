@@ -113,6 +113,29 @@ class Polar247Data(Base247DataTemplate):
                 return None
             raise
 
+    def _fetch_in_chunks(
+        self,
+        db: DbSession,
+        user_id: UUID,
+        endpoint: str,
+        start_time: datetime,
+        end_time: datetime,
+        params: dict[str, Any] | None = None,
+    ) -> list[Any]:
+        """Fetch a range endpoint in 28-day chunks (Polar's max window); one response per chunk, in order."""
+        chunks: list[tuple[datetime, datetime]] = []
+        chunk_start = start_time
+        while chunk_start < end_time:
+            chunk_end = min(chunk_start + timedelta(days=27), end_time)
+            chunks.append((chunk_start, chunk_end))
+            chunk_start = chunk_end + timedelta(days=1)
+
+        def fetch_chunk(chunk: tuple[datetime, datetime]) -> Any:
+            chunk_params = {"from": chunk[0].date().isoformat(), "to": chunk[1].date().isoformat(), **(params or {})}
+            return self._make_api_request(db, user_id, endpoint, params=chunk_params)
+
+        return self.fetch_windows(db, user_id, chunks, fetch_chunk)
+
     def _parse_time_key(self, key: str) -> time:
         parts = key.split(":")
         h, m = int(parts[0]), int(parts[1])
@@ -165,12 +188,11 @@ class Polar247Data(Base247DataTemplate):
             start_time.date() + timedelta(days=i) for i in range((end_time.date() - start_time.date()).days + 1)
         }
         available_dates = self._get_available_sleep_dates(db, user_id)
-        sleep_data = []
-        for d in date_range.intersection(available_dates):
-            response = self._make_api_request(db, user_id, f"/v3/users/sleep/{d.isoformat()}")
-            if response:
-                sleep_data.append(response)
-        return sleep_data
+        nights = sorted(date_range.intersection(available_dates))
+        responses = self.fetch_windows(
+            db, user_id, nights, lambda d: self._make_api_request(db, user_id, f"/v3/users/sleep/{d.isoformat()}")
+        )
+        return [response for response in responses if response]
 
     def _parse_hypnogram(
         self,
@@ -317,20 +339,10 @@ class Polar247Data(Base247DataTemplate):
         end_date: datetime,
     ) -> list[dict[str, Any]]:
         # Polar enforces a max 28-day window per request
+        params = {"steps": "true", "activity_zones": "false", "inactivity_stamps": "false"}
         results: list[dict[str, Any]] = []
-        chunk_start = start_date
-        while chunk_start < end_date:
-            chunk_end = min(chunk_start + timedelta(days=27), end_date)
-            params = {
-                "from": chunk_start.date().isoformat(),
-                "to": chunk_end.date().isoformat(),
-                "steps": "true",
-                "activity_zones": "false",
-                "inactivity_stamps": "false",
-            }
-            response = self._make_api_request(db, user_id, "/v3/users/activities", params=params)
+        for response in self._fetch_in_chunks(db, user_id, "/v3/users/activities", start_date, end_date, params):
             results.extend(response or [])
-            chunk_start = chunk_end + timedelta(days=1)
         return results
 
     def normalize_daily_activity(
@@ -375,13 +387,8 @@ class Polar247Data(Base247DataTemplate):
         end_time: datetime,
     ) -> list[dict[str, Any]]:
         results: list[dict[str, Any]] = []
-        chunk_start = start_time
-        while chunk_start < end_time:
-            chunk_end = min(chunk_start + timedelta(days=27), end_time)
-            params = {"from": chunk_start.date().isoformat(), "to": chunk_end.date().isoformat()}
-            response = self._make_api_request(db, user_id, "/v3/users/continuous-heart-rate", params=params)
+        for response in self._fetch_in_chunks(db, user_id, "/v3/users/continuous-heart-rate", start_time, end_time):
             results.extend((response or {}).get("heart_rates", []))
-            chunk_start = chunk_end + timedelta(days=1)
         return results
 
     def normalize_continuous_hr(
@@ -423,13 +430,8 @@ class Polar247Data(Base247DataTemplate):
         end_time: datetime,
     ) -> list[dict[str, Any]]:
         results: list[dict[str, Any]] = []
-        chunk_start = start_time
-        while chunk_start < end_time:
-            chunk_end = min(chunk_start + timedelta(days=27), end_time)
-            params = {"from": chunk_start.date().isoformat(), "to": chunk_end.date().isoformat()}
-            response = self._make_api_request(db, user_id, "/v3/users/cardio-load/date", params=params)
+        for response in self._fetch_in_chunks(db, user_id, "/v3/users/cardio-load/date", start_time, end_time):
             results.extend(response or [])
-            chunk_start = chunk_end + timedelta(days=1)
         return results
 
     def normalize_cardio_load(
@@ -912,10 +914,8 @@ class Polar247Data(Base247DataTemplate):
         self,
         db: DbSession,
         user_id: UUID,
-        start_time: datetime,
-        end_time: datetime,
+        raw_items: list[dict[str, Any]],
     ) -> int:
-        raw_items = self.get_sleep_data(db, user_id, start_time, end_time)
         normalized = self.normalize_sleep(raw_items, user_id)
         count = 0
         scores: list[HealthScoreCreate] = []
@@ -961,60 +961,47 @@ class Polar247Data(Base247DataTemplate):
         if not end_time:
             end_time = datetime.now(timezone.utc)
 
-        tasks: dict[str, Callable[[], int]] = {
-            "sleep": lambda: self._save_sleep(db, user_id, start_time, end_time),
-            "daily_activity": lambda: self._save_timeseries(
-                db,
-                self.normalize_daily_activity(
-                    self.get_daily_activity_statistics(db, user_id, start_time, end_time), user_id
-                ),
-            ),
-            "continuous_hr": lambda: self._save_timeseries(
-                db,
-                self.normalize_continuous_hr(self.get_continuous_hr_data(db, user_id, start_time, end_time), user_id),
-            ),
-            "cardio_load": lambda: self._save_scores(
-                db, self.normalize_cardio_load(self.get_cardio_load_data(db, user_id, start_time, end_time), user_id)
-            ),
-            "nightly_recharge": lambda: self._save_scores(
-                db,
-                self.normalize_nightly_recharge(
-                    self.get_nightly_recharge_data(db, user_id, start_time, end_time), user_id
-                ),
-            ),
-            "alertness": lambda: self._save_scores(
-                db, self.normalize_alertness(self.get_alertness_data(db, user_id, start_time, end_time), user_id)
-            ),
-            "circadian_bedtime": lambda: self._save_scores(
-                db,
-                self.normalize_circadian_bedtime(
-                    self.get_circadian_bedtime_data(db, user_id, start_time, end_time), user_id
-                ),
-            ),
-            "body_temperature": lambda: self._save_timeseries(
-                db,
-                self.normalize_body_temperature(
-                    self.get_body_temperature_data(db, user_id, start_time, end_time), user_id
-                ),
-            ),
-            "sleep_skin_temperature": lambda: self._save_timeseries(
-                db,
-                self.normalize_sleep_skin_temperature(
-                    self.get_sleep_skin_temperature_data(db, user_id, start_time, end_time), user_id
+        # Fetch every endpoint concurrently, then save one by one on the DB session.
+        fetched = self.fetch_concurrently(
+            db,
+            user_id,
+            {
+                "sleep": lambda: self.get_sleep_data(db, user_id, start_time, end_time),
+                "daily_activity": lambda: self.get_daily_activity_statistics(db, user_id, start_time, end_time),
+                "continuous_hr": lambda: self.get_continuous_hr_data(db, user_id, start_time, end_time),
+                "cardio_load": lambda: self.get_cardio_load_data(db, user_id, start_time, end_time),
+                "nightly_recharge": lambda: self.get_nightly_recharge_data(db, user_id, start_time, end_time),
+                "alertness": lambda: self.get_alertness_data(db, user_id, start_time, end_time),
+                "circadian_bedtime": lambda: self.get_circadian_bedtime_data(db, user_id, start_time, end_time),
+                "body_temperature": lambda: self.get_body_temperature_data(db, user_id, start_time, end_time),
+                "sleep_skin_temperature": lambda: self.get_sleep_skin_temperature_data(
+                    db, user_id, start_time, end_time
                 ),
+                "spo2": lambda: self.get_spo2_data(db, user_id, start_time, end_time),
+                "wrist_ecg": lambda: self.get_wrist_ecg_data(db, user_id, start_time, end_time),
+            },
+        )
+
+        savers: dict[str, Callable[[Any], int]] = {
+            "sleep": lambda raw: self._save_sleep(db, user_id, raw),
+            "daily_activity": lambda raw: self._save_timeseries(db, self.normalize_daily_activity(raw, user_id)),
+            "continuous_hr": lambda raw: self._save_timeseries(db, self.normalize_continuous_hr(raw, user_id)),
+            "cardio_load": lambda raw: self._save_scores(db, self.normalize_cardio_load(raw, user_id)),
+            "nightly_recharge": lambda raw: self._save_scores(db, self.normalize_nightly_recharge(raw, user_id)),
+            "alertness": lambda raw: self._save_scores(db, self.normalize_alertness(raw, user_id)),
+            "circadian_bedtime": lambda raw: self._save_scores(db, self.normalize_circadian_bedtime(raw, user_id)),
+            "body_temperature": lambda raw: self._save_timeseries(db, self.normalize_body_temperature(raw, user_id)),
+            "sleep_skin_temperature": lambda raw: self._save_timeseries(
+                db, self.normalize_sleep_skin_temperature(raw, user_id)
             ),
-            "spo2": lambda: self._save_timeseries(
-                db, self.normalize_spo2(self.get_spo2_data(db, user_id, start_time, end_time), user_id)
-            ),
-            "wrist_ecg": lambda: self._save_timeseries(
-                db, self.normalize_wrist_ecg(self.get_wrist_ecg_data(db, user_id, start_time, end_time), user_id)
-            ),
+            "spo2": lambda raw: self._save_timeseries(db, self.normalize_spo2(raw, user_id)),
+            "wrist_ecg": lambda raw: self._save_timeseries(db, self.normalize_wrist_ecg(raw, user_id)),
         }
 
         results: dict[str, int] = {}
-        for data_type, fn in tasks.items():
+        for data_type, save in savers.items():
             try:
-                results[data_type] = fn()
+                results[data_type] = save(self.fetch_result(fetched[data_type]))
                 db.commit()
             except Exception as e:
                 db.rollback()
@@ -0,0 +1,221 @@
+"""Shared rate limiting for provider API calls.
+
+Every worker calling a provider draws from the same Redis token bucket, so a
+fleet of workers stays within the vendor's limit instead of each one finding
+out with a ``429``.  Buckets are keyed by provider and OAuth app (client id),
+and additionally by user for vendors that limit per access token.
+
+Redis keys:
+
+  provider_rate:{provider}:{app}[:{user_id}]
+      Hash ``{"tokens", "ts"}`` — the token bucket, refilled continuously at
+      ``requests / per_seconds``.  Expires once it would be full again.
+
+  provider_rate:{provider}:{app}[:{user_id}]:blocked
+      Set when the provider told us to back off (``429`` with ``Retry-After``,
+      or ``X-RateLimit-Remaining: 0`` with a reset time).  Every request in the
+      scope waits until it expires, whether or not the provider has a bucket.
+
+A caller that would wait longer than ``provider_rate_limit_max_wait_seconds``
+gets :class:`ProviderRateLimitedError` instead of sleeping, and the sync task
+reschedules itself (see :func:`rate_limit_deferrals`).
+
+Redis failures never block a request: the limiter fails open.
+"""
+
+import hashlib
+import logging
+import math
+import time
+from collections.abc import Generator, Mapping
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "provider_rate"
+
+# Reset headers above this are epoch timestamps rather than delays (2001-09-09).
+_EPOCH_THRESHOLD = 1_000_000_000
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most *requests* calls per *per_seconds*, per app (or per user with *per_user*)."""
+
+    requests: int
+    per_seconds: float
+    per_user: bool = False
+
+
+# Documented vendor limits.  Providers missing here get no bucket, but still
+# honour the back-off the provider signals in its responses.
+PROVIDER_RATE_LIMITS: dict[str, RateLimit] = {
+    "garmin": RateLimit(100, 60, per_user=True),  # same budget as garmin/backfill_config.py
+    "strava": RateLimit(100, 15 * 60),
+    "whoop": RateLimit(100, 60),
+    "oura": RateLimit(5000, 5 * 60, per_user=True),
+    "fitbit": RateLimit(150, 60 * 60, per_user=True),
+}
+
+# Takes a token from the bucket, or returns how long (ms) until one is available.
+# KEYS: bucket, blocked.  ARGV: capacity (0 = no bucket), refill rate (tokens/ms).
+_ACQUIRE_LUA = """
+local blocked = redis.call("pttl", KEYS[2])
+if blocked > 0 then
+    return blocked
+end
+local capacity = tonumber(ARGV[1])
+if capacity <= 0 then
+    return 0
+end
+local rate = tonumber(ARGV[2])
+local clock = redis.call("time")
+local now = clock[1] * 1000 + math.floor(clock[2] / 1000)
+local bucket = redis.call("hmget", KEYS[1], "tokens", "ts")
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = math.ceil((1 - tokens) / rate)
+end
+redis.call("hset", KEYS[1], "tokens", tostring(tokens), "ts", now)
+redis.call("pexpire", KEYS[1], math.ceil(capacity / rate) + 1000)
+return wait
+"""
+
+
+class ProviderRateLimitedError(HTTPException):
+    """The provider's rate budget is exhausted for longer than we are willing to wait inline."""
+
+    def __init__(self, provider_name: str, retry_after: float) -> None:
+        self.provider_name = provider_name
+        self.retry_after = retry_after
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"{provider_name.capitalize()} API rate limit reached, retry in {math.ceil(retry_after)}s",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+# Rate-limit deferrals of the running sync (provider -> seconds), see rate_limit_deferrals.
+_deferrals: ContextVar[dict[str, float] | None] = ContextVar("provider_rate_limit_deferrals", default=None)
+
+
+@contextmanager
+def rate_limit_deferrals(deferred: dict[str, float] | None = None) -> Generator[dict[str, float], None, None]:
+    """Collect the providers that hit their rate limit inside the block, with the longest back-off.
+
+    Providers often log and swallow per-endpoint errors, so a sync task cannot
+    rely on the exception reaching it.  Every :class:`ProviderRateLimitedError`
+    raised in this context (worker threads running a copy of it included) is
+    recorded in the yielded dict, which the task uses to reschedule itself.
+    """
+    collected = {} if deferred is None else deferred
+    reset = _deferrals.set(collected)
+    try:
+        yield collected
+    finally:
+        _deferrals.reset(reset)
+
+
+def rate_limited(provider_name: str, retry_after: float) -> ProviderRateLimitedError:
+    """Build the error for an exhausted budget and record it for the enclosing sync task."""
+    deferred = _deferrals.get()
+    if deferred is not None:
+        deferred[provider_name] = max(retry_after, deferred.get(provider_name, 0.0))
+    return ProviderRateLimitedError(provider_name, retry_after)
+
+
+def rate_limit_scope(provider_name: str, client_id: str | None, user_id: UUID) -> str:
+    """Redis key of the bucket a request for *user_id* draws from."""
+    app = hashlib.sha256(str(client_id or "").encode()).hexdigest()[:12]
+    limit = PROVIDER_RATE_LIMITS.get(provider_name)
+    if limit is not None and limit.per_user:
+        return f"{_PREFIX}:{provider_name}:{app}:{user_id}"
+    return f"{_PREFIX}:{provider_name}:{app}"
+
+
+def acquire(provider_name: str, scope: str) -> float:
+    """Take one request from the budget; return 0, or the seconds to wait before trying again."""
+    if not settings.provider_rate_limit_enabled:
+        return 0.0
+    limit = PROVIDER_RATE_LIMITS.get(provider_name)
+    capacity, rate = (limit.requests, limit.requests / (limit.per_seconds * 1000)) if limit else (0, 0)
+    try:
+        wait_ms = get_redis_client().eval(_ACQUIRE_LUA, 2, scope, f"{scope}:blocked", capacity, rate)
+    except Exception as exc:
+        logger.warning("Provider rate limiter unavailable, not limiting %s: %s", provider_name, exc)
+        return 0.0
+    return int(wait_ms) / 1000
+
+
+def wait_for_budget(provider_name: str, scope: str) -> None:
+    """Block until a request may be sent, or raise :class:`ProviderRateLimitedError` if that takes too long."""
+    while (wait := acquire(provider_name, scope)) > 0:
+        if wait > settings.provider_rate_limit_max_wait_seconds:
+            raise rate_limited(provider_name, wait)
+        time.sleep(wait)
+
+
+def block(scope: str, seconds: float) -> None:
+    """Hold every request in *scope* for *seconds* (provider-signalled back-off)."""
+    if not settings.provider_rate_limit_enabled or seconds <= 0:
+        return
+    try:
+        # Only ever extend a block; a shorter hint must not cut a longer back-off short.
+        client = get_redis_client()
+        if client.pttl(f"{scope}:blocked") < seconds * 1000:
+            client.set(f"{scope}:blocked", "1", px=math.ceil(seconds * 1000))
+    except Exception as exc:
+        logger.warning("Failed to record provider back-off for %s: %s", scope, exc)
+
+
+def _header_seconds(value: str | None) -> float | None:
+    """Parse a delay or reset header: seconds, an epoch timestamp, or an HTTP date."""
+    if not value:
+        return None
+    try:
+        # Some vendors report several windows ("15,86400"); the first is the shortest.
+        number = float(value.split(",")[0])
+    except ValueError:
+        try:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, number - time.time()) if number > _EPOCH_THRESHOLD else max(0.0, number)
+
+
+def _header(headers: Mapping[str, str], *names: str) -> str | None:
+    return next((headers[name] for name in names if name in headers), None)
+
+
+def retry_after_from_headers(headers: Mapping[str, str]) -> float | None:
+    """Back-off requested by a ``429`` response (``Retry-After`` or the rate-limit reset)."""
+    return _header_seconds(_header(headers, "retry-after")) or _header_seconds(
+        _header(headers, "x-ratelimit-reset", "ratelimit-reset", "fitbit-rate-limit-reset")
+    )
+
+
+def exhausted_for(headers: Mapping[str, str]) -> float | None:
+    """Seconds until the window resets when a successful response says no requests are left."""
+    remaining = _header(headers, "x-ratelimit-remaining", "ratelimit-remaining", "fitbit-rate-limit-remaining")
+    if remaining is None:
+        return None
+    try:
+        if min(int(part) for part in remaining.split(",")) > 0:
+            return None
+    except ValueError:
+        return None
+    return _header_seconds(_header(headers, "x-ratelimit-reset", "ratelimit-reset", "fitbit-rate-limit-reset"))
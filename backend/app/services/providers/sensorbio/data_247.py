@@ -1,6 +1,6 @@
 """Sensor Bio 247 data implementation for sleep, recovery, biometrics, and daily activity."""
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any, TypeVar
 from uuid import UUID, uuid4
@@ -110,6 +110,12 @@ class SensorBio247Data(Base247DataTemplate):
     def _from_epoch_millis(timestamp: int | float | None) -> datetime | None:
         return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc) if timestamp is not None else None
 
+    @staticmethod
+    def _utc_days(start_time: datetime, end_time: datetime) -> list[date]:
+        """UTC calendar days from *start_time* through *end_time*, for the date-scoped endpoints."""
+        first, last = start_time.astimezone(timezone.utc).date(), end_time.astimezone(timezone.utc).date()
+        return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
     # -------------------------------------------------------------------------
     # Sleep — GET /v1/sleep
     # -------------------------------------------------------------------------
@@ -124,27 +130,25 @@ class SensorBio247Data(Base247DataTemplate):
         session-level sleep, so we must issue one request per day. A day may
         return multiple sessions (e.g. overnight sleep + nap).
         """
-        all_sleep_data: list[dict[str, Any]] = []
-        current_date = start_time.astimezone(timezone.utc).date()
-        end_date = end_time.astimezone(timezone.utc).date()
 
-        while current_date <= end_date:
-            try:
-                response = self._make_api_request(db, user_id, "/v1/sleep", params={"date": current_date.isoformat()})
-                records = response.get("data", []) if isinstance(response, dict) else []
-                if isinstance(records, list):
-                    all_sleep_data.extend(records)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching Sensor Bio sleep for {current_date}: {e}",
-                    provider="sensorbio",
-                    task="get_sleep_data",
-                )
-            current_date += timedelta(days=1)
+        def fetch_day(day: date) -> list[dict[str, Any]]:
+            response = self._make_api_request(db, user_id, "/v1/sleep", params={"date": day.isoformat()})
+            records = response.get("data", []) if isinstance(response, dict) else []
+            return records if isinstance(records, list) else []
+
+        def log_failed_day(day: date, e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching Sensor Bio sleep for {day}: {e}",
+                provider="sensorbio",
+                task="get_sleep_data",
+            )
 
-        return all_sleep_data
+        days = self._utc_days(start_time, end_time)
+        return [
+            record for records in self.fetch_windows(db, user_id, days, fetch_day, log_failed_day) for record in records
+        ]
 
     def normalize_sleep(self, raw_sleep: dict[str, Any], user_id: UUID) -> dict[str, Any] | None:  # ty:ignore[invalid-method-override]
         """Validate + normalise a single /v1/sleep record.
@@ -292,28 +296,26 @@ class SensorBio247Data(Base247DataTemplate):
         parameter. There is no multi-day range for the top-level scores payload
         (activity + sleep + recovery), so we issue one request per day.
         """
-        all_scores: list[dict[str, Any]] = []
-        current_date = start_time.astimezone(timezone.utc).date()
-        end_date = end_time.astimezone(timezone.utc).date()
 
-        while current_date <= end_date:
-            try:
-                response = self._make_api_request(db, user_id, "/v1/scores", params={"date": current_date.isoformat()})
-                record = response.get("data") if isinstance(response, dict) else None
-                if isinstance(record, dict):
-                    record["date"] = record.get("date") or current_date.isoformat()
-                    all_scores.append(record)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching Sensor Bio scores for {current_date}: {e}",
-                    provider="sensorbio",
-                    task="get_recovery_data",
-                )
-            current_date += timedelta(days=1)
+        def fetch_day(day: date) -> dict[str, Any] | None:
+            response = self._make_api_request(db, user_id, "/v1/scores", params={"date": day.isoformat()})
+            record = response.get("data") if isinstance(response, dict) else None
+            if not isinstance(record, dict):
+                return None
+            record["date"] = record.get("date") or day.isoformat()
+            return record
 
-        return all_scores
+        def log_failed_day(day: date, e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching Sensor Bio scores for {day}: {e}",
+                provider="sensorbio",
+                task="get_recovery_data",
+            )
+
+        days = self._utc_days(start_time, end_time)
+        return [record for record in self.fetch_windows(db, user_id, days, fetch_day, log_failed_day) if record]
 
     def normalize_recovery(self, raw_recovery: dict[str, Any], user_id: UUID) -> dict[str, Any] | None:  # ty:ignore[invalid-method-override]
         """Validate + normalise a /v1/scores record (recovery + activity + sleep scores).
@@ -599,26 +601,24 @@ class SensorBio247Data(Base247DataTemplate):
 
         Like sleep/scores, this endpoint is date-scoped (``date`` + ``granularity``).
         """
-        all_stats: list[dict[str, Any]] = []
-        current_date = start_date.astimezone(timezone.utc).date()
-        final_date = end_date.astimezone(timezone.utc).date()
-        while current_date <= final_date:
-            try:
-                response = self._make_api_request(
-                    db, user_id, "/v1/step/details", params={"date": current_date.isoformat(), "granularity": "day"}
-                )
-                if isinstance(response, dict) and "metrics" in response:
-                    all_stats.append(response)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching Sensor Bio step details for {current_date}: {e}",
-                    provider="sensorbio",
-                    task="get_daily_activity_statistics",
-                )
-            current_date += timedelta(days=1)
-        return all_stats
+
+        def fetch_day(day: date) -> Any:
+            return self._make_api_request(
+                db, user_id, "/v1/step/details", params={"date": day.isoformat(), "granularity": "day"}
+            )
+
+        def log_failed_day(day: date, e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching Sensor Bio step details for {day}: {e}",
+                provider="sensorbio",
+                task="get_daily_activity_statistics",
+            )
+
+        days = self._utc_days(start_date, end_date)
+        responses = self.fetch_windows(db, user_id, days, fetch_day, log_failed_day)
+        return [response for response in responses if isinstance(response, dict) and "metrics" in response]
 
     def normalize_daily_activity(self, raw_stats: dict[str, Any], user_id: UUID) -> dict[str, Any] | None:  # ty:ignore[invalid-method-override]
         """Validate + normalise a StepDetailsResponseBody into our internal shape."""
@@ -46,6 +46,7 @@ from app.database import DbSession
 from app.repositories import UserConnectionRepository
 from app.schemas.providers.strava import ActivityJSON as StravaActivityJSON
 from app.schemas.providers.strava import StravaWebhookEvent
+from app.services import webhook_coalescer
 from app.services.event_record_service import event_record_service
 from app.services.providers.strava.workouts import StravaWorkouts
 from app.services.providers.templates.base_webhook_handler import BaseWebhookHandler
@@ -128,6 +129,10 @@ class StravaWebhookHandler(BaseWebhookHandler):
 
         store_raw_payload(source="webhook", provider="strava", payload=raw, trace_id=trace_id)
 
+        object_key = f"{payload.object_type}:{payload.object_id}"
+        if webhook_coalescer.defer("strava", str(payload.owner_id), object_key, raw, trace_id):
+            return {"status": "accepted"}
+
         task = celery_app.send_task(_PROCESS_PUSH_TASK, args=["strava", raw, trace_id], queue="webhook_sync")
         log_structured(
             logger,
@@ -399,16 +399,17 @@ class StravaWorkouts(BaseWorkoutsTemplate):
                     error=str(e),
                 )
 
-        count = 0
-        for activity in parsed_activities:
-            record, detail = self._normalize_workout(activity, user_id)
-            created_record = event_record_service.create(db, record)
-            detail_for_record = detail.model_copy(update={"record_id": created_record.id})
-            event_record_service.create_detail(db, detail_for_record)
-            count += 1
+        normalized = [(activity, *self._normalize_workout(activity, user_id)) for activity in parsed_activities]
+        inserted_ids = event_record_service.bulk_create_with_details(
+            db, [(record, detail) for _, record, detail in normalized], detail_type="workout"
+        )
+        db.commit()
+
+        for activity, record, _ in normalized:
             self._ingest_workout_streams(db, activity, user_id, record)
+        db.commit()
 
-        return count
+        return len(inserted_ids)
 
     def process_push_activity(
         self,
@@ -123,31 +123,31 @@ class Suunto247Data(Base247DataTemplate):
         chunk_days: int = 20,
     ) -> list[dict[str, Any]]:
         """Fetch data in chunks to stay within Suunto's 28-day API limit."""
-        all_data: list[dict[str, Any]] = []
+        chunks: list[tuple[datetime, datetime]] = []
         current_start = start_time
-
         while current_start < end_time:
             current_end = min(current_start + timedelta(days=chunk_days), end_time)
-            params = {
-                "from": self._epoch_ms(current_start),
-                "to": self._epoch_ms(current_end),
-            }
+            chunks.append((current_start, current_end))
+            current_start = current_end
 
-            try:
-                response = self._make_api_request(db, user_id, endpoint, params=params)
-                if isinstance(response, list):
-                    all_data.extend(response)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching chunk {current_start} to {current_end}: {e}",
-                    provider="suunto",
-                    task="fetch_in_chunks",
-                    user_id=str(user_id),
-                )
+        def fetch_chunk(chunk: tuple[datetime, datetime]) -> Any:
+            params = {"from": self._epoch_ms(chunk[0]), "to": self._epoch_ms(chunk[1])}
+            return self._make_api_request(db, user_id, endpoint, params=params)
 
-            current_start = current_end
+        def log_failed_chunk(chunk: tuple[datetime, datetime], e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching chunk {chunk[0]} to {chunk[1]}: {e}",
+                provider="suunto",
+                task="fetch_in_chunks",
+                user_id=str(user_id),
+            )
+
+        all_data: list[dict[str, Any]] = []
+        for response in self.fetch_windows(db, user_id, chunks, fetch_chunk, on_error=log_failed_chunk):
+            if isinstance(response, list):
+                all_data.extend(response)
 
         return all_data
 
@@ -424,12 +424,14 @@ class Suunto247Data(Base247DataTemplate):
         user_id: UUID,
         start_time: datetime,
         end_time: datetime,
+        raw_data: list[dict[str, Any]] | None = None,
     ) -> int:
-        """Load recovery data from API and save to database.
+        """Load recovery data from API (unless already fetched as *raw_data*) and save to database.
 
         Returns total number of data point samples saved.
         """
-        raw_data = self.get_recovery_data(db, user_id, start_time, end_time)
+        if raw_data is None:
+            raw_data = self.get_recovery_data(db, user_id, start_time, end_time)
         total_count = 0
 
         for item in raw_data:
@@ -576,32 +578,35 @@ class Suunto247Data(Base247DataTemplate):
         This endpoint uses ISO-8601 date params (not epoch ms) and lives
         under /247 rather than /247samples.
         """
-        all_data: list[dict[str, Any]] = []
+        chunks: list[tuple[datetime, datetime]] = []
         current_start = start_date
         chunk_days = 14  # Conservative vs 28-day API limit
-
         while current_start < end_date:
             current_end = min(current_start + timedelta(days=chunk_days), end_date)
+            chunks.append((current_start, current_end))
+            current_start = current_end
+
+        def fetch_chunk(chunk: tuple[datetime, datetime]) -> Any:
             params = {
-                "startdate": current_start.strftime("%Y-%m-%dT%H:%M:%S"),
-                "enddate": current_end.strftime("%Y-%m-%dT%H:%M:%S"),
+                "startdate": chunk[0].strftime("%Y-%m-%dT%H:%M:%S"),
+                "enddate": chunk[1].strftime("%Y-%m-%dT%H:%M:%S"),
             }
+            return self._make_api_request(db, user_id, "/247/daily-activity-statistics", params=params)
 
-            try:
-                response = self._make_api_request(db, user_id, "/247/daily-activity-statistics", params=params)
-                if isinstance(response, list):
-                    all_data.extend(response)
-            except Exception as e:
-                log_structured(
-                    self.logger,
-                    "warning",
-                    f"Error fetching daily activity chunk {current_start} to {current_end}: {e}",
-                    provider="suunto",
-                    task="get_daily_activity_statistics",
-                    user_id=str(user_id),
-                )
+        def log_failed_chunk(chunk: tuple[datetime, datetime], e: Exception) -> None:
+            log_structured(
+                self.logger,
+                "warning",
+                f"Error fetching daily activity chunk {chunk[0]} to {chunk[1]}: {e}",
+                provider="suunto",
+                task="get_daily_activity_statistics",
+                user_id=str(user_id),
+            )
 
-            current_start = current_end
+        all_data: list[dict[str, Any]] = []
+        for response in self.fetch_windows(db, user_id, chunks, fetch_chunk, on_error=log_failed_chunk):
+            if isinstance(response, list):
+                all_data.extend(response)
 
         return all_data
 
@@ -684,13 +689,15 @@ class Suunto247Data(Base247DataTemplate):
         user_id: UUID,
         start_time: datetime,
         end_time: datetime,
+        raw_data: list[dict[str, Any]] | None = None,
     ) -> tuple[int, int]:
-        """Load sleep data from API and save to database.
+        """Load sleep data from API (unless already fetched as *raw_data*) and save to database.
 
         Returns ``(saved, skipped)`` so callers can distinguish a real sync from
         one where every fetched session was dropped (e.g. unusable windows).
         """
-        raw_data = self.get_sleep_data(db, user_id, start_time, end_time)
+        if raw_data is None:
+            raw_data = self.get_sleep_data(db, user_id, start_time, end_time)
         saved = 0
         skipped = 0
         for item in raw_data:
@@ -740,9 +747,23 @@ class Suunto247Data(Base247DataTemplate):
             "daily_activity_synced": 0,
         }
 
+        # Fetch the endpoints concurrently, then save one by one on the DB session.
+        fetched = self.fetch_concurrently(
+            db,
+            user_id,
+            {
+                "sleep": lambda: self.get_sleep_data(db, user_id, start_dt, end_dt),
+                "recovery": lambda: self.get_recovery_data(db, user_id, start_dt, end_dt),
+                "activity": lambda: self.get_activity_samples(db, user_id, start_dt, end_dt),
+                "daily": lambda: self.get_daily_activity_statistics(db, user_id, start_dt, end_dt),
+            },
+        )
+
         # 1. Sleep sessions → EventRecord + SleepDetails
         try:
-            saved, skipped = self.load_and_save_sleep(db, user_id, start_dt, end_dt)
+            saved, skipped = self.load_and_save_sleep(
+                db, user_id, start_dt, end_dt, raw_data=self.fetch_result(fetched["sleep"])
+            )
             results["sleep_sessions_synced"] = saved
             results["sleep_sessions_skipped"] = skipped
         except Exception as e:
@@ -757,7 +778,9 @@ class Suunto247Data(Base247DataTemplate):
 
         # 2. Recovery → HealthScore (RECOVERY category, balance scaled 0-100)
         try:
-            results["recovery_samples_synced"] = self.load_and_save_recovery(db, user_id, start_dt, end_dt)
+            results["recovery_samples_synced"] = self.load_and_save_recovery(
+                db, user_id, start_dt, end_dt, raw_data=self.fetch_result(fetched["recovery"])
+            )
         except Exception as e:
             log_structured(
                 self.logger,
@@ -770,7 +793,7 @@ class Suunto247Data(Base247DataTemplate):
 
         # 3. Activity samples → DataPointSeries (HR, steps, SpO2, energy, HRV)
         try:
-            raw_activity = self.get_activity_samples(db, user_id, start_dt, end_dt)
+            raw_activity = self.fetch_result(fetched["activity"])
             normalized_activity = self.normalize_activity_samples(raw_activity, user_id)
             results["activity_samples_synced"] = self.save_activity_samples(db, user_id, normalized_activity)
         except Exception as e:
@@ -785,7 +808,7 @@ class Suunto247Data(Base247DataTemplate):
 
         # 4. Daily aggregated statistics → DataPointSeries (steps, energy)
         try:
-            raw_daily = self.get_daily_activity_statistics(db, user_id, start_dt, end_dt)
+            raw_daily = self.fetch_result(fetched["daily"])
             normalized_daily = [self.normalize_daily_activity(item, user_id) for item in raw_daily]
             results["daily_activity_synced"] = self.save_daily_activity_statistics(db, user_id, normalized_daily)
         except Exception as e:
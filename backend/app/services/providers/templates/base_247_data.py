@@ -2,13 +2,33 @@
 
 import logging
 from abc import ABC, abstractmethod
+from collections.abc import Callable, Generator, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar, copy_context
 from datetime import datetime
+from functools import partial
 from typing import Any
 from uuid import UUID
 
+from app.config import settings
 from app.database import DbSession
+from app.repositories import UserConnectionRepository
+from app.services.providers.api_client import pinned_access_token
 from app.services.providers.templates.base_oauth import BaseOAuthTemplate
 
+# Set while fetches are submitted to a pool; submitted fetches run in a copy of that context,
+# so a fetch that fetches again (a chunked endpoint inside fetch_concurrently) runs its own
+# fetches inline on its worker thread and the provider never exceeds the outer pool's limit.
+_in_fetch_pool: ContextVar[bool] = ContextVar("in_fetch_pool", default=False)
+
+
+def _capture[T](fetch: Callable[[], T]) -> T | Exception:
+    try:
+        return fetch()
+    except Exception as e:
+        return e
+
 
 class Base247DataTemplate(ABC):
     """Base template for fetching and processing 247 data (sleep, recovery, activity).
@@ -19,6 +39,9 @@ class Base247DataTemplate(ABC):
     - Includes: sleep sessions, recovery metrics, activity samples (steps, HR, etc.)
     """
 
+    # Upper bound on concurrent API fetches for this provider (None = provider_fetch_concurrency).
+    fetch_concurrency: int | None = None
+
     def __init__(
         self,
         provider_name: str,
@@ -173,6 +196,109 @@ class Base247DataTemplate(ABC):
         raw_data = self.get_daily_activity_statistics(db, user_id, start_date, end_date)
         return [self.normalize_daily_activity(item, user_id) for item in raw_data]
 
+    # -------------------------------------------------------------------------
+    # Concurrent Fetching
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def _fetch_pool(
+        self, db: DbSession, user_id: UUID, fetch_count: int
+    ) -> Generator[ThreadPoolExecutor | None, None, None]:
+        """Yield a worker pool for *fetch_count* API calls, or None when they should run one by one.
+
+        The access token is resolved once on the calling thread, so fetches never
+        use *db* from a worker thread; the caller saves the results on *db* afterwards.
+        Falls back to fetching one by one when the token cannot be resolved up front,
+        so every fetch fails the way it would have on its own, and when already running
+        inside a fetch pool, so nested fetches share the outer concurrency limit.
+        """
+        workers = min(fetch_count, self.fetch_concurrency or settings.provider_fetch_concurrency)
+        if _in_fetch_pool.get():
+            workers = 1
+        with ExitStack() as stack:
+            if workers > 1:
+                try:
+                    stack.enter_context(
+                        pinned_access_token(db, user_id, self.provider_name, UserConnectionRepository(), self.oauth)
+                    )
+                except Exception:
+                    workers = 1
+            if workers <= 1:
+                yield None
+                return
+            pool = stack.enter_context(
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.provider_name}-fetch")
+            )
+            token = _in_fetch_pool.set(True)
+            try:
+                yield pool
+            finally:
+                _in_fetch_pool.reset(token)
+
+    def fetch_concurrently(
+        self,
+        db: DbSession,
+        user_id: UUID,
+        fetchers: Mapping[str, Callable[[], Any]],
+    ) -> dict[str, Any]:
+        """Run independent API fetches concurrently; return each result or the exception it raised."""
+        with self._fetch_pool(db, user_id, len(fetchers)) as pool:
+            if pool is None:
+                return {name: _capture(fetch) for name, fetch in fetchers.items()}
+            futures = {name: pool.submit(copy_context().run, _capture, fetch) for name, fetch in fetchers.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+    def fetch_windows[W, R](
+        self,
+        db: DbSession,
+        user_id: UUID,
+        windows: Sequence[W],
+        fetch: Callable[[W], R],
+        on_error: Callable[[W, Exception], None] | None = None,
+    ) -> list[R]:
+        """Fetch a date range window by window (days, API-sized chunks) with bounded concurrency.
+
+        Returns the results of the successful windows in window order. A failed
+        window is handed to *on_error* on the calling thread, in window order;
+        without *on_error* the first failure (in window order) is raised, and so
+        is anything *on_error* raises, dropping the windows not started yet.
+        """
+        results: list[R] = []
+        with self._fetch_pool(db, user_id, len(windows)) as pool:
+            if pool is None:
+                for window in windows:
+                    try:
+                        results.append(fetch(window))
+                    except Exception as e:
+                        if on_error is None:
+                            raise
+                        on_error(window, e)
+                return results
+
+            futures = [pool.submit(copy_context().run, _capture, partial(fetch, window)) for window in windows]
+            try:
+                for window, future in zip(windows, futures, strict=True):
+                    result = future.result()
+                    if not isinstance(result, Exception):
+                        results.append(result)  # ty:ignore[invalid-argument-type]
+                    elif on_error is not None:
+                        on_error(window, result)
+                    else:
+                        raise result
+            except BaseException:
+                # Raised (or re-raised by on_error): drop the windows not started yet.
+                for pending in futures:
+                    pending.cancel()
+                raise
+        return results
+
+    @staticmethod
+    def fetch_result[T](result: T | Exception) -> T:
+        """Unwrap one result of :meth:`fetch_concurrently`, re-raising the exception of a failed fetch."""
+        if isinstance(result, Exception):
+            raise result
+        return result
+
     # -------------------------------------------------------------------------
     # Combined Load
     # -------------------------------------------------------------------------
@@ -199,10 +199,13 @@ class BaseOAuthTemplate(ABC):
 
     def _revoke_connection(self, db: DbSession, user_id: UUID, *, reason: str) -> None:
         """Mark the connection revoked and emit a connection.revoked webhook."""
+        from app.services.providers.token_refresh import revoke_cached_token
+
         connection = self.connection_repo.get_by_user_and_provider(db, user_id, self.provider_name)
         if not connection or connection.status == ConnectionStatus.REVOKED:
             return
         self.connection_repo.mark_as_revoked(db, connection)
+        revoke_cached_token(user_id, self.provider_name)
         on_connection_revoked(
             user_id=user_id,
             provider=self.provider_name,
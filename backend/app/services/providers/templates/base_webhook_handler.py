@@ -30,6 +30,15 @@ Different providers deliver data in fundamentally different ways:
 
 Providers indicate which modes they support through
 ``BaseProviderStrategy.capabilities`` (see ``ProviderCapabilities``).
+
+Fast acknowledgement
+--------------------
+With ``webhook_fast_ack_enabled`` (the default) ``handle()`` only verifies the
+signature inside the request: the raw body goes to the claim-check store
+(``app.services.webhook_claim_check``) and ``parse_payload()`` / ``dispatch()``
+run in the ``process_webhook_body`` task on the ``webhook_sync`` queue.  The
+response time therefore no longer depends on payload size or dispatch cost;
+malformed bodies are still answered with 200 and dropped by the worker.
 """
 
 import hashlib
@@ -37,12 +46,19 @@ import hmac
 import logging
 from abc import ABC, abstractmethod
 from typing import Any
+from uuid import uuid4
 
+from celery import current_app as celery_app
 from fastapi import HTTPException, Request
 
+from app.config import settings
 from app.database import DbSession
+from app.services import webhook_claim_check
+from app.services.payload_dedup import claim_payload, delivery_scope, payload_digest, release_payload
 from app.utils.structured_logging import log_structured
 
+_PROCESS_BODY_TASK = "app.integrations.celery.tasks.webhook_push_task.process_webhook_body"
+
 
 class BaseWebhookHandler(ABC):
     """Abstract template for provider-specific webhook handlers.
@@ -74,6 +90,14 @@ class BaseWebhookHandler(ABC):
         self.provider_name = provider_name
         self.logger = logging.getLogger(self.__class__.__name__)
 
+    def delivery_key(self, body: bytes) -> str:
+        """Idempotency key of one webhook delivery: a digest of the raw body.
+
+        None of the supported providers sends a delivery id header, so a
+        redelivery is recognised by its identical body.
+        """
+        return f"sha256:{payload_digest(body)}"
+
     def extract_user_id(self, payload: dict[str, Any]) -> str | None:
         """Best-effort provider-side user id from a raw webhook payload (for log correlation)."""
         if not self.user_id_field:
@@ -189,6 +213,14 @@ class BaseWebhookHandler(ABC):
         """Orchestrate the full webhook handling pipeline.
 
         Executes: ``verify_signature`` → ``parse_payload`` → ``dispatch``.
+        In fast-ack mode only the verification happens here; the body is
+        stored and ``parse_payload`` → ``dispatch`` run in the
+        ``process_webhook_body`` task (see ``_enqueue_body``).
+
+        A delivery already accepted within ``webhook_dedup_ttl_seconds`` (same
+        ``delivery_key``) is acknowledged right after verification, before any
+        DB work.  The claim is released when processing fails, so the
+        provider's redelivery is processed again.
 
         Override this only when the standard sequence is insufficient (e.g.
         when Garmin mixes PING and PUSH in the same endpoint and the routing
@@ -200,11 +232,13 @@ class BaseWebhookHandler(ABC):
             db: Active database session.
 
         Returns:
-            Result ``dict`` from ``dispatch()``.
+            ``{"status": "accepted"}`` in fast-ack mode, ``{"status": "duplicate"}``
+            for a redelivery, otherwise the result ``dict`` from ``dispatch()``.
 
         Raises:
             ``HTTPException(401)`` if ``verify_signature`` returns ``False``.
-            ``HTTPException(400)`` if ``parse_payload`` raises a validation error.
+            ``HTTPException(400)`` if ``parse_payload`` raises a validation error
+            (inline mode only).
         """
         if not self.verify_signature(request, body):
             log_structured(
@@ -217,8 +251,70 @@ class BaseWebhookHandler(ABC):
             )
             raise HTTPException(status_code=401, detail="Invalid webhook signature")
 
-        payload = self.parse_payload(body)
-        return self.dispatch(db, payload)
+        scope = delivery_scope(self.provider_name)
+        delivery_key = self.delivery_key(body)
+        owner = uuid4().hex
+        if not claim_payload(scope, delivery_key, owner, ttl=settings.webhook_dedup_ttl_seconds):
+            log_structured(
+                self.logger,
+                "info",
+                "Duplicate webhook delivery acknowledged without processing",
+                provider=self.provider_name,
+                delivery_key=delivery_key,
+            )
+            return {"status": "duplicate"}
+
+        try:
+            if settings.webhook_fast_ack_enabled:
+                accepted = self._enqueue_body(body, delivery_key, owner)
+                if accepted is not None:
+                    return accepted
+
+            payload = self.parse_payload(body)
+            return self.dispatch(db, payload)
+        except Exception:
+            release_payload(scope, delivery_key, owner)
+            raise
+
+    def _enqueue_body(self, body: bytes, delivery_key: str, owner: str) -> dict[str, Any] | None:
+        """Store the raw body and enqueue ``process_webhook_body`` for it.
+
+        The task releases the delivery claim (*delivery_key* held by *owner*)
+        if it gives up on the body.  Returns None when the body could not be
+        stored or the task could not be enqueued, so the caller processes the
+        webhook inline instead.
+        """
+        ref = webhook_claim_check.put_body(self.provider_name, body)
+        if ref is None:
+            return None
+        trace_id = str(uuid4())[:8]
+        try:
+            task = celery_app.send_task(
+                _PROCESS_BODY_TASK,
+                args=[self.provider_name, ref, trace_id, delivery_key, owner],
+                queue="webhook_sync",
+            )
+        except Exception as exc:
+            log_structured(
+                self.logger,
+                "warning",
+                "Could not enqueue webhook body, processing inline",
+                provider=self.provider_name,
+                trace_id=trace_id,
+                error=str(exc),
+            )
+            webhook_claim_check.delete_body(ref)
+            return None
+        log_structured(
+            self.logger,
+            "info",
+            "Webhook accepted for async processing",
+            provider=self.provider_name,
+            trace_id=trace_id,
+            size_bytes=len(body),
+            task_id=getattr(task, "id", None),
+        )
+        return {"status": "accepted"}
 
     def handle_challenge(self, request: Request) -> dict[str, Any]:
         """Handle GET-based subscription verification challenges.
@@ -0,0 +1,257 @@
+"""Single-flight OAuth token refresh.
+
+Webhook pushes, pull syncs and linked-profile fan-out for the same connection
+often find its access token about to expire at the same moment.  Refreshing
+from every one of them wastes round trips and, for providers that rotate
+refresh tokens, lets a late refresh present a token an earlier one already
+consumed — which the provider answers with ``invalid_grant`` and we treat as
+a revoked connection.  Only the caller holding the lock refreshes; the others
+wait for it and read the new token from the database.
+
+Redis keys:
+
+  oauth_refresh:{provider}:{user_id}
+      Random owner token.  SET NX with ``oauth_refresh_lock_ttl_seconds``, so
+      a holder that dies mid-refresh cannot block the connection for long.
+
+  oauth_token_revoked:{provider}:{user_id}
+      Set when the connection is disconnected or revoked, for
+      ``provider_token_cache_ttl_seconds``.  While it exists no process uses
+      its cached token for the connection.
+
+Redis failures never block a request: without the lock every caller refreshes
+inline, as before.
+
+Valid access tokens are also cached in-process for
+``provider_token_cache_ttl_seconds``, so the paginated and chunked fetch loops
+of a sync look the connection up once instead of once per HTTP call.  A
+refresh (or a ``401`` from the provider) drops the cached token; a disconnect
+or revoke drops it in every process via the marker key above.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+
+from app.config import settings
+from app.database import DbSession
+from app.integrations.redis_client import get_redis_client
+from app.models import UserConnection
+from app.schemas.auth import ConnectionStatus
+from app.services.providers.templates.base_oauth import BaseOAuthTemplate
+from app.utils.structured_logging import log_structured
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "oauth_refresh"
+_REVOKED_PREFIX = "oauth_token_revoked"
+_POLL_INTERVAL = 0.1
+
+# Tokens closer than this to expiry are refreshed before use.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# Entries beyond this trigger a sweep of stale tokens (one per user and provider).
+_TOKEN_CACHE_MAX_ENTRIES = 10_000
+
+# (user_id, provider) -> (access token, token expiry, monotonic time cached)
+_token_cache: dict[tuple[UUID, str], tuple[str, datetime | None, float]] = {}
+
+_RELEASE_LUA = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+def _lock_key(connection: UserConnection) -> str:
+    return f"{_PREFIX}:{connection.provider}:{connection.user_id}"
+
+
+def _expires_within(expires_at: datetime | None, margin: timedelta) -> bool:
+    return expires_at is not None and expires_at < datetime.now(timezone.utc) + margin
+
+
+def needs_refresh(connection: UserConnection, margin: timedelta = REFRESH_MARGIN) -> bool:
+    """Whether the connection's access token expires within *margin*."""
+    return _expires_within(connection.token_expires_at, margin)
+
+
+def _is_fresh(entry: tuple[str, datetime | None, float], now: float) -> bool:
+    _, expires_at, cached_at = entry
+    return now - cached_at < settings.provider_token_cache_ttl_seconds and not _expires_within(
+        expires_at, REFRESH_MARGIN
+    )
+
+
+def _revoked_key(user_id: UUID, provider_name: str) -> str:
+    return f"{_REVOKED_PREFIX}:{provider_name}:{user_id}"
+
+
+def _recently_revoked(user_id: UUID, provider_name: str) -> bool:
+    try:
+        return bool(get_redis_client().exists(_revoked_key(user_id, provider_name)))
+    except Exception as exc:
+        logger.warning("Token revocation marker unavailable, trusting cached token: %s", exc)
+        return False
+
+
+def cached_token(user_id: UUID, provider_name: str) -> str | None:
+    """Access token cached by this process for the connection, if still usable."""
+    entry = _token_cache.get((user_id, provider_name))
+    if entry is None:
+        return None
+    if not _is_fresh(entry, time.monotonic()) or _recently_revoked(user_id, provider_name):
+        _token_cache.pop((user_id, provider_name), None)
+        return None
+    return entry[0]
+
+
+def cache_token(connection: UserConnection) -> None:
+    """Remember the connection's (valid) access token for the next requests of this process."""
+    if settings.provider_token_cache_ttl_seconds <= 0 or not connection.access_token:
+        return
+    now = time.monotonic()
+    if len(_token_cache) >= _TOKEN_CACHE_MAX_ENTRIES:
+        for key, entry in list(_token_cache.items()):
+            if not _is_fresh(entry, now):
+                _token_cache.pop(key, None)
+    _token_cache[(connection.user_id, connection.provider)] = (
+        connection.access_token,
+        connection.token_expires_at,
+        now,
+    )
+
+
+def invalidate_token(user_id: UUID, provider_name: str) -> None:
+    """Drop the cached token, e.g. after it was refreshed or rejected by the provider."""
+    _token_cache.pop((user_id, provider_name), None)
+
+
+def revoke_cached_token(user_id: UUID, provider_name: str) -> None:
+    """Drop the connection's cached token in every process, after a disconnect or revoke.
+
+    Other processes check the marker before using their cached copy; it expires
+    once every copy cached before the revoke would have expired anyway.
+    """
+    invalidate_token(user_id, provider_name)
+    ttl = settings.provider_token_cache_ttl_seconds
+    if ttl <= 0:
+        return
+    try:
+        get_redis_client().set(_revoked_key(user_id, provider_name), "1", ex=ttl)
+    except Exception as exc:
+        logger.warning("Failed to mark cached %s token revoked for user %s: %s", provider_name, user_id, exc)
+
+
+def clear_token_cache() -> None:
+    _token_cache.clear()
+
+
+def _try_lock(key: str, owner: str) -> bool | None:
+    """SET NX the lock; None when Redis is unavailable."""
+    try:
+        return bool(get_redis_client().set(key, owner, nx=True, ex=settings.oauth_refresh_lock_ttl_seconds))
+    except Exception as exc:
+        logger.warning("OAuth refresh lock unavailable, refreshing without it: %s", exc)
+        return None
+
+
+def _release(key: str, owner: str) -> None:
+    try:
+        get_redis_client().eval(_RELEASE_LUA, 1, key, owner)
+    except Exception as exc:
+        logger.warning("Failed to release OAuth refresh lock %s: %s", key, exc)
+
+
+def _wait_for_release(key: str, deadline: float) -> None:
+    try:
+        client = get_redis_client()
+        while client.exists(key) and time.monotonic() < deadline:
+            time.sleep(_POLL_INTERVAL)
+    except Exception as exc:
+        logger.warning("OAuth refresh lock unavailable while waiting: %s", exc)
+
+
+def _current_token(db: DbSession, connection: UserConnection, margin: timedelta) -> str | None:
+    """Re-read the connection; return its access token if another worker already renewed it."""
+    db.refresh(connection)
+    if connection.status == ConnectionStatus.REVOKED:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Connection to {connection.provider} was revoked; reconnection required",
+        )
+    if connection.access_token and not needs_refresh(connection, margin):
+        return connection.access_token
+    return None
+
+
+def _refresh(db: DbSession, connection: UserConnection, oauth: BaseOAuthTemplate) -> str:
+    if not connection.refresh_token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Token expired and no refresh token available for {connection.provider}",
+        )
+    return oauth.refresh_access_token(db, connection.user_id, connection.refresh_token).access_token
+
+
+def refresh_single_flight(
+    db: DbSession,
+    connection: UserConnection,
+    oauth: BaseOAuthTemplate,
+    margin: timedelta = REFRESH_MARGIN,
+) -> str:
+    """Return an access token valid for at least *margin*, refreshing it at most once across workers.
+
+    Callers that find the lock taken wait up to ``oauth_refresh_wait_seconds``
+    for the holder and then use the token it stored.  If the holder gave up
+    without renewing the token, the next waiter takes the lock and retries.
+    """
+    invalidate_token(connection.user_id, connection.provider)
+    token = _refresh_single_flight(db, connection, oauth, margin)
+    cache_token(connection)
+    return token
+
+
+def _refresh_single_flight(
+    db: DbSession,
+    connection: UserConnection,
+    oauth: BaseOAuthTemplate,
+    margin: timedelta,
+) -> str:
+    key = _lock_key(connection)
+    owner = uuid4().hex
+    deadline = time.monotonic() + settings.oauth_refresh_wait_seconds
+    while True:
+        acquired = _try_lock(key, owner)
+        if acquired is None:
+            return _refresh(db, connection, oauth)
+        if acquired:
+            try:
+                # The previous holder may have renewed the token while we were waiting for the lock.
+                if token := _current_token(db, connection, margin):
+                    return token
+                return _refresh(db, connection, oauth)
+            finally:
+                _release(key, owner)
+
+        _wait_for_release(key, deadline)
+        if token := _current_token(db, connection, margin):
+            return token
+        if time.monotonic() >= deadline:
+            log_structured(
+                logger,
+                "warning",
+                "Timed out waiting for concurrent OAuth token refresh",
+                provider=connection.provider,
+                task="refresh_single_flight",
+                user_id=str(connection.user_id),
+            )
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=f"{connection.provider.capitalize()} token refresh in progress, retry later",
+            )
@@ -1,7 +1,8 @@
 """Ultrahuman Ring Air 24/7 data implementation for sleep, recovery, and activity samples."""
 
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
+from functools import partial
 from typing import Any
 from uuid import UUID, uuid4
 
@@ -61,6 +62,12 @@ class Ultrahuman247Data(Base247DataTemplate):
             headers=headers,
         )
 
+    @staticmethod
+    def _calendar_days(start_time: datetime, end_time: datetime) -> list[date]:
+        """Calendar days from *start_time* through *end_time*; the metrics endpoint is queried per day."""
+        first, last = start_time.date(), end_time.date()
+        return [first + timedelta(days=offset) for offset in range((last - first).days + 1)]
+
     def _fetch_daily_metrics(
         self,
         db: DbSession,
@@ -466,107 +473,138 @@ class Ultrahuman247Data(Base247DataTemplate):
             "errors": [],
         }
 
-        current_date = datetime.combine(start_time.date(), datetime.min.time(), tzinfo=timezone.utc)
-        end_date = datetime.combine(end_time.date(), datetime.min.time(), tzinfo=timezone.utc)
-        while current_date <= end_date:
-            date_str = current_date.strftime("%Y-%m-%d")
-            day_error = None
-
-            try:
-                metrics_list = self._fetch_daily_metrics(db, user_id, current_date)
-
-                # Group items by type
-                items_by_type = {}
-                for item in metrics_list:
-                    t = item.get("type")
-                    if t and "object" in item:
-                        items_by_type[t] = item["object"]
-
-                # 1. Process Sleep
-                if "Sleep" in items_by_type:
-                    try:
-                        normalized_sleep = self.normalize_sleep(items_by_type["Sleep"], user_id)
-                        if self.save_sleep_data(db, user_id, normalized_sleep):
-                            results["sleep_sessions_synced"] += 1
-                    except Exception as e:
-                        day_error = f"Sleep processing failed: {e}"
+        # Fetch a bounded batch of days concurrently, then save it day by day in date order
+        # before fetching the next. A fatal error (401/403) stops the sync without fetching
+        # the rest of the range.
+        days = [
+            datetime.combine(day, datetime.min.time(), tzinfo=timezone.utc)
+            for day in self._calendar_days(start_time, end_time)
+        ]
+        batch_size = 2 * (self.fetch_concurrency or settings.provider_fetch_concurrency)
+        for offset in range(0, len(days), batch_size):
+            fetched = self.fetch_concurrently(
+                db,
+                user_id,
+                {
+                    day.strftime("%Y-%m-%d"): partial(self._fetch_daily_metrics, db, user_id, day)
+                    for day in days[offset : offset + batch_size]
+                },
+            )
 
-                # 2. Process Recovery (Not saved to DB yet in this template, but logic is here)
-                # We don't have a generic "save_recovery" in Base247DataTemplate or a table for it yet?
-                # Actually EventRecord doesn't support generic daily recovery metrics easily without a specific type.
-                # But we can normalize it if we add support later.
+            for date_str, fetch_outcome in fetched.items():
+                day_error = None
 
-                # 3. Process Activity Samples
                 try:
-                    # Prepare list for normalization
-                    sample_inputs = []
-                    for t in ["hr", "hrv", "temp", "steps"]:
-                        if t in items_by_type:
-                            sample_inputs.append({"type": t, "values": items_by_type[t].get("values", [])})
-
-                    if sample_inputs:
-                        normalized_samples = self.normalize_activity_samples(sample_inputs, user_id)
-                        saved_count = self.save_activity_samples(db, user_id, normalized_samples)
-                        results["activity_samples"] += saved_count
-
-                    # VO2 max (single daily value, not a time series)
-                    if "vo2_max" in items_by_type:
-                        vo2_obj = items_by_type["vo2_max"]
-                        vo2_value = vo2_obj.get("value")
-                        vo2_ts = vo2_obj.get("day_start_timestamp")
-                        if vo2_value and vo2_ts:
-                            recorded_at = datetime.fromtimestamp(vo2_ts, tz=timezone.utc)
-                            ts_sample = TimeSeriesSampleCreate(
-                                id=uuid4(),
-                                user_id=user_id,
-                                provider=self.provider_name,
-                                recorded_at=recorded_at,
-                                value=Decimal(str(vo2_value)),
-                                series_type=SeriesType.vo2_max,
-                            )
-                            self.data_point_repo.create(db, ts_sample)
-                            results["activity_samples"] += 1
-
-                    # Active time (single daily value in minutes, like vo2_max)
-                    if "active_minutes" in items_by_type:
-                        active_obj = items_by_type["active_minutes"]
-                        active_value = active_obj.get("value")
-                        active_ts = active_obj.get("day_start_timestamp")
-                        if active_value is not None and active_ts:
-                            recorded_at = datetime.fromtimestamp(active_ts, tz=timezone.utc)
-                            self.data_point_repo.create(
-                                db,
-                                TimeSeriesSampleCreate(
+                    metrics_list = self.fetch_result(fetch_outcome)
+
+                    # Group items by type
+                    items_by_type = {}
+                    for item in metrics_list:
+                        t = item.get("type")
+                        if t and "object" in item:
+                            items_by_type[t] = item["object"]
+
+                    # 1. Process Sleep
+                    if "Sleep" in items_by_type:
+                        try:
+                            normalized_sleep = self.normalize_sleep(items_by_type["Sleep"], user_id)
+                            if self.save_sleep_data(db, user_id, normalized_sleep):
+                                results["sleep_sessions_synced"] += 1
+                        except Exception as e:
+                            day_error = f"Sleep processing failed: {e}"
+
+                    # 2. Process Recovery (Not saved to DB yet in this template, but logic is here)
+                    # We don't have a generic "save_recovery" in Base247DataTemplate or a table for it yet?
+                    # Actually EventRecord doesn't support generic daily recovery metrics easily without a
+                    # specific type.
+                    # But we can normalize it if we add support later.
+
+                    # 3. Process Activity Samples
+                    try:
+                        # Prepare list for normalization
+                        sample_inputs = []
+                        for t in ["hr", "hrv", "temp", "steps"]:
+                            if t in items_by_type:
+                                sample_inputs.append({"type": t, "values": items_by_type[t].get("values", [])})
+
+                        if sample_inputs:
+                            normalized_samples = self.normalize_activity_samples(sample_inputs, user_id)
+                            saved_count = self.save_activity_samples(db, user_id, normalized_samples)
+                            results["activity_samples"] += saved_count
+
+                        # VO2 max (single daily value, not a time series)
+                        if "vo2_max" in items_by_type:
+                            vo2_obj = items_by_type["vo2_max"]
+                            vo2_value = vo2_obj.get("value")
+                            vo2_ts = vo2_obj.get("day_start_timestamp")
+                            if vo2_value and vo2_ts:
+                                recorded_at = datetime.fromtimestamp(vo2_ts, tz=timezone.utc)
+                                ts_sample = TimeSeriesSampleCreate(
                                     id=uuid4(),
                                     user_id=user_id,
                                     provider=self.provider_name,
                                     recorded_at=recorded_at,
-                                    value=Decimal(str(active_value)),
-                                    series_type=SeriesType.active_time,
-                                    is_daily_total=True,
-                                ),
-                            )
-                            results["activity_samples"] += 1
-                except Exception as e:
-                    day_error = f"Activity samples processing failed: {e}"
-
-            except HTTPException:
-                # Fatal errors from _fetch_daily_metrics (401, 403) should be raised
-                raise
+                                    value=Decimal(str(vo2_value)),
+                                    series_type=SeriesType.vo2_max,
+                                )
+                                self.data_point_repo.create(db, ts_sample)
+                                results["activity_samples"] += 1
+
+                        # Active time (single daily value in minutes, like vo2_max)
+                        if "active_minutes" in items_by_type:
+                            active_obj = items_by_type["active_minutes"]
+                            active_value = active_obj.get("value")
+                            active_ts = active_obj.get("day_start_timestamp")
+                            if active_value is not None and active_ts:
+                                recorded_at = datetime.fromtimestamp(active_ts, tz=timezone.utc)
+                                self.data_point_repo.create(
+                                    db,
+                                    TimeSeriesSampleCreate(
+                                        id=uuid4(),
+                                        user_id=user_id,
+                                        provider=self.provider_name,
+                                        recorded_at=recorded_at,
+                                        value=Decimal(str(active_value)),
+                                        series_type=SeriesType.active_time,
+                                        is_daily_total=True,
+                                    ),
+                                )
+                                results["activity_samples"] += 1
+                    except Exception as e:
+                        day_error = f"Activity samples processing failed: {e}"
 
-            except Exception as e:
-                # Any other error processing this day
-                day_error = f"Unexpected error: {e}"
+                except HTTPException:
+                    # Fatal errors from _fetch_daily_metrics (401, 403) should be raised
+                    raise
 
-            # Track errors for this day
-            if day_error:
-                results["failed_days"] += 1
-                results["errors"].append({"date": date_str, "error": day_error})
+                except Exception as e:
+                    # Any other error processing this day
+                    day_error = f"Unexpected error: {e}"
 
-            current_date += timedelta(days=1)
+                # Track errors for this day
+                if day_error:
+                    results["failed_days"] += 1
+                    results["errors"].append({"date": date_str, "error": day_error})
 
         return results
 
+    def _fetch_metrics_by_day(
+        self,
+        db: DbSession,
+        user_id: UUID,
+        start_time: datetime,
+        end_time: datetime,
+    ) -> list[tuple[str, list[dict[str, Any]]]]:
+        """Fetch the metrics of each day in the range concurrently; ``(date, metrics)`` pairs in date order."""
+        days = self._calendar_days(start_time, end_time)
+        daily_metrics = self.fetch_windows(
+            db,
+            user_id,
+            days,
+            lambda day: self._fetch_daily_metrics(db, user_id, datetime.combine(day, datetime.min.time())),
+        )
+        return [(day.strftime("%Y-%m-%d"), metrics) for day, metrics in zip(days, daily_metrics, strict=True)]
+
     # -------------------------------------------------------------------------
     # Abstract Method Implementations
     # -------------------------------------------------------------------------
@@ -584,20 +622,12 @@ class Ultrahuman247Data(Base247DataTemplate):
             list[dict[str, Any]]: List of sleep data objects from API.
         """
         sleep_data = []
-        current_date = start_time.date()
-        end_date = end_time.date()
-
-        while current_date <= end_date:
-            metrics_list = self._fetch_daily_metrics(db, user_id, datetime.combine(current_date, datetime.min.time()))
-            date_str = current_date.strftime("%Y-%m-%d")
-
+        for date_str, metrics_list in self._fetch_metrics_by_day(db, user_id, start_time, end_time):
             for item in metrics_list:
                 if item.get("type") == "Sleep" and "object" in item:
                     item["object"]["ultrahuman_date"] = date_str
                     sleep_data.append(item["object"])
 
-            current_date = current_date + timedelta(days=1)
-
         return sleep_data
 
     def get_recovery_data(
@@ -613,21 +643,13 @@ class Ultrahuman247Data(Base247DataTemplate):
             list[dict[str, Any]]: List of recovery data objects from API.
         """
         recovery_data = []
-        current_date = start_time.date()
-        end_date = end_time.date()
-
-        while current_date <= end_date:
-            metrics_list = self._fetch_daily_metrics(db, user_id, datetime.combine(current_date, datetime.min.time()))
-            date_str = current_date.strftime("%Y-%m-%d")
-
+        for date_str, metrics_list in self._fetch_metrics_by_day(db, user_id, start_time, end_time):
             for item in metrics_list:
                 item_type = item.get("type")
                 if item_type in ("recovery_index", "movement_index", "metabolic_score") and "object" in item:
                     item["object"]["ultrahuman_date"] = date_str
                     recovery_data.append(item["object"])
 
-            current_date = current_date + timedelta(days=1)
-
         return recovery_data
 
     def get_activity_samples(
@@ -643,21 +665,13 @@ class Ultrahuman247Data(Base247DataTemplate):
             list[dict[str, Any]]: List of activity sample objects from API.
         """
         samples = []
-        current_date = start_time.date()
-        end_date = end_time.date()
-
-        while current_date <= end_date:
-            metrics_list = self._fetch_daily_metrics(db, user_id, datetime.combine(current_date, datetime.min.time()))
-            date_str = current_date.strftime("%Y-%m-%d")
-
+        for date_str, metrics_list in self._fetch_metrics_by_day(db, user_id, start_time, end_time):
             for item in metrics_list:
                 item_type = item.get("type")
                 if item_type in ("hr", "hrv", "temp", "steps") and "object" in item:
                     item["object"]["ultrahuman_date"] = date_str
                     samples.append({"type": item_type, "object": item["object"]})
 
-            current_date = current_date + timedelta(days=1)
-
         return samples
 
     def get_daily_activity_statistics(
@@ -404,9 +404,11 @@ class Whoop247Data(Base247DataTemplate):
         user_id: UUID,
         start_time: datetime,
         end_time: datetime,
+        raw_data: list[dict[str, Any]] | None = None,
     ) -> int:
-        """Load sleep data from API and save to database."""
-        raw_data = self.get_sleep_data(db, user_id, start_time, end_time)
+        """Load sleep data from API (unless already fetched as *raw_data*) and save to database."""
+        if raw_data is None:
+            raw_data = self.get_sleep_data(db, user_id, start_time, end_time)
         count = 0
         health_scores: list[HealthScoreCreate] = []
         for item in raw_data:
@@ -466,8 +468,21 @@ class Whoop247Data(Base247DataTemplate):
             "body_measurement_samples_synced": 0,
         }
 
+        # Fetch the endpoints concurrently, then save one by one on the DB session.
+        fetched = self.fetch_concurrently(
+            db,
+            user_id,
+            {
+                "sleep": lambda: self.get_sleep_data(db, user_id, start_time, end_time),
+                "recovery": lambda: self.get_recovery_data(db, user_id, start_time, end_time),
+                "body_measurement": lambda: self.get_body_measurement(db, user_id),
+            },
+        )
+
         try:
-            results["sleep_sessions_synced"] = self.load_and_save_sleep(db, user_id, start_time, end_time)
+            results["sleep_sessions_synced"] = self.load_and_save_sleep(
+                db, user_id, start_time, end_time, raw_data=self.fetch_result(fetched["sleep"])
+            )
         except Exception as e:
             db.rollback()
             log_structured(
@@ -480,7 +495,9 @@ class Whoop247Data(Base247DataTemplate):
             )
 
         try:
-            results["recovery_samples_synced"] = self.load_and_save_recovery(db, user_id, start_time, end_time)
+            results["recovery_samples_synced"] = self.load_and_save_recovery(
+                db, user_id, start_time, end_time, raw_data=self.fetch_result(fetched["recovery"])
+            )
         except Exception as e:
             db.rollback()
             log_structured(
@@ -493,7 +510,9 @@ class Whoop247Data(Base247DataTemplate):
             )
 
         try:
-            results["body_measurement_samples_synced"] = self.load_and_save_body_measurement(db, user_id)
+            results["body_measurement_samples_synced"] = self.load_and_save_body_measurement(
+                db, user_id, body=self.fetch_result(fetched["body_measurement"])
+            )
         except Exception as e:
             db.rollback()
             log_structured(
@@ -567,13 +586,15 @@ class Whoop247Data(Base247DataTemplate):
         self,
         db: DbSession,
         user_id: UUID,
+        body: dict[str, Any] | None = None,
     ) -> int:
-        """Fetch body measurements and save height/weight to data_point_series.
+        """Fetch body measurements (unless already fetched as *body*) and save height/weight to data_point_series.
 
         Only saves if the value has changed from the most recent entry.
         Returns the number of samples saved.
         """
-        body = self.get_body_measurement(db, user_id)
+        if body is None:
+            body = self.get_body_measurement(db, user_id)
         if not body:
             return 0
 
@@ -903,12 +924,14 @@ class Whoop247Data(Base247DataTemplate):
         user_id: UUID,
         start_time: datetime,
         end_time: datetime,
+        raw_data: list[dict[str, Any]] | None = None,
     ) -> int:
-        """Load recovery data from API and save to database.
+        """Load recovery data from API (unless already fetched as *raw_data*) and save to database.
 
         Returns the total number of data point samples saved.
         """
-        raw_data = self.get_recovery_data(db, user_id, start_time, end_time)
+        if raw_data is None:
+            raw_data = self.get_recovery_data(db, user_id, start_time, end_time)
         total_count = 0
         health_scores: list[HealthScoreCreate] = []
 
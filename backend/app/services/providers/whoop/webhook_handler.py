@@ -40,6 +40,7 @@ from app.config import settings
 from app.database import DbSession
 from app.repositories import UserConnectionRepository
 from app.schemas.providers.whoop import WhoopWebhookNotification, WhoopWebhookNotificationType
+from app.services import webhook_coalescer
 from app.services.providers.templates.base_webhook_handler import BaseWebhookHandler
 from app.services.providers.whoop.data_247 import Whoop247Data
 from app.services.providers.whoop.workouts import WhoopWorkouts
@@ -147,6 +148,14 @@ class WhoopWebhookHandler(BaseWebhookHandler):
 
         store_raw_payload(source="webhook", provider="whoop", payload=payload, trace_id=request_trace_id)
 
+        # workout.updated / workout.deleted for the same id share a key: the latest one wins.
+        object_key = f"{str(event_type).split('.')[0]}:{payload.get('id')}"
+        provider_user_id = payload.get("user_id")
+        if webhook_coalescer.defer(
+            "whoop", str(provider_user_id) if provider_user_id else None, object_key, payload, request_trace_id
+        ):
+            return {"status": "accepted"}
+
         task = celery_app.send_task(_PROCESS_PUSH_TASK, args=["whoop", payload, request_trace_id], queue="webhook_sync")
         log_structured(
             logger,
@@ -7,15 +7,32 @@ Supported backends:
     - "disabled" (default): no-op
     - "log": prints JSON to stdout
     - "s3": uploads to S3 bucket (configured via RAW_PAYLOAD_S3_BUCKET / AWS creds)
+    - "local": appends to rotating segment files under RAW_PAYLOAD_LOCAL_DIR,
+      e.g. to capture traffic as a replay / load-test corpus
 
 Usage (one-liner at ingestion point):
     store_raw_payload(source="webhook", provider="garmin", payload=data)
+
+The S3 backend never blocks the caller on S3: payloads go onto an in-process
+queue and a writer thread groups them per provider, source and minute into
+one gzip-compressed NDJSON object (plus a JSON manifest indexing its lines),
+uploaded once the minute is over or the batch reaches
+RAW_PAYLOAD_BATCH_MAX_BYTES.  The local backend uses the same queue and
+writer thread.  When the queue is full, payloads are dropped rather than
+slowing down ingestion.
 """
 
+import atexit
+import gzip
 import json
 import logging
+import os
+import queue
 import sys
+import threading
+from dataclasses import dataclass, field
 from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any
 from uuid import uuid4
 
@@ -29,6 +46,23 @@ _s3_bucket: str | None = None
 _s3_prefix: str = "raw-payloads"
 _s3_client: Any = None
 _fit_files_enabled: bool = False
+_batch_max_bytes: int = 8 * 1024 * 1024  # 8 MB uncompressed
+_queue_size: int = 10_000
+_local_dir: str = "raw-payloads"
+_segment_max_bytes: int = 64 * 1024 * 1024  # 64 MB uncompressed
+_segment_max_seconds: int = 3600
+
+# Archive writer of the current process (see _ensure_writer)
+_queue: "queue.Queue[_Record | threading.Event | None] | None" = None
+_writer: threading.Thread | None = None
+_writer_pid: int | None = None
+_writer_lock = threading.Lock()
+_dropped: int = 0
+
+_WRITER_TICK_SECONDS = 1.0
+_GZIP_LEVEL = 6
+_DROP_LOG_EVERY = 1000
+_NOTHING = object()
 
 
 def configure(
@@ -38,12 +72,23 @@ def configure(
     s3_prefix: str = "raw-payloads",
     s3_endpoint_url: str | None = None,
     fit_files_enabled: bool = False,
+    batch_max_bytes: int = 8 * 1024 * 1024,
+    queue_size: int = 10_000,
+    local_dir: str = "raw-payloads",
+    segment_max_bytes: int = 64 * 1024 * 1024,
+    segment_max_seconds: int = 3600,
 ) -> None:
     """Called once at startup from settings."""
     global _storage_backend, _max_size_bytes, _s3_bucket, _s3_prefix, _s3_client, _fit_files_enabled
+    global _batch_max_bytes, _queue_size, _local_dir, _segment_max_bytes, _segment_max_seconds
     _storage_backend = storage_backend
     _max_size_bytes = max_size_bytes
     _s3_prefix = s3_prefix
+    _batch_max_bytes = batch_max_bytes
+    _queue_size = queue_size
+    _local_dir = local_dir
+    _segment_max_bytes = segment_max_bytes
+    _segment_max_seconds = segment_max_seconds
     _fit_files_enabled = False
 
     if storage_backend == "s3" or fit_files_enabled:
@@ -94,6 +139,10 @@ def store_raw_payload(
 ) -> None:
     """Store a raw payload. No-op when disabled.
 
+    With the S3 and local backends the payload is only queued; serialization,
+    the size check and the write happen on the archive writer thread, so callers
+    must not mutate *payload* afterwards.
+
     Args:
         source: Origin type - "sdk", "webhook", or "api_response"
         provider: Provider name (e.g. "garmin", "apple", "strava")
@@ -104,29 +153,35 @@ def store_raw_payload(
     if _storage_backend == "disabled":
         return
 
-    payload_str = payload if isinstance(payload, str) else json.dumps(payload, default=json_serial)
+    if _storage_backend in ("s3", "local"):
+        _enqueue(_Record(datetime.now(UTC), source, provider, payload, user_id, trace_id))
+        return
+
+    encoded = _serialize(payload)
+    if encoded is None:
+        return
+    if _storage_backend == "log":
+        _store_to_log(source, provider, encoded, user_id, trace_id)
+
 
-    # Skip payloads that exceed size limit
-    size = len(payload_str.encode("utf-8"))
-    if size > _max_size_bytes:
+def _serialize(payload: Any) -> bytes | None:
+    """UTF-8 JSON of *payload*, or None when it exceeds the size limit."""
+    payload_str = payload if isinstance(payload, str) else json.dumps(payload, default=json_serial)
+    encoded = payload_str.encode("utf-8")
+    if len(encoded) > _max_size_bytes:
         logger.warning(
             "Raw payload skipped (size %d bytes exceeds limit %d)",
-            size,
+            len(encoded),
             _max_size_bytes,
         )
-        return
-
-    if _storage_backend == "log":
-        _store_to_log(source, provider, payload_str, size, user_id, trace_id)
-    elif _storage_backend == "s3":
-        _store_to_s3(source, provider, payload_str, size, user_id, trace_id)
+        return None
+    return encoded
 
 
 def _store_to_log(
     source: str,
     provider: str,
-    payload_str: str,
-    size: int,
+    encoded: bytes,
     user_id: str | None,
     trace_id: str | None,
 ) -> None:
@@ -135,67 +190,307 @@ def _store_to_log(
         "message": "raw_payload",
         "source": source,
         "provider": provider,
-        "size_bytes": size,
+        "size_bytes": len(encoded),
     }
     if user_id:
         entry["user_id"] = user_id
     if trace_id:
         entry["trace_id"] = trace_id
-    entry["payload"] = payload_str
+    entry["payload"] = encoded.decode("utf-8")
 
     print(json.dumps(entry), file=sys.stdout, flush=True)
 
 
-def _store_to_s3(
-    source: str,
-    provider: str,
-    payload_str: str,
-    size: int,
-    user_id: str | None,
-    trace_id: str | None,
-) -> None:
-    """Upload raw payload to S3.
+# --- Batched S3 archive -----------------------------------------------------
+
+
+@dataclass(slots=True)
+class _Record:
+    received_at: datetime
+    source: str
+    provider: str
+    payload: Any
+    user_id: str | None
+    trace_id: str | None
+
+
+@dataclass(slots=True)
+class _Batch:
+    provider: str
+    source: str
+    minute: datetime
+    lines: list[bytes] = field(default_factory=list)
+    entries: list[dict[str, Any]] = field(default_factory=list)
+    size: int = 0
 
-    Key format: {prefix}/{provider}/{source}/{YYYY-MM-DD}/{uuid}.json
-    Metadata includes user_id, trace_id, and size for easy filtering.
+
+def _enqueue(record: _Record) -> None:
+    queue_ = _ensure_writer()
+    try:
+        queue_.put_nowait(record)
+    except queue.Full:
+        global _dropped
+        _dropped += 1
+        if _dropped % _DROP_LOG_EVERY == 1:
+            log_structured(
+                logger,
+                "warning",
+                "Raw payload archive queue full, dropping payloads",
+                dropped_total=_dropped,
+                queue_size=_queue_size,
+            )
+
+
+def _ensure_writer() -> "queue.Queue[_Record | threading.Event | None]":
+    """The archive queue of this process, starting its writer thread on first use.
+
+    Started lazily rather than in ``configure`` so every forked worker
+    process gets its own thread.
     """
-    if _s3_client is None or _s3_bucket is None:
-        logger.warning("S3 client or bucket not configured - skipping raw payload storage")
+    global _queue, _writer, _writer_pid
+    with _writer_lock:
+        if _queue is None or _writer is None or _writer_pid != os.getpid():
+            _queue = queue.Queue(maxsize=_queue_size)
+            _writer = threading.Thread(target=_run_writer, args=(_queue,), name="raw-payload-archive", daemon=True)
+            _writer.start()
+            _writer_pid = os.getpid()
+        return _queue
+
+
+def flush(timeout: float = 10.0) -> None:
+    """Upload every buffered batch / close the open segment now. No-op when the writer is not running."""
+    queue_ = _queue
+    if queue_ is None or _writer_pid != os.getpid():
         return
+    done = threading.Event()
+    try:
+        queue_.put(done, timeout=timeout)
+    except queue.Full:
+        logger.warning("Raw payload archive queue full, could not flush")
+        return
+    done.wait(timeout)
 
-    now = datetime.now(UTC)
-    date_part = now.strftime("%Y-%m-%d")
-    file_id = uuid4().hex[:12]
-    user_part = user_id if user_id else "_unknown"
-    key = f"{_s3_prefix}/{provider}/{source}/{date_part}/{user_part}/{file_id}.json"
 
-    metadata: dict[str, str] = {
-        "source": source,
-        "provider": provider,
-        "size_bytes": str(size),
-        "timestamp": now.isoformat(),
+def shutdown(timeout: float = 10.0) -> None:
+    """Flush buffered batches and stop the writer thread (process exit / worker shutdown)."""
+    global _queue, _writer, _writer_pid
+    with _writer_lock:
+        queue_, writer = _queue, _writer
+        if queue_ is None or writer is None or _writer_pid != os.getpid():
+            return
+        _queue, _writer, _writer_pid = None, None, None
+    try:
+        queue_.put(None, timeout=timeout)
+    except queue.Full:
+        logger.warning("Raw payload archive queue full, buffered payloads lost on shutdown")
+        return
+    writer.join(timeout)
+
+
+def _run_writer(queue_: "queue.Queue[_Record | threading.Event | None]") -> None:
+    """Archive queued payloads until a ``None`` arrives; an Event asks to write out everything buffered."""
+    sink = _LocalSegments() if _storage_backend == "local" else _S3Batches()
+    while True:
+        try:
+            item = queue_.get(timeout=_WRITER_TICK_SECONDS)
+        except queue.Empty:
+            item = _NOTHING
+
+        if item is None:
+            sink.flush()
+            return
+        if isinstance(item, threading.Event):
+            sink.flush()
+            item.set()
+            continue
+        if isinstance(item, _Record):
+            try:
+                sink.add(item)
+            except Exception:
+                logger.exception("Failed to archive raw payload")
+        sink.tick(datetime.now(UTC))
+
+
+def _encode_line(record: _Record, encoded: bytes) -> bytes:
+    """One NDJSON archive line; the same format in S3 batches and local segments."""
+    line = {
+        "received_at": record.received_at.isoformat(),
+        "source": record.source,
+        "provider": record.provider,
+        "user_id": record.user_id,
+        "trace_id": record.trace_id,
+        "payload": encoded.decode("utf-8"),
     }
-    if user_id:
-        metadata["user_id"] = user_id
-    if trace_id:
-        metadata["trace_id"] = trace_id
+    return json.dumps(line).encode("utf-8") + b"\n"
 
+
+class _S3Batches:
+    """Groups payloads per provider, source and minute; each group is uploaded as one object."""
+
+    def __init__(self) -> None:
+        self.batches: dict[tuple[str, str, datetime], _Batch] = {}
+
+    def add(self, record: _Record) -> None:
+        encoded = _serialize(record.payload)
+        if encoded is None:
+            return
+        minute = _minute(record.received_at)
+        key = (record.provider, record.source, minute)
+        batch = self.batches.get(key)
+        if batch is None:
+            batch = self.batches[key] = _Batch(record.provider, record.source, minute)
+
+        line = _encode_line(record, encoded)
+        batch.entries.append(
+            {
+                "line": len(batch.lines),
+                "user_id": record.user_id,
+                "trace_id": record.trace_id,
+                "received_at": record.received_at.isoformat(),
+                "size_bytes": len(encoded),
+            }
+        )
+        batch.lines.append(line)
+        batch.size += len(line)
+        if batch.size >= _batch_max_bytes:
+            _upload_batch(self.batches.pop(key))
+
+    def tick(self, now: datetime) -> None:
+        current_minute = _minute(now)
+        for key in [key for key in self.batches if key[2] < current_minute]:
+            _upload_batch(self.batches.pop(key))
+
+    def flush(self) -> None:
+        for batch in self.batches.values():
+            _upload_batch(batch)
+        self.batches.clear()
+
+
+def _minute(moment: datetime) -> datetime:
+    return moment.replace(second=0, microsecond=0)
+
+
+def _upload_batch(batch: _Batch) -> None:
+    """Upload one batch as gzip-compressed NDJSON plus its manifest.
+
+    Key format: {prefix}/{provider}/{source}/{YYYY-MM-DD}/{HHMM}-{uuid}.ndjson.gz
+    The manifest ({same}.manifest.json) indexes the lines by user_id and
+    trace_id, so a replay can pick one user's payloads without downloading
+    every batch.
+    """
+    if _s3_client is None or _s3_bucket is None:
+        logger.warning("S3 client or bucket not configured - skipping raw payload storage")
+        return
+
+    base = (
+        f"{_s3_prefix}/{batch.provider}/{batch.source}/{batch.minute.strftime('%Y-%m-%d')}/"
+        f"{batch.minute.strftime('%H%M')}-{uuid4().hex[:12]}"
+    )
+    key = f"{base}.ndjson.gz"
+    body = gzip.compress(b"".join(batch.lines), compresslevel=_GZIP_LEVEL)
+    manifest = {
+        "object": key,
+        "provider": batch.provider,
+        "source": batch.source,
+        "minute": batch.minute.isoformat(),
+        "record_count": len(batch.entries),
+        "uncompressed_bytes": batch.size,
+        "compressed_bytes": len(body),
+        "user_ids": sorted({entry["user_id"] for entry in batch.entries if entry["user_id"]}),
+        "records": batch.entries,
+    }
     try:
         _s3_client.put_object(
             Bucket=_s3_bucket,
             Key=key,
-            Body=payload_str.encode("utf-8"),
+            Body=body,
+            ContentType="application/gzip",
+            Metadata={
+                "source": batch.source,
+                "provider": batch.provider,
+                "record_count": str(len(batch.entries)),
+                "minute": batch.minute.isoformat(),
+            },
+        )
+        _s3_client.put_object(
+            Bucket=_s3_bucket,
+            Key=f"{base}.manifest.json",
+            Body=json.dumps(manifest).encode("utf-8"),
             ContentType="application/json",
-            Metadata=metadata,
         )
         logger.debug(
-            "Stored raw payload to S3: s3://%s/%s (%d bytes)",
+            "Stored %d raw payloads to S3: s3://%s/%s (%d bytes)",
+            len(batch.entries),
             _s3_bucket,
             key,
-            size,
+            len(body),
         )
     except Exception:
-        logger.exception("Failed to store raw payload to S3: s3://%s/%s", _s3_bucket, key)
+        logger.exception("Failed to store raw payload batch to S3: s3://%s/%s", _s3_bucket, key)
+
+
+class _LocalSegments:
+    """Appends payloads to gzip-compressed NDJSON segment files under RAW_PAYLOAD_LOCAL_DIR.
+
+    Path format: {local_dir}/{YYYY-MM-DD}/{HHMMSS}-{pid}-{uuid}.ndjson.gz
+    The segment being written carries an extra ``.open`` suffix and is
+    renamed once it reaches RAW_PAYLOAD_SEGMENT_MAX_BYTES (uncompressed),
+    is RAW_PAYLOAD_SEGMENT_MAX_SECONDS old, or on flush / shutdown, so
+    readers only ever see complete segments.  Every process writes its own
+    segments.
+    """
+
+    def __init__(self) -> None:
+        self.file: gzip.GzipFile | None = None
+        self.path: Path | None = None
+        self.opened_at: datetime | None = None
+        self.size = 0
+
+    def add(self, record: _Record) -> None:
+        encoded = _serialize(record.payload)
+        if encoded is None:
+            return
+        file = self.file if self.file is not None else self._open(record.received_at)
+        line = _encode_line(record, encoded)
+        try:
+            file.write(line)
+        except Exception:
+            logger.exception("Failed to write raw payload segment %s", self.path)
+            self._close()
+            return
+        self.size += len(line)
+        if self.size >= _segment_max_bytes:
+            self._close()
+
+    def tick(self, now: datetime) -> None:
+        if self.opened_at is not None and (now - self.opened_at).total_seconds() >= _segment_max_seconds:
+            self._close()
+
+    def flush(self) -> None:
+        self._close()
+
+    def _open(self, now: datetime) -> gzip.GzipFile:
+        directory = Path(_local_dir) / now.strftime("%Y-%m-%d")
+        directory.mkdir(parents=True, exist_ok=True)
+        self.path = directory / f"{now.strftime('%H%M%S')}-{os.getpid()}-{uuid4().hex[:8]}.ndjson.gz"
+        self.file = gzip.GzipFile(self.path.with_name(self.path.name + ".open"), "wb", compresslevel=_GZIP_LEVEL)
+        self.opened_at = now
+        self.size = 0
+        return self.file
+
+    def _close(self) -> None:
+        if self.file is None or self.path is None:
+            return
+        try:
+            self.file.close()
+            os.replace(self.path.with_name(self.path.name + ".open"), self.path)
+            logger.debug("Closed raw payload segment %s (%d bytes uncompressed)", self.path, self.size)
+        except Exception:
+            logger.exception("Failed to close raw payload segment %s", self.path)
+        self.file, self.path, self.opened_at, self.size = None, None, None, 0
+
+
+atexit.register(shutdown)
 
 
 def store_fit_file(
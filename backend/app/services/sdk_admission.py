@@ -0,0 +1,145 @@
+"""Admission control for the SDK sync endpoint.
+
+``/sdk/users/{user_id}/sync`` enqueues a ``process_sdk_upload`` task for every
+batch.  When a fleet of phones reconnects at once the ``sdk_sync`` queue (and
+Redis memory) would grow without bound, so the route asks this module first
+and answers ``429`` with ``Retry-After`` once the backlog is too deep.
+
+Signals (all read from the same Redis that backs the Celery broker):
+
+  sdk_sync                                   (Celery broker list)
+      LLEN gives the number of queued ``process_sdk_upload`` messages.
+
+  sdk_admission:lag
+      Seconds between enqueue and pickup of the most recently started task,
+      written by the worker.  Deleted by the worker that finds the queue
+      drained, and ignored while the queue is empty, so a backlog that has
+      cleared never keeps rejecting batches; the short TTL covers idle workers.
+
+  sdk_admission:queued:{user_id}
+      Batches this user has waiting in the queue.  INCR on enqueue, DECR on
+      pickup.  Used for per-user fairness once the queue is past its soft limit.
+
+Thresholds:
+
+  depth < soft limit and lag < max lag  -> everyone admitted
+  soft limit <= depth < hard limit      -> users over their fair share rejected
+  depth >= hard limit or lag >= max lag -> everyone rejected
+
+Redis failures never block ingestion: every check fails open.
+"""
+
+import logging
+import random
+import time
+from dataclasses import dataclass
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+SDK_SYNC_QUEUE = "sdk_sync"
+
+_PREFIX = "sdk_admission"
+_LAG_KEY = f"{_PREFIX}:lag"
+_LAG_TTL = 120  # seconds — stale lag readings expire once workers go idle
+_QUEUED_TTL = 6 * 3600  # bounds leaked counters if a worker dies before pickup
+
+# Decrement without going below zero (a counter may have expired mid-flight).
+_DECR_FLOOR_LUA = """
+local v = redis.call("decr", KEYS[1])
+if v <= 0 then
+    redis.call("del", KEYS[1])
+    return 0
+end
+return v
+"""
+
+
+@dataclass(frozen=True)
+class AdmissionDecision:
+    """Outcome of an admission check."""
+
+    admitted: bool
+    reason: str | None = None
+    retry_after_seconds: int = 0
+    queue_depth: int = 0
+
+
+def _queued_key(user_id: str) -> str:
+    return f"{_PREFIX}:queued:{user_id}"
+
+
+def _retry_after(depth: int) -> int:
+    """Back off proportionally to the overload, with jitter so phones don't return in lockstep."""
+    base = settings.sdk_sync_retry_after_seconds
+    overload = max(1.0, depth / max(1, settings.sdk_sync_queue_soft_limit))
+    seconds = min(base * overload, settings.sdk_sync_retry_after_max_seconds)
+    return int(seconds + random.uniform(0, base))
+
+
+def check_admission(user_id: str) -> AdmissionDecision:
+    """Decide whether a new SDK batch from *user_id* may be enqueued."""
+    if not settings.sdk_admission_enabled:
+        return AdmissionDecision(admitted=True)
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.llen(SDK_SYNC_QUEUE)
+        pipe.get(_LAG_KEY)
+        pipe.get(_queued_key(user_id))
+        depth, lag, user_queued = pipe.execute()
+    except Exception as exc:
+        logger.warning("SDK admission check failed, admitting: %s", exc)
+        return AdmissionDecision(admitted=True)
+
+    depth = int(depth or 0)
+    # Lag measures how long the backlog waits; with nothing queued there is none.
+    lag = float(lag or 0) if depth else 0.0
+    user_queued = int(user_queued or 0)
+
+    if depth >= settings.sdk_sync_queue_hard_limit or lag >= settings.sdk_sync_max_lag_seconds:
+        return AdmissionDecision(
+            admitted=False,
+            reason="queue_saturated",
+            retry_after_seconds=_retry_after(depth),
+            queue_depth=depth,
+        )
+    if depth >= settings.sdk_sync_queue_soft_limit and user_queued >= settings.sdk_sync_max_queued_per_user:
+        return AdmissionDecision(
+            admitted=False,
+            reason="user_fair_share_exceeded",
+            retry_after_seconds=_retry_after(depth),
+            queue_depth=depth,
+        )
+    return AdmissionDecision(admitted=True, queue_depth=depth)
+
+
+def mark_enqueued(user_id: str) -> None:
+    """Count a batch as queued for *user_id* (call after a successful enqueue)."""
+    if not settings.sdk_admission_enabled:
+        return
+    key = _queued_key(user_id)
+    try:
+        pipe = get_redis_client().pipeline()
+        pipe.incr(key)
+        pipe.expire(key, _QUEUED_TTL)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Failed to count queued SDK batch: %s", exc)
+
+
+def mark_started(user_id: str, enqueued_at: float | None) -> None:
+    """Record pickup of a batch: release the user's queue slot and publish worker lag."""
+    if not settings.sdk_admission_enabled:
+        return
+    try:
+        client = get_redis_client()
+        client.eval(_DECR_FLOOR_LUA, 1, _queued_key(user_id))
+        if not client.llen(SDK_SYNC_QUEUE):
+            # Queue drained: this pickup's wait no longer describes anything still queued.
+            client.delete(_LAG_KEY)
+        elif enqueued_at is not None:
+            client.set(_LAG_KEY, max(0.0, time.time() - enqueued_at), ex=_LAG_TTL)
+    except Exception as exc:
+        logger.warning("Failed to record SDK batch pickup: %s", exc)
@@ -7,12 +7,14 @@ from app.database import DbSession
 from app.schemas.responses.dashboard import ProviderDataCount, UserDataSummaryResponse
 from app.schemas.responses.upload import (
     DataPointsInfo,
+    DedupCounts,
     EventRecordsInfo,
     MetricCount,
     SystemInfoResponse,
 )
 from app.services.dashboard_stats_cache import get_total_data_points
 from app.services.event_record_service import EventRecordService, event_record_service
+from app.services.payload_dedup import dedup_stats
 from app.services.timeseries_service import TimeSeriesService, timeseries_service
 from app.services.user_connection_service import UserConnectionService, user_connection_service
 from app.services.user_service import UserService, user_service
@@ -40,7 +42,7 @@ class SystemInfoService:
 
         The total data-point count is served from cache (approximate on a cold cache) to avoid a
         multi-second full scan on every dashboard load; the remaining figures are cheap counts on
-        small tables.
+        small tables; payload dedup counters come from Redis (empty when it is unavailable).
         """
         category_counts = dict(self.event_record_service.get_category_counts(db_session))
         event_records = EventRecordsInfo(
@@ -59,6 +61,7 @@ class SystemInfoService:
             ),
             event_records=event_records,
             connections_coverage=self.user_connection_service.get_connections_coverage(db_session),
+            payload_dedup={metric: DedupCounts(**counts) for metric, counts in dedup_stats().items()},
         )
 
     def get_user_data_summary(
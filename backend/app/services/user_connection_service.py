@@ -11,6 +11,7 @@ from app.schemas.model_crud.user_management import UserConnectionCreate, UserCon
 from app.schemas.responses.upload import ConnectionsCoverage, ProviderConnectionCount
 from app.services.outgoing_webhooks.events import on_connection_revoked
 from app.services.providers.templates.base_oauth import BaseOAuthTemplate
+from app.services.providers.token_refresh import revoke_cached_token
 from app.services.services import AppService
 from app.utils.exceptions import ResourceNotFoundError, handle_exceptions
 from app.utils.sentry_helpers import log_and_capture_error
@@ -72,6 +73,7 @@ class UserConnectionService(
 
         updated = self.crud.disconnect(db_session, user_id, provider)
         if updated:
+            revoke_cached_token(user_id, provider)
             self.logger.info("Revoked connection for user %s from provider %s", user_id, provider)
             connection = self.crud.get_by_user_and_provider(db_session, user_id, provider)
             if connection:
@@ -0,0 +1,56 @@
+"""Claim-check store for incoming provider webhook bodies.
+
+Provider webhooks are acknowledged as soon as their signature is verified:
+the request thread parks the raw body here and enqueues only a reference to
+it (``process_webhook_body``), so the response time does not depend on the
+payload size or on how long parsing and dispatching take.  The worker loads
+the body, runs the handler's ``parse_payload`` / ``dispatch`` and deletes it.
+
+Redis keys:
+
+  webhook_body:{provider}:{id}
+      Raw request body of one webhook delivery, stored and read back as bytes
+      (``get_binary_redis_client``), so bodies that are not valid UTF-8
+      survive the round trip.  Expires after
+      ``webhook_body_ttl_seconds`` so bodies whose task never ran (or kept
+      failing) do not pile up.
+
+Redis failures never lose a delivery: when the body cannot be stored the
+handler falls back to parsing and dispatching inside the request.
+"""
+
+import logging
+from uuid import uuid4
+
+from app.config import settings
+from app.integrations.redis_client import get_binary_redis_client
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "webhook_body"
+
+
+def put_body(provider: str, body: bytes) -> str | None:
+    """Store *body* and return its reference, or None if it could not be stored."""
+    ref = f"{_PREFIX}:{provider}:{uuid4().hex}"
+    try:
+        get_binary_redis_client().set(ref, body, ex=settings.webhook_body_ttl_seconds)
+    except Exception as exc:
+        logger.warning("Webhook claim-check store unavailable, processing inline: %s", exc)
+        return None
+    return ref
+
+
+def get_body(ref: str) -> bytes | None:
+    """The body stored under *ref*, or None once it expired or was deleted.
+
+    Redis errors propagate so the calling task can retry.
+    """
+    return get_binary_redis_client().get(ref)  # ty:ignore[invalid-return-type]
+
+
+def delete_body(ref: str) -> None:
+    try:
+        get_binary_redis_client().delete(ref)
+    except Exception as exc:
+        logger.warning("Failed to delete webhook body %s: %s", ref, exc)
@@ -0,0 +1,153 @@
+"""Coalescing of notify-only provider webhooks per user.
+
+Oura, Strava and Whoop only tell us *what* changed; every notification costs
+a REST pull.  A morning sync easily sends a burst of them for one user, often
+several for the same object (created, then updated, then scored).  Instead of
+enqueueing one ``process_webhook_push`` per notification, ``dispatch`` buffers
+them here and the first one of a window schedules ``flush_coalesced_webhooks``
+``webhook_coalesce_window_seconds`` later.  The flush pulls every changed
+object of the window once, in one task and DB session; for an object notified
+several times only the latest notification is kept (so an activity created
+and deleted within the window is never fetched).
+
+Redis keys:
+
+  webhook_coalesce:{provider}:{provider_user_id}:pending
+      Hash of object key (e.g. ``daily_sleep:{object_id}``) to the JSON of
+      its latest notification and trace id.
+
+  webhook_coalesce:{provider}:{provider_user_id}:received
+      Number of notifications buffered since the last flush (for logging).
+
+  webhook_coalesce:{provider}:{provider_user_id}:scheduled
+      SET NX by the notification that scheduled the flush; deleted by the
+      flush, so the next notification schedules a new one.  Expires shortly
+      after the window in case the flush task is lost.
+
+  webhook_coalesce:{provider}:{provider_user_id}:processing
+  webhook_coalesce:{provider}:{provider_user_id}:processing_received
+      The pending hash and count as taken by the running flush.  Deleted only
+      once the flush processed them (``done``); a flush redelivered after a
+      worker crash takes the leftovers again, merged with anything buffered
+      since.
+
+Redis failures never drop a notification: ``defer`` returns False and the
+caller enqueues ``process_webhook_push`` directly, as without coalescing.
+"""
+
+import contextlib
+import json
+import logging
+from typing import Any
+
+from celery import current_app as celery_app
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.utils.structured_logging import json_serial, log_structured
+
+logger = logging.getLogger(__name__)
+
+_PREFIX = "webhook_coalesce"
+_FLUSH_TASK = "app.integrations.celery.tasks.webhook_push_task.flush_coalesced_webhooks"
+
+# Buffered notifications outlive a lost flush task for this long before they expire.
+_PENDING_TTL_SECONDS = 24 * 3600
+# Grace on top of the window before another notification may schedule a new flush.
+_SCHEDULE_GRACE_SECONDS = 300
+
+# Move the window's notifications to the processing keys (after the leftovers of a crashed
+# flush, so newer notifications win) and clear the window atomically.
+# KEYS: pending, received, scheduled, processing, processing_received.  ARGV: TTL.
+# Returns {received, [field, value, ...]}.
+_TAKE_LUA = """
+local items = redis.call("hgetall", KEYS[1])
+for i = 1, #items, 2 do
+    redis.call("hset", KEYS[4], items[i], items[i + 1])
+end
+local received = redis.call("incrby", KEYS[5], tonumber(redis.call("get", KEYS[2]) or "0"))
+redis.call("del", KEYS[1], KEYS[2], KEYS[3])
+redis.call("expire", KEYS[4], ARGV[1])
+redis.call("expire", KEYS[5], ARGV[1])
+return {received, redis.call("hgetall", KEYS[4])}
+"""
+
+
+def _keys(provider: str, provider_user_id: str) -> tuple[str, str, str]:
+    base = f"{_PREFIX}:{provider}:{provider_user_id}"
+    return f"{base}:pending", f"{base}:received", f"{base}:scheduled"
+
+
+def _processing_keys(provider: str, provider_user_id: str) -> tuple[str, str]:
+    base = f"{_PREFIX}:{provider}:{provider_user_id}"
+    return f"{base}:processing", f"{base}:processing_received"
+
+
+def defer(provider: str, provider_user_id: str | None, object_key: str, payload: Any, trace_id: str) -> bool:
+    """Buffer a notification for the user's next coalesced pull.
+
+    Returns False when coalescing is off, the user is unknown or Redis is
+    unavailable; the caller then enqueues ``process_webhook_push`` itself.
+    """
+    window = settings.webhook_coalesce_window_seconds
+    if window <= 0 or not provider_user_id:
+        return False
+    pending, received, scheduled = _keys(provider, provider_user_id)
+    try:
+        client = get_redis_client()
+        pipe = client.pipeline()
+        pipe.hset(pending, object_key, json.dumps({"payload": payload, "trace_id": trace_id}, default=json_serial))
+        pipe.expire(pending, _PENDING_TTL_SECONDS)
+        pipe.incr(received)
+        pipe.expire(received, _PENDING_TTL_SECONDS)
+        pipe.set(scheduled, trace_id, nx=True, ex=window + _SCHEDULE_GRACE_SECONDS)
+        first_in_window = pipe.execute()[-1]
+    except Exception as exc:
+        logger.warning("Webhook coalescing unavailable, pulling immediately: %s", exc)
+        return False
+
+    if first_in_window:
+        try:
+            celery_app.send_task(_FLUSH_TASK, args=[provider, provider_user_id], countdown=window, queue="webhook_sync")
+        except Exception as exc:
+            # The notification stays buffered; pull it now as well rather than waiting for the next one.
+            logger.warning("Could not schedule coalesced webhook flush: %s", exc)
+            with contextlib.suppress(Exception):
+                client.delete(scheduled)
+            return False
+    log_structured(
+        logger,
+        "info",
+        "Webhook notification buffered for coalesced pull",
+        provider=provider,
+        trace_id=trace_id,
+        provider_user_id=provider_user_id,
+        object_key=object_key,
+        flush_scheduled=bool(first_in_window),
+    )
+    return True
+
+
+def take(provider: str, provider_user_id: str) -> tuple[list[tuple[Any, str]], int]:
+    """Return the buffered ``(payload, trace_id)`` pairs and the number of notifications received.
+
+    The notifications move out of the window but stay stored until ``done``,
+    so a flush that dies half-way loses nothing.  Redis errors propagate so
+    the flush task can retry.
+    """
+    keys = (*_keys(provider, provider_user_id), *_processing_keys(provider, provider_user_id))
+    received, items = get_redis_client().eval(_TAKE_LUA, len(keys), *keys, _PENDING_TTL_SECONDS)
+    pending = []
+    for raw in items[1::2]:
+        entry = json.loads(raw)
+        pending.append((entry["payload"], entry["trace_id"]))
+    return pending, int(received)
+
+
+def done(provider: str, provider_user_id: str) -> None:
+    """Drop the notifications returned by ``take`` once they were processed (or handed off)."""
+    try:
+        get_redis_client().delete(*_processing_keys(provider, provider_user_id))
+    except Exception as exc:
+        # They expire on their own; a later flush would skip them as duplicates.
+        logger.warning("Failed to clear coalesced webhooks of %s user %s: %s", provider, provider_user_id, exc)
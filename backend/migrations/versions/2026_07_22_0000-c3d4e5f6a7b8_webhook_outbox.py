@@ -0,0 +1,47 @@
+"""webhook outbox
+
+Outgoing webhook events are written to this table in the transaction that
+stores the data they announce, and drained by the drain_webhook_outbox task.
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a1
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "c3d4e5f6a7b8"
+down_revision: Union[str, None] = "b2c3d4e5f6a1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "webhook_outbox",
+        sa.Column("id", sa.BigInteger(), sa.Identity(always=False), nullable=False),
+        sa.Column("event", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("available_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("failed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_webhook_outbox_pending",
+        "webhook_outbox",
+        ["available_at", "id"],
+        unique=False,
+        postgresql_where="failed_at IS NULL",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("idx_webhook_outbox_pending", table_name="webhook_outbox", postgresql_where="failed_at IS NULL")
+    op.drop_table("webhook_outbox")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Apple Health export parsers against a synthetic export.
+
+Generates an export.xml of the requested size (Records across the common
+quantity types, sleep stages, Correlations and Workouts with statistics,
+a few recurring devices and timezone offsets) and runs XMLService.parse_xml
+over it with each parser backend. Every backend runs in its own process so
+peak RSS is measured independently.
+
+Usage:
+    cd backend
+    set -a && source config/.env && set +a
+
+    # 2 GB synthetic export, both parsers:
+    uv run python scripts/benchmark_xml_parser.py --size-gb 2
+
+    # Reuse a previously generated (or real) export, lxml only:
+    uv run python scripts/benchmark_xml_parser.py --input /tmp/export.xml --parsers lxml
+"""
+
+import argparse
+import multiprocessing
+import random
+import resource
+import tempfile
+import time
+from datetime import datetime, timedelta
+from logging import getLogger
+from pathlib import Path
+from typing import TextIO
+from uuid import uuid4
+
+DEVICES = [
+    "&lt;&lt;HKDevice: 0x283c1a300&gt;, name:Apple Watch, manufacturer:Apple Inc., model:Watch, "
+    "hardware:Watch6,12, software:10.1&gt;",
+    "&lt;&lt;HKDevice: 0x283c1b440&gt;, name:iPhone, manufacturer:Apple Inc., model:iPhone, "
+    "hardware:iPhone15,2, software:17.1&gt;",
+    "",
+]
+OFFSETS = ["+0000", "+0100", "+0200", "-0500"]
+RECORD_TYPES: list[tuple[str, str, tuple[float, float]]] = [
+    ("HKQuantityTypeIdentifierHeartRate", "count/min", (50, 180)),
+    ("HKQuantityTypeIdentifierStepCount", "count", (1, 400)),
+    ("HKQuantityTypeIdentifierActiveEnergyBurned", "Cal", (0.1, 15)),
+    ("HKQuantityTypeIdentifierBasalEnergyBurned", "Cal", (0.5, 2)),
+    ("HKQuantityTypeIdentifierDistanceWalkingRunning", "km", (0.001, 0.5)),
+    ("HKQuantityTypeIdentifierOxygenSaturation", "%", (0.92, 1)),
+    ("HKQuantityTypeIdentifierRespiratoryRate", "count/min", (10, 22)),
+    ("HKQuantityTypeIdentifierWalkingSpeed", "km/hr", (3, 6)),
+]
+SLEEP_VALUES = [
+    "HKCategoryValueSleepAnalysisAsleepCore",
+    "HKCategoryValueSleepAnalysisAsleepDeep",
+    "HKCategoryValueSleepAnalysisAsleepREM",
+    "HKCategoryValueSleepAnalysisAwake",
+]
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE HealthData [
+<!ELEMENT HealthData (ExportDate,Me,(Record|Correlation|Workout|ActivitySummary|ClinicalRecord)*)>
+<!ATTLIST HealthData locale CDATA #REQUIRED>
+]>
+<HealthData locale="en_US">
+ <ExportDate value="2025-01-01 08:00:00 +0000"/>
+ <Me HKCharacteristicTypeIdentifierBiologicalSex="HKBiologicalSexNotSet"/>
+"""
+
+
+def _fmt(moment: datetime, offset: str) -> str:
+    return f"{moment:%Y-%m-%d %H:%M:%S} {offset}"
+
+
+def _write_block(out: TextIO, rng: random.Random, moment: datetime) -> None:
+    """Write one synthetic "minute" of export data."""
+    offset = rng.choice(OFFSETS)
+    created = _fmt(moment + timedelta(minutes=5), offset)
+    for metric_type, unit, (low, high) in RECORD_TYPES:
+        start = _fmt(moment, offset)
+        end = _fmt(moment + timedelta(seconds=rng.randint(0, 59)), offset)
+        out.write(
+            f' <Record type="{metric_type}" sourceName="Apple Watch" sourceVersion="10.1" '
+            f'device="{rng.choice(DEVICES)}" unit="{unit}" creationDate="{created}" '
+            f'startDate="{start}" endDate="{end}" value="{round(rng.uniform(low, high), 3)}">\n'
+            f'  <MetadataEntry key="HKMetadataKeyHeartRateMotionContext" value="0"/>\n'
+            f" </Record>\n"
+        )
+    if moment.minute % 30 == 0:
+        start = _fmt(moment, offset)
+        end = _fmt(moment + timedelta(minutes=30), offset)
+        out.write(
+            f' <Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Apple Watch" '
+            f'device="{DEVICES[0]}" creationDate="{created}" startDate="{start}" endDate="{end}" '
+            f'value="{rng.choice(SLEEP_VALUES)}"/>\n'
+            f' <Correlation type="HKCorrelationTypeIdentifierBloodPressure" sourceName="Cuff" '
+            f'creationDate="{created}" startDate="{start}" endDate="{start}">\n'
+            f'  <Record type="HKQuantityTypeIdentifierBloodPressureSystolic" sourceName="Cuff" unit="mmHg" '
+            f'creationDate="{created}" startDate="{start}" endDate="{start}" value="{rng.randint(105, 135)}"/>\n'
+            f'  <Record type="HKQuantityTypeIdentifierBloodPressureDiastolic" sourceName="Cuff" unit="mmHg" '
+            f'creationDate="{created}" startDate="{start}" endDate="{start}" value="{rng.randint(65, 90)}"/>\n'
+            f" </Correlation>\n"
+        )
+    if moment.minute == 0 and moment.hour % 6 == 0:
+        start = _fmt(moment, offset)
+        end = _fmt(moment + timedelta(minutes=45), offset)
+        out.write(
+            f' <Workout workoutActivityType="HKWorkoutActivityTypeRunning" duration="45" durationUnit="min" '
+            f'sourceName="Apple Watch" device="{DEVICES[0]}" creationDate="{created}" '
+            f'startDate="{start}" endDate="{end}">\n'
+            f'  <WorkoutEvent type="HKWorkoutEventTypeSegment" date="{start}" duration="5" durationUnit="min"/>\n'
+            f'  <WorkoutStatistics type="HKQuantityTypeIdentifierActiveEnergyBurned" startDate="{start}" '
+            f'endDate="{end}" sum="{rng.randint(300, 600)}" unit="Cal"/>\n'
+            f'  <WorkoutStatistics type="HKQuantityTypeIdentifierHeartRate" startDate="{start}" endDate="{end}" '
+            f'average="{rng.randint(130, 160)}" minimum="{rng.randint(90, 110)}" '
+            f'maximum="{rng.randint(170, 190)}" unit="count/min"/>\n'
+            f" </Workout>\n"
+        )
+
+
+def generate_export(path: Path, size_bytes: int, seed: int) -> None:
+    """Stream a synthetic export of roughly *size_bytes* to *path*."""
+    rng = random.Random(seed)
+    moment = datetime(2015, 1, 1)
+    with path.open("w", encoding="utf-8", buffering=4 * 1024 * 1024) as out:
+        out.write(HEADER)
+        while out.tell() < size_bytes:
+            _write_block(out, rng, moment)
+            moment += timedelta(minutes=1)
+        out.write("</HealthData>\n")
+
+
+def _run_parser(path: str, parser: str, chunk_size: int, results: "multiprocessing.Queue[dict]") -> None:
+    from app.config import settings
+    from app.services.apple.apple_xml.xml_service import XMLService
+
+    settings.xml_parser = parser
+    service = XMLService(Path(path), getLogger("benchmark_xml_parser"))
+    service.chunk_size = chunk_size
+
+    records = workouts = sleep = chunks = 0
+    started = time.perf_counter()
+    for chunk_records, chunk_workouts, sync_request in service.parse_xml(str(uuid4())):
+        chunks += 1
+        records += len(chunk_records)
+        workouts += len(chunk_workouts)
+        sleep += len(sync_request.data.sleep)
+    elapsed = time.perf_counter() - started
+
+    results.put(
+        {
+            "parser": parser,
+            "seconds": elapsed,
+            "chunks": chunks,
+            "records": records,
+            "workouts": workouts,
+            "sleep": sleep,
+            "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-gb", type=float, default=2.0, help="Size of the generated export (default: 2)")
+    parser.add_argument("--input", type=Path, help="Benchmark an existing export.xml/zip instead of generating one")
+    parser.add_argument("--parsers", nargs="+", default=["stdlib", "lxml"], choices=["stdlib", "lxml"])
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="Records per yielded chunk")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--keep", action="store_true", help="Keep the generated export")
+    args = parser.parse_args()
+
+    if args.input:
+        path = args.input
+    else:
+        path = Path(tempfile.gettempdir()) / f"benchmark-export-{args.size_gb:g}gb.xml"
+        started = time.perf_counter()
+        generate_export(path, int(args.size_gb * 1024**3), args.seed)
+        print(f"Generated {path} in {time.perf_counter() - started:.1f}s")
+
+    size_mb = path.stat().st_size / 1024**2
+    print(f"Export size: {size_mb:,.1f} MB\n")
+    print(
+        f"{'parser':<8} {'seconds':>9} {'MB/s':>8} {'records/s':>11} "
+        f"{'records':>11} {'workouts':>9} {'sleep':>8} {'peak RSS MB':>12}"
+    )
+
+    try:
+        ctx = multiprocessing.get_context("spawn")
+        for name in args.parsers:
+            results = ctx.Queue()
+            process = ctx.Process(target=_run_parser, args=(str(path), name, args.chunk_size, results))
+            process.start()
+            result = results.get()
+            process.join()
+            print(
+                f"{result['parser']:<8} {result['seconds']:>9.1f} {size_mb / result['seconds']:>8.1f} "
+                f"{result['records'] / result['seconds']:>11,.0f} {result['records']:>11,} "
+                f"{result['workouts']:>9,} {result['sleep']:>8,} {result['peak_rss_mb']:>12,.0f}"
+            )
+    finally:
+        if not args.input and not args.keep:
+            path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,35 @@
 #!/usr/bin/env python3
-"""Replay raw payloads stored in S3 back through the SDK sync endpoint.
-
-Standalone script - no imports from app.* required. Just boto3 + httpx + stdlib.
+"""Replay archived raw payloads back through the SDK sync endpoint.
+
+The default ``--mode api`` needs no imports from app.* - just httpx + stdlib,
+plus boto3 when reading from S3.  ``--mode direct`` imports the backend.
+
+Reads payloads from S3 - batched gzip NDJSON objects (located through their
+``.manifest.json`` index) and the older one-object-per-payload keys - or from
+the segment files of the ``local`` storage backend (``--local-dir``, no boto3
+needed).  With ``--concurrency`` payloads are sent by parallel workers and
+the summary reports throughput and latency percentiles, so a captured corpus
+doubles as an ingest load test.  ``--mode direct`` skips the API and Celery
+and calls the ``process_sdk_upload`` worker function in-process; run it from
+``backend/`` with the backend environment (config/.env) loaded.  Bodies are
+read from storage one batch / segment at a time while they are replayed.
+
+Deduplication: the SDK sync endpoint acknowledges a batch identical to one it
+already accepted for the same user within ``PAYLOAD_DEDUP_TTL_SECONDS``
+(default 24h) with a 202 "Duplicate batch already queued" without processing
+it.  Replaying a corpus a second time within that window is therefore mostly
+no-ops; such responses are counted as duplicates in the summary.  For repeated
+load tests set ``PAYLOAD_DEDUP_TTL_SECONDS=0`` on the server, send to a fresh
+``--target-user-id``, or use ``--mode direct``, which calls the worker
+function behind the endpoint and is not deduplicated.
 
 Usage:
     uv run --with boto3,httpx python scripts/replay_raw_payloads.py \
-        --user-id <UUID> \
+        [--user-id <UUID>] \
         [--target-user-id <UUID>] \
         --api-url http://localhost:8000 \
         --api-key sk-... \
-        --s3-bucket my-bucket \
+        (--s3-bucket my-bucket | --local-dir raw-payloads) \
         [--s3-prefix raw-payloads] \
         [--s3-endpoint-url https://...] \
         [--aws-region eu-north-1] \
@@ -19,7 +39,9 @@ Usage:
         [--source sdk] \
         [--date-from 2025-01-01] \
         [--date-to 2025-01-31] \
-        [--delay 1.0] \
+        [--mode api|direct] \
+        [--concurrency 1] \
+        [--delay 0] \
         [--dry-run] \
         [--limit 10]
 """
@@ -27,26 +49,34 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import gzip
 import json
 import os
 import sys
+import threading
 import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import date, datetime
+from pathlib import Path
 from typing import Any
+from uuid import uuid4
 
-import boto3
 import httpx
 
 
 def parse_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description="Replay S3-stored raw payloads through the SDK sync endpoint",
+        description="Replay archived raw payloads through the SDK sync endpoint",
         formatter_class=argparse.RawDescriptionHelpFormatter,
     )
 
     # Required
-    parser.add_argument("--user-id", required=True, help="S3 user ID whose payloads to read")
-    parser.add_argument("--target-user-id", help="User ID to send payloads to (defaults to --user-id)")
+    parser.add_argument("--user-id", help="User ID whose payloads to read (default: all users)")
+    parser.add_argument(
+        "--target-user-id", help="User ID to send payloads to (defaults to --user-id, else each payload's own user)"
+    )
     parser.add_argument(
         "--api-url", default="http://localhost:8000", help="Backend API base URL (default: http://localhost:8000)"
     )
@@ -61,6 +91,8 @@ def parse_args() -> argparse.Namespace:
         help="S3 bucket name (or set RAW_PAYLOAD_S3_BUCKET / AWS_BUCKET_NAME env var)",
     )
 
+    parser.add_argument("--local-dir", help="Read segment files of the local storage backend instead of S3")
+
     # S3 config
     parser.add_argument(
         "--s3-prefix",
@@ -93,28 +125,53 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--date-to", type=date.fromisoformat, help="Filter payloads up to this date (YYYY-MM-DD)")
 
     # Behavior
-    parser.add_argument("--delay", type=float, default=1.0, help="Delay between requests in seconds (default: 1.0)")
+    parser.add_argument(
+        "--mode",
+        choices=("api", "direct"),
+        default="api",
+        help="Send through the API, or call the worker function in-process (default: api)",
+    )
+    parser.add_argument("--concurrency", type=int, default=1, help="Parallel senders (default: 1)")
+    parser.add_argument(
+        "--delay",
+        type=float,
+        default=0.0,
+        help="Delay between requests of each sender in seconds, excluded from the throughput (default: 0)",
+    )
     parser.add_argument("--dry-run", action="store_true", help="List payloads without sending them")
     parser.add_argument("--limit", type=int, help="Maximum number of payloads to replay")
 
     args = parser.parse_args()
 
-    if not args.api_key:
+    if args.mode == "api" and not args.api_key:
         parser.error("--api-key is required (or set OPEN_WEARABLES_API_KEY env var)")
-    if not args.s3_bucket:
-        parser.error("--s3-bucket is required (or set RAW_PAYLOAD_S3_BUCKET env var)")
+    if not args.local_dir and not args.s3_bucket:
+        parser.error("--s3-bucket is required (or set RAW_PAYLOAD_S3_BUCKET env var) unless --local-dir is given")
     if args.limit is not None and args.limit < 1:
         parser.error("--limit must be a positive integer")
+    if args.concurrency < 1:
+        parser.error("--concurrency must be a positive integer")
     if not args.target_user_id:
         args.target_user_id = args.user_id
 
     return args
 
 
+@dataclass
+class Payload:
+    """One payload to replay: a legacy per-payload key, or line *line* of a batch object / local segment."""
+
+    key: str
+    received_at: datetime
+    line: int | None = None
+    user_id: str | None = None
+
+
 def build_s3_prefix(base_prefix: str, provider: str | None, source: str | None) -> str:
     """Build the S3 key prefix for listing objects.
 
-    Key format: {prefix}/{provider}/{source}/{YYYY-MM-DD}/{user_id}/{uuid}.json
+    Key formats: {prefix}/{provider}/{source}/{YYYY-MM-DD}/{HHMM}-{uuid}.ndjson.gz (+ .manifest.json)
+    and the older {prefix}/{provider}/{source}/{YYYY-MM-DD}/{user_id}/{uuid}.json
     We build the deepest prefix we can from the filters to narrow the listing.
     If provider or source is not specified, we list from the broadest level
     and filter client-side.
@@ -140,15 +197,19 @@ def parse_key_date(key: str) -> date | None:
 
 def matches_filters(
     key: str,
-    user_id: str,
+    user_id: str | None,
     provider: str | None,
     source: str | None,
     date_from: date | None,
     date_to: date | None,
 ) -> bool:
-    """Check if an S3 key matches all specified filters."""
+    """Check if an S3 key matches all specified filters.
+
+    *user_id* is checked against the path only for per-payload keys; batch
+    manifests are filtered by their contents.
+    """
     # Must contain the user_id in the path
-    if f"/{user_id}/" not in key:
+    if user_id is not None and f"/{user_id}/" not in key:
         return False
 
     parts = key.split("/")
@@ -172,9 +233,9 @@ def matches_filters(
     return True
 
 
-def list_payloads(s3_client: Any, bucket: str, prefix: str, args: argparse.Namespace) -> list[tuple[str, datetime]]:
-    """List and filter S3 keys matching the given criteria. Returns (key, last_modified) tuples."""
-    entries: list[tuple[str, datetime]] = []
+def list_payloads(s3_client: Any, bucket: str, prefix: str, args: argparse.Namespace) -> list[Payload]:
+    """List and filter the payloads matching the given criteria, in arrival order."""
+    entries: list[Payload] = []
     paginator = s3_client.get_paginator("list_objects_v2")
 
     for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
@@ -182,11 +243,20 @@ def list_payloads(s3_client: Any, bucket: str, prefix: str, args: argparse.Names
             key = obj["Key"]
             if not key.endswith(".json"):
                 continue
-            if matches_filters(key, args.user_id, args.provider, args.source, args.date_from, args.date_to):
-                entries.append((key, obj["LastModified"]))
+            is_manifest = key.endswith(".manifest.json")
+            path_user_id = None if is_manifest else args.user_id
+            if not matches_filters(key, path_user_id, args.provider, args.source, args.date_from, args.date_to):
+                continue
+            if is_manifest:
+                entries.extend(read_manifest(s3_client, bucket, key, args.user_id))
+            else:
+                path_user = key.split("/")[-2]
+                entries.append(
+                    Payload(key, obj["LastModified"], user_id=None if path_user == "_unknown" else path_user)
+                )
 
-    # Sort by upload timestamp (original arrival order)
-    entries.sort(key=lambda e: e[1])
+    # Sort by arrival timestamp (original arrival order)
+    entries.sort(key=lambda e: e.received_at)
 
     if args.limit is not None:
         entries = entries[: args.limit]
@@ -194,6 +264,87 @@ def list_payloads(s3_client: Any, bucket: str, prefix: str, args: argparse.Names
     return entries
 
 
+def read_manifest(s3_client: Any, bucket: str, key: str, user_id: str | None) -> list[Payload]:
+    """The payloads in the batch indexed by manifest *key*; only *user_id*'s when given."""
+    manifest = json.loads(s3_client.get_object(Bucket=bucket, Key=key)["Body"].read())
+    if user_id is not None and user_id not in manifest["user_ids"]:
+        return []
+    return [
+        Payload(manifest["object"], datetime.fromisoformat(record["received_at"]), record["line"], record["user_id"])
+        for record in manifest["records"]
+        if user_id is None or record["user_id"] == user_id
+    ]
+
+
+def list_local_payloads(root: Path, args: argparse.Namespace) -> list[Payload]:
+    """Scan the closed segment files under *root* and filter their lines, in arrival order.
+
+    Path format: {local_dir}/{YYYY-MM-DD}/{HHMMSS}-{pid}-{uuid}.ndjson.gz
+    Segments still being written (``.open`` suffix) are skipped.  Only the
+    line positions are kept; bodies are read again by :class:`PayloadLoader`.
+    """
+    entries: list[Payload] = []
+    for path in sorted(root.rglob("*.ndjson.gz")):
+        if not matches_filters(str(path), None, None, None, args.date_from, args.date_to):
+            continue
+        with gzip.open(path) as segment:
+            for i, raw in enumerate(segment):
+                line = json.loads(raw)
+                if args.provider and line["provider"] != args.provider:
+                    continue
+                if args.source and line["source"] != args.source:
+                    continue
+                if args.user_id and line["user_id"] != args.user_id:
+                    continue
+                received_at = datetime.fromisoformat(line["received_at"])
+                entries.append(Payload(str(path), received_at, i, line["user_id"]))
+
+    entries.sort(key=lambda e: e.received_at)
+
+    if args.limit is not None:
+        entries = entries[: args.limit]
+
+    return entries
+
+
+def create_s3_client(args: argparse.Namespace) -> Any:
+    import boto3
+
+    s3_kwargs: dict = {"region_name": args.aws_region}
+    if args.s3_endpoint_url:
+        s3_kwargs["endpoint_url"] = args.s3_endpoint_url
+    if args.aws_access_key_id and args.aws_secret_access_key:
+        s3_kwargs["aws_access_key_id"] = args.aws_access_key_id
+        s3_kwargs["aws_secret_access_key"] = args.aws_secret_access_key
+    return boto3.client("s3", **s3_kwargs)
+
+
+class PayloadLoader:
+    """Fetches payload bodies, keeping the last decompressed batch since its lines are replayed together.
+
+    Reads S3 objects, or local segment files when *s3_client* is None.
+    """
+
+    def __init__(self, s3_client: Any | None, bucket: str | None) -> None:
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self._batch_key: str | None = None
+        self._batch_lines: list[bytes] = []
+
+    def _read(self, key: str) -> bytes:
+        if self.s3_client is None:
+            return Path(key).read_bytes()
+        return self.s3_client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def load(self, entry: Payload) -> bytes:
+        if entry.line is None:
+            return self._read(entry.key)
+        if entry.key != self._batch_key:
+            self._batch_lines = gzip.decompress(self._read(entry.key)).splitlines()
+            self._batch_key = entry.key
+        return json.loads(self._batch_lines[entry.line])["payload"].encode("utf-8")
+
+
 def replay_payload(http_client: Any, api_url: str, api_key: str, user_id: str, payload_bytes: bytes) -> tuple[int, str]:
     """Send a payload to the SDK sync endpoint. Returns (status_code, response_text)."""
     url = f"{api_url}/api/v1/sdk/users/{user_id}/sync"
@@ -208,6 +359,45 @@ def replay_payload(http_client: Any, api_url: str, api_key: str, user_id: str, p
     return resp.status_code, resp.text
 
 
+def is_duplicate(status_code: int, response_text: str) -> bool:
+    """Whether the endpoint acknowledged the payload as a duplicate without processing it."""
+    if status_code != 202:
+        return False
+    try:
+        return json.loads(response_text).get("response") == "Duplicate batch already queued"
+    except (ValueError, AttributeError):
+        return False
+
+
+def make_direct_sender() -> Callable[[str, bytes], tuple[int, str]]:
+    """Call the SDK upload worker function in-process, bypassing the API and the Celery broker."""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from app.integrations.celery.tasks.process_sdk_upload_task import process_sdk_upload
+
+    def send(user_id: str, payload_bytes: bytes) -> tuple[int, str]:
+        content = payload_bytes.decode("utf-8")
+        provider = str(json.loads(content).get("provider") or "").lower()
+        result = process_sdk_upload(
+            content=content,
+            content_type="application/json",
+            user_id=user_id,
+            provider=provider,
+            batch_id=str(uuid4()),
+        )
+        status_code = result.get("status_code")
+        return (status_code if isinstance(status_code, int) else 0), json.dumps(result, default=str)
+
+    return send
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
 def format_size(size_bytes: int) -> str:
     if size_bytes >= 1024 * 1024:
         return f"{size_bytes / (1024 * 1024):.1f} MB"
@@ -219,21 +409,15 @@ def format_size(size_bytes: int) -> str:
 def main() -> None:
     args = parse_args()
 
-    # Create S3 client
-    s3_kwargs: dict = {"region_name": args.aws_region}
-    if args.s3_endpoint_url:
-        s3_kwargs["endpoint_url"] = args.s3_endpoint_url
-    if args.aws_access_key_id and args.aws_secret_access_key:
-        s3_kwargs["aws_access_key_id"] = args.aws_access_key_id
-        s3_kwargs["aws_secret_access_key"] = args.aws_secret_access_key
-    s3_client = boto3.client("s3", **s3_kwargs)
-
-    # Build prefix and list payloads
-    prefix = build_s3_prefix(args.s3_prefix, args.provider, args.source)
-    print(f"Listing payloads in s3://{args.s3_bucket}/{prefix}")
-    print(f"  Source user ID: {args.user_id}")
+    if args.local_dir:
+        print(f"Reading payloads from {args.local_dir}")
+    else:
+        s3_client = create_s3_client(args)
+        prefix = build_s3_prefix(args.s3_prefix, args.provider, args.source)
+        print(f"Listing payloads in s3://{args.s3_bucket}/{prefix}")
+    print(f"  Source user ID: {args.user_id or 'all'}")
     if args.target_user_id != args.user_id:
-        print(f"  Target user ID: {args.target_user_id}")
+        print(f"  Target user ID: {args.target_user_id or 'own user of each payload'}")
     if args.provider:
         print(f"  Provider: {args.provider}")
     if args.source:
@@ -243,7 +427,10 @@ def main() -> None:
     if args.date_to:
         print(f"  To: {args.date_to}")
 
-    entries = list_payloads(s3_client, args.s3_bucket, prefix, args)
+    if args.local_dir:
+        entries = list_local_payloads(Path(args.local_dir), args)
+    else:
+        entries = list_payloads(s3_client, args.s3_bucket, prefix, args)
 
     if not entries:
         print("\nNo payloads found matching the filters.")
@@ -254,56 +441,114 @@ def main() -> None:
 
     if args.dry_run:
         print("\n[DRY RUN] Payloads that would be replayed:")
-        for i, (key, last_modified) in enumerate(entries, 1):
-            ts = last_modified.strftime("%Y-%m-%d %H:%M:%S")
-            print(f"  {i}. {key} (uploaded: {ts})")
+        for i, entry in enumerate(entries, 1):
+            ts = entry.received_at.strftime("%Y-%m-%d %H:%M:%S")
+            line = f" line {entry.line}" if entry.line is not None else ""
+            print(f"  {i}. {entry.key}{line} (received: {ts})")
         sys.exit(0)
 
-    # Replay payloads
-    print(f"\nReplaying to {args.api_url} (delay: {args.delay}s)")
+    loader = PayloadLoader(None, None) if args.local_dir else PayloadLoader(s3_client, args.s3_bucket)
+
+    target = f"{args.api_url} (API)" if args.mode == "api" else "process_sdk_upload (in-process)"
+    print(f"\nReplaying to {target} (concurrency: {args.concurrency}, delay: {args.delay}s)")
     print("-" * 60)
 
-    success = 0
-    failed = 0
-    total_bytes = 0
+    http_client = httpx.Client(timeout=30.0, limits=httpx.Limits(max_connections=args.concurrency))
+    if args.mode == "api":
 
-    with httpx.Client(timeout=30.0) as http_client:
-        for i, (key, last_modified) in enumerate(entries, 1):
-            ts = last_modified.strftime("%Y-%m-%d %H:%M:%S")
-            try:
-                obj = s3_client.get_object(Bucket=args.s3_bucket, Key=key)
-                payload_bytes = obj["Body"].read()
-                size = len(payload_bytes)
-                total_bytes += size
+        def send(user_id: str, payload_bytes: bytes) -> tuple[int, str]:
+            return replay_payload(http_client, args.api_url, args.api_key, user_id, payload_bytes)
 
-                # Validate JSON
-                json.loads(payload_bytes)
+    else:
+        send = make_direct_sender()
 
-                status_code, response_text = replay_payload(
-                    http_client, args.api_url, args.api_key, args.target_user_id, payload_bytes
-                )
+    lock = threading.Lock()
+    latencies: list[float] = []
+    counts = {"success": 0, "duplicate": 0, "failed": 0, "bytes": 0}
+    slept = 0.0
 
-                if 200 <= status_code < 300:
-                    success += 1
-                    print(f"  [{i}/{total}] OK {status_code} - {ts} - {format_size(size)}")
-                else:
-                    failed += 1
-                    detail = response_text[:200]
-                    print(f"  [{i}/{total}] FAIL {status_code} - {ts} - {format_size(size)} - {detail}")
-
-            except json.JSONDecodeError:
-                failed += 1
-                print(f"  [{i}/{total}] SKIP - invalid JSON: {key}")
+    def run(i: int, entry: Payload, body: bytes, user_id: str) -> None:
+        nonlocal slept
+        ts = entry.received_at.strftime("%Y-%m-%d %H:%M:%S")
+        size = len(body)
+        try:
+            # Validate JSON
+            json.loads(body)
+            started = time.perf_counter()
+            status_code, response_text = send(user_id, body)
+            latency = time.perf_counter() - started
+        except json.JSONDecodeError:
+            with lock:
+                counts["failed"] += 1
+                print(f"  [{i}/{total}] SKIP - invalid JSON: {entry.key}")
+            return
+        except Exception as e:
+            with lock:
+                counts["failed"] += 1
+                print(f"  [{i}/{total}] ERROR - {entry.key}: {e}")
+            return
+
+        with lock:
+            latencies.append(latency)
+            counts["bytes"] += size
+            if is_duplicate(status_code, response_text):
+                counts["duplicate"] += 1
+                print(f"  [{i}/{total}] DUP {status_code} - {ts} - {format_size(size)} - {latency * 1000:.0f} ms")
+            elif 200 <= status_code < 300:
+                counts["success"] += 1
+                print(f"  [{i}/{total}] OK {status_code} - {ts} - {format_size(size)} - {latency * 1000:.0f} ms")
+            else:
+                counts["failed"] += 1
+                detail = response_text[:200]
+                print(f"  [{i}/{total}] FAIL {status_code} - {ts} - {format_size(size)} - {detail}")
+        if args.delay > 0:
+            time.sleep(args.delay)
+            with lock:
+                slept += args.delay
+
+    def skip(i: int, reason: str, entry: Payload) -> None:
+        with lock:
+            counts["failed"] += 1
+            print(f"  [{i}/{total}] SKIP - {reason}: {entry.key}")
+
+    # Bodies are loaded as they are submitted; the bound keeps only a few of them in memory
+    in_flight = threading.BoundedSemaphore(args.concurrency * 2)
+    started = time.perf_counter()
+    with http_client, ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for i, entry in enumerate(entries, 1):
+            user_id = args.target_user_id or entry.user_id
+            if not user_id:
+                skip(i, "no user ID", entry)
+                continue
+            try:
+                body = loader.load(entry)
             except Exception as e:
-                failed += 1
-                print(f"  [{i}/{total}] ERROR - {key}: {e}")
-
-            if i < total and args.delay > 0:
-                time.sleep(args.delay)
+                skip(i, f"no payload ({e})", entry)
+                continue
+            in_flight.acquire()
+            pool.submit(run, i, entry, body, user_id).add_done_callback(lambda _: in_flight.release())
+    # --delay pacing is not load: leave each sender's share of the sleeps out of the rate
+    elapsed = max(time.perf_counter() - started - slept / args.concurrency, 1e-9)
 
     # Summary
     print("-" * 60)
-    print(f"Done. {success} succeeded, {failed} failed, {format_size(total_bytes)} total")
+    print(
+        f"Done. {counts['success']} succeeded, {counts['duplicate']} skipped as duplicates, "
+        f"{counts['failed']} failed, {format_size(counts['bytes'])} total"
+    )
+    if counts["duplicate"]:
+        print("  Duplicates were not processed; see PAYLOAD_DEDUP_TTL_SECONDS in the script docstring.")
+    if latencies:
+        latencies.sort()
+        print(
+            f"Throughput: {len(latencies) / elapsed:.1f} payloads/s, "
+            f"{format_size(int(counts['bytes'] / elapsed))}/s over {elapsed:.1f}s (excluding --delay)"
+        )
+        print(
+            "Latency: "
+            + ", ".join(f"p{pct} {percentile(latencies, pct) * 1000:.0f} ms" for pct in (50, 90, 95, 99))
+            + f", max {latencies[-1] * 1000:.0f} ms"
+        )
 
 
 if __name__ == "__main__":
@@ -1,20 +1,28 @@
 """Tests for Garmin webhook HTTP contract layer.
 
 The /api/v1/providers/garmin/webhooks endpoint immediately returns
-{"status": "accepted"} and enqueues all processing to the process_push
+{"status": "accepted"}: in fast-ack mode after parking the body for the
+process_webhook_body task, inline after dispatch() enqueued the process_push
 Celery task. Processing logic is tested in tests/tasks/test_garmin_webhook_task.py.
 """
 
+from collections.abc import Generator
 from unittest.mock import MagicMock, patch
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app.config import settings
+from app.services import webhook_claim_check
+
 PUSH_ENDPOINT = "/api/v1/providers/garmin/webhooks"
 LEGACY_PUSH_ENDPOINT = "/api/v1/garmin/webhooks/push"
 LEGACY_PING_ENDPOINT = "/api/v1/garmin/webhooks/ping"
 WEBHOOK_HANDLER = "app.services.providers.garmin.webhook_handler"
 PROCESS_PUSH_TASK = "app.integrations.celery.tasks.webhook_push_task.process_webhook_push"
+PROCESS_BODY_TASK = "app.integrations.celery.tasks.webhook_push_task.process_webhook_body"
+BASE_HANDLER = "app.services.providers.templates.base_webhook_handler"
 
 
 class TestGarminWebhookAuth:
@@ -39,15 +47,102 @@ class TestGarminWebhookAuth:
         assert response.json() == {"status": "accepted"}
 
     def test_invalid_json_returns_400(self, client: TestClient, db: Session) -> None:
-        """Malformed JSON body returns 400."""
+        """Malformed JSON body returns 400 when the webhook is processed inline."""
+        with patch.object(settings, "webhook_fast_ack_enabled", False):
+            response = client.post(
+                PUSH_ENDPOINT,
+                content=b"not json",
+                headers={"garmin-client-id": "test-client-id", "Content-Type": "application/json"},
+            )
+        assert response.status_code == 400
+
+
+class TestGarminWebhookFastAck:
+    """In fast-ack mode the request only verifies, stores the body and enqueues process_webhook_body."""
+
+    def test_enqueues_process_body_task_with_stored_body(self, client: TestClient, db: Session) -> None:
+        body = b'{"hrv": [{"userId": "u1", "summaryId": "s1"}]}'
+        headers = {"garmin-client-id": "test-client-id", "Content-Type": "application/json"}
+
+        with (
+            patch(f"{BASE_HANDLER}.celery_app") as mock_celery,
+            patch(f"{WEBHOOK_HANDLER}.celery_app") as mock_garmin_celery,
+        ):
+            response = client.post(PUSH_ENDPOINT, headers=headers, content=body)
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "accepted"}
+        mock_garmin_celery.send_task.assert_not_called()
+        task_name = mock_celery.send_task.call_args[0][0]
+        provider, ref, _ = mock_celery.send_task.call_args[1]["args"]
+        assert task_name == PROCESS_BODY_TASK
+        assert mock_celery.send_task.call_args[1]["queue"] == "webhook_sync"
+        assert provider == "garmin"
+        assert webhook_claim_check.get_body(ref) == body
+
+    def test_malformed_body_is_accepted(self, client: TestClient, db: Session) -> None:
+        """Parsing happens in the worker, so the request cannot reject a malformed body."""
         response = client.post(
             PUSH_ENDPOINT,
             content=b"not json",
             headers={"garmin-client-id": "test-client-id", "Content-Type": "application/json"},
         )
-        assert response.status_code == 400
+        assert response.status_code == 200
+
+    def test_falls_back_to_inline_dispatch_without_claim_check_store(self, client: TestClient, db: Session) -> None:
+        with (
+            patch(f"{BASE_HANDLER}.webhook_claim_check.put_body", return_value=None),
+            patch(f"{BASE_HANDLER}.celery_app") as mock_celery,
+            patch(f"{WEBHOOK_HANDLER}.celery_app") as mock_garmin_celery,
+        ):
+            response = client.post(PUSH_ENDPOINT, headers={"garmin-client-id": "test-client-id"}, json={"hrv": []})
+
+        assert response.json() == {"status": "accepted"}
+        mock_celery.send_task.assert_not_called()
+        assert mock_garmin_celery.send_task.call_args[0][0] == PROCESS_PUSH_TASK
+
+
+class TestGarminWebhookDeliveryDedup:
+    """A redelivered webhook is acknowledged before it is stored, enqueued or dispatched."""
+
+    def test_redelivery_is_not_enqueued_again(self, client: TestClient, db: Session) -> None:
+        body = b'{"hrv": [{"userId": "u1", "summaryId": "s1"}]}'
+        headers = {"garmin-client-id": "test-client-id", "Content-Type": "application/json"}
+
+        with patch(f"{BASE_HANDLER}.celery_app") as mock_celery:
+            first = client.post(PUSH_ENDPOINT, headers=headers, content=body)
+            second = client.post(PUSH_ENDPOINT, headers=headers, content=body)
+            other = client.post(PUSH_ENDPOINT, headers=headers, content=body.replace(b"s1", b"s2"))
+
+        assert first.json() == {"status": "accepted"}
+        assert second.status_code == 200
+        assert second.json() == {"status": "duplicate"}
+        assert other.json() == {"status": "accepted"}
+        assert mock_celery.send_task.call_count == 2
+
+    def test_failed_inline_processing_accepts_redelivery(self, client: TestClient, db: Session) -> None:
+        body = b'{"hrv": []}'
+        headers = {"garmin-client-id": "test-client-id", "Content-Type": "application/json"}
+
+        with (
+            patch.object(settings, "webhook_fast_ack_enabled", False),
+            patch(f"{WEBHOOK_HANDLER}.celery_app") as mock_garmin_celery,
+        ):
+            mock_garmin_celery.send_task.side_effect = [ConnectionError("broker down"), MagicMock(id="t")]
+            with pytest.raises(ConnectionError):
+                client.post(PUSH_ENDPOINT, headers=headers, content=body)
+            retry = client.post(PUSH_ENDPOINT, headers=headers, content=body)
+
+        assert retry.json() == {"status": "accepted"}
+
+
+@pytest.fixture
+def inline_webhooks() -> Generator[None, None, None]:
+    with patch.object(settings, "webhook_fast_ack_enabled", False):
+        yield
 
 
+@pytest.mark.usefixtures("inline_webhooks")
 class TestGarminWebhookTaskEnqueue:
     """Verify that dispatch() enqueues the process_push Celery task."""
 
@@ -3,7 +3,7 @@
 Covers:
 - WebhookEventType enum (#717)
 - webhook_emit helpers (#719, #721)
-- emit_webhook_event Celery task
+- batched emission and the emit_webhook_event(s) Celery tasks
 - outgoing_webhooks API router (#722-726)
 """
 
@@ -11,6 +11,7 @@ from __future__ import annotations
 
 import re
 from collections.abc import Generator
+from datetime import datetime, timedelta, timezone
 from typing import Any
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
@@ -19,11 +20,16 @@ import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
-from app.integrations.celery.tasks.emit_webhook_event_task import emit_webhook_event
+from app.config import settings
+from app.integrations.celery.tasks.emit_webhook_event_task import emit_webhook_event, emit_webhook_events
+from app.schemas.enums import ProviderName
+from app.schemas.webhooks.endpoints import WebhookPayloadMode
 from app.schemas.webhooks.event_types import EVENT_TYPE_DESCRIPTIONS, WebhookEventType
+from app.services.outgoing_webhooks import payload_modes
 from app.services.outgoing_webhooks.events import (
     SVIX_MAX_SAMPLES_PER_EVENT,
     _dispatch,
+    batched_webhooks,
     on_connection_created,
     on_connection_revoked,
     on_sleep_created,
@@ -31,7 +37,13 @@ from app.services.outgoing_webhooks.events import (
     on_workout_created,
 )
 from app.utils.security import create_access_token
-from tests.factories import DeveloperFactory
+from tests.factories import (
+    DataPointSeriesFactory,
+    DataSourceFactory,
+    DeveloperFactory,
+    SeriesTypeDefinitionFactory,
+    UserFactory,
+)
 
 # Svix eventId charset: colons/plus signs from ISO 8601 timestamps must not survive.
 _SVIX_ID_SAFE_RE = re.compile(r"^[a-zA-Z0-9\-_.]+$")
@@ -296,22 +308,131 @@ class TestWebhookEmit:
             mock_task.delay.assert_not_called()
 
 
+class TestBatchedWebhooks:
+    @pytest.fixture(autouse=True)
+    def _webhooks_enabled(self) -> Generator[None, None, None]:
+        with patch("app.services.outgoing_webhooks.svix.is_enabled", return_value=True):
+            yield
+
+    @staticmethod
+    def _samples(count: int) -> list[dict[str, Any]]:
+        return [{"timestamp": f"2026-04-16T06:00:{i % 60:02d}+00:00", "value": 60.0} for i in range(count)]
+
+    def _save(self, series_type: str, samples: list[dict[str, Any]]) -> None:
+        on_timeseries_batch_saved(
+            user_id=uuid4(),
+            provider="garmin",
+            series_type=series_type,
+            sample_count=len(samples),
+            start_time=samples[0]["timestamp"],
+            end_time=samples[-1]["timestamp"],
+            samples=samples,
+        )
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_event")
+    def test_events_in_block_are_enqueued_as_one_task(self, mock_single: MagicMock, mock_batch: MagicMock) -> None:
+        with batched_webhooks():
+            self._save("heart_rate", self._samples(2))
+            self._save("resting_heart_rate", self._samples(1))
+            on_workout_created(
+                record_id=uuid4(),
+                user_id=uuid4(),
+                provider="garmin",
+                device=None,
+                workout_type="running",
+                start_time="2026-04-16T06:00:00+00:00",
+                end_time="2026-04-16T07:00:00+00:00",
+                zone_offset=None,
+                duration_seconds=3600,
+            )
+            mock_batch.delay.assert_not_called()
+
+        mock_single.delay.assert_not_called()
+        mock_batch.delay.assert_called_once()
+        events = mock_batch.delay.call_args.args[0]
+        assert [event["event_types"] for event in events] == [
+            ["heart_rate.created", "series.heart_rate.created"],
+            ["heart_rate.created", "series.resting_heart_rate.created"],
+            ["workout.created"],
+        ]
+        # Group and granular events share one copy of the samples.
+        assert len(events[0]["data"]["samples"]) == 2
+        assert len(events[0]["idempotency_keys"]) == 2
+        assert all(_SVIX_ID_SAFE_RE.match(key) for key in events[0]["idempotency_keys"])
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events")
+    def test_nested_blocks_join_the_outer_batch(self, mock_batch: MagicMock) -> None:
+        with batched_webhooks():
+            with batched_webhooks():
+                self._save("heart_rate", self._samples(1))
+            self._save("heart_rate", self._samples(1))
+
+        mock_batch.delay.assert_called_once()
+        assert len(mock_batch.delay.call_args.args[0]) == 2
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events")
+    def test_large_batch_is_split_by_sample_budget(self, mock_batch: MagicMock) -> None:
+        with batched_webhooks():
+            for _ in range(3):
+                self._save("heart_rate", self._samples(SVIX_MAX_SAMPLES_PER_EVENT * 2))
+
+        # 3 saves x 2 chunks = 6 events of SVIX_MAX_SAMPLES_PER_EVENT samples, 4 per task.
+        assert [len(c.args[0]) for c in mock_batch.delay.call_args_list] == [4, 2]
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events")
+    def test_empty_block_enqueues_nothing(self, mock_batch: MagicMock) -> None:
+        with batched_webhooks():
+            pass
+
+        mock_batch.delay.assert_not_called()
+
+    @patch("app.services.outgoing_webhooks.events._outbox")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.emit_webhook_events")
+    def test_outbox_block_writes_events_to_session(self, mock_batch: MagicMock, mock_outbox: MagicMock) -> None:
+        session = MagicMock()
+        with batched_webhooks(outbox=session):
+            self._save("heart_rate", self._samples(1))
+
+        mock_batch.delay.assert_not_called()
+        mock_outbox.add.assert_called_once()
+        written_session, events = mock_outbox.add.call_args.args
+        assert written_session is session
+        assert [event["event_types"] for event in events] == [["heart_rate.created", "series.heart_rate.created"]]
+        # Stored with the batch's own samples, exactly as they are delivered.
+        assert len(events[0]["data"]["samples"]) == 1
+
+    @patch("app.services.outgoing_webhooks.events._outbox")
+    def test_failed_outbox_block_writes_nothing(self, mock_outbox: MagicMock) -> None:
+        def save_then_fail() -> None:
+            with batched_webhooks(outbox=MagicMock()):
+                self._save("heart_rate", self._samples(1))
+                raise ValueError("insert failed")
+
+        with pytest.raises(ValueError, match="insert failed"):
+            save_then_fail()
+
+        mock_outbox.add.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # emit_webhook_event Celery task (unit, Svix mocked)
 # ---------------------------------------------------------------------------
 
 
 class TestEmitWebhookEventTask:
+    @patch("app.services.outgoing_webhooks.app_registry.svix_service")
     @patch("app.integrations.celery.tasks.emit_webhook_event_task.svix_service")
-    @patch("app.integrations.celery.tasks.emit_webhook_event_task.developer_service")
+    @patch("app.services.outgoing_webhooks.app_registry._developers")
     def test_sends_to_all_developers(
         self,
-        mock_dev_service: MagicMock,
+        mock_developers: MagicMock,
         mock_svix: MagicMock,
+        mock_registry_svix: MagicMock,
     ) -> None:
         dev1 = MagicMock(id=uuid4(), email="dev1@test.com")
         dev2 = MagicMock(id=uuid4(), email="dev2@test.com")
-        mock_dev_service.crud.get_all.return_value = [dev1, dev2]
+        mock_developers.get_all.return_value = [dev1, dev2]
         mock_svix.send.return_value = MagicMock(id="msg_123")
 
         result = emit_webhook_event(
@@ -320,9 +441,109 @@ class TestEmitWebhookEventTask:
         )
 
         assert result["sent"] == 2
-        assert mock_svix.ensure_application.call_count == 2
+        assert mock_registry_svix.ensure_application.call_count == 2
         assert mock_svix.send.call_count == 2
 
+    @patch("app.services.outgoing_webhooks.app_registry.svix_service")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.svix_service")
+    @patch("app.services.outgoing_webhooks.app_registry._developers")
+    def test_later_events_reuse_resolved_applications(
+        self,
+        mock_developers: MagicMock,
+        mock_svix: MagicMock,
+        mock_registry_svix: MagicMock,
+    ) -> None:
+        mock_developers.get_all.return_value = [MagicMock(id=uuid4(), email="dev1@test.com")]
+        mock_svix.send.return_value = MagicMock(id="msg_123")
+
+        for _ in range(3):
+            assert emit_webhook_event("workout.created", {"type": "workout.created", "data": {}})["sent"] == 1
+
+        mock_developers.get_all.assert_called_once()
+        mock_registry_svix.ensure_application.assert_called_once()
+        assert mock_svix.send.call_count == 3
+
+
+class TestEmitWebhookEventsTask:
+    @staticmethod
+    def _event(*event_types: str) -> dict[str, Any]:
+        return {
+            "event_types": list(event_types),
+            "data": {"user_id": "u1"},
+            "idempotency_keys": [f"key.{event_type}" for event_type in event_types],
+            "channels": ["user.u1"],
+        }
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.app_registry")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.svix_service")
+    def test_sends_every_type_to_every_app(self, mock_svix: MagicMock, mock_registry: MagicMock) -> None:
+        mock_registry.cached_apps.return_value = {"app1": [], "app2": []}
+        mock_svix.send.return_value = MagicMock(id="msg_123")
+
+        result = emit_webhook_events([self._event("heart_rate.created", "series.heart_rate.created")])
+
+        assert result == {"events": 1, "sent": 4, "errors": []}
+        sent = {(c.args[0], c.args[1], c.kwargs["idempotency_key"]) for c in mock_svix.send.call_args_list}
+        assert sent == {
+            ("heart_rate.created", "app1", "key.heart_rate.created"),
+            ("heart_rate.created", "app2", "key.heart_rate.created"),
+            ("series.heart_rate.created", "app1", "key.series.heart_rate.created"),
+            ("series.heart_rate.created", "app2", "key.series.heart_rate.created"),
+        }
+        payload = mock_svix.send.call_args_list[0].args[2]
+        assert payload == {"type": payload["type"], "data": {"user_id": "u1"}}
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.app_registry")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.svix_service")
+    def test_retries_only_failed_events(self, mock_svix: MagicMock, mock_registry: MagicMock) -> None:
+        mock_registry.cached_apps.return_value = {"app1": []}
+        mock_svix.send.side_effect = lambda event_type, *args, **kwargs: (
+            None if event_type == "sleep.created" else MagicMock()
+        )
+        ok, failing = self._event("workout.created"), self._event("sleep.created")
+
+        with (
+            patch.object(emit_webhook_events, "retry", side_effect=RuntimeError("retry")) as mock_retry,
+            pytest.raises(RuntimeError, match="retry"),
+        ):
+            emit_webhook_events([ok, failing])
+
+        assert mock_retry.call_args.kwargs["args"] == ([failing],)
+        mock_registry.forget.assert_called_once_with("app1")
+
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.app_registry")
+    @patch("app.integrations.celery.tasks.emit_webhook_event_task.svix_service")
+    def test_timeseries_events_are_sent_in_each_payload_mode(
+        self, mock_svix: MagicMock, mock_registry: MagicMock
+    ) -> None:
+        mock_registry.cached_apps.return_value = {"app1": ["columnar"], "app2": []}
+        mock_svix.send.return_value = MagicMock(id="msg_123")
+        event = self._event("heart_rate.created")
+        event["data"] = {
+            "user_id": str(uuid4()),
+            "provider": "garmin",
+            "series_type": "heart_rate",
+            "sample_count": 0,
+            "start_time": None,
+            "end_time": None,
+            "samples": [],
+        }
+
+        result = emit_webhook_events([event, self._event("workout.created")])
+
+        assert result["sent"] == 5
+        sent = {
+            (c.args[0], c.args[1], c.kwargs["payload_mode"], c.kwargs["idempotency_key"])
+            for c in mock_svix.send.call_args_list
+        }
+        assert sent == {
+            ("heart_rate.created", "app1", WebhookPayloadMode.FULL, "key.heart_rate.created"),
+            ("heart_rate.created", "app1", WebhookPayloadMode.COLUMNAR, "key.heart_rate.created.columnar"),
+            ("heart_rate.created", "app2", WebhookPayloadMode.FULL, "key.heart_rate.created"),
+            ("workout.created", "app1", None, "key.workout.created"),
+            ("workout.created", "app2", None, "key.workout.created"),
+        }
+
 
 # ---------------------------------------------------------------------------
 # Outgoing webhooks API (#722-726)
@@ -343,6 +564,7 @@ class TestOutgoingWebhooksAPI:
             m.is_enabled.return_value = True
             m.ensure_application.return_value = "app_uid_123"
             m.user_id_from_endpoint.return_value = None
+            m.payload_mode_from_endpoint.return_value = WebhookPayloadMode.FULL
             yield m
 
     def test_list_event_types(self, client: TestClient) -> None:
@@ -377,6 +599,28 @@ class TestOutgoingWebhooksAPI:
         assert data["id"] == "ep_123"
         assert data["url"] == "https://example.com/wh"
 
+    def test_create_endpoint_with_payload_mode(
+        self,
+        client: TestClient,
+        db: Session,
+        mock_svix: MagicMock,
+    ) -> None:
+        token = create_access_token(DeveloperFactory().id)
+        mock_svix.create_endpoint.return_value = MagicMock(
+            id="ep_123", url="https://example.com/wh", description="", filter_types=None
+        )
+        mock_svix.payload_mode_from_endpoint.return_value = WebhookPayloadMode.COLUMNAR
+
+        resp = client.post(
+            "/api/v1/webhooks/endpoints",
+            json={"url": "https://example.com/wh", "payload_mode": "columnar"},
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        assert resp.status_code == 201
+        assert resp.json()["payload_mode"] == "columnar"
+        assert mock_svix.create_endpoint.call_args.kwargs["payload_mode"] == WebhookPayloadMode.COLUMNAR
+
     def test_list_endpoints(
         self,
         client: TestClient,
@@ -478,3 +722,37 @@ class TestOutgoingWebhooksAPI:
             headers={"Authorization": f"Bearer {token}"},
         )
         assert resp.status_code == 503
+
+
+class TestTimeseriesFetchAPI:
+    def test_invalid_token_is_rejected(self, client: TestClient, db: Session) -> None:
+        resp = client.get(f"/api/v1/users/{uuid4()}/timeseries/fetch", params={"token": "forged"})
+
+        assert resp.status_code == 401
+
+    def test_returns_only_the_announced_provider(self, client: TestClient, db: Session) -> None:
+        user = UserFactory()
+        series_type = SeriesTypeDefinitionFactory.get_or_create_heart_rate()
+        garmin = DataSourceFactory(user=user, provider=ProviderName.GARMIN, source="garmin")
+        oura = DataSourceFactory(user=user, provider=ProviderName.OURA, source="oura")
+        start = datetime(2026, 4, 16, 6, tzinfo=timezone.utc)
+        for minute in range(3):
+            recorded_at = start + timedelta(minutes=minute)
+            DataPointSeriesFactory(data_source=garmin, series_type=series_type, recorded_at=recorded_at, value=60)
+            DataPointSeriesFactory(data_source=oura, series_type=series_type, recorded_at=recorded_at, value=50)
+        url = payload_modes.fetch_url(
+            user.id,
+            "garmin",
+            "heart_rate",
+            start.isoformat(),
+            (start + timedelta(minutes=2)).isoformat(),
+            datetime.now(timezone.utc) + timedelta(hours=1),
+        )
+
+        resp = client.get(url.removeprefix(settings.api_base_url))
+
+        assert resp.status_code == 200
+        samples = resp.json()["data"]
+        assert len(samples) == 3
+        assert {sample["source"]["provider"] for sample in samples} == {"garmin"}
+        assert {sample["value"] for sample in samples} == {60.0}
@@ -0,0 +1,64 @@
+"""Tests for 429 backpressure on the SDK sync endpoint."""
+
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from httpx import Response
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
+
+from app.services.sdk_admission import AdmissionDecision
+from app.services.sdk_token_service import create_sdk_user_token
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+BODY = {
+    "provider": "apple",
+    "sdkVersion": "1.0.0",
+    "syncTimestamp": "2021-01-01T00:00:00Z",
+    "data": {"records": [], "workouts": [], "sleep": []},
+}
+
+
+@pytest.fixture
+def mock_sdk_task() -> Generator[MagicMock, None, None]:
+    with patch("app.api.routes.v1.sdk_sync.process_sdk_upload") as mock:
+        mock.delay.return_value = None
+        yield mock
+
+
+def _post(client: TestClient, api_v1_prefix: str) -> Response:
+    token = create_sdk_user_token("app_123", USER_ID)
+    return client.post(
+        f"{api_v1_prefix}/sdk/users/{USER_ID}/sync",
+        headers={"Authorization": f"Bearer {token}"},
+        json=BODY,
+    )
+
+
+class TestSDKSyncAdmission:
+    def test_saturated_queue_returns_429_with_retry_after(
+        self, client: TestClient, db: Session, api_v1_prefix: str, mock_sdk_task: MagicMock
+    ) -> None:
+        rejected = AdmissionDecision(
+            admitted=False, reason="queue_saturated", retry_after_seconds=42, queue_depth=20_000
+        )
+        with patch("app.api.routes.v1.sdk_sync.check_admission", return_value=rejected):
+            response = _post(client, api_v1_prefix)
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "42"
+        assert response.json()["detail"]["retry_after_seconds"] == 42
+        mock_sdk_task.delay.assert_not_called()
+
+    def test_rejected_batch_is_accepted_on_retry(
+        self, client: TestClient, db: Session, api_v1_prefix: str, mock_sdk_task: MagicMock
+    ) -> None:
+        """A throttled batch must not be deduplicated when the SDK resends it."""
+        rejected = AdmissionDecision(admitted=False, reason="queue_saturated", retry_after_seconds=1)
+        with patch("app.api.routes.v1.sdk_sync.check_admission", return_value=rejected):
+            assert _post(client, api_v1_prefix).status_code == 429
+
+        assert _post(client, api_v1_prefix).status_code == 202
+        mock_sdk_task.delay.assert_called_once()
+        assert "enqueued_at" in mock_sdk_task.delay.call_args.kwargs
@@ -0,0 +1,68 @@
+"""Tests for duplicate SDK batch suppression on the sync endpoint."""
+
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy.orm import Session
+from starlette.testclient import TestClient
+
+from app.services.sdk_token_service import create_sdk_user_token
+
+USER_ID = "123e4567-e89b-12d3-a456-426614174000"
+
+
+@pytest.fixture
+def mock_sdk_task() -> Generator[MagicMock, None, None]:
+    with patch("app.api.routes.v1.sdk_sync.process_sdk_upload") as mock:
+        mock.delay.return_value = None
+        yield mock
+
+
+def _post(client: TestClient, api_v1_prefix: str, body: dict) -> int:
+    token = create_sdk_user_token("app_123", USER_ID)
+    response = client.post(
+        f"{api_v1_prefix}/sdk/users/{USER_ID}/sync",
+        headers={"Authorization": f"Bearer {token}"},
+        json=body,
+    )
+    return response.status_code
+
+
+def _body(value: int) -> dict:
+    return {
+        "provider": "apple",
+        "sdkVersion": "1.0.0",
+        "syncTimestamp": "2021-01-01T00:00:00Z",
+        "data": {"records": [{"type": "HKQuantityTypeIdentifierStepCount", "value": value}]},
+    }
+
+
+class TestSDKSyncDeduplication:
+    def test_identical_batch_is_acked_without_enqueueing(
+        self, client: TestClient, db: Session, api_v1_prefix: str, mock_sdk_task: MagicMock
+    ) -> None:
+        assert _post(client, api_v1_prefix, _body(10)) == 202
+        assert _post(client, api_v1_prefix, _body(10)) == 202
+
+        assert mock_sdk_task.delay.call_count == 1
+        assert mock_sdk_task.delay.call_args.kwargs["payload_digest"]
+
+    def test_different_batches_are_both_enqueued(
+        self, client: TestClient, db: Session, api_v1_prefix: str, mock_sdk_task: MagicMock
+    ) -> None:
+        assert _post(client, api_v1_prefix, _body(10)) == 202
+        assert _post(client, api_v1_prefix, _body(11)) == 202
+
+        assert mock_sdk_task.delay.call_count == 2
+
+    def test_failed_enqueue_releases_claim(
+        self, client: TestClient, db: Session, api_v1_prefix: str, mock_sdk_task: MagicMock
+    ) -> None:
+        mock_sdk_task.delay.side_effect = [ConnectionError("broker down"), None]
+
+        with pytest.raises(ConnectionError):
+            _post(client, api_v1_prefix, _body(10))
+        assert _post(client, api_v1_prefix, _body(10)) == 202
+
+        assert mock_sdk_task.delay.call_count == 2
@@ -24,10 +24,11 @@ from testcontainers.redis import RedisContainer
 
 from app.config import settings
 from app.database import BaseDbModel, _get_db_dependency
-from app.integrations.redis_client import get_redis_client
+from app.integrations.redis_client import get_binary_redis_client, get_redis_client
 from app.main import api
 from app.models import SeriesTypeDefinition
 from app.schemas.enums import SERIES_TYPE_DEFINITIONS
+from app.services.providers.token_refresh import clear_token_cache
 from tests import factories
 
 # Set test environment before importing app modules
@@ -200,9 +201,19 @@ def flush_redis(_redis_url: str) -> Generator[None, None, None]:
     """Flush Redis state before each test to ensure isolation."""
     redis_lib.from_url(_redis_url).flushdb()
     get_redis_client.cache_clear()
+    get_binary_redis_client.cache_clear()
     yield
     redis_lib.from_url(_redis_url).flushdb()
     get_redis_client.cache_clear()
+    get_binary_redis_client.cache_clear()
+
+
+@pytest.fixture(autouse=True)
+def clear_provider_token_cache() -> Generator[None, None, None]:
+    """Keep access tokens cached by one test from short-circuiting connection lookups in the next."""
+    clear_token_cache()
+    yield
+    clear_token_cache()
 
 
 # ============================================================================
@@ -260,6 +271,8 @@ def mock_celery_tasks(monkeypatch: pytest.MonkeyPatch) -> Generator[MagicMock, N
         patch("celery.current_app") as mock_celery,
         # Prevent webhook handler from dispatching the backfill Celery task
         patch("app.services.providers.garmin.webhook_handler.celery_app", mock_handler_celery),
+        # Fast-ack webhook handling enqueues process_webhook_body from the base handler
+        patch("app.services.providers.templates.base_webhook_handler.celery_app", mock_handler_celery),
     ):
         # Configure Celery to use in-memory broker and result backend
         # We Mock the conf object to return our test settings
@@ -4,10 +4,21 @@ Provider-specific test fixtures.
 These fixtures provide mock data and utilities for testing provider integrations.
 """
 
+from collections.abc import Generator
 from unittest.mock import MagicMock
 
 import pytest
 
+from app.services.providers.api_client import close_http_clients
+
+
+@pytest.fixture(autouse=True)
+def fresh_http_clients() -> Generator[None, None, None]:
+    """Keep pooled provider clients (possibly mocked) from leaking between tests."""
+    close_http_clients()
+    yield
+    close_http_clients()
+
 
 @pytest.fixture
 def mock_httpx_response() -> MagicMock:
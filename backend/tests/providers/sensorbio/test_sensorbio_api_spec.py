@@ -298,7 +298,7 @@ def test_data_247_make_api_request_uses_http2(data_247: SensorBio247Data) -> Non
 
 
 def test_api_client_http2_flag_forwarded() -> None:
-    """make_authenticated_request must forward http2 to the httpx.Client."""
+    """make_authenticated_request must forward http2 to the pooled httpx.Client."""
     client_req = make_authenticated_request
 
     mock_repo = MagicMock()
@@ -331,4 +331,5 @@ def test_api_client_http2_flag_forwarded() -> None:
             http2=True,
         )
 
-    mock_client_cls.assert_called_once_with(http2=True)
+    mock_client_cls.assert_called_once()
+    assert mock_client_cls.call_args.kwargs["http2"] is True
@@ -350,3 +350,27 @@ class TestIngestionWiring:
 
         mock_ts.bulk_create_samples.assert_not_called()
         assert count == 0
+
+
+class TestLoadDataBatching:
+    """Historical backfill saves all activities with one bulk insert."""
+
+    def test_activities_saved_in_one_batch(self, strava_workouts: StravaWorkouts) -> None:
+        db = MagicMock()
+        second = _SAMPLE_ACTIVITY.model_copy(update={"id": 98766, "start_date": "2024-01-16T08:00:00Z"})
+
+        with (
+            patch.object(strava_workouts, "get_workouts", return_value=[_SAMPLE_ACTIVITY, second]),
+            patch.object(strava_workouts, "_ingest_workout_streams") as mock_streams,
+            patch("app.services.providers.strava.workouts.event_record_service") as mock_service,
+        ):
+            mock_service.bulk_create_with_details.side_effect = lambda _db, pairs, **_: [pairs[0][0].id]
+            count = strava_workouts.load_data(db, uuid4())
+
+        mock_service.bulk_create_with_details.assert_called_once()
+        pairs = mock_service.bulk_create_with_details.call_args.args[1]
+        assert [record.external_id for record, _ in pairs] == ["98765", "98766"]
+        assert all(detail.record_id == record.id for record, detail in pairs)
+        mock_service.create.assert_not_called()
+        assert count == 1  # only newly inserted workouts count
+        assert mock_streams.call_count == 2
@@ -203,6 +203,8 @@ class TestSuuntoSleepSyncStats:
 
     def test_load_and_save_all_surfaces_skipped_count(self, data_247: Suunto247Data) -> None:
         with (
+            patch.object(data_247, "get_sleep_data", return_value=[]),
+            patch.object(data_247, "get_recovery_data", return_value=[]),
             patch.object(data_247, "load_and_save_sleep", return_value=(2, 3)),
             patch.object(data_247, "load_and_save_recovery", return_value=0),
             patch.object(data_247, "get_activity_samples", return_value=[]),
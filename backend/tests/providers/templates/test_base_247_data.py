@@ -0,0 +1,237 @@
+"""Tests for the concurrent fetch phase shared by 247 data providers."""
+
+import threading
+import time
+from collections.abc import Generator
+from datetime import datetime
+from functools import partial
+from typing import Any
+from unittest.mock import MagicMock, patch
+from uuid import UUID, uuid4
+
+import pytest
+
+from app.config import settings
+from app.services.providers import api_client
+from app.services.providers.templates import base_247_data
+from app.services.providers.templates.base_247_data import Base247DataTemplate
+
+
+class _Data247(Base247DataTemplate):
+    def get_sleep_data(self, db: Any, user_id: UUID, start_time: datetime, end_time: datetime) -> list:
+        return []
+
+    def normalize_sleep(self, raw_sleep: dict, user_id: UUID) -> dict:
+        return {}
+
+    def get_recovery_data(self, db: Any, user_id: UUID, start_time: datetime, end_time: datetime) -> list:
+        return []
+
+    def normalize_recovery(self, raw_recovery: dict, user_id: UUID) -> dict:
+        return {}
+
+    def get_activity_samples(self, db: Any, user_id: UUID, start_time: datetime, end_time: datetime) -> list:
+        return []
+
+    def normalize_activity_samples(self, raw_samples: list, user_id: UUID) -> dict:
+        return {}
+
+    def get_daily_activity_statistics(self, db: Any, user_id: UUID, start_date: datetime, end_date: datetime) -> list:
+        return []
+
+    def normalize_daily_activity(self, raw_stats: dict, user_id: UUID) -> dict:
+        return {}
+
+
+@pytest.fixture
+def data_247() -> _Data247:
+    return _Data247("oura", "https://api.example.com", MagicMock())
+
+
+@pytest.fixture
+def connection_repo() -> Generator[MagicMock, None, None]:
+    repo = MagicMock()
+    repo.get_by_user_and_provider.return_value = MagicMock(
+        access_token="tok", refresh_token=None, token_expires_at=None
+    )
+    with patch.object(base_247_data, "UserConnectionRepository", return_value=repo):
+        yield repo
+
+
+class TestFetchConcurrently:
+    def test_fetches_run_in_parallel(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        barrier = threading.Barrier(3, timeout=5)
+
+        def fetch(value: int) -> int:
+            barrier.wait()  # only passes when all three fetches are in flight at once
+            return value
+
+        with patch.object(settings, "provider_fetch_concurrency", 4):
+            results = data_247.fetch_concurrently(
+                MagicMock(), uuid4(), {"a": lambda: fetch(1), "b": lambda: fetch(2), "c": lambda: fetch(3)}
+            )
+
+        assert results == {"a": 1, "b": 2, "c": 3}
+
+    def test_failed_fetch_is_returned_not_raised(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        def broken() -> list:
+            raise RuntimeError("502 from provider")
+
+        results = data_247.fetch_concurrently(MagicMock(), uuid4(), {"ok": lambda: [1], "broken": broken})
+
+        assert results["ok"] == [1]
+        assert isinstance(results["broken"], RuntimeError)
+        with pytest.raises(RuntimeError, match="502"):
+            data_247.fetch_result(results["broken"])
+
+    def test_workers_use_pinned_token_without_db(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        user_id = uuid4()
+        worker_repo = MagicMock()
+
+        def fetch() -> str:
+            return api_client._get_valid_token(MagicMock(), user_id, "oura", worker_repo, MagicMock())
+
+        results = data_247.fetch_concurrently(MagicMock(), user_id, {"a": fetch, "b": fetch})
+
+        assert results == {"a": "tok", "b": "tok"}
+        connection_repo.get_by_user_and_provider.assert_called_once()
+        worker_repo.get_by_user_and_provider.assert_not_called()
+
+    def test_unresolvable_token_falls_back_to_serial(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        connection_repo.get_by_user_and_provider.return_value = None
+        threads: list[str] = []
+
+        def fetch() -> None:
+            threads.append(threading.current_thread().name)
+
+        data_247.fetch_concurrently(MagicMock(), uuid4(), {"a": fetch, "b": fetch})
+
+        assert threads == [threading.current_thread().name] * 2
+
+    def test_provider_cap_of_one_fetches_serially(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        data_247.fetch_concurrency = 1
+        threads: list[str] = []
+
+        def fetch() -> None:
+            threads.append(threading.current_thread().name)
+
+        data_247.fetch_concurrently(MagicMock(), uuid4(), {"a": fetch, "b": fetch})
+
+        assert threads == [threading.current_thread().name] * 2
+        connection_repo.get_by_user_and_provider.assert_not_called()
+
+
+class TestFetchWindows:
+    def test_results_are_in_window_order(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        def fetch(day: int) -> int:
+            time.sleep(0.01 * (5 - day))  # later windows finish first
+            return day * 10
+
+        with patch.object(settings, "provider_fetch_concurrency", 4):
+            results = data_247.fetch_windows(MagicMock(), uuid4(), [1, 2, 3, 4], fetch)
+
+        assert results == [10, 20, 30, 40]
+
+    def test_failed_windows_go_to_on_error_in_order(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        failed: list[tuple[int, str]] = []
+
+        def fetch(day: int) -> int:
+            if day % 2:
+                raise RuntimeError(f"day {day} failed")
+            return day
+
+        results = data_247.fetch_windows(
+            MagicMock(), uuid4(), [1, 2, 3, 4], fetch, on_error=lambda day, e: failed.append((day, str(e)))
+        )
+
+        assert results == [2, 4]
+        assert failed == [(1, "day 1 failed"), (3, "day 3 failed")]
+
+    def test_first_failure_is_raised_without_on_error(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        def fetch(day: int) -> int:
+            if day >= 2:
+                raise RuntimeError(f"day {day} failed")
+            return day
+
+        with pytest.raises(RuntimeError, match="day 2 failed"):
+            data_247.fetch_windows(MagicMock(), uuid4(), [1, 2, 3, 4], fetch)
+
+    def test_error_raised_by_on_error_drops_pending_windows(
+        self, data_247: _Data247, connection_repo: MagicMock
+    ) -> None:
+        fetched: list[int] = []
+
+        def fetch(day: int) -> int:
+            fetched.append(day)
+            if day == 1:
+                raise RuntimeError("401")
+            time.sleep(0.05)
+            return day
+
+        def on_error(day: int, e: Exception) -> None:
+            raise e
+
+        with patch.object(settings, "provider_fetch_concurrency", 2), pytest.raises(RuntimeError, match="401"):
+            data_247.fetch_windows(MagicMock(), uuid4(), list(range(1, 21)), fetch, on_error=on_error)
+
+        assert len(fetched) < 20
+
+    def test_serial_fetch_stops_at_first_failure(self, data_247: _Data247, connection_repo: MagicMock) -> None:
+        data_247.fetch_concurrency = 1
+        fetched: list[int] = []
+
+        def fetch(day: int) -> int:
+            fetched.append(day)
+            if day == 2:
+                raise RuntimeError("401")
+            return day
+
+        with pytest.raises(RuntimeError, match="401"):
+            data_247.fetch_windows(MagicMock(), uuid4(), [1, 2, 3], fetch)
+
+        assert fetched == [1, 2]
+
+
+class TestNestedFetches:
+    def test_nested_windows_run_inline_on_the_outer_worker(
+        self, data_247: _Data247, connection_repo: MagicMock
+    ) -> None:
+        lock = threading.Lock()
+        in_flight = peak = 0
+        inner_threads: dict[str, set[str]] = {}
+
+        def fetch_window(name: str, window: int) -> int:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+                inner_threads.setdefault(name, set()).add(threading.current_thread().name)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return window
+
+        def chunked(name: str) -> list[int]:
+            return data_247.fetch_windows(MagicMock(), uuid4(), [1, 2, 3, 4], lambda w: fetch_window(name, w))
+
+        with patch.object(settings, "provider_fetch_concurrency", 2):
+            results = data_247.fetch_concurrently(
+                MagicMock(), uuid4(), {name: partial(chunked, name) for name in ("a", "b", "c")}
+            )
+
+        assert results == {"a": [1, 2, 3, 4], "b": [1, 2, 3, 4], "c": [1, 2, 3, 4]}
+        assert peak <= 2
+        assert all(len(threads) == 1 for threads in inner_threads.values())
+
+    def test_pool_is_available_again_after_the_outer_fetch(
+        self, data_247: _Data247, connection_repo: MagicMock
+    ) -> None:
+        data_247.fetch_concurrently(MagicMock(), uuid4(), {"a": lambda: None, "b": lambda: None})
+        threads: list[str] = []
+
+        def fetch(window: int) -> None:
+            threads.append(threading.current_thread().name)
+
+        data_247.fetch_windows(MagicMock(), uuid4(), [1, 2], fetch)
+
+        assert threading.current_thread().name not in threads
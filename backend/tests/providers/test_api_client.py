@@ -0,0 +1,256 @@
+"""Tests for the pooled HTTP clients and rate limiting behind make_authenticated_request."""
+
+import os
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.services.providers import api_client, rate_limiter
+from app.services.providers.api_client import (
+    close_http_clients,
+    download_binary_content,
+    get_http_client,
+    make_authenticated_request,
+)
+from app.services.providers.rate_limiter import ProviderRateLimitedError, rate_limit_deferrals
+
+
+@pytest.fixture
+def connection_repo() -> MagicMock:
+    repo = MagicMock()
+    repo.get_by_user_and_provider.return_value = MagicMock(access_token="tok", token_expires_at=None)
+    return repo
+
+
+def _request(connection_repo: MagicMock, endpoint: str) -> dict:
+    return make_authenticated_request(
+        db=MagicMock(),
+        user_id=uuid4(),
+        connection_repo=connection_repo,
+        oauth=MagicMock(),
+        api_base_url="https://api.example.com",
+        provider_name="oura",
+        endpoint=endpoint,
+    )
+
+
+class TestHttpClientPool:
+    def test_client_is_reused_per_provider(self) -> None:
+        client = get_http_client("oura")
+
+        assert get_http_client("oura") is client
+        assert get_http_client("garmin") is not client
+        assert get_http_client("oura", http2=True) is not client
+
+    def test_closed_client_is_replaced(self) -> None:
+        client = get_http_client("oura")
+        close_http_clients()
+
+        assert client.is_closed
+        assert get_http_client("oura") is not client
+
+    def test_pool_uses_configured_limits(self) -> None:
+        close_http_clients()
+        with (
+            patch.object(api_client.settings, "provider_http_max_connections", 7),
+            patch.object(api_client.settings, "provider_http_timeout_seconds", 12.0),
+            patch.object(httpx, "Client") as mock_client_cls,
+        ):
+            get_http_client("oura")
+
+        kwargs = mock_client_cls.call_args.kwargs
+        assert kwargs["limits"].max_connections == 7
+        assert kwargs["timeout"] == 12.0
+
+    @pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork")
+    def test_forked_child_does_not_inherit_clients(self) -> None:
+        client = get_http_client("oura")
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover - runs in the child
+            os.write(write_fd, b"1" if get_http_client("oura") is not client else b"0")
+            os._exit(0)
+        os.waitpid(pid, 0)
+        os.close(write_fd)
+
+        assert os.read(read_fd, 1) == b"1"
+        assert not client.is_closed
+
+
+class TestPooledRequests:
+    def test_requests_share_one_client(self, connection_repo: MagicMock) -> None:
+        seen: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.url.path)
+            return httpx.Response(200, json={"ok": True})
+
+        transport_client = httpx.Client(transport=httpx.MockTransport(handler))
+        with (
+            patch.object(api_client, "get_http_client", return_value=transport_client) as mock_get_client,
+            patch.object(httpx, "Client") as mock_client_cls,
+        ):
+            assert _request(connection_repo, "/v2/usercollection/sleep") == {"ok": True}
+            assert _request(connection_repo, "/v2/usercollection/workout") == {"ok": True}
+
+        assert seen == ["/v2/usercollection/sleep", "/v2/usercollection/workout"]
+        assert mock_get_client.call_count == 2
+        mock_client_cls.assert_not_called()
+        assert not transport_client.is_closed
+
+    def test_binary_download_uses_pooled_client(self, connection_repo: MagicMock) -> None:
+        transport_client = httpx.Client(transport=httpx.MockTransport(lambda _: httpx.Response(200, content=b"FIT")))
+        with patch.object(api_client, "get_http_client", return_value=transport_client) as mock_get_client:
+            content = download_binary_content(
+                MagicMock(), uuid4(), connection_repo, MagicMock(), "garmin", "https://api.example.com/file"
+            )
+
+        assert content == b"FIT"
+        mock_get_client.assert_called_once_with("garmin")
+
+
+class TestRateLimitedRequests:
+    @staticmethod
+    def _client(*responses: httpx.Response) -> tuple[httpx.Client, list[str]]:
+        seen: list[str] = []
+        queue = list(responses)
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.url.path)
+            return queue.pop(0)
+
+        return httpx.Client(transport=httpx.MockTransport(handler)), seen
+
+    def test_short_retry_after_defers_instead_of_sleeping(self, connection_repo: MagicMock) -> None:
+        client, seen = self._client(httpx.Response(429, headers={"Retry-After": "1"}))
+        with (
+            patch.object(api_client, "get_http_client", return_value=client),
+            patch.object(api_client.settings, "provider_rate_limit_max_wait_seconds", 5.0),
+            rate_limit_deferrals() as deferred,
+            pytest.raises(ProviderRateLimitedError),
+        ):
+            _request(connection_repo, "/v2/usercollection/sleep")
+
+        assert len(seen) == 1
+        assert deferred == {"oura": 1.0}
+
+    def test_long_retry_after_defers_instead_of_sleeping(self, connection_repo: MagicMock) -> None:
+        client, seen = self._client(httpx.Response(429, headers={"Retry-After": "120"}))
+        oauth = MagicMock()
+        user_id = uuid4()
+        with (
+            patch.object(api_client, "get_http_client", return_value=client),
+            patch.object(rate_limiter.time, "sleep") as mock_sleep,
+            rate_limit_deferrals() as deferred,
+        ):
+            with pytest.raises(ProviderRateLimitedError) as exc_info:
+                make_authenticated_request(
+                    MagicMock(), user_id, connection_repo, oauth, "https://api.example.com", "polar", "/v3/a"
+                )
+            # The back-off is shared: the next request is deferred without reaching the provider.
+            with pytest.raises(ProviderRateLimitedError):
+                make_authenticated_request(
+                    MagicMock(), user_id, connection_repo, oauth, "https://api.example.com", "polar", "/v3/b"
+                )
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.retry_after == 120
+        assert seen == ["/v3/a"]
+        assert 119 < deferred["polar"] <= 120
+        mock_sleep.assert_not_called()
+
+    def test_exhausted_window_blocks_next_request(self, connection_repo: MagicMock) -> None:
+        client, seen = self._client(
+            httpx.Response(200, json={"ok": True}, headers={"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "60"})
+        )
+        oauth = MagicMock()
+        user_id = uuid4()
+        with patch.object(api_client, "get_http_client", return_value=client):
+            assert make_authenticated_request(
+                MagicMock(), user_id, connection_repo, oauth, "https://api.example.com", "polar", "/v3/a"
+            ) == {"ok": True}
+            with pytest.raises(ProviderRateLimitedError):
+                make_authenticated_request(
+                    MagicMock(), user_id, connection_repo, oauth, "https://api.example.com", "polar", "/v3/b"
+                )
+
+        assert seen == ["/v3/a"]
+
+
+class TestTokenCache:
+    @staticmethod
+    def _repo(user_id: object) -> MagicMock:
+        repo = MagicMock()
+        repo.get_by_user_and_provider.return_value = MagicMock(
+            user_id=user_id, provider="polar", access_token="tok", token_expires_at=None
+        )
+        return repo
+
+    def test_paginated_requests_look_connection_up_once(self) -> None:
+        user_id = uuid4()
+        repo = self._repo(user_id)
+        client = httpx.Client(transport=httpx.MockTransport(lambda _: httpx.Response(200, json={"ok": True})))
+        with patch.object(api_client, "get_http_client", return_value=client):
+            for page in range(5):
+                make_authenticated_request(
+                    MagicMock(), user_id, repo, MagicMock(), "https://api.example.com", "polar", f"/v3/{page}"
+                )
+
+        repo.get_by_user_and_provider.assert_called_once()
+
+    def test_rejected_token_is_not_reused(self) -> None:
+        user_id = uuid4()
+        repo = self._repo(user_id)
+        client = httpx.Client(transport=httpx.MockTransport(lambda _: httpx.Response(401, text="expired")))
+        with patch.object(api_client, "get_http_client", return_value=client):
+            for _ in range(2):
+                with pytest.raises(HTTPException):
+                    make_authenticated_request(
+                        MagicMock(), user_id, repo, MagicMock(), "https://api.example.com", "polar", "/v3/a"
+                    )
+
+        # Each call retries the lookup once; the token did not change, so no second request is sent.
+        assert repo.get_by_user_and_provider.call_count == 4
+
+    def test_rotated_token_is_retried_once(self) -> None:
+        user_id = uuid4()
+        repo = self._repo(user_id)
+        repo.get_by_user_and_provider.side_effect = [
+            MagicMock(user_id=user_id, provider="polar", access_token=token, token_expires_at=None)
+            for token in ("stale", "rotated")
+        ]
+        seen: list[str] = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            seen.append(request.headers["Authorization"])
+            if request.headers["Authorization"] == "Bearer stale":
+                return httpx.Response(401, text="expired")
+            return httpx.Response(200, json={"ok": True})
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        with patch.object(api_client, "get_http_client", return_value=client):
+            assert make_authenticated_request(
+                MagicMock(), user_id, repo, MagicMock(), "https://api.example.com", "polar", "/v3/a"
+            ) == {"ok": True}
+
+        assert seen == ["Bearer stale", "Bearer rotated"]
+
+    def test_binary_download_retries_rotated_token(self) -> None:
+        user_id = uuid4()
+        repo = self._repo(user_id)
+        repo.get_by_user_and_provider.side_effect = [
+            MagicMock(user_id=user_id, provider="garmin", access_token=token, token_expires_at=None)
+            for token in ("stale", "rotated")
+        ]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.headers["Authorization"] == "Bearer stale":
+                return httpx.Response(401)
+            return httpx.Response(200, content=b"FIT")
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        with patch.object(api_client, "get_http_client", return_value=client):
+            assert download_binary_content(MagicMock(), user_id, repo, MagicMock(), "garmin", "https://x/f") == b"FIT"
@@ -0,0 +1,139 @@
+"""Tests for the shared provider API rate limiter."""
+
+import time
+from email.utils import formatdate
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.services.providers import rate_limiter
+from app.services.providers.rate_limiter import (
+    PROVIDER_RATE_LIMITS,
+    ProviderRateLimitedError,
+    RateLimit,
+    acquire,
+    block,
+    exhausted_for,
+    rate_limit_deferrals,
+    rate_limit_scope,
+    rate_limited,
+    retry_after_from_headers,
+    wait_for_budget,
+)
+
+
+class TestRateLimitScope:
+    def test_app_wide_limit_is_shared_by_users(self) -> None:
+        assert rate_limit_scope("strava", "client", uuid4()) == rate_limit_scope("strava", "client", uuid4())
+
+    def test_per_user_limit_is_scoped_to_user(self) -> None:
+        assert rate_limit_scope("oura", "client", uuid4()) != rate_limit_scope("oura", "client", uuid4())
+
+    def test_apps_have_separate_budgets(self) -> None:
+        assert rate_limit_scope("strava", "app-a", uuid4()) != rate_limit_scope("strava", "app-b", uuid4())
+
+
+class TestAcquire:
+    def test_budget_is_spent_then_waits(self) -> None:
+        with patch.dict(PROVIDER_RATE_LIMITS, {"strava": RateLimit(3, 60)}):
+            waits = [acquire("strava", "provider_rate:strava:test") for _ in range(4)]
+
+        assert waits[:3] == [0, 0, 0]
+        assert 0 < waits[3] <= 20
+
+    def test_unlimited_provider_is_never_throttled(self) -> None:
+        assert all(acquire("polar", "provider_rate:polar:test") == 0 for _ in range(50))
+
+    def test_block_applies_to_unlimited_provider(self) -> None:
+        block("provider_rate:polar:test", 30)
+
+        assert 29 < acquire("polar", "provider_rate:polar:test") <= 30
+
+    def test_shorter_block_does_not_shorten_longer_one(self) -> None:
+        block("provider_rate:polar:test", 30)
+        block("provider_rate:polar:test", 1)
+
+        assert acquire("polar", "provider_rate:polar:test") > 29
+
+    def test_block_expires(self) -> None:
+        block("provider_rate:polar:test", 0.05)
+        time.sleep(0.1)
+
+        assert get_redis_client().exists("provider_rate:polar:test:blocked") == 0
+
+    def test_disabled_limiter_lets_everything_through(self) -> None:
+        block("provider_rate:polar:test", 30)
+        with patch.object(settings, "provider_rate_limit_enabled", False):
+            assert acquire("polar", "provider_rate:polar:test") == 0
+
+    def test_fails_open_when_redis_is_down(self) -> None:
+        broken = MagicMock()
+        broken.eval.side_effect = ConnectionError("redis down")
+        with patch.object(rate_limiter, "get_redis_client", return_value=broken):
+            assert acquire("strava", "provider_rate:strava:test") == 0
+
+
+class TestWaitForBudget:
+    def test_short_wait_is_slept(self) -> None:
+        with patch.object(rate_limiter, "acquire", side_effect=[0.5, 0]), patch.object(time, "sleep") as mock_sleep:
+            wait_for_budget("strava", "scope")
+
+        mock_sleep.assert_called_once_with(0.5)
+
+    def test_long_wait_raises(self) -> None:
+        block("provider_rate:polar:test", 60)
+
+        with pytest.raises(ProviderRateLimitedError) as exc_info:
+            wait_for_budget("polar", "provider_rate:polar:test")
+
+        assert exc_info.value.status_code == 429
+        assert 59 < exc_info.value.retry_after <= 60
+
+
+class TestDeferrals:
+    def test_rate_limits_in_context_are_collected(self) -> None:
+        with rate_limit_deferrals() as deferred:
+            rate_limited("garmin", 30)
+            rate_limited("garmin", 10)
+            rate_limited("oura", 5)
+
+        assert deferred == {"garmin": 30, "oura": 5}
+
+    def test_outside_context_nothing_is_collected(self) -> None:
+        with rate_limit_deferrals() as deferred:
+            pass
+        rate_limited("garmin", 30)
+
+        assert deferred == {}
+
+
+class TestHeaders:
+    def test_retry_after_seconds(self) -> None:
+        assert retry_after_from_headers({"retry-after": "42"}) == 42
+
+    def test_retry_after_http_date(self) -> None:
+        seconds = retry_after_from_headers({"retry-after": formatdate(time.time() + 120, usegmt=True)})
+
+        assert seconds is not None
+        assert 110 < seconds <= 120
+
+    def test_reset_epoch_timestamp(self) -> None:
+        seconds = retry_after_from_headers({"x-ratelimit-reset": str(int(time.time()) + 60)})
+
+        assert seconds is not None
+        assert 55 < seconds <= 60
+
+    def test_no_hint(self) -> None:
+        assert retry_after_from_headers({}) is None
+
+    def test_exhausted_window(self) -> None:
+        assert exhausted_for({"x-ratelimit-remaining": "0", "x-ratelimit-reset": "25"}) == 25
+
+    def test_remaining_budget_is_not_exhausted(self) -> None:
+        assert exhausted_for({"x-ratelimit-remaining": "7", "x-ratelimit-reset": "25"}) is None
+
+    def test_any_exhausted_window_counts(self) -> None:
+        assert exhausted_for({"x-ratelimit-remaining": "12,0", "x-ratelimit-reset": "40"}) == 40
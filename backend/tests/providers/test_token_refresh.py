@@ -0,0 +1,194 @@
+"""Tests for single-flight OAuth token refresh and the in-process token cache."""
+
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.schemas.auth import ConnectionStatus
+from app.services.providers import token_refresh
+from app.services.providers.token_refresh import (
+    cache_token,
+    cached_token,
+    invalidate_token,
+    needs_refresh,
+    refresh_single_flight,
+    revoke_cached_token,
+)
+
+
+def _connection(expires_in: timedelta = timedelta(minutes=1)) -> MagicMock:
+    connection = MagicMock()
+    connection.provider = "whoop"
+    connection.user_id = uuid4()
+    connection.access_token = "old-access"
+    connection.refresh_token = "old-refresh"
+    connection.status = ConnectionStatus.ACTIVE
+    connection.token_expires_at = datetime.now(timezone.utc) + expires_in
+    return connection
+
+
+def _renew(connection: MagicMock) -> None:
+    connection.access_token = "new-access"
+    connection.token_expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+
+def _oauth(connection: MagicMock) -> MagicMock:
+    oauth = MagicMock()
+
+    def refresh(db: MagicMock, user_id: object, refresh_token: str) -> MagicMock:
+        _renew(connection)
+        return MagicMock(access_token="new-access")
+
+    oauth.refresh_access_token.side_effect = refresh
+    return oauth
+
+
+class TestNeedsRefresh:
+    def test_token_within_margin_needs_refresh(self) -> None:
+        assert needs_refresh(_connection(timedelta(minutes=1)))
+
+    def test_token_beyond_margin_is_valid(self) -> None:
+        assert not needs_refresh(_connection(timedelta(hours=1)))
+
+    def test_wider_margin(self) -> None:
+        assert needs_refresh(_connection(timedelta(minutes=20)), margin=timedelta(minutes=30))
+
+
+class TestTokenCache:
+    def test_valid_token_is_cached(self) -> None:
+        connection = _connection(timedelta(hours=1))
+        cache_token(connection)
+
+        assert cached_token(connection.user_id, "whoop") == "old-access"
+        assert cached_token(connection.user_id, "oura") is None
+
+    def test_entry_expires_after_ttl(self) -> None:
+        connection = _connection(timedelta(hours=1))
+        cache_token(connection)
+
+        with patch.object(token_refresh.time, "monotonic", return_value=time.monotonic() + 61):
+            assert cached_token(connection.user_id, "whoop") is None
+
+    def test_token_close_to_expiry_is_not_served(self) -> None:
+        connection = _connection(timedelta(minutes=1))
+        cache_token(connection)
+
+        assert cached_token(connection.user_id, "whoop") is None
+
+    def test_invalidate(self) -> None:
+        connection = _connection(timedelta(hours=1))
+        cache_token(connection)
+        invalidate_token(connection.user_id, "whoop")
+
+        assert cached_token(connection.user_id, "whoop") is None
+
+    def test_revoke_drops_tokens_cached_by_other_processes(self) -> None:
+        connection = _connection(timedelta(hours=1))
+        revoke_cached_token(connection.user_id, "whoop")
+        # Another process's entry, cached before the revoke reached it.
+        cache_token(connection)
+
+        assert cached_token(connection.user_id, "whoop") is None
+        assert get_redis_client().ttl(token_refresh._revoked_key(connection.user_id, "whoop")) > 0
+
+    def test_zero_ttl_disables_cache(self) -> None:
+        connection = _connection(timedelta(hours=1))
+        with patch.object(settings, "provider_token_cache_ttl_seconds", 0):
+            cache_token(connection)
+
+        assert cached_token(connection.user_id, "whoop") is None
+
+    def test_refresh_replaces_cached_token(self) -> None:
+        connection = _connection()
+        cache_token(connection)
+
+        refresh_single_flight(MagicMock(), connection, _oauth(connection))
+
+        assert cached_token(connection.user_id, "whoop") == "new-access"
+
+
+class TestRefreshSingleFlight:
+    def test_lock_holder_refreshes_and_releases(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+
+        assert refresh_single_flight(MagicMock(), connection, oauth) == "new-access"
+
+        oauth.refresh_access_token.assert_called_once()
+        assert get_redis_client().exists(token_refresh._lock_key(connection)) == 0
+
+    def test_token_renewed_before_lock_was_taken_is_reused(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+        db = MagicMock()
+        db.refresh.side_effect = _renew
+
+        assert refresh_single_flight(db, connection, oauth) == "new-access"
+
+        oauth.refresh_access_token.assert_not_called()
+
+    def test_waiter_uses_token_from_lock_holder(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+        key = token_refresh._lock_key(connection)
+        get_redis_client().set(key, "other-worker", ex=60)
+
+        def holder_finishes(seconds: float) -> None:
+            _renew(connection)
+            get_redis_client().delete(key)
+
+        with patch.object(token_refresh.time, "sleep", side_effect=holder_finishes) as mock_sleep:
+            assert refresh_single_flight(MagicMock(), connection, oauth) == "new-access"
+
+        mock_sleep.assert_called_once()
+        oauth.refresh_access_token.assert_not_called()
+
+    def test_waiter_refreshes_when_holder_gave_up(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+        key = token_refresh._lock_key(connection)
+        get_redis_client().set(key, "other-worker", ex=60)
+
+        with patch.object(token_refresh.time, "sleep", side_effect=lambda _: get_redis_client().delete(key)):
+            assert refresh_single_flight(MagicMock(), connection, oauth) == "new-access"
+
+        oauth.refresh_access_token.assert_called_once()
+
+    def test_times_out_while_lock_is_held(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+        get_redis_client().set(token_refresh._lock_key(connection), "other-worker", ex=60)
+
+        with patch.object(settings, "oauth_refresh_wait_seconds", 0), pytest.raises(HTTPException) as exc_info:
+            refresh_single_flight(MagicMock(), connection, oauth)
+
+        assert exc_info.value.status_code == 503
+        oauth.refresh_access_token.assert_not_called()
+
+    def test_revoked_connection_is_not_refreshed(self) -> None:
+        connection = _connection()
+        connection.status = ConnectionStatus.REVOKED
+        oauth = _oauth(connection)
+
+        with pytest.raises(HTTPException) as exc_info:
+            refresh_single_flight(MagicMock(), connection, oauth)
+
+        assert exc_info.value.status_code == 401
+        oauth.refresh_access_token.assert_not_called()
+
+    def test_refreshes_without_lock_when_redis_is_down(self) -> None:
+        connection = _connection()
+        oauth = _oauth(connection)
+        broken = MagicMock()
+        broken.set.side_effect = ConnectionError("redis down")
+
+        with patch.object(token_refresh, "get_redis_client", return_value=broken):
+            assert refresh_single_flight(MagicMock(), connection, oauth) == "new-access"
+
+        oauth.refresh_access_token.assert_called_once()
@@ -4,8 +4,15 @@ Tests for Ultrahuman 24/7 data implementation.
 Tests the Ultrahuman247Data class for sleep, recovery, and activity data handling.
 """
 
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.models import User
 from app.repositories.user_connection_repository import UserConnectionRepository
 from app.repositories.user_repository import UserRepository
@@ -254,3 +261,33 @@ class TestUltrahumanActivitySamples:
         assert normalized["hrv"][0]["value"] == 45
         assert normalized["temperature"][0]["value"] == 36.5
         assert normalized["steps"][0]["value"] == 8500
+
+
+class TestUltrahumanLoadAndSaveAll:
+    """Days are fetched in bounded batches so a fatal error stops the sync early."""
+
+    def test_fatal_error_stops_before_fetching_later_batches(self) -> None:
+        data_247 = Ultrahuman247Data(
+            provider_name="ultrahuman", api_base_url="https://partner.ultrahuman.com", oauth=MagicMock()
+        )
+        fetched: list[str] = []
+
+        def fetch_day(db: object, user_id: object, day: datetime) -> list:
+            fetched.append(day.strftime("%Y-%m-%d"))
+            if day.day == 2:
+                raise HTTPException(status_code=401, detail="Ultrahuman authorization expired")
+            return []
+
+        with (
+            patch.object(settings, "provider_fetch_concurrency", 2),
+            patch.object(data_247, "_fetch_daily_metrics", side_effect=fetch_day),
+            pytest.raises(HTTPException),
+        ):
+            data_247.load_and_save_all(
+                MagicMock(),
+                uuid4(),
+                start_time=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                end_time=datetime(2024, 1, 30, tzinfo=timezone.utc),
+            )
+
+        assert len(fetched) <= 4  # the first batch only, never the whole month
@@ -677,6 +677,30 @@ class TestDataPointSeriesRepository:
         assert (second.inserted, second.updated) == (0, 1)
         assert int(second) == 1
 
+    def test_bulk_create_skips_unchanged_rows(self, db: Session, series_repo: DataPointSeriesRepository) -> None:
+        """Re-upserting an identical sample (replayed batch) rewrites nothing and counts nothing."""
+        user = UserFactory()
+        ts = datetime(2099, 1, 1, tzinfo=timezone.utc)
+
+        def sample(value: int) -> TimeSeriesSampleCreate:
+            return TimeSeriesSampleCreate(
+                id=uuid4(),
+                user_id=user.id,
+                source="oura",
+                recorded_at=ts,
+                value=value,
+                series_type=SeriesType.steps,
+            )
+
+        series_repo.bulk_create(db, [sample(1000)])
+
+        replay = series_repo.bulk_create(db, [sample(1000)])
+        assert (replay.inserted, replay.updated) == (0, 0)
+        assert int(replay) == 0
+
+        changed = series_repo.bulk_create(db, [sample(1500)])
+        assert (changed.inserted, changed.updated) == (0, 1)
+
     def test_bulk_create_empty_returns_zero_counts(self, db: Session, series_repo: DataPointSeriesRepository) -> None:
         """An empty batch writes nothing and reports zero inserted/updated."""
         counts = series_repo.bulk_create(db, [])
@@ -3,6 +3,7 @@ Tests for EventRecordService.
 
 Tests cover:
 - Creating event record details
+- Bulk creating workouts with their details
 - Getting formatted event records with filters
 - Counting workouts by type
 - create_or_merge_sleep: adjacent session merging
@@ -167,6 +168,56 @@ class TestEventRecordServiceBulkCreateDetails:
         mock_workout.assert_not_called()
 
 
+class TestEventRecordServiceBulkCreateWithDetails:
+    """Batch workout persistence used by the XML import and Strava backfill."""
+
+    @staticmethod
+    def _workout(user_id: UUID, hour: int) -> tuple[EventRecordCreate, EventRecordDetailCreate]:
+        record_id = uuid4()
+        record = EventRecordCreate(
+            id=record_id,
+            category="workout",
+            type="running",
+            source_name="Apple Watch",
+            device_model="Watch6,12",
+            source="apple",
+            duration_seconds=1800,
+            start_datetime=datetime(2024, 1, 15, hour, 0, tzinfo=timezone.utc),
+            end_datetime=datetime(2024, 1, 15, hour, 30, tzinfo=timezone.utc),
+            user_id=user_id,
+        )
+        return record, EventRecordDetailCreate(record_id=record_id, energy_burned=Decimal("300.0"))
+
+    def test_creates_records_and_details(self, db: Session) -> None:
+        user = UserFactory()
+        workouts = [self._workout(user.id, 8), self._workout(user.id, 18)]
+
+        inserted_ids = event_record_service.bulk_create_with_details(db, workouts)
+        db.commit()
+
+        assert set(inserted_ids) == {record.id for record, _ in workouts}
+        for record, _ in workouts:
+            detail = event_record_service.event_record_detail_repo.get_by_record_id(db, record.id, "workout")
+            assert detail is not None
+            assert detail.energy_burned == Decimal("300.0")
+
+    def test_existing_workouts_are_skipped_with_their_details(self, db: Session) -> None:
+        user = UserFactory()
+        event_record_service.bulk_create_with_details(db, [self._workout(user.id, 8)])
+        db.commit()
+        duplicate, new = self._workout(user.id, 8), self._workout(user.id, 18)
+
+        inserted_ids = event_record_service.bulk_create_with_details(db, [duplicate, new])
+        db.commit()
+
+        assert inserted_ids == [new[0].id]
+        assert db.get(EventRecord, duplicate[0].id) is None
+        assert event_record_service.event_record_detail_repo.get_by_record_id(db, duplicate[0].id, "workout") is None
+
+    def test_empty_list_is_noop(self, db: Session) -> None:
+        assert event_record_service.bulk_create_with_details(db, []) == []
+
+
 class TestEventRecordServiceGetRecordsResponse:
     """Test getting formatted event records."""
 
@@ -0,0 +1,81 @@
+"""Tests for content-hash payload deduplication."""
+
+from unittest.mock import patch
+
+from app.config import settings
+from app.services import payload_dedup
+
+
+class TestPayloadDigest:
+    def test_dict_key_order_does_not_change_digest(self) -> None:
+        assert payload_dedup.payload_digest({"a": 1, "b": [1, 2]}) == payload_dedup.payload_digest(
+            {"b": [1, 2], "a": 1}
+        )
+
+    def test_different_payloads_have_different_digests(self) -> None:
+        assert payload_dedup.payload_digest({"a": 1}) != payload_dedup.payload_digest({"a": 2})
+
+    def test_string_and_bytes_hash_identically(self) -> None:
+        assert payload_dedup.payload_digest('{"a": 1}') == payload_dedup.payload_digest(b'{"a": 1}')
+
+
+class TestClaimPayload:
+    def test_first_claim_wins(self) -> None:
+        assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-1") is True
+
+    def test_second_owner_is_duplicate(self) -> None:
+        payload_dedup.claim_payload("sdk:u1", "digest", "batch-1")
+        assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-2") is False
+
+    def test_same_owner_can_reclaim(self) -> None:
+        """Celery retries/redeliveries keep their task id and must not be dropped."""
+        payload_dedup.claim_payload("webhook:garmin", "digest", "task-1")
+        assert payload_dedup.claim_payload("webhook:garmin", "digest", "task-1") is True
+
+    def test_scopes_are_independent(self) -> None:
+        payload_dedup.claim_payload("sdk:u1", "digest", "batch-1")
+        assert payload_dedup.claim_payload("sdk:u2", "digest", "batch-2") is True
+
+    def test_release_allows_reprocessing(self) -> None:
+        payload_dedup.claim_payload("sdk:u1", "digest", "batch-1")
+        payload_dedup.release_payload("sdk:u1", "digest", "batch-1")
+        assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-2") is True
+
+    def test_release_by_other_owner_is_ignored(self) -> None:
+        payload_dedup.claim_payload("sdk:u1", "digest", "batch-1")
+        payload_dedup.release_payload("sdk:u1", "digest", "batch-2")
+        assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-3") is False
+
+    def test_zero_ttl_disables_dedup(self) -> None:
+        with patch.object(settings, "payload_dedup_ttl_seconds", 0):
+            payload_dedup.claim_payload("sdk:u1", "digest", "batch-1")
+            assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-2") is True
+
+    def test_redis_failure_fails_open(self) -> None:
+        with patch.object(payload_dedup, "get_redis_client", side_effect=ConnectionError("down")):
+            assert payload_dedup.claim_payload("sdk:u1", "digest", "batch-1") is True
+
+    def test_explicit_ttl_overrides_setting(self) -> None:
+        with patch.object(settings, "payload_dedup_ttl_seconds", 0):
+            payload_dedup.claim_payload("webhook:oura", "digest", "task-1", ttl=60)
+            assert payload_dedup.claim_payload("webhook:oura", "digest", "task-2", ttl=60) is False
+
+
+class TestDedupStats:
+    def test_hits_and_misses_are_counted_per_metric(self) -> None:
+        payload_dedup.claim_payload("sdk:u1", "d1", "batch-1", metric="sdk")
+        payload_dedup.claim_payload("sdk:u2", "d1", "batch-2", metric="sdk")
+        payload_dedup.claim_payload("sdk:u1", "d1", "batch-3", metric="sdk")
+        payload_dedup.claim_payload("webhook_delivery:garmin", "d2", "req-1")
+        payload_dedup.claim_payload("webhook_delivery:garmin", "d2", "req-2")
+
+        assert payload_dedup.dedup_stats() == {
+            "sdk": {"hits": 1, "misses": 2},
+            "webhook_delivery:garmin": {"hits": 1, "misses": 1},
+        }
+
+    def test_reclaim_by_owner_is_not_counted(self) -> None:
+        payload_dedup.claim_payload("webhook:garmin", "digest", "task-1")
+        payload_dedup.claim_payload("webhook:garmin", "digest", "task-1")
+
+        assert payload_dedup.dedup_stats() == {"webhook:garmin": {"hits": 0, "misses": 1}}
@@ -1,6 +1,11 @@
 """Tests for raw payload storage backends."""
 
+import gzip
 import json
+from collections.abc import Generator
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -9,13 +14,37 @@ from app.services import raw_payload_storage
 
 
 @pytest.fixture(autouse=True)
-def _reset_module_state() -> None:
-    """Reset module-level globals before each test."""
+def _reset_module_state() -> Generator[None, None, None]:
+    """Reset module-level globals before each test and stop the archive writer after it."""
     raw_payload_storage._storage_backend = "disabled"
     raw_payload_storage._max_size_bytes = 10 * 1024 * 1024
     raw_payload_storage._s3_bucket = None
     raw_payload_storage._s3_prefix = "raw-payloads"
     raw_payload_storage._s3_client = None
+    raw_payload_storage._dropped = 0
+    yield
+    raw_payload_storage.shutdown()
+
+
+def _configure_s3(**kwargs: Any) -> MagicMock:
+    mock_client = MagicMock()
+    mock_client.put_object.return_value = {"ETag": "test-etag"}
+    with patch.object(raw_payload_storage, "_create_s3_client", return_value=mock_client):
+        raw_payload_storage.configure("s3", 10 * 1024 * 1024, s3_bucket="test-bucket", **kwargs)
+    return mock_client
+
+
+def _uploads(mock_client: MagicMock) -> list[tuple[dict[str, Any], list[dict[str, Any]], dict[str, Any]]]:
+    """(batch put_object kwargs, decoded NDJSON lines, manifest) for every uploaded batch."""
+    calls = [call.kwargs for call in mock_client.put_object.call_args_list]
+    batches = [call for call in calls if call["Key"].endswith(".ndjson.gz")]
+    manifests = {call["Key"]: json.loads(call["Body"]) for call in calls if call["Key"].endswith(".manifest.json")}
+    result = []
+    for batch in batches:
+        lines = [json.loads(line) for line in gzip.decompress(batch["Body"]).splitlines()]
+        manifest = manifests[batch["Key"].removesuffix(".ndjson.gz") + ".manifest.json"]
+        result.append((batch, lines, manifest))
+    return result
 
 
 class TestConfigure:
@@ -78,12 +107,8 @@ class TestStoreRawPayload:
         assert entry["user_id"] == "user-123"
         assert entry["trace_id"] == "trace-abc"
 
-    def test_s3_backend_uploads_payload(self) -> None:
-        mock_client = MagicMock()
-        mock_client.put_object.return_value = {"ETag": "test-etag"}
-
-        with patch.object(raw_payload_storage, "_create_s3_client", return_value=mock_client):
-            raw_payload_storage.configure("s3", 10 * 1024 * 1024, s3_bucket="test-bucket", s3_prefix="raw")
+    def test_s3_backend_uploads_batch_with_manifest(self) -> None:
+        mock_client = _configure_s3(s3_prefix="raw")
 
         raw_payload_storage.store_raw_payload(
             source="webhook",
@@ -92,51 +117,155 @@ class TestStoreRawPayload:
             user_id="user-456",
             trace_id="trace-xyz",
         )
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+        raw_payload_storage.flush()
 
-        mock_client.put_object.assert_called_once()
-        call_kwargs = mock_client.put_object.call_args[1]
+        [(call_kwargs, lines, manifest)] = _uploads(mock_client)
+        assert mock_client.put_object.call_count == 2
         assert call_kwargs["Bucket"] == "test-bucket"
-        assert "garmin/webhook/" in call_kwargs["Key"]
-        assert "/user-456/" in call_kwargs["Key"]
-        assert call_kwargs["Key"].endswith(".json")
-        assert call_kwargs["ContentType"] == "application/json"
+        assert call_kwargs["Key"].startswith("raw/garmin/webhook/")
+        assert call_kwargs["ContentType"] == "application/gzip"
         assert call_kwargs["Metadata"]["provider"] == "garmin"
-        assert call_kwargs["Metadata"]["user_id"] == "user-456"
-        assert call_kwargs["Metadata"]["trace_id"] == "trace-xyz"
+        assert call_kwargs["Metadata"]["record_count"] == "2"
+
+        assert [json.loads(line["payload"]) for line in lines] == [{"activity": "running"}, {"x": 1}]
+        assert lines[0]["user_id"] == "user-456"
+        assert lines[0]["trace_id"] == "trace-xyz"
+        assert lines[1]["user_id"] is None
+
+        assert manifest["object"] == call_kwargs["Key"]
+        assert manifest["record_count"] == 2
+        assert manifest["user_ids"] == ["user-456"]
+        assert [(entry["line"], entry["trace_id"]) for entry in manifest["records"]] == [(0, "trace-xyz"), (1, None)]
+
+    def test_s3_backend_batches_per_provider_and_source(self) -> None:
+        mock_client = _configure_s3()
+
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+        raw_payload_storage.store_raw_payload(source="sdk", provider="apple", payload={"x": 2})
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 3})
+        raw_payload_storage.flush()
+
+        uploads = {manifest["provider"]: manifest["record_count"] for _, _, manifest in _uploads(mock_client)}
+        assert uploads == {"garmin": 2, "apple": 1}
+
+    def test_s3_backend_cuts_batch_at_max_bytes(self) -> None:
+        mock_client = _configure_s3(batch_max_bytes=1)
+
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 2})
+        raw_payload_storage.flush()
+
+        assert [manifest["record_count"] for _, _, manifest in _uploads(mock_client)] == [1, 1]
+
+    def test_s3_backend_does_not_upload_on_caller_thread(self) -> None:
+        mock_client = _configure_s3()
+        mock_client.put_object.side_effect = AssertionError("uploaded on the request path")
+
+        with patch.object(raw_payload_storage, "_ensure_writer") as ensure_writer:
+            raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+
+        ensure_writer.return_value.put_nowait.assert_called_once()
+        mock_client.put_object.assert_not_called()
+
+    def test_s3_backend_drops_payloads_when_queue_full(self) -> None:
+        _configure_s3()
+
+        with patch.object(raw_payload_storage, "_ensure_writer") as ensure_writer:
+            ensure_writer.return_value.put_nowait.side_effect = raw_payload_storage.queue.Full
+            raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+
+        assert raw_payload_storage._dropped == 1
+
+    def test_s3_backend_skips_oversized_payload(self) -> None:
+        mock_client = _configure_s3()
+        raw_payload_storage._max_size_bytes = 10
+
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"big": "payload"})
+        raw_payload_storage.flush()
 
-        body = call_kwargs["Body"].decode("utf-8")
-        assert json.loads(body) == {"activity": "running"}
+        mock_client.put_object.assert_not_called()
 
     def test_s3_backend_handles_upload_error(self) -> None:
-        mock_client = MagicMock()
+        mock_client = _configure_s3()
         mock_client.put_object.side_effect = Exception("S3 error")
 
-        with patch.object(raw_payload_storage, "_create_s3_client", return_value=mock_client):
-            raw_payload_storage.configure("s3", 10 * 1024 * 1024, s3_bucket="test-bucket")
-
         # Should not raise - errors are logged
         raw_payload_storage.store_raw_payload(source="sdk", provider="apple", payload="raw-xml-data")
+        raw_payload_storage.flush()
 
-    def test_s3_backend_unknown_user_fallback(self) -> None:
-        mock_client = MagicMock()
-        mock_client.put_object.return_value = {"ETag": "test-etag"}
+        mock_client.put_object.assert_called_once()
 
-        with patch.object(raw_payload_storage, "_create_s3_client", return_value=mock_client):
-            raw_payload_storage.configure("s3", 10 * 1024 * 1024, s3_bucket="test-bucket")
+    def test_s3_backend_pre_serialized_string(self) -> None:
+        mock_client = _configure_s3()
+
+        raw_payload_storage.store_raw_payload(source="sdk", provider="apple", payload='{"pre":"serialized"}')
+        raw_payload_storage.flush()
+
+        [(_, lines, _)] = _uploads(mock_client)
+        assert lines[0]["payload"] == '{"pre":"serialized"}'
+
+    def test_shutdown_uploads_buffered_batches(self) -> None:
+        mock_client = _configure_s3()
 
         raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"x": 1})
+        raw_payload_storage.shutdown()
 
-        call_kwargs = mock_client.put_object.call_args[1]
-        assert "/_unknown/" in call_kwargs["Key"]
+        assert len(_uploads(mock_client)) == 1
+        assert raw_payload_storage._writer is None
 
-    def test_s3_backend_pre_serialized_string(self) -> None:
-        mock_client = MagicMock()
-        mock_client.put_object.return_value = {"ETag": "test-etag"}
 
-        with patch.object(raw_payload_storage, "_create_s3_client", return_value=mock_client):
-            raw_payload_storage.configure("s3", 10 * 1024 * 1024, s3_bucket="test-bucket")
+class TestLocalBackend:
+    def _segments(self, root: Path) -> list[list[dict[str, Any]]]:
+        return [
+            [json.loads(line) for line in gzip.decompress(path.read_bytes()).splitlines()]
+            for path in sorted(root.rglob("*.ndjson.gz"))
+        ]
 
-        raw_payload_storage.store_raw_payload(source="sdk", provider="apple", payload='{"pre":"serialized"}')
+    def test_flush_closes_segment_with_payloads(self, tmp_path: Path) -> None:
+        raw_payload_storage.configure("local", 10 * 1024 * 1024, local_dir=str(tmp_path))
+
+        raw_payload_storage.store_raw_payload(
+            source="sdk", provider="apple", payload='{"a":1}', user_id="user-1", trace_id="batch-1"
+        )
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"b": 2})
+        raw_payload_storage.flush()
+
+        [segment] = self._segments(tmp_path)
+        assert [(line["provider"], line["source"], line["payload"]) for line in segment] == [
+            ("apple", "sdk", '{"a":1}'),
+            ("garmin", "webhook", '{"b": 2}'),
+        ]
+        assert segment[0]["user_id"] == "user-1"
+        assert segment[0]["trace_id"] == "batch-1"
+        assert not list(tmp_path.rglob("*.open"))
+
+    def test_segment_rotates_at_max_bytes(self, tmp_path: Path) -> None:
+        raw_payload_storage.configure("local", 10 * 1024 * 1024, local_dir=str(tmp_path), segment_max_bytes=1)
+
+        for i in range(3):
+            raw_payload_storage.store_raw_payload(source="sdk", provider="apple", payload={"i": i})
+        raw_payload_storage.flush()
+
+        assert sorted(json.loads(segment[0]["payload"])["i"] for segment in self._segments(tmp_path)) == [0, 1, 2]
+
+    def test_segment_rotates_after_max_seconds(self, tmp_path: Path) -> None:
+        raw_payload_storage.configure("local", 10 * 1024 * 1024, local_dir=str(tmp_path), segment_max_seconds=60)
+        segments = raw_payload_storage._LocalSegments()
+        now = datetime.now(UTC)
+
+        segments.add(raw_payload_storage._Record(now, "sdk", "apple", {"x": 1}, None, None))
+        segments.tick(now + timedelta(seconds=30))
+        assert len(list(tmp_path.rglob("*.ndjson.gz.open"))) == 1
+
+        segments.tick(now + timedelta(seconds=60))
+        assert len(self._segments(tmp_path)) == 1
+        assert not list(tmp_path.rglob("*.open"))
+
+    def test_oversized_payload_is_not_written(self, tmp_path: Path) -> None:
+        raw_payload_storage.configure("local", 10, local_dir=str(tmp_path))
+
+        raw_payload_storage.store_raw_payload(source="webhook", provider="garmin", payload={"big": "payload"})
+        raw_payload_storage.flush()
 
-        call_kwargs = mock_client.put_object.call_args[1]
-        assert call_kwargs["Body"] == b'{"pre":"serialized"}'
+        assert self._segments(tmp_path) == []
@@ -0,0 +1,108 @@
+"""Tests for SDK sync admission control."""
+
+import time
+from unittest.mock import patch
+
+from app.config import settings
+from app.integrations.redis_client import get_redis_client
+from app.services import sdk_admission
+
+
+def _fill_queue(depth: int) -> None:
+    client = get_redis_client()
+    client.rpush(sdk_admission.SDK_SYNC_QUEUE, *(["msg"] * depth))
+
+
+class TestCheckAdmission:
+    def test_empty_queue_admits(self) -> None:
+        decision = sdk_admission.check_admission("user-1")
+        assert decision.admitted is True
+        assert decision.queue_depth == 0
+
+    def test_hard_limit_rejects_everyone(self) -> None:
+        _fill_queue(5)
+        with patch.object(settings, "sdk_sync_queue_hard_limit", 5):
+            decision = sdk_admission.check_admission("user-1")
+
+        assert decision.admitted is False
+        assert decision.reason == "queue_saturated"
+        assert decision.retry_after_seconds >= settings.sdk_sync_retry_after_seconds
+
+    def test_soft_limit_rejects_only_heavy_uploader(self) -> None:
+        _fill_queue(3)
+        for _ in range(2):
+            sdk_admission.mark_enqueued("heavy")
+
+        with (
+            patch.object(settings, "sdk_sync_queue_soft_limit", 3),
+            patch.object(settings, "sdk_sync_max_queued_per_user", 2),
+        ):
+            heavy = sdk_admission.check_admission("heavy")
+            light = sdk_admission.check_admission("light")
+
+        assert heavy.admitted is False
+        assert heavy.reason == "user_fair_share_exceeded"
+        assert light.admitted is True
+
+    def test_worker_lag_rejects(self) -> None:
+        _fill_queue(1)
+        sdk_admission.mark_started("user-1", enqueued_at=time.time() - 60)
+        with patch.object(settings, "sdk_sync_max_lag_seconds", 30):
+            decision = sdk_admission.check_admission("user-1")
+
+        assert decision.admitted is False
+        assert decision.reason == "queue_saturated"
+
+    def test_lag_is_ignored_once_queue_is_empty(self) -> None:
+        _fill_queue(1)
+        sdk_admission.mark_started("user-1", enqueued_at=time.time() - 60)
+        get_redis_client().delete(sdk_admission.SDK_SYNC_QUEUE)
+
+        with patch.object(settings, "sdk_sync_max_lag_seconds", 30):
+            assert sdk_admission.check_admission("user-1").admitted is True
+
+    def test_pickup_from_drained_queue_clears_lag(self) -> None:
+        _fill_queue(1)
+        sdk_admission.mark_started("user-1", enqueued_at=time.time() - 60)
+        get_redis_client().delete(sdk_admission.SDK_SYNC_QUEUE)
+        sdk_admission.mark_started("user-1", enqueued_at=time.time() - 60)
+
+        assert get_redis_client().get("sdk_admission:lag") is None
+
+    def test_retry_after_is_capped(self) -> None:
+        _fill_queue(50)
+        with (
+            patch.object(settings, "sdk_sync_queue_soft_limit", 1),
+            patch.object(settings, "sdk_sync_queue_hard_limit", 10),
+            patch.object(settings, "sdk_sync_retry_after_seconds", 10),
+            patch.object(settings, "sdk_sync_retry_after_max_seconds", 20),
+        ):
+            decision = sdk_admission.check_admission("user-1")
+
+        assert 20 <= decision.retry_after_seconds <= 30
+
+    def test_disabled_always_admits(self) -> None:
+        _fill_queue(5)
+        with (
+            patch.object(settings, "sdk_admission_enabled", False),
+            patch.object(settings, "sdk_sync_queue_hard_limit", 1),
+        ):
+            assert sdk_admission.check_admission("user-1").admitted is True
+
+    def test_redis_failure_fails_open(self) -> None:
+        with patch.object(sdk_admission, "get_redis_client", side_effect=ConnectionError("down")):
+            assert sdk_admission.check_admission("user-1").admitted is True
+
+
+class TestQueuedCounter:
+    def test_started_releases_user_slot(self) -> None:
+        sdk_admission.mark_enqueued("user-1")
+        sdk_admission.mark_enqueued("user-1")
+        sdk_admission.mark_started("user-1", enqueued_at=None)
+
+        assert get_redis_client().get("sdk_admission:queued:user-1") == "1"
+
+    def test_counter_never_goes_negative(self) -> None:
+        sdk_admission.mark_started("user-1", enqueued_at=None)
+
+        assert get_redis_client().get("sdk_admission:queued:user-1") is None
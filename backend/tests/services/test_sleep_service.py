@@ -2,7 +2,7 @@
 Tests for Apple HealthKit sleep service processing.
 
 Tests the sleep pipeline (handle_sleep_data, _apply_transition, _calculate_final_metrics,
-finish_sleep) using synthetic payloads modeled after real Apple HealthKit SDK data.
+finish_sleep, and the batch import_sleep_history) using synthetic payloads modeled after real Apple HealthKit SDK data.
 
 Apple Watch sleep data patterns:
 - Older Apple Watch (pre-watchOS 9): only "in_bed" and "sleeping" stages
@@ -22,6 +22,7 @@ from app.schemas.model_crud.activities import (
     EventRecordDetailCreate,
 )
 from app.schemas.providers.mobile_sdk import (
+    SleepRecord,
     SleepState,
     SleepStateStage,
     SyncRequest,
@@ -30,6 +31,8 @@ from app.services.apple.healthkit.sleep_service import (
     _calculate_final_metrics,
     finish_sleep,
     handle_sleep_data,
+    import_sleep_history,
+    sessionize_sleep,
 )
 
 
@@ -839,3 +842,93 @@ class TestHistoricalBulkUploadMerging:
         assert SleepStageType.LIGHT in stage_types
         assert SleepStageType.DEEP in stage_types
         assert SleepStageType.REM in stage_types
+
+
+def _sample(sample_id: str, stage: str, start: str, end: str) -> SleepRecord:
+    return SleepRecord.model_validate(
+        {
+            "id": sample_id,
+            "stage": stage,
+            "startDate": start,
+            "endDate": end,
+            "source": {"device_type": "watch", "device_model": "Watch7,9"},
+        }
+    )
+
+
+# Two nights in reverse order, a duplicate sample, and an awake sample before the first night.
+HISTORY = [
+    _sample("N2-1", "light", "2026-03-23T23:00:00Z", "2026-03-24T02:00:00Z"),
+    _sample("N2-2", "deep", "2026-03-24T02:00:00Z", "2026-03-24T06:00:00Z"),
+    _sample("N1-0", "awake", "2026-03-22T20:00:00Z", "2026-03-22T20:10:00Z"),
+    _sample("N1-1", "light", "2026-03-22T23:00:00Z", "2026-03-23T01:00:00Z"),
+    _sample("N1-1", "light", "2026-03-22T23:00:00Z", "2026-03-23T01:00:00Z"),
+    _sample("N1-2", "rem", "2026-03-23T01:00:00Z", "2026-03-23T07:00:00Z"),
+]
+
+
+class TestImportSleepHistory:
+    """Batch sessionization of historical sleep (XML imports) without Redis state."""
+
+    def test_sessionize_splits_on_gap_in_one_pass(self) -> None:
+        sessions = sessionize_sleep(HISTORY, "apple_health_xml")
+
+        assert [s.uuid for s in sessions] == ["N1-1", "N2-1"]
+        assert [len(s.stages) for s in sessions] == [2, 2]
+        assert sessions[0].start_time == _dt("2026-03-22T23:00:00Z")
+        assert sessions[0].end_time == _dt("2026-03-23T07:00:00Z")
+        assert sessions[0].light_seconds == 2 * 3600
+        assert all(s.provider == "apple_health_xml" for s in sessions)
+
+    @patch("app.services.apple.healthkit.sleep_service.event_record_service")
+    @patch("app.services.apple.healthkit.sleep_service.get_redis_client")
+    def test_new_sessions_are_bulk_inserted_without_redis(
+        self,
+        mock_redis_func: MagicMock,
+        mock_event_service: MagicMock,
+    ) -> None:
+        mock_event_service.get_sleep_session_windows.return_value = []
+        mock_event_service.bulk_create_with_details.side_effect = lambda db, pairs, detail_type: [
+            record.id for record, _ in pairs
+        ]
+
+        saved = import_sleep_history(MagicMock(), str(uuid4()), HISTORY)
+
+        assert saved == 2
+        mock_redis_func.assert_not_called()
+        mock_event_service.find_adjacent_sleep_record.assert_not_called()
+        mock_event_service.bulk_create_with_details.assert_called_once()
+        pairs = mock_event_service.bulk_create_with_details.call_args.args[1]
+        assert mock_event_service.bulk_create_with_details.call_args.kwargs["detail_type"] == "sleep"
+        assert [record.start_datetime for record, _ in pairs] == [
+            _dt("2026-03-22T23:00:00Z"),
+            _dt("2026-03-23T23:00:00Z"),
+        ]
+        assert all(detail.record_id == record.id for record, detail in pairs)
+        assert [detail.sleep_total_duration_minutes for _, detail in pairs] == [8 * 60, 7 * 60]
+
+    @patch("app.services.apple.healthkit.sleep_service.event_record_service")
+    @patch("app.services.apple.healthkit.sleep_service.get_redis_client")
+    def test_session_next_to_existing_record_is_merged(
+        self,
+        mock_redis_func: MagicMock,
+        mock_event_service: MagicMock,
+    ) -> None:
+        # A session already in the database ends an hour before the second night starts.
+        mock_event_service.get_sleep_session_windows.return_value = [
+            (_dt("2026-03-23T20:00:00Z"), _dt("2026-03-23T22:00:00Z")),
+        ]
+        mock_event_service.find_adjacent_sleep_record.return_value = None
+        mock_event_service.bulk_create_with_details.side_effect = lambda db, pairs, detail_type: [
+            record.id for record, _ in pairs
+        ]
+        db = MagicMock()
+
+        saved = import_sleep_history(db, str(uuid4()), HISTORY)
+
+        assert saved == 2
+        mock_redis_func.assert_not_called()
+        mock_event_service.find_adjacent_sleep_record.assert_called_once()
+        assert mock_event_service.create.call_args.args[1].start_datetime == _dt("2026-03-23T23:00:00Z")
+        pairs = mock_event_service.bulk_create_with_details.call_args.args[1]
+        assert [record.start_datetime for record, _ in pairs] == [_dt("2026-03-22T23:00:00Z")]
@@ -0,0 +1,103 @@
+"""Tests for the cached developer -> Svix application registry."""
+
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.integrations.redis_client import get_redis_client
+from app.services.outgoing_webhooks import app_registry
+
+
+@pytest.fixture
+def developers() -> Generator[MagicMock, None, None]:
+    with patch.object(app_registry, "_developers") as mock_developers:
+        mock_developers.get_all.return_value = [
+            MagicMock(id=uuid4(), email="dev1@test.com"),
+            MagicMock(id=uuid4(), email="dev2@test.com"),
+        ]
+        yield mock_developers
+
+
+@pytest.fixture
+def svix() -> Generator[MagicMock, None, None]:
+    with patch.object(app_registry, "svix_service") as mock_svix:
+        mock_svix.payload_modes.return_value = []
+        yield mock_svix
+
+
+def _app_ids(developers: MagicMock) -> list[str]:
+    return [str(developer.id) for developer in developers.get_all.return_value]
+
+
+def _apps(developers: MagicMock) -> dict[str, list[str]]:
+    return {app_id: [] for app_id in _app_ids(developers)}
+
+
+class TestAppRegistry:
+    def test_cold_registry_is_rebuilt_and_cached(self, developers: MagicMock, svix: MagicMock) -> None:
+        assert app_registry.cached_apps() is None
+
+        assert app_registry.load_apps(MagicMock()) == _apps(developers)
+
+        assert app_registry.cached_apps() == _apps(developers)
+        assert svix.ensure_application.call_count == 2
+
+    def test_rebuild_only_ensures_new_developers(self, developers: MagicMock, svix: MagicMock) -> None:
+        app_registry.load_apps(MagicMock())
+        developers.get_all.return_value = [
+            *developers.get_all.return_value,
+            MagicMock(id=uuid4(), email="new@test.com"),
+        ]
+        app_registry.invalidate()
+
+        assert app_registry.cached_apps() is None
+        assert app_registry.load_apps(MagicMock()) == _apps(developers)
+        assert svix.ensure_application.call_count == 3
+
+    def test_forgotten_app_is_ensured_again(self, developers: MagicMock, svix: MagicMock) -> None:
+        app_registry.load_apps(MagicMock())
+        app_registry.forget(_app_ids(developers)[0])
+        svix.ensure_application.reset_mock()
+
+        app_registry.load_apps(MagicMock())
+
+        svix.ensure_application.assert_called_once_with(_app_ids(developers)[0], "dev1@test.com")
+
+    def test_rebuild_racing_an_invalidation_is_not_cached(self, developers: MagicMock, svix: MagicMock) -> None:
+        def invalidated_meanwhile(*args: object, **kwargs: object) -> list[MagicMock]:
+            app_registry.invalidate()
+            return [MagicMock(id=uuid4(), email="dev1@test.com")]
+
+        developers.get_all.side_effect = invalidated_meanwhile
+
+        app_registry.load_apps(MagicMock())
+
+        assert get_redis_client().exists("svix_apps:registry") == 0
+
+    def test_redis_down_resolves_and_ensures_every_developer(self, developers: MagicMock, svix: MagicMock) -> None:
+        broken = MagicMock()
+        broken.get.side_effect = ConnectionError("redis down")
+        with patch.object(app_registry, "get_redis_client", return_value=broken):
+            assert app_registry.cached_apps() is None
+            assert app_registry.load_apps(MagicMock()) == _apps(developers)
+
+        assert svix.ensure_application.call_count == 2
+
+    def test_payload_modes_are_cached_per_app(self, developers: MagicMock, svix: MagicMock) -> None:
+        first, second = _app_ids(developers)
+        svix.payload_modes.side_effect = lambda app_id: ["columnar"] if app_id == first else []
+
+        app_registry.load_apps(MagicMock())
+
+        assert app_registry.cached_apps() == {first: ["columnar"], second: []}
+
+    def test_registry_is_not_cached_when_endpoints_cannot_be_listed(
+        self, developers: MagicMock, svix: MagicMock
+    ) -> None:
+        svix.payload_modes.side_effect = ConnectionError("svix down")
+
+        assert app_registry.load_apps(MagicMock()) == _apps(developers)
+
+        assert app_registry.cached_apps() is None
@@ -11,6 +11,7 @@ an exact ``COUNT(*)``, so it is only asserted to be a valid non-negative integer
 
 from sqlalchemy.orm import Session
 
+from app.services import payload_dedup
 from app.services.system_info_service import system_info_service
 from tests.factories import (
     DataPointSeriesFactory,
@@ -120,6 +121,19 @@ class TestSystemInfoServiceGetSystemInfo:
         assert hasattr(info.connections_coverage, "users_with_multi_active")
         assert isinstance(info.connections_coverage.top_providers, list)
 
+    def test_get_system_info_payload_dedup(self, db: Session) -> None:
+        """Should report payload dedup hits and misses per metric."""
+        # Arrange
+        payload_dedup.claim_payload("sdk:user-1", "digest", "batch-1", metric="sdk")
+        payload_dedup.claim_payload("sdk:user-1", "digest", "batch-2", metric="sdk")
+
+        # Act
+        info = system_info_service.get_system_info(db)
+
+        # Assert
+        assert info.payload_dedup["sdk"].hits == 1
+        assert info.payload_dedup["sdk"].misses == 1
+
     def test_get_system_info_empty_database(self, db: Session) -> None:
         """Should handle empty database gracefully."""
         # Act
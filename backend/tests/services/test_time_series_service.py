@@ -9,8 +9,10 @@ Tests cover:
 """
 
 from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
 from uuid import uuid4
 
+import pytest
 from sqlalchemy.orm import Session
 
 from app.schemas.enums import SeriesType
@@ -123,6 +125,33 @@ class TestTimeSeriesServiceBulkCreateSamples:
         total_count = timeseries_service.get_total_count(db)
         assert total_count >= initial_count + 2
 
+    def test_outbox_failure_rolls_back_insert(self, db: Session) -> None:
+        """A failed webhook outbox write fails the insert, so the samples roll back with their events."""
+        user = UserFactory()
+        initial_count = timeseries_service.get_total_count(db)
+        samples = [
+            HeartRateSampleCreate(
+                id=uuid4(),
+                user_id=user.id,
+                provider_name="apple",
+                device_model="device_4",
+                recorded_at=datetime.now(timezone.utc),
+                value=70,
+                series_type=SeriesType.heart_rate,
+            )
+        ]
+
+        with (
+            patch("app.services.timeseries_service.svix_service.is_enabled", return_value=True),
+            patch("app.services.outgoing_webhooks.events.svix_service.is_enabled", return_value=True),
+            patch("app.services.outgoing_webhooks.events._outbox.add", side_effect=RuntimeError("outbox down")),
+            pytest.raises(RuntimeError, match="outbox down"),
+        ):
+            timeseries_service.bulk_create_samples(db, samples)
+        db.rollback()
+
+        assert timeseries_service.get_total_count(db) == initial_count
+
 
 class TestTimeSeriesServiceGetDailyHistogram:
     """Test getting daily histogram of data points."""
@@ -0,0 +1,95 @@
+"""Tests for per-user coalescing of notify-only webhook notifications."""
+
+from collections.abc import Generator
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.config import settings
+from app.services import webhook_coalescer
+
+
+@pytest.fixture
+def celery() -> Generator[MagicMock, None, None]:
+    with patch.object(webhook_coalescer, "celery_app") as mock_celery:
+        yield mock_celery
+
+
+def _notification(object_id: str, event_type: str = "update") -> dict[str, str]:
+    return {"user_id": "oura-1", "data_type": "daily_sleep", "object_id": object_id, "event_type": event_type}
+
+
+class TestDefer:
+    def test_first_notification_schedules_one_flush(self, celery: MagicMock) -> None:
+        for object_id in ("a", "b", "c"):
+            assert webhook_coalescer.defer("oura", "oura-1", f"daily_sleep:{object_id}", _notification(object_id), "t")
+
+        celery.send_task.assert_called_once()
+        assert celery.send_task.call_args.kwargs["args"] == ["oura", "oura-1"]
+        assert celery.send_task.call_args.kwargs["countdown"] == settings.webhook_coalesce_window_seconds
+
+    def test_same_object_keeps_latest_notification(self, celery: MagicMock) -> None:
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a", "create"), "t1")
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a", "update"), "t2")
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:b", _notification("b"), "t3")
+
+        pending, received = webhook_coalescer.take("oura", "oura-1")
+
+        assert received == 3
+        assert sorted(pending, key=lambda entry: entry[1]) == [
+            (_notification("a", "update"), "t2"),
+            (_notification("b"), "t3"),
+        ]
+
+    def test_take_opens_a_new_window(self, celery: MagicMock) -> None:
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a"), "t1")
+        webhook_coalescer.take("oura", "oura-1")
+        webhook_coalescer.done("oura", "oura-1")
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:b", _notification("b"), "t2")
+
+        assert celery.send_task.call_count == 2
+        assert webhook_coalescer.take("oura", "oura-1") == ([(_notification("b"), "t2")], 1)
+        webhook_coalescer.done("oura", "oura-1")
+        assert webhook_coalescer.take("oura", "oura-1") == ([], 0)
+
+    def test_notifications_survive_a_flush_that_did_not_finish(self, celery: MagicMock) -> None:
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a", "create"), "t1")
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:b", _notification("b"), "t2")
+        webhook_coalescer.take("oura", "oura-1")
+        # The flush died before done(); a newer notification for "a" arrives meanwhile.
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a", "update"), "t3")
+
+        pending, received = webhook_coalescer.take("oura", "oura-1")
+
+        assert received == 3
+        assert sorted(pending, key=lambda entry: entry[1]) == [
+            (_notification("b"), "t2"),
+            (_notification("a", "update"), "t3"),
+        ]
+
+    def test_users_are_coalesced_separately(self, celery: MagicMock) -> None:
+        webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a"), "t1")
+        webhook_coalescer.defer("oura", "oura-2", "daily_sleep:a", _notification("a"), "t2")
+
+        assert celery.send_task.call_count == 2
+        assert webhook_coalescer.take("oura", "oura-2")[0] == [(_notification("a"), "t2")]
+
+    def test_disabled_or_unknown_user_is_not_buffered(self, celery: MagicMock) -> None:
+        assert not webhook_coalescer.defer("oura", None, "daily_sleep:a", _notification("a"), "t")
+        with patch.object(settings, "webhook_coalesce_window_seconds", 0):
+            assert not webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a"), "t")
+
+        celery.send_task.assert_not_called()
+
+    def test_redis_failure_pulls_immediately(self, celery: MagicMock) -> None:
+        with patch.object(webhook_coalescer, "get_redis_client", side_effect=ConnectionError("down")):
+            assert not webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a"), "t")
+
+    def test_unschedulable_flush_pulls_immediately(self, celery: MagicMock) -> None:
+        celery.send_task.side_effect = ConnectionError("broker down")
+
+        assert not webhook_coalescer.defer("oura", "oura-1", "daily_sleep:a", _notification("a"), "t1")
+
+        # The next notification tries to schedule the flush again.
+        celery.send_task.side_effect = None
+        assert webhook_coalescer.defer("oura", "oura-1", "daily_sleep:b", _notification("b"), "t2")
@@ -0,0 +1,148 @@
+"""Tests for compact timeseries webhook payloads and their Svix channel routing."""
+
+from typing import Any
+from unittest.mock import MagicMock
+from urllib.parse import parse_qs, urlparse
+from uuid import uuid4
+
+from app.schemas.webhooks.endpoints import WebhookPayloadMode
+from app.services.outgoing_webhooks import payload_modes
+from app.services.outgoing_webhooks import svix as svix_service
+
+
+def _sample(timestamp: str, value: float, device: str | None = "Forerunner") -> dict[str, Any]:
+    return {
+        "timestamp": timestamp,
+        "zone_offset": "+02:00",
+        "type": "heart_rate",
+        "value": value,
+        "unit": "bpm",
+        "source": {"provider": "garmin", "device": device},
+        "is_daily_total": False,
+    }
+
+
+def _data(samples: list[dict[str, Any]]) -> dict[str, Any]:
+    return {
+        "user_id": str(uuid4()),
+        "provider": "garmin",
+        "series_type": "heart_rate",
+        "sample_count": len(samples),
+        "start_time": samples[0]["timestamp"] if samples else None,
+        "end_time": samples[-1]["timestamp"] if samples else None,
+        "samples": samples,
+    }
+
+
+class TestRender:
+    def test_full_is_unchanged(self) -> None:
+        data = _data([_sample("2026-04-16T06:00:00+00:00", 60.0)])
+
+        assert payload_modes.render(data, WebhookPayloadMode.FULL) is data
+
+    def test_columnar_lists_unit_and_source_once(self) -> None:
+        data = _data([_sample("2026-04-16T06:00:00+00:00", 60.0), _sample("2026-04-16T06:01:00+00:00", 62.0)])
+
+        shaped = payload_modes.render(data, WebhookPayloadMode.COLUMNAR)
+
+        assert "samples" not in shaped
+        assert shaped["payload_mode"] == "columnar"
+        assert shaped["unit"] == "bpm"
+        assert shaped["source"] == {"provider": "garmin", "device": "Forerunner"}
+        assert shaped["columns"] == {
+            "timestamp": ["2026-04-16T06:00:00+00:00", "2026-04-16T06:01:00+00:00"],
+            "value": [60.0, 62.0],
+            "zone_offset": ["+02:00", "+02:00"],
+            "is_daily_total": [False, False],
+        }
+        assert shaped["sample_count"] == 2
+
+    def test_columnar_adds_device_column_for_mixed_devices(self) -> None:
+        data = _data([_sample("2026-04-16T06:00:00+00:00", 60.0), _sample("2026-04-16T06:01:00+00:00", 62.0, "Edge")])
+
+        shaped = payload_modes.render(data, WebhookPayloadMode.COLUMNAR)
+
+        assert shaped["source"] == {"provider": "garmin", "device": None}
+        assert shaped["columns"]["device"] == ["Forerunner", "Edge"]
+
+    def test_reference_carries_signed_fetch_url(self) -> None:
+        data = _data([_sample("2026-04-16T06:00:00+00:00", 60.0), _sample("2026-04-16T06:05:00+00:00", 62.0)])
+
+        shaped = payload_modes.render(data, WebhookPayloadMode.REFERENCE)
+
+        assert "samples" not in shaped
+        assert shaped["sample_count"] == 2
+        url = urlparse(shaped["fetch_url"])
+        assert url.path == f"/api/v1/users/{data['user_id']}/timeseries/fetch"
+        token = parse_qs(url.query)["token"][0]
+        claims = payload_modes.verify_fetch_token(token, data["user_id"])
+        assert claims is not None
+        assert (claims["provider"], claims["series_type"], claims["start_time"], claims["end_time"]) == (
+            "garmin",
+            "heart_rate",
+            "2026-04-16T06:00:00+00:00",
+            "2026-04-16T06:05:00+00:00",
+        )
+
+    def test_fetch_token_is_bound_to_user(self) -> None:
+        data = _data([_sample("2026-04-16T06:00:00+00:00", 60.0)])
+        url = payload_modes.render(data, WebhookPayloadMode.REFERENCE)["fetch_url"]
+        token = parse_qs(urlparse(url).query)["token"][0]
+
+        assert payload_modes.verify_fetch_token(token, uuid4()) is None
+        assert payload_modes.verify_fetch_token("not-a-token", data["user_id"]) is None
+
+    def test_only_timeseries_payloads_are_shapeable(self) -> None:
+        assert payload_modes.is_shapeable(_data([]))
+        assert not payload_modes.is_shapeable({"id": "w1", "user_id": "u1"})
+
+
+class TestChannelRouting:
+    @staticmethod
+    def _receives(endpoint_channels: list[str] | None, message_channels: list[str] | None) -> bool:
+        if not endpoint_channels:
+            return True
+        return bool(set(endpoint_channels) & set(message_channels or ()))
+
+    def test_endpoints_receive_only_their_payload_mode(self) -> None:
+        user, other = uuid4(), uuid4()
+        channels = [f"user.{user}"]
+        endpoints = {
+            "full_user": svix_service._endpoint_channels(user, WebhookPayloadMode.FULL),
+            "full_all": svix_service._PINNED_FULL_CHANNELS,
+            "columnar_user": svix_service._endpoint_channels(user, WebhookPayloadMode.COLUMNAR),
+            "columnar_all": svix_service._endpoint_channels(None, WebhookPayloadMode.COLUMNAR),
+            "reference_other": svix_service._endpoint_channels(other, WebhookPayloadMode.REFERENCE),
+        }
+        messages = {
+            "event": svix_service.message_channels(channels, None),
+            "full": svix_service.message_channels(channels, WebhookPayloadMode.FULL),
+            "columnar": svix_service.message_channels(channels, WebhookPayloadMode.COLUMNAR),
+            "reference": svix_service.message_channels(channels, WebhookPayloadMode.REFERENCE),
+        }
+
+        received = {
+            name: sorted(kind for kind, message in messages.items() if self._receives(endpoint, message))
+            for name, endpoint in endpoints.items()
+        }
+
+        assert received == {
+            "full_user": ["event", "full"],
+            "full_all": ["event", "full"],
+            "columnar_user": ["columnar", "event"],
+            "columnar_all": ["columnar", "event"],
+            "reference_other": [],
+        }
+        assert all(len(message or ()) <= 5 for message in messages.values())
+
+    def test_user_and_mode_are_read_back_from_channels(self) -> None:
+        user = uuid4()
+        endpoint = MagicMock(channels=svix_service._endpoint_channels(user, WebhookPayloadMode.REFERENCE))
+        unscoped = MagicMock(channels=svix_service._endpoint_channels(None, WebhookPayloadMode.COLUMNAR))
+
+        assert svix_service.user_id_from_endpoint(endpoint) == user
+        assert svix_service.payload_mode_from_endpoint(endpoint) == WebhookPayloadMode.REFERENCE
+        assert svix_service.user_id_from_endpoint(unscoped) is None
+        assert svix_service.payload_mode_from_endpoint(unscoped) == WebhookPayloadMode.COLUMNAR
+        assert svix_service.payload_mode_from_endpoint(MagicMock(channels=[f"user.{user}"])) == WebhookPayloadMode.FULL
+        assert svix_service.payload_mode_from_endpoint(MagicMock(channels=None)) == WebhookPayloadMode.FULL
@@ -0,0 +1,103 @@
+"""Tests for resumable XML import checkpoints."""
+
+import time
+from unittest.mock import patch
+from uuid import uuid4
+
+from app.config import settings
+from app.schemas.providers.apple.apple_xml import XMLParseStats
+from app.schemas.providers.mobile_sdk import SleepRecord
+from app.services.apple.apple_xml import import_checkpoint
+from app.services.apple.apple_xml.import_checkpoint import ImportCheckpoint
+
+
+def _stats() -> XMLParseStats:
+    stats = XMLParseStats()
+    stats.records.processed = 120
+    stats.records.skip("invalid_value")
+    return stats
+
+
+def _sleep(start: str) -> SleepRecord:
+    return SleepRecord.model_validate(
+        {"id": str(uuid4()), "parentId": None, "stage": "light", "startDate": start, "endDate": start}
+    )
+
+
+class TestImportCheckpoint:
+    def test_missing_checkpoint(self) -> None:
+        assert import_checkpoint.load_checkpoint("task-1") is None
+
+    def test_round_trip(self) -> None:
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()))
+
+        loaded = import_checkpoint.load_checkpoint("task-1")
+
+        assert loaded is not None
+        assert (loaded.offset, loaded.run_id) == (4096, "xml-run")
+        assert loaded.stats.to_dict() == _stats().to_dict()
+
+    def test_latest_checkpoint_wins(self) -> None:
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()))
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(8192, "xml-run", _stats()))
+
+        loaded = import_checkpoint.load_checkpoint("task-1")
+        assert loaded is not None
+        assert loaded.offset == 8192
+
+    def test_sleep_records_accumulate_across_checkpoints(self) -> None:
+        first, second = _sleep("2024-01-01T23:00:00+00:00"), _sleep("2024-01-02T01:00:00+00:00")
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()), new_sleep=[first])
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(8192, "xml-run", _stats()))
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(9000, "xml-run", _stats()), new_sleep=[second])
+
+        loaded = import_checkpoint.load_checkpoint("task-1")
+
+        assert loaded is not None
+        assert loaded.sleep == [first, second]
+
+        import_checkpoint.clear_checkpoint("task-1")
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()))
+        reloaded = import_checkpoint.load_checkpoint("task-1")
+        assert reloaded is not None
+        assert reloaded.sleep == []
+
+    def test_clear(self) -> None:
+        import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()))
+        import_checkpoint.clear_checkpoint("task-1")
+
+        assert import_checkpoint.load_checkpoint("task-1") is None
+
+    def test_redis_failure_starts_over(self) -> None:
+        with patch.object(import_checkpoint, "get_redis_client", side_effect=ConnectionError("down")):
+            import_checkpoint.save_checkpoint("task-1", ImportCheckpoint(4096, "xml-run", _stats()))
+            assert import_checkpoint.load_checkpoint("task-1") is None
+
+
+class TestImportLease:
+    def test_second_holder_is_refused_until_release(self) -> None:
+        with import_checkpoint.import_lease("task-1") as first, import_checkpoint.import_lease("task-1") as second:
+            assert (first, second) == (True, False)
+
+        with import_checkpoint.import_lease("task-1") as again:
+            assert again
+
+    def test_refused_holder_does_not_release_the_lease(self) -> None:
+        with import_checkpoint.import_lease("task-1"):
+            with import_checkpoint.import_lease("task-1"):
+                pass
+            with import_checkpoint.import_lease("task-1") as third:
+                assert not third
+
+    def test_heartbeat_keeps_lease_alive(self) -> None:
+        with patch.object(settings, "xml_import_lease_seconds", 1), import_checkpoint.import_lease("task-1"):
+            time.sleep(1.5)
+            with import_checkpoint.import_lease("task-1") as second:
+                assert not second
+
+    def test_redis_failure_imports_without_lease(self) -> None:
+        with (
+            patch.object(import_checkpoint, "get_redis_client", side_effect=ConnectionError("down")),
+            import_checkpoint.import_lease("task-1") as leased,
+        ):
+            assert leased
@@ -0,0 +1,75 @@
+"""Tests for the parse/write pipeline used by Apple Health XML imports."""
+
+import threading
+import time
+from collections.abc import Callable, Generator
+
+import pytest
+
+from app.services.apple.apple_xml.pipeline import prefetch_chunks
+
+
+def _wait_for(predicate: Callable[[], bool], timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+class TestPrefetchChunks:
+    @pytest.mark.parametrize("depth", [0, 1, 3])
+    def test_yields_all_chunks_in_order(self, depth: int) -> None:
+        assert list(prefetch_chunks(iter(range(10)), depth)) == list(range(10))
+
+    def test_parses_in_background_thread(self) -> None:
+        producer_threads: list[str] = []
+
+        def chunks() -> Generator[int, None, None]:
+            for i in range(3):
+                producer_threads.append(threading.current_thread().name)
+                yield i
+
+        assert list(prefetch_chunks(chunks(), 1)) == [0, 1, 2]
+        assert set(producer_threads) == {"xml-import-parser"}
+
+    def test_producer_stays_at_most_depth_ahead(self) -> None:
+        produced: list[int] = []
+
+        def chunks() -> Generator[int, None, None]:
+            for i in range(10):
+                produced.append(i)
+                yield i
+
+        pipeline = prefetch_chunks(chunks(), 2)
+        assert next(pipeline) == 0
+        # One chunk handed out, two buffered, one parsed and waiting for space.
+        _wait_for(lambda: len(produced) >= 4)
+        time.sleep(0.05)
+        assert len(produced) == 4
+        pipeline.close()
+
+    def test_producer_error_is_raised_in_consumer(self) -> None:
+        def chunks() -> Generator[int, None, None]:
+            yield 1
+            raise ValueError("broken export")
+
+        pipeline = prefetch_chunks(chunks(), 1)
+        assert next(pipeline) == 1
+        with pytest.raises(ValueError, match="broken export"):
+            next(pipeline)
+
+    def test_consumer_stopping_early_closes_source(self) -> None:
+        closed = threading.Event()
+
+        def chunks() -> Generator[int, None, None]:
+            try:
+                for i in range(100):
+                    yield i
+            finally:
+                closed.set()
+
+        for chunk in prefetch_chunks(chunks(), 1):
+            if chunk == 2:
+                break
+
+        assert closed.is_set()
+        assert not any(t.name == "xml-import-parser" for t in threading.enumerate())
@@ -0,0 +1,273 @@
+"""Tests for Apple Health XML parsing from plain and zipped exports."""
+
+import io
+import zipfile
+from datetime import datetime
+from logging import getLogger
+from pathlib import Path
+from typing import Any
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from app.config import DEFAULT_XML_UPLOAD_DIR, settings
+from app.schemas.enums import SeriesType
+from app.services.apple.apple_xml.upload_spool import (
+    check_upload_storage,
+    discard_upload,
+    local_upload,
+    spool_upload,
+)
+from app.services.apple.apple_xml.xml_service import XMLService, parse_export_datetime
+from app.utils.config_utils import EnvironmentType
+
+EXPORT_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE HealthData [
+<!ELEMENT HealthData (ExportDate,Me,(Record|Correlation|Workout|ActivitySummary)*)>
+]>
+<HealthData locale="en_US">
+ <ExportDate value="2024-01-02 08:00:00 +0000"/>
+ <Me HKCharacteristicTypeIdentifierBiologicalSex="HKBiologicalSexNotSet"/>
+ <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Watch" unit="count/min"
+  startDate="2024-01-01 10:00:00 +0000" endDate="2024-01-01 10:00:00 +0000" value="72"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="iPhone" unit="count"
+  startDate="2024-01-01 11:00:00 +0000" endDate="2024-01-01 11:05:00 +0000" value="120"/>
+ <Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Watch"
+  startDate="2024-01-01 23:00:00 +0000" endDate="2024-01-02 01:00:00 +0000"
+  value="HKCategoryValueSleepAnalysisAsleepCore"/>
+ <Workout workoutActivityType="HKWorkoutActivityTypeRunning" duration="30" durationUnit="min" sourceName="Watch"
+  startDate="2024-01-01 07:00:00 +0000" endDate="2024-01-01 07:30:00 +0000">
+  <WorkoutStatistics type="HKQuantityTypeIdentifierActiveEnergyBurned" startDate="2024-01-01 07:00:00 +0000"
+   endDate="2024-01-01 07:30:00 +0000" sum="250" unit="Cal"/>
+ </Workout>
+</HealthData>
+"""
+
+
+EDGE_CASES_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<HealthData locale="en_US">
+ <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Watch" unit="count/min"
+  device="&lt;&lt;HKDevice: 0x1&gt;, name:Apple Watch, model:Watch, software:10.1&gt;"
+  startDate="2024-03-31 01:59:59 -0530" endDate="2024-03-31 01:59:59 -0530" value="61"/>
+ <Record type="HKQuantityTypeIdentifierBodyMass" sourceName="Scale" unit="kg"
+  startDate="2024-03-31 08:00:00 +0200" endDate="2024-03-31 08:00:00 +0200" value="70.25"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="iPhone" unit="count"
+  startDate="2024-03-31 08:00:00 +0200" endDate="2024-13-31 08:00:00 +0200" value="10"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="iPhone" unit="count"
+  startDate="2024-03-31 08:00:00 +0200" value="abc"/>
+ <Record type="HKQuantityTypeIdentifierStepCount" sourceName="iPhone" unit="count" value="5"/>
+ <Record type="HKQuantityTypeIdentifierUnsupportedThing" value="1"
+  startDate="2024-03-31 08:00:00 +0200" endDate="2024-03-31 08:00:00 +0200"/>
+ <Correlation type="HKCorrelationTypeIdentifierBloodPressure"
+  startDate="2024-03-31 09:00:00 +0200" endDate="2024-03-31 09:00:00 +0200">
+  <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Cuff" unit="count/min"
+   startDate="2024-03-31 09:00:00 +0200" endDate="2024-03-31 09:00:00 +0200" value="66"/>
+ </Correlation>
+ <Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Watch"
+  startDate="2024-03-31 23:00:00 +0200" endDate="2024-04-01 01:00:00 +0200" value="Unknown"/>
+</HealthData>
+"""
+
+
+def _parse(path: Path) -> tuple[list, list, list]:
+    service = XMLService(path, getLogger(__name__))
+    records, workouts, sleep = [], [], []
+    for chunk_records, chunk_workouts, sync_request in service.parse_xml(str(uuid4())):
+        records.extend(chunk_records)
+        workouts.extend(chunk_workouts)
+        sleep.extend(sync_request.data.sleep)
+    return records, workouts, sleep
+
+
+class TestXMLServiceSources:
+    def test_parses_plain_xml(self, tmp_path: Path) -> None:
+        xml_path = tmp_path / "export.xml"
+        xml_path.write_text(EXPORT_XML)
+
+        records, workouts, sleep = _parse(xml_path)
+
+        assert [r.series_type for r in records] == [SeriesType.heart_rate, SeriesType.steps]
+        assert len(workouts) == 1
+        assert len(sleep) == 1
+
+    def test_parses_export_xml_inside_zip(self, tmp_path: Path) -> None:
+        zip_path = tmp_path / "export.zip"
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("apple_health_export/export_cda.xml", "<ClinicalDocument/>")
+            archive.writestr("apple_health_export/export.xml", EXPORT_XML)
+
+        records, workouts, sleep = _parse(zip_path)
+
+        assert [r.value for r in records] == [72, 120]
+        assert workouts[0][1].energy_burned == 250
+        assert len(sleep) == 1
+
+    def test_zip_without_export_xml_raises(self, tmp_path: Path) -> None:
+        zip_path = tmp_path / "export.zip"
+        with zipfile.ZipFile(zip_path, "w") as archive:
+            archive.writestr("apple_health_export/export_cda.xml", "<ClinicalDocument/>")
+
+        with pytest.raises(ValueError, match="No export.xml"):
+            _parse(zip_path)
+
+
+def _comparable(path: Path, parser: str, chunk_size: int) -> tuple[list, dict[str, dict[str, int]]]:
+    """Parse with the given backend and strip the random ids so runs can be compared."""
+    service = XMLService(path, getLogger(__name__))
+    service.chunk_size = chunk_size
+    chunks = []
+    with patch.object(settings, "xml_parser", parser):
+        for records, workouts, sync_request in service.parse_xml("00000000-0000-0000-0000-000000000001"):
+            chunks.append(
+                (
+                    [(type(r).__name__, r.model_dump(exclude={"id"})) for r in records],
+                    [(w.model_dump(exclude={"id"}), d.model_dump(exclude={"record_id"})) for w, d in workouts],
+                    [s.model_dump() for s in sync_request.data.sleep],
+                )
+            )
+    stats = service.stats
+    return chunks, {"records": stats.records.reasons, "workouts": stats.workouts.reasons, "sleep": stats.sleep.reasons}
+
+
+class TestXMLParserBackends:
+    @pytest.mark.parametrize("document", [EXPORT_XML, EDGE_CASES_XML])
+    @pytest.mark.parametrize("chunk_size", [1, 2, 50_000])
+    def test_lxml_and_stdlib_yield_identical_chunks(self, tmp_path: Path, document: str, chunk_size: int) -> None:
+        xml_path = tmp_path / "export.xml"
+        xml_path.write_text(document)
+
+        assert _comparable(xml_path, "lxml", chunk_size) == _comparable(xml_path, "stdlib", chunk_size)
+
+    def test_lxml_parser_handles_edge_cases(self, tmp_path: Path) -> None:
+        xml_path = tmp_path / "export.xml"
+        xml_path.write_text(EDGE_CASES_XML)
+
+        (chunk,), skipped = _comparable(xml_path, "lxml", 50_000)
+        records, _, sleep = chunk
+
+        assert [(name, r["value"]) for name, r in records] == [
+            ("HeartRateSampleCreate", 61),
+            ("TimeSeriesSampleCreate", 70.25),
+            ("HeartRateSampleCreate", 66),
+        ]
+        assert records[0][1]["device_model"] == "Watch"
+        assert records[0][1]["software_version"] == "10.1"
+        assert sleep == []
+        assert skipped["records"] == {
+            "invalid_date:HKQuantityTypeIdentifierStepCount": 1,
+            "invalid_value:HKQuantityTypeIdentifierStepCount": 1,
+            "missing_startDate:HKQuantityTypeIdentifierStepCount": 1,
+        }
+        assert skipped["sleep"] == {"unknown_sleep_stage:Unknown": 1}
+
+    def test_lxml_parser_releases_every_top_level_element(self, tmp_path: Path) -> None:
+        summaries = "".join(f' <ActivitySummary dateComponents="2024-01-{day:02d}"/>\n' for day in range(1, 29))
+        xml_path = tmp_path / "export.xml"
+        xml_path.write_text(EXPORT_XML.replace("</HealthData>", summaries + "</HealthData>"))
+        released: list[str] = []
+        release = XMLService._release_element
+
+        def tracking_release(elem: Any) -> None:
+            released.append(elem.tag)
+            release(elem)
+
+        with patch.object(XMLService, "_release_element", staticmethod(tracking_release)):
+            _comparable(xml_path, "lxml", 50_000)
+
+        assert released.count("ActivitySummary") == 28
+        assert {"ExportDate", "Me", "Record", "Workout"} <= set(released)
+        assert "WorkoutStatistics" not in released
+
+
+class TestParseExportDatetime:
+    @pytest.mark.parametrize(
+        "value",
+        [
+            "2024-01-01 10:00:00 +0000",
+            "2024-03-31 01:59:59 -0530",
+            "1999-12-31 23:59:59 +1400",
+        ],
+    )
+    def test_matches_strptime(self, value: str) -> None:
+        expected = datetime.strptime(value, "%Y-%m-%d %H:%M:%S %z")
+        parsed = parse_export_datetime(value)
+
+        assert parsed == expected
+        assert parsed.utcoffset() == expected.utcoffset()
+
+    @pytest.mark.parametrize("value", ["2024-13-01 10:00:00 +0000", "2024/01/01 10:00:00 +0000", "2024-01-01", ""])
+    def test_invalid_values_raise_value_error(self, value: str) -> None:
+        with pytest.raises(ValueError, match="does not match format"):
+            parse_export_datetime(value)
+
+
+class TestUploadSpool:
+    def test_spool_copies_stream_and_discard_removes_it(self, tmp_path: Path) -> None:
+        xml_path = tmp_path / "source.xml"
+        xml_path.write_text(EXPORT_XML)
+
+        with (
+            patch.object(settings, "xml_upload_storage", "local"),
+            patch.object(settings, "xml_upload_dir", tmp_path / "uploads"),
+            xml_path.open("rb") as stream,
+        ):
+            spooled = Path(spool_upload(stream, "my export.xml"))
+
+        assert spooled.parent == tmp_path / "uploads"
+        assert spooled.name.endswith("_myexport.xml")
+        assert spooled.read_text() == EXPORT_XML
+
+        discard_upload(spooled)
+        assert not spooled.exists()
+
+    def test_s3_storage_uploads_downloads_and_deletes(self, tmp_path: Path) -> None:
+        s3 = MagicMock()
+        s3.download_fileobj.side_effect = lambda bucket, key, out: out.write(EXPORT_XML.encode())
+
+        with (
+            patch.object(settings, "xml_upload_storage", "auto"),
+            patch.object(settings, "aws_bucket_name", "exports"),
+            patch.object(settings, "xml_upload_dir", tmp_path / "work"),
+            patch("app.services.apple.apple_xml.upload_spool.get_s3_client", return_value=s3),
+        ):
+            ref = spool_upload(io.BytesIO(EXPORT_XML.encode()), "export.zip")
+            with local_upload(ref) as local:
+                assert local.read_text() == EXPORT_XML
+            discard_upload(ref)
+
+        assert ref.startswith("s3://exports/xml-uploads/")
+        key = ref.removeprefix("s3://exports/")
+        assert s3.upload_fileobj.call_args.args[1:] == ("exports", key)
+        assert not local.exists()
+        s3.delete_object.assert_called_once_with(Bucket="exports", Key=key)
+
+    def test_s3_shard_download_fetches_only_its_ranges(self, tmp_path: Path) -> None:
+        data = b"0123456789abcdefghij"
+        s3 = MagicMock()
+
+        def get_object(Bucket: str, Key: str, Range: str) -> dict[str, io.BytesIO]:  # noqa: N803
+            start, end = (int(part) for part in Range.removeprefix("bytes=").split("-"))
+            return {"Body": io.BytesIO(data[start : end + 1])}
+
+        s3.get_object.side_effect = get_object
+        with (
+            patch.object(settings, "xml_upload_dir", tmp_path),
+            patch("app.services.apple.apple_xml.upload_spool.get_s3_client", return_value=s3),
+            local_upload("s3://exports/xml-uploads/x.xml", [(0, 4), (10, 15)]) as local,
+        ):
+            contents = local.read_bytes()
+
+        assert contents[:4] == data[:4]
+        assert contents[10:15] == data[10:15]
+        assert s3.get_object.call_count == 2
+        s3.download_fileobj.assert_not_called()
+
+    def test_production_refuses_default_local_dir(self) -> None:
+        with (
+            patch.object(settings, "environment", EnvironmentType.PRODUCTION),
+            patch.object(settings, "xml_upload_storage", "local"),
+            patch.object(settings, "xml_upload_dir", DEFAULT_XML_UPLOAD_DIR),
+            pytest.raises(RuntimeError, match="shared"),
+        ):
+            check_upload_storage()
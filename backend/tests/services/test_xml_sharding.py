@@ -0,0 +1,228 @@
+"""Tests for byte-range sharding of Apple Health exports."""
+
+import io
+import zipfile
+from logging import getLogger
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from app.config import settings
+from app.services.apple.apple_xml.sharding import (
+    ExportShard,
+    iter_export_segments,
+    open_export_shard,
+    plan_export_shards,
+)
+from app.services.apple.apple_xml.xml_service import XMLService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+PROLOG = """<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE HealthData [
+<!ELEMENT HealthData (ExportDate,Me,(Record|Correlation|Workout|ActivitySummary)*)>
+]>
+<HealthData locale="en_US">
+ <ExportDate value="2024-01-02 08:00:00 +0000"/>
+ <Me HKCharacteristicTypeIdentifierBiologicalSex="HKBiologicalSexNotSet"/>
+"""
+
+
+def _body(minutes: int) -> str:
+    lines = []
+    for minute in range(minutes):
+        stamp = f"2024-01-01 {minute // 60:02d}:{minute % 60:02d}:00 +0100"
+        lines.append(
+            f' <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Watch" unit="count/min" '
+            f'startDate="{stamp}" endDate="{stamp}" value="{60 + minute % 40}">\n'
+            f'  <MetadataEntry key="HKMetadataKeyHeartRateMotionContext" value="0"/>\n'
+            f" </Record>\n"
+        )
+        if minute % 10 == 0:
+            lines.append(
+                f' <Correlation type="HKCorrelationTypeIdentifierBloodPressure" '
+                f'startDate="{stamp}" endDate="{stamp}">\n'
+                f'  <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Cuff" unit="count/min" '
+                f'startDate="{stamp}" endDate="{stamp}" value="70"/>\n'
+                f" </Correlation>\n"
+                f' <Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Watch" '
+                f'startDate="{stamp}" endDate="{stamp}" value="HKCategoryValueSleepAnalysisAsleepCore"/>\n'
+                f' <Workout workoutActivityType="HKWorkoutActivityTypeRunning" duration="1" durationUnit="min" '
+                f'sourceName="Watch" startDate="{stamp}" endDate="{stamp}">\n'
+                f'  <WorkoutStatistics type="HKQuantityTypeIdentifierActiveEnergyBurned" sum="5" unit="Cal"/>\n'
+                f" </Workout>\n"
+            )
+    return "".join(lines)
+
+
+def _write_export(tmp_path: Path, minutes: int = 120) -> Path:
+    path = tmp_path / "export.xml"
+    path.write_text(PROLOG + _body(minutes) + ' <ActivitySummary dateComponents="2024-01-01"/>\n</HealthData>\n')
+    return path
+
+
+def _collect(path: Path, shard: ExportShard | None = None) -> tuple[list, list, list]:
+    service = XMLService(path, getLogger(__name__), shard=shard)
+    records, workouts, sleep = [], [], []
+    with patch.object(settings, "xml_parser", "lxml"):
+        for chunk_records, chunk_workouts, sync_request in service.parse_xml(USER_ID):
+            records.extend(r.model_dump(exclude={"id"}) for r in chunk_records)
+            workouts.extend(w.model_dump(exclude={"id"}) for w, _ in chunk_workouts)
+            sleep.extend(s.model_dump() for s in sync_request.data.sleep)
+    return records, workouts, sleep
+
+
+class TestPlanExportShards:
+    def test_shards_cover_body_and_start_on_top_level_elements(self, tmp_path: Path) -> None:
+        path = _write_export(tmp_path)
+        data = path.read_bytes()
+
+        shards = plan_export_shards(path, shard_bytes=4096, max_shards=8)
+
+        assert len(shards) == 8
+        header_end = data.index(b'<HealthData locale="en_US">') + len(b'<HealthData locale="en_US">')
+        assert shards[0].start == shards[0].header_end == header_end
+        assert shards[-1].end == data.rindex(b"</HealthData>")
+        for previous, current in zip(shards, shards[1:], strict=False):
+            assert previous.end == current.start
+            assert data[current.start : current.start + 2] == b" <"
+            assert data[current.start + 2 : current.start + 3] != b"/"
+
+    def test_small_export_is_a_single_shard(self, tmp_path: Path) -> None:
+        path = _write_export(tmp_path, minutes=5)
+
+        assert len(plan_export_shards(path, shard_bytes=10 * 1024 * 1024, max_shards=8)) == 1
+
+    def test_unindented_export_is_not_split(self, tmp_path: Path) -> None:
+        path = tmp_path / "export.xml"
+        path.write_text(PROLOG.replace("\n ", "") + _body(60).replace("\n", "") + "</HealthData>")
+
+        assert len(plan_export_shards(path, shard_bytes=1024, max_shards=8)) == 1
+
+    def test_non_export_file_has_no_shards(self, tmp_path: Path) -> None:
+        path = tmp_path / "export.xml"
+        path.write_text("<ClinicalDocument/>")
+
+        assert plan_export_shards(path, shard_bytes=1024, max_shards=8) == []
+
+
+class TestShardedParsing:
+    def test_shards_are_well_formed_documents(self, tmp_path: Path) -> None:
+        path = _write_export(tmp_path)
+        shard = plan_export_shards(path, shard_bytes=4096, max_shards=8)[3]
+
+        with open_export_shard(path, shard) as stream:
+            document = stream.read()
+
+        assert document.startswith(b'<?xml version="1.0"')
+        assert document.rstrip().endswith(b"</HealthData>")
+
+    def test_union_of_shards_matches_whole_export(self, tmp_path: Path) -> None:
+        path = _write_export(tmp_path)
+        whole = _collect(path)
+
+        sharded: tuple[list, list, list] = ([], [], [])
+        for shard in plan_export_shards(path, shard_bytes=4096, max_shards=8):
+            for collected, part in zip(sharded, _collect(path, shard), strict=True):
+                collected.extend(part)
+
+        assert sharded == whole
+        assert len(whole[0]) == 132
+        assert len(whole[1]) == 12
+        assert len(whole[2]) == 12
+
+
+class TestExportSegments:
+    def test_segments_end_on_top_level_elements_and_cover_body(self, tmp_path: Path) -> None:
+        data = _write_export(tmp_path).read_bytes()
+
+        bounds = []
+        for segment in iter_export_segments(io.BytesIO(data), segment_bytes=4096):
+            document = segment.read()
+            bounds.append((segment.start, segment.end, segment.final))
+            assert document.rstrip().endswith(b"</HealthData>")
+
+        assert len(bounds) > 3
+        assert bounds[-1] == (bounds[-1][0], len(data), True)
+        for (_, end, final), (start, _, _) in zip(bounds, bounds[1:], strict=False):
+            assert end == start
+            assert not final
+            assert data[start : start + 2] == b" <"
+            assert data[start + 2 : start + 3] != b"/"
+
+    def test_zero_segment_bytes_is_one_segment(self, tmp_path: Path) -> None:
+        data = _write_export(tmp_path).read_bytes()
+
+        segments = [(segment.read(), segment.final) for segment in iter_export_segments(io.BytesIO(data), 0)]
+
+        assert segments == [(data, True)]
+
+    def test_unread_segment_is_skipped(self, tmp_path: Path) -> None:
+        data = _write_export(tmp_path).read_bytes()
+
+        skipped = [segment.start for segment in iter_export_segments(io.BytesIO(data), segment_bytes=4096)]
+        read = []
+        for segment in iter_export_segments(io.BytesIO(data), segment_bytes=4096):
+            segment.read()
+            read.append(segment.start)
+
+        assert len(skipped) > 3
+        assert skipped == read
+
+    def test_resume_from_must_be_a_segment_boundary(self, tmp_path: Path) -> None:
+        data = _write_export(tmp_path).read_bytes()
+
+        with pytest.raises(ValueError, match="not the start of a top-level element"):
+            next(iter_export_segments(io.BytesIO(data), 4096, resume_from=data.index(b"value=")))
+
+
+def _collect_resumable(
+    path: Path, resume_from: int = 0, stop_after: int | None = None
+) -> tuple[list[dict], list[tuple[int, object]]]:
+    service = XMLService(path, getLogger(__name__))
+    records: list[dict] = []
+    checkpoints: list[tuple[int, object]] = []
+    with patch.object(settings, "xml_parser", "lxml"):
+        for (chunk_records, _, _), position in service.parse_xml_resumable(USER_ID, 4096, resume_from):
+            records.extend(r.model_dump(exclude={"id"}) for r in chunk_records)
+            if position.resume_offset is not None:
+                checkpoints.append((position.resume_offset, position.stats))
+                if stop_after is not None and len(checkpoints) == stop_after:
+                    break
+    return records, checkpoints
+
+
+class TestResumableParsing:
+    @pytest.mark.parametrize("archive", [False, True])
+    def test_resuming_from_checkpoint_yields_the_rest(self, tmp_path: Path, archive: bool) -> None:
+        path = _write_export(tmp_path)
+        if archive:
+            zipped = tmp_path / "export.zip"
+            with zipfile.ZipFile(zipped, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.write(path, "apple_health_export/export.xml")
+            path = zipped
+        whole, checkpoints = _collect_resumable(path)
+        assert len(checkpoints) > 3
+
+        head, head_checkpoints = _collect_resumable(path, stop_after=2)
+        offset, _ = head_checkpoints[-1]
+        tail, _ = _collect_resumable(path, resume_from=offset)
+
+        assert head + tail == whole
+        assert whole == _collect(path)[0]
+
+    def test_stats_continue_from_checkpoint(self, tmp_path: Path) -> None:
+        path = _write_export(tmp_path)
+        service = XMLService(path, getLogger(__name__))
+        with patch.object(settings, "xml_parser", "lxml"):
+            positions = [position for _, position in service.parse_xml_resumable(USER_ID, 4096)]
+            total = service.stats.records.processed
+            offset, stats = next((p.resume_offset, p.stats) for p in positions if p.resume_offset is not None)
+            assert stats is not None
+            list(service.parse_xml_resumable(USER_ID, 4096, resume_from=offset, stats=stats))
+
+        assert 0 < stats.records.processed < total
+        assert service.stats.records.processed == total
+        assert positions[-1].bytes_read == path.stat().st_size
+        assert positions[-1].resume_offset is None
@@ -0,0 +1,130 @@
+"""Tests for the drain_webhook_outbox Celery task."""
+
+from collections.abc import Generator
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.integrations.celery.tasks.drain_webhook_outbox_task import _LOCK_KEY, _PURGE_KEY, drain_webhook_outbox
+from app.integrations.redis_client import get_redis_client
+from app.models import WebhookOutbox
+from app.repositories import WebhookOutboxRepository
+from app.schemas.enums import ProviderName
+from app.schemas.model_crud.activities import HeartRateSampleCreate
+from app.services.timeseries_service import timeseries_service
+from tests.factories import DataPointSeriesFactory, DataSourceFactory, SeriesTypeDefinitionFactory, UserFactory
+
+TASK = "app.integrations.celery.tasks.drain_webhook_outbox_task"
+
+
+def _event(event_type: str) -> dict:
+    return {"event_types": [event_type], "data": {}, "idempotency_keys": [f"key.{event_type}"], "channels": None}
+
+
+class TestDrainWebhookOutbox:
+    @pytest.fixture(autouse=True)
+    def _session(self, db: Session) -> Generator[None, None, None]:
+        with (
+            patch(f"{TASK}.SessionLocal") as mock_session_local,
+            patch(f"{TASK}.svix_service.is_enabled", return_value=True),
+        ):
+            mock_session_local.return_value.__enter__ = MagicMock(return_value=db)
+            mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+            yield
+
+    @patch(f"{TASK}.deliver_events", return_value=(2, [], []))
+    def test_delivers_in_order_and_deletes_rows(self, mock_deliver: MagicMock, db: Session) -> None:
+        WebhookOutboxRepository().add(db, [_event("workout.created"), _event("sleep.created")])
+
+        assert drain_webhook_outbox() == {"delivered": 2, "retried": 0, "parked": 0, "purged": 0}
+
+        events = mock_deliver.call_args.args[0]
+        assert [event["event_types"] for event in events] == [["workout.created"], ["sleep.created"]]
+        assert db.scalars(select(WebhookOutbox)).all() == []
+
+    @patch(f"{TASK}.deliver_events", return_value=(1, [1], ["app1"]))
+    def test_failed_rows_are_rescheduled(self, mock_deliver: MagicMock, db: Session) -> None:
+        WebhookOutboxRepository().add(db, [_event("workout.created"), _event("sleep.created")])
+
+        assert drain_webhook_outbox() == {"delivered": 1, "retried": 1, "parked": 0, "purged": 0}
+
+        row = db.scalars(select(WebhookOutbox)).one()
+        assert row.event["event_types"] == ["sleep.created"]
+        assert row.attempts == 1
+        assert row.available_at > datetime.now(timezone.utc)
+        # Not due yet: the next run leaves it alone.
+        assert drain_webhook_outbox() == {"delivered": 0, "retried": 0, "parked": 0, "purged": 0}
+        mock_deliver.assert_called_once()
+
+    @patch(f"{TASK}.deliver_events", side_effect=RuntimeError("svix down"))
+    def test_row_is_parked_after_last_attempt(self, mock_deliver: MagicMock, db: Session) -> None:
+        WebhookOutboxRepository().add(db, [_event("workout.created")])
+
+        with patch(f"{TASK}.settings.webhook_outbox_max_attempts", 1):
+            assert drain_webhook_outbox() == {"delivered": 0, "retried": 0, "parked": 1, "purged": 0}
+
+        row = db.scalars(select(WebhookOutbox)).one()
+        assert row.failed_at is not None
+        assert row.last_error == "svix down"
+
+    @patch(f"{TASK}.deliver_events")
+    def test_skips_while_another_run_holds_the_lock(self, mock_deliver: MagicMock, db: Session) -> None:
+        WebhookOutboxRepository().add(db, [_event("workout.created")])
+        get_redis_client().set(_LOCK_KEY, "other-worker", ex=60)
+
+        assert drain_webhook_outbox() == {"delivered": 0, "retried": 0, "parked": 0, "purged": 0}
+
+        mock_deliver.assert_not_called()
+
+    @patch(f"{TASK}.deliver_events", return_value=(1, [], []))
+    def test_timeseries_event_delivers_only_its_batch(self, mock_deliver: MagicMock, db: Session) -> None:
+        user = UserFactory()
+        source = DataSourceFactory(user=user, provider=ProviderName.APPLE, source="apple", device_model="watch")
+        heart_rate = SeriesTypeDefinitionFactory.get_or_create_heart_rate()
+        start = datetime(2026, 1, 1, 10, tzinfo=timezone.utc)
+        # Samples stored earlier, inside the time range of the new batch.
+        for hour in range(1, 8):
+            DataPointSeriesFactory(
+                data_source=source, series_type=heart_rate, recorded_at=start + timedelta(hours=hour), value=50
+            )
+        batch = [
+            HeartRateSampleCreate(
+                id=uuid4(),
+                user_id=user.id,
+                provider="apple",
+                source="apple",
+                device_model="watch",
+                recorded_at=start + timedelta(hours=hours),
+                value=70,
+            )
+            for hours in (0, 8)
+        ]
+        timeseries_service.bulk_create_samples(db, batch)
+
+        drain_webhook_outbox()
+
+        [event] = mock_deliver.call_args.args[0]
+        assert event["data"]["sample_count"] == 2
+        assert [sample["timestamp"] for sample in event["data"]["samples"]] == [
+            start.isoformat(),
+            (start + timedelta(hours=8)).isoformat(),
+        ]
+
+    @patch(f"{TASK}.deliver_events")
+    def test_expired_parked_rows_are_purged(self, mock_deliver: MagicMock, db: Session) -> None:
+        repo = WebhookOutboxRepository()
+        repo.add(db, [_event("workout.created"), _event("sleep.created")])
+        old, recent = db.scalars(select(WebhookOutbox).order_by(WebhookOutbox.id)).all()
+        old.failed_at = datetime.now(timezone.utc) - timedelta(days=30)
+        recent.failed_at = datetime.now(timezone.utc)
+        db.flush()
+
+        assert drain_webhook_outbox()["purged"] == 1
+        assert [row.id for row in db.scalars(select(WebhookOutbox))] == [recent.id]
+        mock_deliver.assert_not_called()
+        # Swept at most once per interval.
+        assert get_redis_client().exists(_PURGE_KEY)
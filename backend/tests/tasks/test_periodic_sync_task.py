@@ -4,11 +4,17 @@ Tests for sync_all_users periodic Celery task.
 Tests the periodic task that syncs data for all users with active connections.
 """
 
+from collections import Counter
+from collections.abc import Generator
 from unittest.mock import MagicMock, patch
+from uuid import uuid4
 
+import pytest
 from sqlalchemy.orm import Session
 
-from app.integrations.celery.tasks.periodic_sync_task import sync_all_users
+from app.config import settings
+from app.integrations.celery.tasks import periodic_sync_task
+from app.integrations.celery.tasks.periodic_sync_task import sync_all_users, sync_slot
 from app.schemas.auth import ConnectionStatus
 from tests.factories import UserConnectionFactory, UserFactory
 
@@ -262,3 +268,103 @@ class TestSyncAllUsersTask:
         call_args_list = [call.kwargs["user_id"] for call in mock_sync_vendor_data.delay.call_args_list]
         for user in users:
             assert str(user.id) in call_args_list
+
+    @patch("app.integrations.celery.tasks.periodic_sync_task.SessionLocal")
+    @patch("app.integrations.celery.tasks.periodic_sync_task.sync_vendor_data")
+    def test_sync_all_users_spread_enqueues_only_due_users(
+        self,
+        mock_sync_vendor_data: MagicMock,
+        mock_session_local: MagicMock,
+        db: Session,
+        mock_celery_app: MagicMock,
+    ) -> None:
+        """Test that a spread run enqueues the users whose slot fell in its window, with countdowns."""
+        users = [UserFactory() for _ in range(5)]
+        for user in users:
+            UserConnectionFactory(user=user, provider="garmin", status=ConnectionStatus.ACTIVE)
+
+        mock_session_local.return_value.__enter__ = MagicMock(return_value=db)
+        mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+
+        # A window covering the whole interval makes every user due.
+        with (
+            patch.object(periodic_sync_task, "_window_start", return_value=0),
+            patch.object(periodic_sync_task.time, "time", return_value=settings.sync_interval_seconds),
+        ):
+            result = sync_all_users(spread=True)
+
+        assert result["users_for_sync"] == 5
+        mock_sync_vendor_data.delay.assert_not_called()
+        queued = {call.kwargs["kwargs"]["user_id"] for call in mock_sync_vendor_data.apply_async.call_args_list}
+        assert queued == {str(user.id) for user in users}
+
+
+class TestSpreadSync:
+    """Slot-based spreading of the periodic sync over the interval."""
+
+    INTERVAL = 3600
+    TICK = 60
+
+    @pytest.fixture
+    def sync_vendor_data(self) -> Generator[MagicMock, None, None]:
+        with (
+            patch.object(periodic_sync_task, "sync_vendor_data") as mock_task,
+            patch.object(settings, "sync_interval_seconds", self.INTERVAL),
+            patch.object(settings, "sync_spread_tick_seconds", self.TICK),
+        ):
+            yield mock_task
+
+    def _run_at(self, now: int, user_ids: list[str]) -> dict:
+        with patch.object(periodic_sync_task.time, "time", return_value=now):
+            return periodic_sync_task._sync_due_users(user_ids, None, None)
+
+    def _queued(self, mock_task: MagicMock) -> list[tuple[str, int]]:
+        return [
+            (call.kwargs["kwargs"]["user_id"], call.kwargs["countdown"])
+            for call in mock_task.apply_async.call_args_list
+        ]
+
+    def test_slot_is_stable_and_within_interval(self) -> None:
+        user_id = str(uuid4())
+        assert sync_slot(user_id, self.INTERVAL) == sync_slot(user_id, self.INTERVAL)
+        assert 0 <= sync_slot(user_id, self.INTERVAL) < self.INTERVAL
+
+    def test_every_user_synced_once_per_interval_in_flat_ticks(self, sync_vendor_data: MagicMock) -> None:
+        user_ids = [str(uuid4()) for _ in range(600)]
+        start = 1_700_000_000
+
+        per_tick = []
+        self._run_at(start, user_ids)
+        sync_vendor_data.reset_mock()
+        for tick in range(1, self.INTERVAL // self.TICK + 1):
+            per_tick.append(self._run_at(start + tick * self.TICK, user_ids)["users_for_sync"])
+
+        queued = self._queued(sync_vendor_data)
+        assert Counter(uid for uid, _ in queued) == Counter(user_ids)
+        assert all(0 <= countdown < self.TICK for _, countdown in queued)
+        # 10 users per tick on average; no tick gets anywhere near the whole herd.
+        assert max(per_tick) < 30
+
+    def test_late_tick_covers_the_missed_slots(self, sync_vendor_data: MagicMock) -> None:
+        user_ids = [str(uuid4()) for _ in range(300)]
+        start = 1_700_000_000
+        self._run_at(start, user_ids)
+        sync_vendor_data.reset_mock()
+
+        self._run_at(start + 3 * self.TICK, user_ids)
+
+        due = {uid for uid, _ in self._queued(sync_vendor_data)}
+        expected = {uid for uid in user_ids if (sync_slot(uid, self.INTERVAL) - start) % self.INTERVAL < 3 * self.TICK}
+        assert due == expected
+        assert all(countdown < self.TICK for _, countdown in self._queued(sync_vendor_data))
+
+    def test_without_redis_covers_last_tick(self, sync_vendor_data: MagicMock) -> None:
+        user_ids = [str(uuid4()) for _ in range(300)]
+        now = 1_700_000_000
+
+        with patch.object(periodic_sync_task, "get_redis_client", side_effect=ConnectionError("down")):
+            self._run_at(now, user_ids)
+
+        due = {uid for uid, _ in self._queued(sync_vendor_data)}
+        start = now - self.TICK
+        assert due == {uid for uid in user_ids if (sync_slot(uid, self.INTERVAL) - start) % self.INTERVAL < self.TICK}
@@ -7,9 +7,11 @@ Tests Apple Health data import processing with user validation.
 from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
+import pytest
 from sqlalchemy.orm import Session
 
 from app.integrations.celery.tasks.process_sdk_upload_task import process_sdk_upload
+from app.services import payload_dedup
 from tests.factories import UserFactory
 
 
@@ -98,6 +100,42 @@ class TestProcessSDKUploadTask:
         assert result["status_code"] == 200
         mock_hk_import_service.import_data_from_request.assert_called_once()
 
+    @patch("app.integrations.celery.tasks.process_sdk_upload_task.started")
+    @patch("app.integrations.celery.tasks.process_sdk_upload_task.UserConnectionRepository")
+    @patch("app.integrations.celery.tasks.process_sdk_upload_task.sdk_import_service")
+    @patch("app.integrations.celery.tasks.process_sdk_upload_task.SessionLocal")
+    @patch("app.integrations.celery.tasks.process_sdk_upload_task.UserRepository")
+    def test_process_sdk_upload_releases_dedup_claim_when_import_raises(
+        self,
+        mock_user_repo_class: MagicMock,
+        mock_session_local: MagicMock,
+        mock_hk_import_service: MagicMock,
+        mock_connection_repo_class: MagicMock,
+        mock_started: MagicMock,
+    ) -> None:
+        """A crashed import forgets the route's dedup claim so the client's retry is processed."""
+        # Arrange
+        user_id = str(uuid4())
+        mock_session_local.return_value.__enter__ = MagicMock(return_value=MagicMock())
+        mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+        mock_user_repo_class.return_value.get.return_value = MagicMock()
+        mock_hk_import_service.import_data_from_request.side_effect = RuntimeError("db down")
+        assert payload_dedup.claim_payload(f"sdk:{user_id}", "digest", "batch-1")
+
+        # Act
+        with pytest.raises(RuntimeError, match="db down"):
+            process_sdk_upload(
+                content='{"data":{"workouts":[],"records":[]}}',
+                content_type="application/json",
+                user_id=user_id,
+                provider="apple",
+                batch_id="batch-1",
+                payload_digest="digest",
+            )
+
+        # Assert
+        assert payload_dedup.claim_payload(f"sdk:{user_id}", "digest", "batch-2")
+
     @patch("app.integrations.celery.tasks.process_sdk_upload_task.SessionLocal")
     @patch("app.integrations.celery.tasks.process_sdk_upload_task.UserRepository")
     def test_process_sdk_upload_user_check_uses_correct_uuid(
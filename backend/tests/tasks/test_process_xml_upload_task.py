@@ -0,0 +1,441 @@
+"""
+Tests for process_xml_upload Celery task.
+
+Tests how large spooled exports are split into shard tasks, how the chord
+callbacks complete or fail the import, and how interrupted imports resume
+from their byte-offset checkpoint.
+"""
+
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from celery.exceptions import Retry
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.integrations.celery.tasks import process_xml_upload_task as task_module
+from app.integrations.celery.tasks.process_xml_upload_task import (
+    _import_xml_data,
+    fail_sharded_xml_import,
+    finalize_sharded_xml_import,
+    process_xml_upload,
+)
+from app.schemas.providers.apple.apple_xml import XMLParseStats
+from app.services.apple.apple_xml.import_checkpoint import (
+    ImportCheckpoint,
+    import_lease,
+    load_checkpoint,
+    save_checkpoint,
+)
+
+EXPORT_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<HealthData locale="en_US">\n'
+RECORD = (
+    ' <Record type="HKQuantityTypeIdentifierHeartRate" sourceName="Watch" unit="count/min" '
+    'startDate="2024-01-01 00:00:00 +0000" endDate="2024-01-01 00:00:00 +0000" value="60"/>\n'
+)
+WORKOUT = (
+    ' <Workout workoutActivityType="HKWorkoutActivityTypeRunning" duration="30" durationUnit="min" '
+    'sourceName="Watch" startDate="2024-01-01 {hour:02d}:00:00 +0000" endDate="2024-01-01 {hour:02d}:30:00 +0000">\n'
+    '  <WorkoutStatistics type="HKQuantityTypeIdentifierActiveEnergyBurned" sum="300" unit="Cal"/>\n'
+    " </Workout>\n"
+)
+
+
+def _sleep_record(start: str) -> dict[str, str | None]:
+    return {
+        "id": str(uuid4()),
+        "parentId": None,
+        "stage": "light",
+        "startDate": start,
+        "endDate": start,
+        "source": None,
+        "values": None,
+    }
+
+
+@pytest.fixture
+def upload_dir(tmp_path: Path) -> Generator[Path, None, None]:
+    with (
+        patch.object(settings, "xml_upload_dir", str(tmp_path)),
+        patch.object(settings, "xml_sharded_import", True),
+        patch.object(settings, "xml_shard_min_bytes", 0),
+        patch.object(settings, "xml_shard_target_bytes", 1024),
+        patch.object(settings, "xml_max_shards", 4),
+    ):
+        yield tmp_path
+
+
+@pytest.fixture
+def sync_status() -> Generator[dict[str, MagicMock], None, None]:
+    with (
+        patch.object(task_module, "started") as started,
+        patch.object(task_module, "progress") as progress,
+        patch.object(task_module, "completed") as completed,
+        patch.object(task_module, "failed") as failed,
+    ):
+        yield {"started": started, "progress": progress, "completed": completed, "failed": failed}
+
+
+class TestShardedXMLImport:
+    """Test suite for splitting large exports across shard tasks."""
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "chord")
+    @patch.object(task_module, "_import_xml_data")
+    def test_large_export_dispatches_shard_chord(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_chord: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD * 40 + "</HealthData>\n")
+
+        result = process_xml_upload("export.xml", str(uuid4()), file_path=str(export))
+
+        assert result["status"] == "sharded"
+        assert result["shard_count"] == 4
+        mock_import_xml_data.assert_not_called()
+        header = mock_chord.call_args.args[0]
+        assert [sig.kwargs["shard_index"] for sig in header.tasks] == [0, 1, 2, 3]
+        assert all(sig.kwargs["file_path"] == str(export) for sig in header.tasks)
+        assert export.exists()  # owned by the chord now
+        sync_status["progress"].assert_called_once()
+        sync_status["completed"].assert_not_called()
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "chord")
+    @patch.object(task_module, "_import_xml_data")
+    def test_small_export_is_imported_in_task(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_chord: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD * 40 + "</HealthData>\n")
+        mock_import_xml_data.return_value = XMLParseStats()
+
+        with patch.object(settings, "xml_shard_min_bytes", 1024 * 1024):
+            result = process_xml_upload("export.xml", str(uuid4()), file_path=str(export))
+
+        assert result["status"] == "success"
+        mock_chord.assert_not_called()
+        mock_import_xml_data.assert_called_once()
+        assert not export.exists()
+        sync_status["completed"].assert_called_once()
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "import_sleep_history")
+    def test_finalize_merges_stats_and_sessionizes_sleep_once(
+        self,
+        mock_import_sleep_history: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text("<HealthData/>")
+        first, second = XMLParseStats(), XMLParseStats()
+        first.records.processed, second.records.processed = 3, 4
+        second.workouts.skip("missing_dates")
+        shard_results = [
+            {"stats": first.to_dict(), "sleep": [_sleep_record("2024-01-02T01:00:00+00:00")]},
+            {"stats": second.to_dict(), "sleep": [_sleep_record("2024-01-01T23:00:00+00:00")]},
+        ]
+
+        result = finalize_sharded_xml_import(
+            shard_results, file_path=str(export), filename="export.xml", user_id=str(uuid4()), run_id="xml-1"
+        )
+
+        assert result["stats"]["records_processed"] == 7
+        assert result["stats"]["workouts_skipped"] == 1
+        mock_import_sleep_history.assert_called_once()
+        sleep = mock_import_sleep_history.call_args.args[2]
+        assert sorted(record.startDate.hour for record in sleep) == [1, 23]
+        assert not export.exists()
+        sync_status["completed"].assert_called_once()
+
+    def test_failed_shard_fails_import_and_removes_export(
+        self,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text("<HealthData/>")
+
+        fail_sharded_xml_import(
+            MagicMock(id="shard-task"),
+            ValueError("broken shard"),
+            None,
+            file_path=str(export),
+            filename="export.xml",
+            user_id=str(uuid4()),
+            run_id="xml-1",
+        )
+
+        assert not export.exists()
+        assert sync_status["failed"].call_args.kwargs["error"] == "broken shard"
+
+
+class TestResumableXMLImport:
+    """Test suite for byte-offset checkpoints and progress reporting."""
+
+    @patch.object(task_module, "timeseries_service")
+    @patch.object(task_module, "import_sleep_history")
+    @patch.object(task_module, "save_checkpoint")
+    def test_import_checkpoints_segments_and_reports_progress(
+        self,
+        mock_save_checkpoint: MagicMock,
+        mock_import_sleep_history: MagicMock,
+        mock_timeseries_service: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD * 100 + "</HealthData>\n")
+
+        with patch.object(settings, "xml_checkpoint_bytes", 4096):
+            stats = _import_xml_data(MagicMock(), str(export), str(uuid4()), run_id="xml-1", import_id="import-1")
+
+        assert stats.records.processed == 100
+        offsets = [call.args[1].offset for call in mock_save_checkpoint.call_args_list]
+        assert len(offsets) >= 3
+        assert offsets == sorted(offsets)
+        assert all(call.args[1].run_id == "xml-1" for call in mock_save_checkpoint.call_args_list)
+        last_progress = sync_status["progress"].call_args.kwargs
+        assert last_progress["progress_value"] == 1.0
+        assert last_progress["items_processed"] == 100
+        assert last_progress["metadata"]["bytes_processed"] == export.stat().st_size
+        assert last_progress["metadata"]["eta_seconds"] == 0
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "_import_xml_data")
+    def test_redelivered_task_resumes_from_checkpoint(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD + "</HealthData>\n")
+        save_checkpoint("import-1", ImportCheckpoint(4096, "xml-original-run", XMLParseStats()))
+        mock_import_xml_data.return_value = XMLParseStats()
+
+        result = process_xml_upload.apply(
+            kwargs={"filename": "export.xml", "user_id": str(uuid4()), "file_path": str(export)},
+            task_id="import-1",
+        ).get()
+
+        assert result["status"] == "success"
+        resume = mock_import_xml_data.call_args.kwargs["resume"]
+        assert resume.offset == 4096
+        assert mock_import_xml_data.call_args.kwargs["run_id"] == "xml-original-run"
+        sync_status["started"].assert_not_called()
+        assert sync_status["completed"].call_args.kwargs["run_id"] == "xml-original-run"
+        assert load_checkpoint("import-1") is None
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "_import_xml_data")
+    def test_duplicate_delivery_exits_while_original_holds_lease(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD + "</HealthData>\n")
+        save_checkpoint("import-1", ImportCheckpoint(4096, "xml-run", XMLParseStats()))
+
+        with import_lease("import-1") as leased:
+            assert leased
+            result = process_xml_upload.apply(
+                kwargs={"filename": "export.xml", "user_id": str(uuid4()), "file_path": str(export)},
+                task_id="import-1",
+            ).get()
+
+        assert result["status"] == "duplicate"
+        mock_import_xml_data.assert_not_called()
+        assert export.exists()
+        assert load_checkpoint("import-1") is not None
+        sync_status["started"].assert_not_called()
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "_import_xml_data")
+    def test_lost_database_retries_and_keeps_upload(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + RECORD + "</HealthData>\n")
+        save_checkpoint("import-1", ImportCheckpoint(4096, "xml-run", XMLParseStats()))
+        mock_import_xml_data.side_effect = OperationalError("INSERT", {}, Exception("server closed the connection"))
+
+        with (
+            patch.object(process_xml_upload, "retry", side_effect=Retry("retrying")) as mock_retry,
+            pytest.raises(Retry),
+        ):
+            process_xml_upload.apply(
+                kwargs={"filename": "export.xml", "user_id": str(uuid4()), "file_path": str(export)},
+                task_id="import-1",
+                throw=True,
+            )
+
+        mock_retry.assert_called_once()
+        assert export.exists()
+        assert load_checkpoint("import-1") is not None
+        sync_status["failed"].assert_not_called()
+
+    @patch.object(task_module, "SessionLocal")
+    @patch.object(task_module, "_import_xml_data")
+    def test_permanent_failure_clears_checkpoint(
+        self,
+        mock_import_xml_data: MagicMock,
+        mock_session_local: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text("not xml")
+        save_checkpoint("import-1", ImportCheckpoint(4096, "xml-run", XMLParseStats()))
+        mock_import_xml_data.side_effect = ValueError("broken export")
+
+        with pytest.raises(ValueError, match="broken export"):
+            process_xml_upload.apply(
+                kwargs={"filename": "export.xml", "user_id": str(uuid4()), "file_path": str(export)},
+                task_id="import-1",
+                throw=True,
+            )
+
+        assert not export.exists()
+        assert load_checkpoint("import-1") is None
+        sync_status["failed"].assert_called_once()
+
+
+class TestXMLWorkoutBatching:
+    """Workouts of a chunk are written with one bulk insert."""
+
+    @patch.object(task_module, "timeseries_service")
+    @patch.object(task_module, "event_record_service")
+    def test_workouts_saved_in_one_batch_per_chunk(
+        self,
+        mock_event_record_service: MagicMock,
+        mock_timeseries_service: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(
+            EXPORT_HEADER + RECORD + "".join(WORKOUT.format(hour=h) for h in range(5)) + "</HealthData>\n"
+        )
+
+        stats = _import_xml_data(MagicMock(), str(export), str(uuid4()))
+
+        mock_event_record_service.bulk_create_with_details.assert_called_once()
+        workouts = mock_event_record_service.bulk_create_with_details.call_args.args[1]
+        assert len(workouts) == 5
+        assert all(detail.record_id == record.id for record, detail in workouts)
+        mock_event_record_service.create.assert_not_called()
+        assert stats.workouts.processed == 5
+
+    @patch.object(task_module, "timeseries_service")
+    @patch.object(task_module, "event_record_service")
+    def test_failed_batch_skips_workouts_but_keeps_samples(
+        self,
+        mock_event_record_service: MagicMock,
+        mock_timeseries_service: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(
+            EXPORT_HEADER + RECORD + "".join(WORKOUT.format(hour=h) for h in range(3)) + "</HealthData>\n"
+        )
+        mock_event_record_service.bulk_create_with_details.side_effect = RuntimeError("deadlock")
+        db = MagicMock()
+
+        stats = _import_xml_data(db, str(export), str(uuid4()))
+
+        db.begin_nested.return_value.rollback.assert_called_once()
+        mock_timeseries_service.bulk_create_samples.assert_called_once()
+        assert stats.workouts.skipped == 3
+        assert stats.workouts.reasons["db_error:RuntimeError"] == 3
+
+
+SLEEP = (
+    ' <Record type="HKCategoryTypeIdentifierSleepAnalysis" sourceName="Watch" '
+    'startDate="2024-01-{day:02d} 23:00:00 +0000" endDate="2024-01-{day:02d} 23:30:00 +0000" '
+    'value="HKCategoryValueSleepAnalysisAsleepCore"/>\n'
+)
+
+
+class TestXMLSleepImport:
+    """Sleep is sessionized once, over every checkpoint segment of the export."""
+
+    @patch.object(task_module, "timeseries_service")
+    @patch.object(task_module, "import_sleep_history")
+    def test_sleep_is_sessionized_once_and_saved_with_each_checkpoint(
+        self,
+        mock_import_sleep_history: MagicMock,
+        mock_timeseries_service: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + "".join(SLEEP.format(day=d) for d in range(1, 29)) + "</HealthData>\n")
+        saved: list[int] = []
+
+        def record_checkpoint(import_id: str, checkpoint: ImportCheckpoint, new_sleep: list) -> None:
+            saved.append(len(new_sleep))
+
+        with (
+            patch.object(settings, "xml_checkpoint_bytes", 1024),
+            patch.object(task_module, "save_checkpoint", side_effect=record_checkpoint),
+        ):
+            stats = _import_xml_data(MagicMock(), str(export), str(uuid4()), run_id="xml-1", import_id="import-1")
+
+        assert len(saved) >= 2
+        mock_import_sleep_history.assert_called_once()
+        assert len(mock_import_sleep_history.call_args.args[2]) == stats.sleep.processed == 28
+        assert sum(saved) < 28  # records after the last checkpoint are never saved
+
+    @patch.object(task_module, "timeseries_service")
+    @patch.object(task_module, "import_sleep_history")
+    def test_resumed_import_sessionizes_saved_and_new_sleep_together(
+        self,
+        mock_import_sleep_history: MagicMock,
+        mock_timeseries_service: MagicMock,
+        upload_dir: Path,
+        sync_status: dict[str, MagicMock],
+    ) -> None:
+        export = upload_dir / "export.xml"
+        export.write_text(EXPORT_HEADER + "".join(SLEEP.format(day=d) for d in range(1, 29)) + "</HealthData>\n")
+        user_id = str(uuid4())
+        with (
+            patch.object(settings, "xml_checkpoint_bytes", 1024),
+            patch.object(task_module, "_import_sleep", side_effect=RuntimeError("worker lost")),
+            pytest.raises(RuntimeError),
+        ):
+            _import_xml_data(MagicMock(), str(export), user_id, run_id="xml-1", import_id="import-1")
+
+        resume = load_checkpoint("import-1")
+        assert resume is not None
+        assert 0 < len(resume.sleep) < 28
+        with patch.object(settings, "xml_checkpoint_bytes", 1024):
+            _import_xml_data(MagicMock(), str(export), user_id, run_id="xml-1", import_id="import-1", resume=resume)
+
+        mock_import_sleep_history.assert_called_once()
+        days = sorted(record.startDate.day for record in mock_import_sleep_history.call_args.args[2])
+        assert days == list(range(1, 29))
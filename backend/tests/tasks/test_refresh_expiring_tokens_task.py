@@ -0,0 +1,79 @@
+"""Tests for the refresh_expiring_tokens periodic Celery task."""
+
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from fastapi import HTTPException
+from sqlalchemy.orm import Session
+
+from app.integrations.celery.tasks.refresh_expiring_tokens_task import refresh_expiring_tokens
+from app.schemas.auth import ConnectionStatus
+from tests.factories import UserConnectionFactory
+
+TASK = "app.integrations.celery.tasks.refresh_expiring_tokens_task"
+
+
+class TestRefreshExpiringTokens:
+    @patch(f"{TASK}.refresh_single_flight")
+    @patch(f"{TASK}.SessionLocal")
+    def test_refreshes_only_tokens_expiring_in_window(
+        self,
+        mock_session_local: MagicMock,
+        mock_refresh: MagicMock,
+        db: Session,
+    ) -> None:
+        now = datetime.now(timezone.utc)
+        expiring = UserConnectionFactory(provider="whoop", token_expires_at=now + timedelta(minutes=10))
+        UserConnectionFactory(provider="whoop", token_expires_at=now + timedelta(days=1))
+        UserConnectionFactory(provider="oura", token_expires_at=now + timedelta(minutes=10), refresh_token=None)
+        UserConnectionFactory(
+            provider="strava", token_expires_at=now + timedelta(minutes=10), status=ConnectionStatus.REVOKED
+        )
+        mock_session_local.return_value.__enter__ = MagicMock(return_value=db)
+        mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+
+        result = refresh_expiring_tokens()
+
+        assert result == {"refreshed": 1, "failed": 0}
+        mock_refresh.assert_called_once()
+        assert mock_refresh.call_args.args[1].id == expiring.id
+
+    @patch(f"{TASK}.refresh_single_flight", side_effect=HTTPException(status_code=401, detail="rejected"))
+    @patch(f"{TASK}.SessionLocal")
+    def test_failed_refresh_is_counted(
+        self,
+        mock_session_local: MagicMock,
+        mock_refresh: MagicMock,
+        db: Session,
+    ) -> None:
+        UserConnectionFactory(provider="whoop", token_expires_at=datetime.now(timezone.utc) + timedelta(minutes=10))
+        mock_session_local.return_value.__enter__ = MagicMock(return_value=db)
+        mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+
+        assert refresh_expiring_tokens() == {"refreshed": 0, "failed": 1}
+
+    @patch(f"{TASK}.refresh_single_flight")
+    @patch(f"{TASK}.SessionLocal")
+    def test_provider_that_cannot_be_loaded_is_skipped(
+        self,
+        mock_session_local: MagicMock,
+        mock_refresh: MagicMock,
+        db: Session,
+    ) -> None:
+        soon = datetime.now(timezone.utc) + timedelta(minutes=10)
+        UserConnectionFactory(provider="oura", token_expires_at=soon)
+        whoop = UserConnectionFactory(provider="whoop", token_expires_at=soon)
+        mock_session_local.return_value.__enter__ = MagicMock(return_value=db)
+        mock_session_local.return_value.__exit__ = MagicMock(return_value=None)
+
+        def get_provider(provider: str) -> MagicMock:
+            if provider == "oura":
+                raise ValueError("Unknown provider: oura")
+            return MagicMock()
+
+        with patch(f"{TASK}.ProviderFactory") as mock_factory:
+            mock_factory.return_value.get_provider.side_effect = get_provider
+            result = refresh_expiring_tokens()
+
+        assert result == {"refreshed": 1, "failed": 0}
+        assert mock_refresh.call_args.args[1].id == whoop.id
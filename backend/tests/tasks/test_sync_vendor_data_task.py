@@ -4,12 +4,15 @@ Tests for sync_vendor_data Celery task.
 Tests synchronization of workout data from external providers (Garmin, Polar, Suunto).
 """
 
+from contextlib import suppress
 from unittest.mock import MagicMock, patch
 
 from sqlalchemy.orm import Session
 
+from app.config import settings
 from app.integrations.celery.tasks.sync_vendor_data_task import sync_vendor_data
 from app.schemas.auth import ConnectionStatus
+from app.services.providers.rate_limiter import ProviderRateLimitedError, rate_limited
 from app.utils.sync_params import build_sync_params
 from tests.factories import UserConnectionFactory, UserFactory
 
@@ -244,6 +247,88 @@ class TestSyncVendorDataTask:
         assert result["providers_synced"]["garmin"]["params"]["workouts"]["success"] is False
         assert "Provider API unavailable" in result["providers_synced"]["garmin"]["params"]["workouts"]["error"]
 
+    @patch("app.integrations.celery.tasks.sync_vendor_data_task.SessionLocal")
+    @patch("app.services.providers.factory.ProviderFactory.get_provider")
+    def test_sync_vendor_data_rate_limited_provider_is_rescheduled(
+        self,
+        mock_get_provider: MagicMock,
+        mock_session_local: MagicMock,
+        db: Session,
+        mock_celery_app: MagicMock,
+    ) -> None:
+        """A provider out of rate budget is synced again after the back-off, not slept on."""
+        user = UserFactory()
+        connection = UserConnectionFactory(user=user, provider="garmin", status=ConnectionStatus.ACTIVE)
+
+        mock_session_local.return_value.__enter__.return_value = db
+        mock_session_local.return_value.__exit__.return_value = None
+
+        def load_data(*args: object, **kwargs: object) -> bool:
+            # Providers often swallow per-endpoint errors; the deferral must still be noticed.
+            with suppress(ProviderRateLimitedError):
+                raise rate_limited("garmin", 89.5)
+            return True
+
+        mock_strategy = MagicMock()
+        mock_strategy.capabilities.rest_pull = True
+        mock_strategy.capabilities.webhook_stream = False
+        mock_strategy.workouts.load_data.side_effect = load_data
+        mock_strategy.data_247 = None
+        mock_get_provider.return_value = mock_strategy
+
+        with patch.object(sync_vendor_data, "apply_async") as mock_apply_async:
+            result = sync_vendor_data(str(user.id))
+
+        assert result["providers_synced"]["garmin"]["params"]["rate_limited"] == {"retry_after_seconds": 90}
+        mock_apply_async.assert_called_once()
+        assert mock_apply_async.call_args.kwargs["countdown"] == 90
+        assert mock_apply_async.call_args.kwargs["kwargs"]["providers"] == ["garmin"]
+        assert mock_apply_async.call_args.kwargs["kwargs"]["_rate_limit_reschedules"] == 1
+        db.refresh(connection)
+        assert connection.last_synced_at is None
+
+    @patch("app.integrations.celery.tasks.sync_vendor_data_task.SessionLocal")
+    @patch("app.services.providers.factory.ProviderFactory.get_provider")
+    def test_sync_vendor_data_rate_limited_at_cap_fails_instead_of_rescheduling(
+        self,
+        mock_get_provider: MagicMock,
+        mock_session_local: MagicMock,
+        db: Session,
+        mock_celery_app: MagicMock,
+    ) -> None:
+        """A provider still rate limited after the last allowed reschedule is failed, not rescheduled again."""
+        user = UserFactory()
+        connection = UserConnectionFactory(user=user, provider="garmin", status=ConnectionStatus.ACTIVE)
+
+        mock_session_local.return_value.__enter__.return_value = db
+        mock_session_local.return_value.__exit__.return_value = None
+
+        def load_data(*args: object, **kwargs: object) -> bool:
+            with suppress(ProviderRateLimitedError):
+                raise rate_limited("garmin", 30)
+            return True
+
+        mock_strategy = MagicMock()
+        mock_strategy.capabilities.rest_pull = True
+        mock_strategy.capabilities.webhook_stream = False
+        mock_strategy.workouts.load_data.side_effect = load_data
+        mock_strategy.data_247 = None
+        mock_get_provider.return_value = mock_strategy
+
+        with (
+            patch.object(settings, "provider_rate_limit_max_reschedules", 2),
+            patch.object(sync_vendor_data, "apply_async") as mock_apply_async,
+            patch("app.integrations.celery.tasks.sync_vendor_data_task.failed") as mock_failed,
+        ):
+            result = sync_vendor_data(str(user.id), _rate_limit_reschedules=2)
+
+        mock_apply_async.assert_not_called()
+        assert result["providers_synced"]["garmin"]["params"]["rate_limited"]["success"] is False
+        mock_failed.assert_called_once()
+        assert "Rate limited after 2 reschedules" in mock_failed.call_args.kwargs["error"]
+        db.refresh(connection)
+        assert connection.last_synced_at is None
+
     @patch("app.integrations.celery.tasks.sync_vendor_data_task.SessionLocal")
     @patch("app.services.providers.factory.ProviderFactory.get_provider")
     def test_sync_vendor_data_sync_returns_false(
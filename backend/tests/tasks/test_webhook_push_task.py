@@ -1,4 +1,5 @@
-"""Tests for webhook → sync-log instrumentation in process_webhook_push.
+"""Tests for webhook → sync-log instrumentation in process_webhook_push, and
+for process_webhook_body, the worker half of fast-ack webhook handling.
 
 The new-vs-updated split is derived centrally: a provider only has to return a
 WriteCounts as its count, and the task surfaces the split — no per-provider
@@ -8,15 +9,20 @@ deliveries with no resolvable user (or from self-reporting Garmin) are dropped.
 
 from __future__ import annotations
 
+import json
 from typing import Any
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 from uuid import uuid4
 
 import pytest
+from celery.exceptions import Retry
+from fastapi import HTTPException
 
 import app.integrations.celery.tasks.webhook_push_task as task
 from app.repositories.data_point_series_repository import WriteCounts
 from app.schemas.sync_status import SyncStatus
+from app.services import payload_dedup, webhook_claim_check, webhook_coalescer
+from app.services.providers.rate_limiter import ProviderRateLimitedError
 
 
 @pytest.fixture
@@ -102,3 +108,205 @@ def test_emission_never_raises() -> None:
         task._emit_webhook_sync_status("oura", None)
         task._emit_webhook_sync_status("oura", {"status": "processed", "records_saved": 1, "user_id": "not-a-uuid"})
     assert calls == []
+
+
+def test_rate_limited_push_retries_after_provider_back_off() -> None:
+    """A provider rate limit retries the push when the budget resets, not after the default delay."""
+    strategy = MagicMock()
+    strategy.webhooks.extract_user_id.return_value = "oura-user"
+    strategy.webhooks.process_payload.side_effect = ProviderRateLimitedError("oura", 41.2)
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_push, "retry", side_effect=Retry()) as mock_retry,
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        with pytest.raises(Retry):
+            task.process_webhook_push.run("oura", {"event_type": "create"}, "trace-rate-limit")
+
+    assert mock_retry.call_args.kwargs["countdown"] == 42
+
+
+def _strategy_for_body() -> MagicMock:
+    strategy = MagicMock()
+    strategy.webhooks.parse_payload.side_effect = lambda body: json.loads(body)
+    strategy.webhooks.dispatch.return_value = {"status": "accepted"}
+    return strategy
+
+
+def test_body_is_parsed_dispatched_and_deleted() -> None:
+    """The fast-ack worker runs parse_payload and dispatch on the stored body, then drops it."""
+    ref = webhook_claim_check.put_body("oura", b'{"event_type": "create"}')
+    assert ref is not None
+    strategy = _strategy_for_body()
+    with patch.object(task, "ProviderFactory") as mock_factory, patch.object(task, "SessionLocal"):
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.process_webhook_body.run("oura", ref, "trace-body")
+
+    assert result == {"status": "accepted"}
+    assert strategy.webhooks.dispatch.call_args.args[1] == {"event_type": "create"}
+    assert webhook_claim_check.get_body(ref) is None
+
+
+def test_malformed_body_is_dropped_without_dispatch() -> None:
+    ref = webhook_claim_check.put_body("oura", b"not json")
+    assert ref is not None
+    strategy = _strategy_for_body()
+    strategy.webhooks.parse_payload.side_effect = HTTPException(status_code=400, detail="Invalid JSON body")
+    with patch.object(task, "ProviderFactory") as mock_factory:
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.process_webhook_body.run("oura", ref, "trace-bad")
+
+    assert result["reason"] == "invalid_payload"
+    strategy.webhooks.dispatch.assert_not_called()
+    assert webhook_claim_check.get_body(ref) is None
+
+
+def test_failed_dispatch_keeps_body_for_retry() -> None:
+    ref = webhook_claim_check.put_body("oura", b"{}")
+    assert ref is not None
+    strategy = _strategy_for_body()
+    strategy.webhooks.dispatch.side_effect = RuntimeError("broker down")
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_body, "retry", side_effect=Retry()),
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        with pytest.raises(Retry):
+            task.process_webhook_body.run("oura", ref, "trace-retry")
+
+    assert webhook_claim_check.get_body(ref) == b"{}"
+
+
+def test_non_utf8_body_round_trips() -> None:
+    body = b"\x1f\x8b\x08\x00\xff\xfe"
+    ref = webhook_claim_check.put_body("garmin", body)
+    assert ref is not None
+
+    assert webhook_claim_check.get_body(ref) == body
+
+
+def test_permanent_upstream_error_is_not_retried() -> None:
+    ref = webhook_claim_check.put_body("oura", b"{}")
+    assert ref is not None
+    strategy = _strategy_for_body()
+    strategy.webhooks.dispatch.side_effect = HTTPException(status_code=404, detail="Object deleted")
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_body, "retry") as mock_retry,
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.process_webhook_body.run("oura", ref, "trace-404")
+
+    assert result == {"status": "skipped", "reason": "upstream_non_retriable", "upstream_status": 404}
+    mock_retry.assert_not_called()
+    assert webhook_claim_check.get_body(ref) is None
+
+
+def test_transient_upstream_error_is_retried() -> None:
+    ref = webhook_claim_check.put_body("oura", b"{}")
+    assert ref is not None
+    strategy = _strategy_for_body()
+    strategy.webhooks.dispatch.side_effect = HTTPException(status_code=503, detail="Unavailable")
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_body, "retry", side_effect=Retry()),
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        with pytest.raises(Retry):
+            task.process_webhook_body.run("oura", ref, "trace-503")
+
+    assert webhook_claim_check.get_body(ref) == b"{}"
+
+
+def test_expired_body_is_skipped() -> None:
+    with patch.object(task, "ProviderFactory") as mock_factory:
+        result = task.process_webhook_body.run("oura", "webhook_body:oura:gone", "trace-expired")
+
+    assert result == {"status": "skipped", "reason": "body_expired"}
+    mock_factory.assert_not_called()
+
+
+def _buffer(*object_ids: str) -> None:
+    with patch.object(webhook_coalescer, "celery_app"):
+        for object_id in object_ids:
+            payload = {"user_id": "oura-1", "data_type": "sleep", "object_id": object_id, "event_type": "update"}
+            webhook_coalescer.defer("oura", "oura-1", f"sleep:{object_id}", payload, f"trace-{object_id}")
+
+
+def test_coalesced_flush_pulls_each_object_once() -> None:
+    _buffer("a", "b", "a")
+    strategy = MagicMock()
+    strategy.webhooks.process_payload.return_value = {"status": "processed"}
+    with patch.object(task, "ProviderFactory") as mock_factory, patch.object(task, "SessionLocal"):
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.flush_coalesced_webhooks.run("oura", "oura-1")
+
+    assert result == {"status": "processed", "received": 3, "processed": 2, "duplicates": 0, "handed_off": 0}
+    pulled = sorted(call.args[1]["object_id"] for call in strategy.webhooks.process_payload.call_args_list)
+    assert pulled == ["a", "b"]
+    assert webhook_coalescer.take("oura", "oura-1") == ([], 0)
+
+
+def test_redelivered_flush_processes_what_a_crashed_one_took() -> None:
+    _buffer("a", "b")
+    with patch.object(task, "ProviderFactory") as mock_factory:
+        mock_factory.return_value.get_provider.side_effect = RuntimeError("worker lost")
+        with pytest.raises(RuntimeError):
+            task.flush_coalesced_webhooks.run("oura", "oura-1")
+
+    strategy = MagicMock()
+    strategy.webhooks.process_payload.return_value = {"status": "processed"}
+    with patch.object(task, "ProviderFactory") as mock_factory, patch.object(task, "SessionLocal"):
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.flush_coalesced_webhooks.run("oura", "oura-1")
+
+    assert result["processed"] == 2
+
+
+def test_coalesced_flush_hands_failures_to_push_task() -> None:
+    _buffer("a", "b")
+    strategy = MagicMock()
+    strategy.webhooks.process_payload.side_effect = RuntimeError("provider down")
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_push, "apply_async") as mock_push,
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        result = task.flush_coalesced_webhooks.run("oura", "oura-1")
+
+    assert result["handed_off"] == 2
+    assert sorted(call.kwargs["args"][1]["object_id"] for call in mock_push.call_args_list) == ["a", "b"]
+
+
+def test_empty_flush_does_nothing() -> None:
+    with patch.object(task, "ProviderFactory") as mock_factory:
+        assert task.flush_coalesced_webhooks.run("oura", "oura-1") == {"status": "empty", "received": 0}
+    mock_factory.assert_not_called()
+
+
+def test_exhausted_body_task_releases_delivery_claim() -> None:
+    """Once the task gives up, the provider's redelivery of the same body must be processed again."""
+    scope = payload_dedup.delivery_scope("oura")
+    payload_dedup.claim_payload(scope, "sha256:abc", "request-1")
+    ref = webhook_claim_check.put_body("oura", b"{}")
+    strategy = _strategy_for_body()
+    strategy.webhooks.dispatch.side_effect = RuntimeError("db down")
+    with (
+        patch.object(task, "ProviderFactory") as mock_factory,
+        patch.object(task, "SessionLocal"),
+        patch.object(task.process_webhook_body, "retry", side_effect=RuntimeError("db down")),
+    ):
+        mock_factory.return_value.get_provider.return_value = strategy
+        task.process_webhook_body.push_request(retries=task.process_webhook_body.max_retries)
+        try:
+            with pytest.raises(RuntimeError):
+                task.process_webhook_body.run("oura", ref, "trace-final", "sha256:abc", "request-1")
+        finally:
+            task.process_webhook_body.pop_request()
+
+    assert payload_dedup.claim_payload(scope, "sha256:abc", "redelivery") is True
@@ -175,6 +175,11 @@ export interface ProviderConnectionCount {
   count: number;
 }
 
+export interface DedupCounts {
+  hits: number;
+  misses: number;
+}
+
 export interface ConnectionsCoverage {
   users_with_active: number;
   users_with_multi_active: number;
@@ -187,6 +192,7 @@ export interface DashboardStats {
   data_points: DataPointsInfo;
   event_records: EventRecordsInfo;
   connections_coverage: ConnectionsCoverage;
+  payload_dedup: Record<string, DedupCounts>;
 }
 
 export interface ProviderDataCount {